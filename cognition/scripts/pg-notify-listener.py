@@ -4,6 +4,9 @@ Listen for PostgreSQL notifications:
 - gambling_changed: Regenerate gambling dashboard
 - schema_changed: Auto-sync schema.sql to GitHub, notify NOVA
 
+Both are handled on background workers that coalesce bursts on a trailing
+edge, so the LISTEN loop never blocks on a dump, push or dashboard build.
+
 Run as a background service via systemd.
 """
 
@@ -15,6 +18,7 @@ import re
 import select
 import subprocess
 import sys
+import threading
 import time
 import urllib.request
 import urllib.error
@@ -58,6 +62,15 @@ CLAWDBOT_TOKEN = "NOVA-schema-hook-2026"
 # Project ID for Nova Memory System
 NOVA_MEMORY_PROJECT_ID = 1
 
+# Trailing-edge coalescing windows (seconds). A batch is flushed once its
+# channel has been quiet for *_QUIET_S, or *_MAX_DELAY_S after the first
+# pending notification if events keep arriving.
+SCHEMA_QUIET_S = 10
+SCHEMA_MAX_DELAY_S = 120
+GAMBLING_QUIET_S = 5
+GAMBLING_MAX_DELAY_S = 30
+SCHEMA_COMMIT_LIST_LIMIT = 5
+
 def log(msg):
     print(f"[{datetime.now().isoformat()}] {msg}", flush=True)
 
@@ -388,8 +401,12 @@ def _ensure_on_main(command, table_name):
     return True
 
 
-def sync_schema_to_github(command, obj_type, obj_name):
-    """Dump schema and push to GitHub. Uses file lock to serialize concurrent calls."""
+def sync_schema_to_github(command, obj_type, obj_name, commit_msg=None):
+    """Dump schema and push to GitHub. Uses file lock to serialize concurrent calls.
+
+    commit_msg overrides the default "schema: <command> <table>" subject, for
+    a coalesced batch of changes.
+    """
     global _git_lock_fd
     try:
         # Acquire file lock to prevent concurrent git operations
@@ -460,7 +477,8 @@ def sync_schema_to_github(command, obj_type, obj_name):
             log("Including README.md in commit")
 
         # 4. Git commit
-        commit_msg = f"schema: {command} {table_name}"
+        if commit_msg is None:
+            commit_msg = f"schema: {command} {table_name}"
         subprocess.run(
             ['git', '-C', NOVA_MIND_DIR, 'commit', '-m', commit_msg],
             capture_output=True,
@@ -757,35 +775,82 @@ def detect_and_record_rename(payload):
         log(f"Error appending to renames.json: {e}")
 
 
+def _short_name(obj_name):
+    return obj_name.split('.')[-1] if '.' in obj_name else obj_name
+
+
+def parse_schema_event(payload_str):
+    """Parse a schema_changed payload into an event dict.
+
+    Returns None for internal/system objects that are never synced. Raises
+    json.JSONDecodeError for malformed payloads.
+    """
+    payload = json.loads(payload_str)
+    command = payload.get('command_tag', 'UNKNOWN')
+    obj_type = payload.get('object_type', 'unknown')
+    obj_name = payload.get('object_identity', 'unknown')
+
+    log(f"Schema change detected: {command} {obj_type} {obj_name}")
+
+    # Skip internal/system objects and pgschema temp schemas
+    if obj_name.startswith('pg_') or 'pg_toast' in obj_name:
+        log(f"Skipping system object: {obj_name}")
+        return None
+    if 'pgschema_tmp_' in obj_name:
+        log(f"Skipping pgschema temp schema: {obj_name}")
+        return None
+
+    return {'command': command, 'obj_type': obj_type, 'obj_name': obj_name}
+
+
 def handle_schema_change(payload_str):
-    """Handle a schema change notification."""
+    """Handle a single schema change notification."""
     try:
-        payload = json.loads(payload_str)
-        command = payload.get('command_tag', 'UNKNOWN')
-        obj_type = payload.get('object_type', 'unknown')
-        obj_name = payload.get('object_identity', 'unknown')
+        event = parse_schema_event(payload_str)
+    except json.JSONDecodeError as e:
+        log(f"Invalid schema change payload: {e}")
+        return
+    if event is not None:
+        handle_schema_changes([event])
 
-        log(f"Schema change detected: {command} {obj_type} {obj_name}")
 
-        # Skip internal/system objects and pgschema temp schemas
-        if obj_name.startswith('pg_') or 'pg_toast' in obj_name:
-            log(f"Skipping system object: {obj_name}")
-            return
-        if 'pgschema_tmp_' in obj_name:
-            log(f"Skipping pgschema temp schema: {obj_name}")
-            return
+def handle_schema_changes(events):
+    """Sync a coalesced batch of schema changes with one dump, commit and push.
 
-        # Auto-sync to GitHub
-        github_ok, commit_hash = sync_schema_to_github(command, obj_type, obj_name)
+    The dump captures every change in the batch, so a burst of migrations
+    produces a single commit. Each change is still logged as its own event.
+    """
+    try:
+        if len(events) == 1:
+            command = events[0]['command']
+            obj_type = events[0]['obj_type']
+            obj_name = events[0]['obj_name']
+            github_ok, commit_hash = sync_schema_to_github(command, obj_type, obj_name)
+        else:
+            command = "BATCH"
+            obj_type = f"{len(events)} objects"
+            obj_name = ", ".join(_short_name(e['obj_name']) for e in events)
+            listed = ", ".join(
+                f"{e['command']} {_short_name(e['obj_name'])}"
+                for e in events[:SCHEMA_COMMIT_LIST_LIMIT]
+            )
+            if len(events) > SCHEMA_COMMIT_LIST_LIMIT:
+                listed += f", +{len(events) - SCHEMA_COMMIT_LIST_LIMIT} more"
+            log(f"Syncing {len(events)} coalesced schema changes")
+            github_ok, commit_hash = sync_schema_to_github(
+                command, obj_type, obj_name,
+                commit_msg=f"schema: {len(events)} changes ({listed})",
+            )
 
         # Update local schema reference
         ref_ok = generate_schema_reference()
 
         # Log to events database
-        log_schema_event(command, obj_type, obj_name, github_ok, commit_hash)
+        for e in events:
+            log_schema_event(e['command'], e['obj_type'], e['obj_name'], github_ok, commit_hash)
 
         # Notify NOVA of result (informational only - work is done)
-        table_name = obj_name.split('.')[-1] if '.' in obj_name else obj_name
+        table_name = _short_name(obj_name)
 
         if github_ok and ref_ok:
             commit_info = f" ({commit_hash})" if commit_hash else ""
@@ -809,11 +874,71 @@ Manual sync required:
         # The operative alert path is send_agent_message via _agent_chat_env.
         notify_clawdbot(message)
 
-    except json.JSONDecodeError as e:
-        log(f"Invalid schema change payload: {e}")
     except Exception as e:
         log(f"Error handling schema change: {e}")
 
+
+class CoalescingWorker:
+    """Background thread that batches notifications on a trailing edge.
+
+    submit() only records the item, so the LISTEN loop never waits on the
+    work itself. Items are keyed, and a repeat of a pending key replaces the
+    earlier item in place. The handler runs once the channel has been quiet
+    for quiet_s, or max_delay_s after the first pending item so a steady
+    stream still flushes, and receives everything pending at that point.
+    Items that arrive while the handler runs form the next batch.
+    """
+
+    def __init__(self, name, handler, quiet_s, max_delay_s):
+        self.name = name
+        self.handler = handler
+        self.quiet_s = quiet_s
+        self.max_delay_s = max_delay_s
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._first_at = None
+        self._last_at = None
+        self._thread = threading.Thread(target=self._run, name=f"{name}-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, key, item):
+        with self._cond:
+            now = time.monotonic()
+            if key in self._pending:
+                log(f"Coalesced {self.name} notification: {key}")
+            self._pending[key] = item
+            if self._first_at is None:
+                self._first_at = now
+            self._last_at = now
+            self._cond.notify()
+
+    def _take_batch(self):
+        with self._cond:
+            while True:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                due = min(self._last_at + self.quiet_s, self._first_at + self.max_delay_s)
+                remaining = due - time.monotonic()
+                if remaining <= 0:
+                    batch = list(self._pending.values())
+                    self._pending.clear()
+                    self._first_at = self._last_at = None
+                    return batch
+                self._cond.wait(remaining)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            try:
+                self.handler(batch)
+            except Exception as e:
+                log(f"Error in {self.name} worker: {e}")
+
+
 def main():
     log("Starting PostgreSQL notification listener...")
 
@@ -825,16 +950,17 @@ def main():
     cur.execute("LISTEN schema_changed;")
     log("Listening for: gambling_changed, schema_changed")
 
-    # Track last updates to debounce rapid changes
-    last_gambling_update = 0
-    last_schema_update = 0
-    debounce_gambling = 5  # seconds
-    debounce_schema = 30   # seconds (schema changes less frequent, longer debounce)
-
-    # Dedup cache: tracks (object_identity, command_tag) seen within debounce window
-    # Prevents duplicate processing when the DB trigger fires multiple notifications
-    # for a single DDL statement (e.g., CREATE FUNCTION fires once per argument type)
-    schema_dedup_cache = {}  # key: (command_tag, object_identity) -> timestamp
+    # Expensive work (dashboard regeneration, pgschema dump + git push) runs
+    # on background workers so notifications are always drained promptly.
+    # Repeats within a window, e.g. CREATE FUNCTION firing once per argument
+    # type, collapse onto one pending entry.
+    gambling_worker = CoalescingWorker(
+        "gambling", lambda _batch: regenerate_dashboard(),
+        GAMBLING_QUIET_S, GAMBLING_MAX_DELAY_S,
+    ).start()
+    schema_worker = CoalescingWorker(
+        "schema", handle_schema_changes, SCHEMA_QUIET_S, SCHEMA_MAX_DELAY_S,
+    ).start()
 
     while True:
         try:
@@ -845,48 +971,28 @@ def main():
             conn.poll()
             while conn.notifies:
                 notify = conn.notifies.pop(0)
-                now = time.time()
 
                 if notify.channel == 'gambling_changed':
                     log(f"Received: {notify.channel} - {notify.payload}")
-                    if now - last_gambling_update >= debounce_gambling:
-                        regenerate_dashboard()
-                        last_gambling_update = now
-                    else:
-                        log(f"Debounced gambling (last update {now - last_gambling_update:.1f}s ago)")
+                    gambling_worker.submit(notify.channel, notify.payload)
 
                 elif notify.channel == 'schema_changed':
                     log(f"Received: {notify.channel} - {notify.payload}")
 
-                    # Rename detection runs on EVERY event (cheap file append, no debounce)
+                    # Rename detection runs on EVERY event, in arrival order
+                    # (cheap file append, not coalesced)
                     try:
                         detect_and_record_rename(json.loads(notify.payload))
                     except Exception as e:
                         log(f"Rename detection error: {e}")
 
-                    # Dedup: skip if we've seen this exact (command_tag, object_identity) recently
-                    is_dup = False
                     try:
-                        p = json.loads(notify.payload)
-                        dedup_key = (p.get('command_tag', ''), p.get('object_identity', ''))
-                        if dedup_key in schema_dedup_cache and now - schema_dedup_cache[dedup_key] < debounce_schema:
-                            log(f"Deduplicated schema notification: {dedup_key[0]} {dedup_key[1]} (duplicate within {debounce_schema}s)")
-                            is_dup = True
-                        else:
-                            schema_dedup_cache[dedup_key] = now
-                            # Prune old entries from cache
-                            schema_dedup_cache = {k: v for k, v in schema_dedup_cache.items() if now - v < debounce_schema * 2}
-                    except (json.JSONDecodeError, Exception) as e:
-                        log(f"Dedup parse error (processing anyway): {e}")
-
-                    # Full schema sync is debounced (expensive git/push)
-                    if not is_dup and now - last_schema_update >= debounce_schema:
-                        handle_schema_change(notify.payload)
-                        last_schema_update = now
-                    elif is_dup:
-                        pass  # already logged above
-                    else:
-                        log(f"Debounced schema sync (last update {now - last_schema_update:.1f}s ago)")
+                        event = parse_schema_event(notify.payload)
+                    except json.JSONDecodeError as e:
+                        log(f"Invalid schema change payload: {e}")
+                        continue
+                    if event is not None:
+                        schema_worker.submit((event['command'], event['obj_name']), event)
         except Exception as e:
             log(f"Error in main loop: {e}")
             time.sleep(5)
@@ -0,0 +1,193 @@
+"""Tests for non-blocking, coalescing notification handling in pg-notify-listener.
+
+Covers the trailing-edge CoalescingWorker and the batched schema sync: a burst
+of schema_changed events must produce one dump/commit while every change is
+still logged individually.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from conftest import (
+    pg_notify_listener,
+    _set_schema_content,
+    _clone_head,
+    _remote_head,
+)
+
+
+def _event(command, name, obj_type="table"):
+    return {"command": command, "obj_type": obj_type, "obj_name": name}
+
+
+class _Recorder:
+    def __init__(self):
+        self.batches = []
+        self.flushed = threading.Event()
+
+    def __call__(self, batch):
+        self.batches.append(batch)
+        self.flushed.set()
+
+
+class TestCoalescingWorker:
+    def test_burst_flushes_once_on_trailing_edge(self):
+        handler = _Recorder()
+        worker = pg_notify_listener.CoalescingWorker("test", handler, 0.2, 5).start()
+
+        worker.submit("a", 1)
+        worker.submit("b", 2)
+        worker.submit("a", 3)  # repeat replaces the pending item in place
+        assert not handler.flushed.wait(0.1)
+
+        assert handler.flushed.wait(2)
+        assert handler.batches == [[3, 2]]
+
+    def test_max_delay_flushes_steady_stream(self):
+        handler = _Recorder()
+        worker = pg_notify_listener.CoalescingWorker("test", handler, 0.3, 0.5).start()
+
+        started = time.monotonic()
+        i = 0
+        while not handler.flushed.is_set() and time.monotonic() - started < 3:
+            worker.submit(i, i)
+            i += 1
+            time.sleep(0.05)
+
+        assert handler.flushed.is_set()
+        assert time.monotonic() - started < 1.5
+
+    def test_submit_does_not_wait_for_handler(self):
+        release = threading.Event()
+        handler = _Recorder()
+
+        def slow(batch):
+            release.wait(5)
+            handler(batch)
+
+        worker = pg_notify_listener.CoalescingWorker("test", slow, 0.01, 1).start()
+        worker.submit("first", 1)
+        time.sleep(0.1)  # handler is now blocked on the first batch
+
+        started = time.monotonic()
+        worker.submit("second", 2)
+        assert time.monotonic() - started < 0.05
+
+        release.set()
+        deadline = time.monotonic() + 2
+        while len(handler.batches) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert handler.batches == [[1], [2]]
+
+    def test_handler_error_does_not_kill_worker(self):
+        handler = _Recorder()
+        calls = []
+
+        def flaky(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            handler(batch)
+
+        worker = pg_notify_listener.CoalescingWorker("test", flaky, 0.01, 1).start()
+        worker.submit("x", 1)
+        time.sleep(0.1)
+        worker.submit("y", 2)
+        assert handler.flushed.wait(2)
+        assert handler.batches == [[2]]
+
+
+class TestParseSchemaEvent:
+    def test_parses_payload(self):
+        event = pg_notify_listener.parse_schema_event(
+            '{"command_tag": "ALTER TABLE", "object_type": "table", "object_identity": "public.t"}'
+        )
+        assert event == _event("ALTER TABLE", "public.t")
+
+    @pytest.mark.parametrize("name", ["pg_temp.x", "pg_toast.pg_toast_1", "pgschema_tmp_1.t"])
+    def test_skips_system_objects(self, name):
+        payload = f'{{"command_tag": "CREATE", "object_identity": "{name}"}}'
+        assert pg_notify_listener.parse_schema_event(payload) is None
+
+
+class TestBatchedSchemaSync:
+    @pytest.fixture
+    def recorded(self, listener_module, monkeypatch):
+        calls = {"sync": [], "events": [], "messages": [], "refs": 0}
+
+        def fake_sync(command, obj_type, obj_name, commit_msg=None):
+            calls["sync"].append((command, obj_type, obj_name, commit_msg))
+            return True, "abc1234"
+
+        def fake_ref():
+            calls["refs"] += 1
+            return True
+
+        monkeypatch.setattr(pg_notify_listener, "sync_schema_to_github", fake_sync)
+        monkeypatch.setattr(pg_notify_listener, "generate_schema_reference", fake_ref)
+        monkeypatch.setattr(
+            pg_notify_listener, "log_schema_event",
+            lambda *args, **kwargs: calls["events"].append(args),
+        )
+        monkeypatch.setattr(pg_notify_listener, "notify_clawdbot", calls["messages"].append)
+        return calls
+
+    def test_batch_syncs_once_and_logs_each_change(self, listener_module, recorded):
+        listener_module.handle_schema_changes([
+            _event("CREATE TABLE", "public.a"),
+            _event("ALTER TABLE", "public.b"),
+            _event("CREATE INDEX", "public.idx_c", obj_type="index"),
+        ])
+
+        (command, _obj_type, obj_name, commit_msg), = recorded["sync"]
+        assert command == "BATCH"
+        assert obj_name == "a, b, idx_c"
+        assert commit_msg == "schema: 3 changes (CREATE TABLE a, ALTER TABLE b, CREATE INDEX idx_c)"
+        assert recorded["refs"] == 1
+        assert [e[2] for e in recorded["events"]] == ["public.a", "public.b", "public.idx_c"]
+        assert all(e[3:] == (True, "abc1234") for e in recorded["events"])
+        assert len(recorded["messages"]) == 1
+
+    def test_long_batch_commit_subject_is_truncated(self, listener_module, recorded):
+        listener_module.handle_schema_changes(
+            [_event("CREATE TABLE", f"public.t{i}") for i in range(8)]
+        )
+        commit_msg = recorded["sync"][0][3]
+        assert commit_msg.startswith("schema: 8 changes (CREATE TABLE t0,")
+        assert commit_msg.endswith(", +3 more)")
+
+    def test_single_change_keeps_default_commit_message(self, listener_module, recorded):
+        listener_module.handle_schema_change(
+            '{"command_tag": "CREATE", "object_type": "table", "object_identity": "public.t"}'
+        )
+        assert recorded["sync"] == [("CREATE", "table", "public.t", None)]
+
+    def test_commit_msg_override_reaches_git(
+        self, listener_module, git_repos, mock_pgschema_dump, mock_agent_chat
+    ):
+        listener_module.NOVA_MIND_DIR = git_repos["clone"]
+        listener_module.SCHEMA_FILE = os.path.join(git_repos["clone"], "database", "schema.sql")
+        _set_schema_content(listener_module, "-- batched schema\n")
+
+        ok, commit_hash = listener_module.sync_schema_to_github(
+            "BATCH", "2 objects", "a, b", commit_msg="schema: 2 changes (CREATE TABLE a, CREATE TABLE b)"
+        )
+
+        assert ok is True
+        assert _remote_head(git_repos["origin"]) == commit_hash == _clone_head(git_repos["clone"])
+        subject = subprocess.run(
+            ["git", "-C", git_repos["clone"], "log", "-1", "--format=%s"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        assert subject == "schema: 2 changes (CREATE TABLE a, CREATE TABLE b)"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
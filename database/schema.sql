@@ -1620,6 +1620,30 @@ COMMENT ON COLUMN entity_facts_archive.archive_reason IS 'Why the fact was archi
 
 COMMENT ON COLUMN entity_facts_archive.archived_by IS 'System or agent that archived the fact';
 
+--
+-- Name: entity_identifiers; Type: TABLE; Schema: -; Owner: -
+--
+
+CREATE TABLE IF NOT EXISTS entity_identifiers (
+    fact_id integer NOT NULL,
+    entity_id integer NOT NULL,
+    kind varchar(10) NOT NULL,
+    key varchar(255) NOT NULL,
+    identifier text NOT NULL,
+    CONSTRAINT entity_identifiers_pkey PRIMARY KEY (kind, identifier, fact_id),
+    CONSTRAINT entity_identifiers_fact_id_fkey FOREIGN KEY (fact_id) REFERENCES entity_facts (id) ON DELETE CASCADE,
+    CONSTRAINT entity_identifiers_kind_check CHECK (kind IN ('handle'::text, 'phone'::text))
+);
+
+
+COMMENT ON TABLE entity_identifiers IS 'Normalized sender/platform identifiers derived from entity_facts (kind handle = lower(value) of whitespace-free values up to 255 chars; kind phone = digits of phone-like keys). Maintained by the entity_facts_identifiers trigger; read-only for everything else.';
+
+--
+-- Name: idx_entity_identifiers_fact_id; Type: INDEX; Schema: -; Owner: -
+--
+
+CREATE INDEX IF NOT EXISTS idx_entity_identifiers_fact_id ON entity_identifiers (fact_id);
+
 --
 -- Name: entity_relationships; Type: TABLE; Schema: -; Owner: -
 --
@@ -1719,6 +1743,30 @@ CREATE TABLE IF NOT EXISTS events_archive (
 
 COMMENT ON TABLE events_archive IS 'Archived historical events. Long-term storage for events moved out of active events table.';
 
+--
+-- Name: extraction_cache; Type: TABLE; Schema: -; Owner: -
+--
+
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    prompt_version integer NOT NULL,
+    model text NOT NULL,
+    text_hash char(64) NOT NULL,
+    context_hash char(64) NOT NULL,
+    result jsonb NOT NULL,
+    created_at timestamptz DEFAULT now() NOT NULL,
+    expires_at timestamptz NOT NULL,
+    CONSTRAINT extraction_cache_pkey PRIMARY KEY (prompt_version, model, text_hash, context_hash)
+);
+
+
+COMMENT ON TABLE extraction_cache IS 'Parsed LLM extraction results from extract_memories.py, keyed by prompt version, model, message hash and context hash, so replays and catch-ups skip the LLM call. Entries expire at expires_at; memory-maintenance.py purges expired rows.';
+
+--
+-- Name: idx_extraction_cache_expires_at; Type: INDEX; Schema: -; Owner: -
+--
+
+CREATE INDEX IF NOT EXISTS idx_extraction_cache_expires_at ON extraction_cache (expires_at);
+
 --
 -- Name: extraction_failures; Type: TABLE; Schema: -; Owner: -
 --
@@ -2369,6 +2417,43 @@ COMMENT ON COLUMN media_tags.confidence IS 'AI confidence score for auto-generat
 
 CREATE INDEX IF NOT EXISTS idx_media_tags_media ON media_tags (media_id);
 
+--
+-- Name: embedding_cache; Type: TABLE; Schema: -; Owner: -
+--
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model text NOT NULL,
+    text_hash char(64) NOT NULL,
+    embedding vector NOT NULL,
+    created_at timestamptz DEFAULT now() NOT NULL,
+    last_used_at timestamptz DEFAULT now() NOT NULL,
+    CONSTRAINT embedding_cache_pkey PRIMARY KEY (model, text_hash)
+);
+
+
+COMMENT ON TABLE embedding_cache IS 'Text-to-vector cache shared by every memory_embeddings writer (memory-maintenance.py, seed-domain-embeddings.py), keyed by model and sha256 of the normalized text, so identical text is embedded once. Entries unused for 90 days are purged by memory-maintenance.py.';
+
+--
+-- Name: idx_embedding_cache_last_used_at; Type: INDEX; Schema: -; Owner: -
+--
+
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used_at ON embedding_cache (last_used_at);
+
+--
+-- Name: embedding_queue; Type: TABLE; Schema: -; Owner: -
+--
+
+CREATE TABLE IF NOT EXISTS embedding_queue (
+    id bigserial NOT NULL,
+    source_type varchar(50) NOT NULL,
+    source_id text NOT NULL,
+    enqueued_at timestamptz DEFAULT now() NOT NULL,
+    CONSTRAINT embedding_queue_pkey PRIMARY KEY (id)
+);
+
+
+COMMENT ON TABLE embedding_queue IS 'Rows whose embedded text changed (source_type/source_id as in memory_embeddings), appended by the <table>_embedding_queue triggers. Drained oldest-first with FOR UPDATE SKIP LOCKED by memory-maintenance.py (--embed-queue-worker or the scheduled run).';
+
 --
 -- Name: memory_embeddings; Type: TABLE; Schema: -; Owner: -
 --
@@ -2383,12 +2468,16 @@ CREATE TABLE IF NOT EXISTS memory_embeddings (
     confidence real DEFAULT 1.0,
     last_confirmed_at timestamptz DEFAULT now(),
     embedding vector(1024),
+    content_hash text GENERATED ALWAYS AS (md5(content)) STORED,
     CONSTRAINT memory_embeddings_pkey PRIMARY KEY (id)
 );
 
 
 COMMENT ON TABLE memory_embeddings IS 'Vector embeddings for semantic memory search. Used by proactive-recall.py.';
 
+
+COMMENT ON COLUMN memory_embeddings.content_hash IS 'md5(content), generated. Compared with md5 of the source row''s current text by memory-maintenance.py to find embeddings made from outdated text.';
+
 --
 -- Name: idx_memory_embeddings_source; Type: INDEX; Schema: -; Owner: -
 --
@@ -4272,6 +4361,40 @@ BEGIN
 END;
 $$;
 
+--
+-- Name: enqueue_embedding(); Type: FUNCTION; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE FUNCTION enqueue_embedding()
+RETURNS trigger
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO embedding_queue (source_type, source_id) VALUES (TG_ARGV[0], OLD.id::text);
+    ELSE
+        INSERT INTO embedding_queue (source_type, source_id) VALUES (TG_ARGV[0], NEW.id::text);
+    END IF;
+
+    IF TG_TABLE_NAME = 'entities' AND TG_OP = 'UPDATE' THEN
+        INSERT INTO embedding_queue (source_type, source_id)
+        SELECT 'entity_fact', id::text FROM entity_facts WHERE entity_id = NEW.id;
+    END IF;
+
+    PERFORM pg_notify('embedding_queue', TG_ARGV[0]);
+    RETURN NULL;
+END;
+$$;
+
+--
+-- Name: enqueue_embedding(); Type: FUNCTION; Schema: -; Owner: -
+--
+
+COMMENT ON FUNCTION enqueue_embedding() IS 'Trigger function: queues the row (source_type from the first trigger argument) in embedding_queue and fires an embedding_queue NOTIFY. An entities UPDATE also queues the entity''s facts.';
+
 --
 -- Name: flag_d100_low_completion(); Type: FUNCTION; Schema: -; Owner: -
 --
@@ -5535,6 +5658,27 @@ $$;
 
 COMMENT ON FUNCTION notify_delegation_change() IS 'SHORT-TERM: Triggers DELEGATION_CONTEXT.md regeneration. Remove when PR #9 long-term solution is active.';
 
+--
+-- Name: notify_entities_changed(); Type: FUNCTION; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE FUNCTION notify_entities_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+VOLATILE
+AS $$
+BEGIN
+    PERFORM pg_notify('entities_changed', (CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END)::text);
+    RETURN NULL;
+END;
+$$;
+
+--
+-- Name: notify_entities_changed(); Type: FUNCTION; Schema: -; Owner: -
+--
+
+COMMENT ON FUNCTION notify_entities_changed() IS 'Fires entities_changed NOTIFY with the entity id when an entity is inserted, deleted, or has its name/full_name/nicknames/alternate_spellings changed. Consumed by the entity index in extract_memories.py / extraction-worker.py.';
+
 --
 -- Name: notify_gambling_change(); Type: FUNCTION; Schema: -; Owner: -
 --
@@ -6088,6 +6232,45 @@ BEGIN
 END;
 $$;
 
+--
+-- Name: resolve_entity_by_identifier(text, text); Type: FUNCTION; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE FUNCTION resolve_entity_by_identifier(
+    key text,
+    value text
+)
+RETURNS bigint
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT m.entity_id
+    FROM (
+        SELECT i.entity_id::bigint AS entity_id, f.confidence, f.last_confirmed_at, f.id
+        FROM entity_identifiers i
+        JOIN entity_facts f ON f.id = i.fact_id
+        WHERE i.kind = 'handle'
+          AND i.identifier = lower($2)
+          AND lower(i.key) = lower($1)
+        UNION ALL
+        -- Values the trigger does not index (whitespace, over 255 characters).
+        SELECT f.entity_id::bigint, f.confidence, f.last_confirmed_at, f.id
+        FROM entity_facts f
+        WHERE (length($2) > 255 OR $2 ~ '\s')
+          AND f.entity_id IS NOT NULL
+          AND lower(f.key) = lower($1)
+          AND lower(f.value) = lower($2)
+    ) m
+    ORDER BY m.confidence DESC NULLS LAST, m.last_confirmed_at DESC NULLS LAST, m.id
+    LIMIT 1
+$$;
+
+--
+-- Name: resolve_entity_by_identifier(text, text); Type: FUNCTION; Schema: -; Owner: -
+--
+
+COMMENT ON FUNCTION resolve_entity_by_identifier(text, text) IS 'Resolve an entity from an identifier fact (any key/value, case-insensitive), preferring the highest-confidence then most recently confirmed fact. Whitespace-free values up to 255 chars are looked up in entity_identifiers; other values, which the trigger does not index, are matched against entity_facts directly. Returns NULL when nothing matches; callers normalize identifier formats (e.g. Nostr npub vs hex) first.';
+
 --
 -- Name: roll_d100(); Type: FUNCTION; Schema: -; Owner: -
 --
@@ -6327,6 +6510,53 @@ BEGIN
 END;
 $$;
 
+--
+-- Name: sync_entity_identifiers(); Type: FUNCTION; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE FUNCTION sync_entity_identifiers()
+RETURNS trigger
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_digits text;
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM entity_identifiers WHERE fact_id = OLD.id;
+    END IF;
+
+    IF NEW.entity_id IS NULL OR NEW.value IS NULL OR NEW.value = '' THEN
+        RETURN NULL;
+    END IF;
+
+    IF length(NEW.value) <= 255 AND NEW.value !~ '\s' THEN
+        INSERT INTO entity_identifiers (fact_id, entity_id, kind, key, identifier)
+        VALUES (NEW.id, NEW.entity_id, 'handle', NEW.key, lower(NEW.value))
+        ON CONFLICT DO NOTHING;
+    END IF;
+
+    IF NEW.key IN ('phone', 'has_phone_number', 'signal', 'signal_id') THEN
+        v_digits := regexp_replace(NEW.value, '[^0-9]', '', 'g');
+        IF v_digits <> '' THEN
+            INSERT INTO entity_identifiers (fact_id, entity_id, kind, key, identifier)
+            VALUES (NEW.id, NEW.entity_id, 'phone', NEW.key, v_digits)
+            ON CONFLICT DO NOTHING;
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+--
+-- Name: sync_entity_identifiers(); Type: FUNCTION; Schema: -; Owner: -
+--
+
+COMMENT ON FUNCTION sync_entity_identifiers() IS 'Keeps entity_identifiers in step with entity_facts: on INSERT or an UPDATE of entity_id/key/value, replaces the fact''s handle and phone identifier rows. Deletes cascade through the fact_id foreign key.';
+
 --
 -- Name: get_next_coder_issue(); Type: FUNCTION; Schema: -; Owner: -
 --
@@ -6710,6 +6940,12 @@ COMMENT ON TABLE lessons IS 'Lessons and insights learned. Update when learning
 
 COMMENT ON COLUMN lessons.confidence IS 'Confidence score 0-1, decays over time if not reinforced';
 
+--
+-- Name: idx_lessons_lesson_trgm; Type: INDEX; Schema: -; Owner: -
+--
+
+CREATE INDEX IF NOT EXISTS idx_lessons_lesson_trgm ON lessons USING gin (lesson gin_trgm_ops);
+
 --
 -- Name: music_works; Type: TABLE; Schema: -; Owner: -
 --
@@ -6948,6 +7184,15 @@ CREATE OR REPLACE TRIGGER agents_delegation_notify
     FOR EACH ROW
     EXECUTE FUNCTION notify_delegation_change();
 
+--
+-- Name: agents_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER agents_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF name ON agents
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('agent');
+
 --
 -- Name: agents_updated_at; Type: TRIGGER; Schema: -; Owner: -
 --
@@ -6975,6 +7220,51 @@ CREATE OR REPLACE TRIGGER enforce_project_lock
     FOR EACH ROW
     EXECUTE FUNCTION prevent_locked_project_update();
 
+--
+-- Name: entities_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER entities_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF name ON entities
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('entity');
+
+--
+-- Name: entities_notify; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER entities_notify
+    AFTER INSERT OR DELETE OR UPDATE OF name, full_name, nicknames, alternate_spellings ON entities
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_entities_changed();
+
+--
+-- Name: entity_facts_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER entity_facts_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF entity_id, key, value ON entity_facts
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('entity_fact');
+
+--
+-- Name: entity_facts_identifiers; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER entity_facts_identifiers
+    AFTER INSERT OR UPDATE OF entity_id, key, value ON entity_facts
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_entity_identifiers();
+
+--
+-- Name: events_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER events_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF description ON events
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('event');
+
 --
 -- Name: gambling_entries_notify; Type: TRIGGER; Schema: -; Owner: -
 --
@@ -7003,6 +7293,51 @@ CREATE OR REPLACE TRIGGER heartbeat_content_changed
     WHEN (((NEW.file_key = 'HEARTBEAT'::text)))
     EXECUTE FUNCTION notify_heartbeat_content_changed();
 
+--
+-- Name: income_sources_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER income_sources_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF name, description ON income_sources
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('income_source');
+
+--
+-- Name: journal_entries_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER journal_entries_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF content ON journal_entries
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('journal_entry');
+
+--
+-- Name: lessons_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER lessons_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF lesson ON lessons
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('lesson');
+
+--
+-- Name: library_works_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER library_works_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title ON library_works
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('library');
+
+--
+-- Name: media_consumed_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER media_consumed_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title ON media_consumed
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('media_consumed');
+
 --
 -- Name: media_search_update; Type: TRIGGER; Schema: -; Owner: -
 --
@@ -7039,6 +7374,24 @@ CREATE OR REPLACE TRIGGER music_search_update
     FOR EACH ROW
     EXECUTE FUNCTION update_music_search_vector();
 
+--
+-- Name: music_works_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER music_works_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title, description ON music_works
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('music_work');
+
+--
+-- Name: projects_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER projects_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF name ON projects
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('project');
+
 --
 -- Name: protect_agent_aliases_delete; Type: TRIGGER; Schema: -; Owner: -
 --
@@ -7336,6 +7689,33 @@ CREATE OR REPLACE TRIGGER publication_status_update
     FOR EACH ROW
     EXECUTE FUNCTION update_work_status_on_publication();
 
+--
+-- Name: research_conclusions_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER research_conclusions_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title, summary, is_current ON research_conclusions
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('research_conclusion');
+
+--
+-- Name: research_findings_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER research_findings_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF content, is_current ON research_findings
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('research_finding');
+
+--
+-- Name: research_tasks_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER research_tasks_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF query ON research_tasks
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('research_task');
+
 --
 -- Name: system_config_changed; Type: TRIGGER; Schema: -; Owner: -
 --
@@ -7345,6 +7725,15 @@ CREATE OR REPLACE TRIGGER system_config_changed
     FOR EACH ROW
     EXECUTE FUNCTION notify_system_config_changed();
 
+--
+-- Name: tasks_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER tasks_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title ON tasks
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('task');
+
 --
 -- Name: trg_agent_turn_context_updated_at; Type: TRIGGER; Schema: -; Owner: -
 --
@@ -7453,6 +7842,24 @@ CREATE OR REPLACE TRIGGER validate_parent_agents_trigger
     FOR EACH ROW
     EXECUTE FUNCTION validate_parent_agents();
 
+--
+-- Name: vocabulary_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER vocabulary_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF word ON vocabulary
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('vocabulary');
+
+--
+-- Name: workflow_runs_embedding_queue; Type: TRIGGER; Schema: -; Owner: -
+--
+
+CREATE OR REPLACE TRIGGER workflow_runs_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF trigger_context, notes ON workflow_runs
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('workflow_run');
+
 --
 -- Name: workflow_step_change_trigger; Type: TRIGGER; Schema: -; Owner: -
 --
@@ -1,4 +1,5 @@
 import { spawn, execFile } from "child_process";
+import { createConnection } from "net";
 import { join } from "path";
 import { promisify } from "util";
 import * as os from "os";
@@ -281,6 +282,334 @@ async function insertExtractionFailure(args: {
   }
 }
 
+// ---------------------------------------------------------------------------
+// Extraction dispatch: resident worker first, child process as fallback
+// ---------------------------------------------------------------------------
+
+// Socket of the resident extraction-worker.py (same default as the worker).
+const EXTRACTION_SOCKET =
+  process.env.MEMORY_EXTRACT_SOCKET ||
+  join(os.homedir(), '.openclaw', 'run', 'extract.sock');
+
+// The worker rejects request lines above this size; larger bodies are spawned.
+const WORKER_MAX_JOB_BYTES = 262144;
+
+interface ExtractionJob {
+  rawBody: string;
+  senderName: string;
+  senderId: string;
+  isGroup: boolean;
+  sessionKey: string;
+  messageTimestamp: string;
+  channelTranscriptId: string;
+  channelSessionId: string;
+}
+
+interface WorkerReply {
+  // 'accepted' is never sent by the worker: the client reports it when the job
+  // was written but the reply never arrived (the worker still runs the job).
+  status: 'complete' | 'skipped' | 'failed' | 'busy' | 'accepted';
+  exit_code?: number;
+  failure_reason?: string;
+  error?: string;
+}
+
+/**
+ * Send one job to extraction-worker.py over its Unix socket.
+ *
+ * Resolves null when no worker took the job (socket missing, refused, or
+ * closed before the job was written) so the caller can fall back to spawning.
+ * Once the job has been written the worker owns it and stores its own result,
+ * so a timeout, error or close without a reply resolves {status: 'accepted'}
+ * instead: spawning or dead-lettering then would store the facts twice.
+ * Rejects with a plain Error on a malformed reply.
+ */
+function queryExtractionWorker(job: ExtractionJob, timeoutMs: number): Promise<WorkerReply | null> {
+  if (!existsSync(EXTRACTION_SOCKET)) return Promise.resolve(null);
+
+  const line = JSON.stringify({
+    content: job.rawBody,
+    sender_name: job.senderName,
+    sender_id: job.senderId,
+    is_group: job.isGroup,
+    source_session_id: job.sessionKey,
+    source_timestamp: job.messageTimestamp,
+    source_channel_transcript_id: job.channelTranscriptId,
+    source_channel_session_id: job.channelSessionId
+  }) + '\n';
+  if (Buffer.byteLength(line, 'utf8') > WORKER_MAX_JOB_BYTES) return Promise.resolve(null);
+
+  return new Promise((resolve, reject) => {
+    const socket = createConnection(EXTRACTION_SOCKET);
+    let buffer = '';
+    let settled = false;
+    let written = false;
+
+    const finish = (fn: () => void) => {
+      if (settled) return;
+      settled = true;
+      clearTimeout(timer);
+      socket.destroy();
+      fn();
+    };
+
+    const unanswered = (error: string) => {
+      finish(() => resolve(written ? { status: 'accepted', error } : null));
+    };
+
+    const timer = setTimeout(() => {
+      unanswered(`extraction-worker sent no reply within ${timeoutMs}ms`);
+    }, timeoutMs);
+
+    socket.on('connect', () => {
+      socket.write(line, 'utf8', (err) => {
+        if (!err) written = true;
+      });
+    });
+
+    socket.on('data', (chunk: Buffer) => {
+      buffer += chunk.toString();
+      const newline = buffer.indexOf('\n');
+      if (newline === -1) return;
+      const replyLine = buffer.substring(0, newline);
+      finish(() => {
+        try {
+          resolve(JSON.parse(replyLine) as WorkerReply);
+        } catch (parseErr) {
+          reject(new Error(`Failed to parse extraction-worker reply: ${parseErr}; reply=${replyLine.substring(0, 200)}`));
+        }
+      });
+    });
+
+    socket.on('error', (err: NodeJS.ErrnoException) => {
+      if (!written) {
+        console.warn('[memory-extract] extraction-worker unreachable, spawning instead', {
+          code: err.code,
+          error: err.message
+        });
+      }
+      unanswered(err.message);
+    });
+
+    socket.on('close', () => {
+      unanswered('extraction-worker closed the connection before replying');
+    });
+  });
+}
+
+/**
+ * Run one extraction: through the resident worker when it is listening and
+ * has room, otherwise by spawning extract_memories.py. Worker failures are
+ * dead-lettered with the same failure_reason taxonomy as child failures; the
+ * worker has no stdout, so its error text is stored as the stderr tail. A job
+ * the worker accepted but never answered is neither spawned nor dead-lettered.
+ */
+async function dispatchExtraction(
+  job: ExtractionJob,
+  pythonCmd: string,
+  scriptPath: string,
+  timeoutMs: number
+): Promise<void> {
+  let reply: WorkerReply | null;
+  try {
+    reply = await queryExtractionWorker(job, timeoutMs);
+  } catch (err) {
+    console.error('[memory-extract] Extraction failed', {
+      sender: job.senderName,
+      senderId: truncateSenderId(job.senderId),
+      via: 'worker',
+      failureReason: 'nonzero_exit',
+      error: (err as Error).message
+    });
+    await recordWorkerFailure(job, 'nonzero_exit', null, (err as Error).message);
+    return;
+  }
+
+  if (reply !== null && reply.status === 'accepted') {
+    console.warn('[memory-extract] extraction-worker accepted the job but sent no reply', {
+      sender: job.senderName,
+      senderId: truncateSenderId(job.senderId),
+      error: reply.error
+    });
+    return;
+  }
+
+  if (reply === null || reply.status === 'busy') {
+    if (reply) {
+      console.warn('[memory-extract] extraction-worker busy, spawning instead', {
+        sender: job.senderName,
+        error: reply.error
+      });
+    }
+    spawnExtraction(job, pythonCmd, scriptPath, timeoutMs);
+    return;
+  }
+
+  const exitCode = typeof reply.exit_code === 'number' ? reply.exit_code : 1;
+  if (exitCode === 0) {
+    console.info('[memory-extract] Extraction complete', {
+      sender: job.senderName,
+      senderId: truncateSenderId(job.senderId),
+      via: 'worker'
+    });
+    return;
+  }
+
+  const failureReason = reply.failure_reason
+    || (exitCode === 2 ? 'json_parse_failure' : 'nonzero_exit');
+  console.error('[memory-extract] Extraction failed', {
+    sender: job.senderName,
+    senderId: truncateSenderId(job.senderId),
+    via: 'worker',
+    exitCode,
+    failureReason,
+    error: reply.error
+  });
+  await recordWorkerFailure(job, failureReason, exitCode, reply.error ?? '');
+}
+
+async function recordWorkerFailure(
+  job: ExtractionJob,
+  failureReason: string,
+  exitCode: number | null,
+  error: string
+) {
+  await insertExtractionFailure({
+    channelTranscriptId: job.channelTranscriptId,
+    sessionKey: job.sessionKey,
+    senderName: job.senderName,
+    senderId: job.senderId,
+    content: job.rawBody,
+    stderrTail: error.slice(-PIPE_TAIL_CAP_BYTES),
+    stdoutTail: '',
+    exitCode,
+    failureReason
+  });
+}
+
+/**
+ * Spawn extract_memories.py for one message, enforcing `timeoutMs` and
+ * dead-lettering timeouts, nonzero exits and spawn errors (#485, #497).
+ */
+function spawnExtraction(job: ExtractionJob, pythonCmd: string, scriptPath: string, timeoutMs: number) {
+  const child = spawn(pythonCmd, [scriptPath], {
+    stdio: ['pipe', 'pipe', 'pipe'],
+    env: {
+      ...process.env,
+      SENDER_NAME: job.senderName,
+      SENDER_ID: job.senderId,
+      IS_GROUP: String(job.isGroup),
+      SOURCE_SESSION_ID: job.sessionKey,
+      SOURCE_TIMESTAMP: job.messageTimestamp,
+      // DB-level source pointers for entity_facts FK columns (may be empty string when not yet ingested)
+      SOURCE_CHANNEL_TRANSCRIPT_ID: job.channelTranscriptId,
+      SOURCE_CHANNEL_SESSION_ID: job.channelSessionId
+    }
+  });
+
+  const getStderrTail = attachTailBuffer(child.stderr, PIPE_TAIL_CAP_BYTES);
+  const getStdoutTail = attachTailBuffer(child.stdout, PIPE_TAIL_CAP_BYTES);
+
+  child.stdin.write(job.rawBody);
+  child.stdin.end();
+
+  let timeoutHandle: any = null;
+  let didTimeout = false;
+  let failureRecorded = false;
+
+  const recordFailure = async (reason: string, exitCode: number | null) => {
+    if (failureRecorded) return;
+    failureRecorded = true;
+    await insertExtractionFailure({
+      channelTranscriptId: job.channelTranscriptId,
+      sessionKey: job.sessionKey,
+      senderName: job.senderName,
+      senderId: job.senderId,
+      content: job.rawBody,
+      stderrTail: tailToString(getStderrTail()),
+      stdoutTail: tailToString(getStdoutTail()),
+      exitCode,
+      failureReason: reason
+    });
+  };
+
+  timeoutHandle = setTimeout(() => {
+    didTimeout = true;
+    console.error('[memory-extract] Extraction timed out, terminating child', {
+      sender: job.senderName,
+      senderId: truncateSenderId(job.senderId)
+    });
+    child.kill('SIGTERM');
+    setTimeout(() => {
+      if (!child.killed) {
+        console.error('[memory-extract] Extraction child did not terminate gracefully, forcing SIGKILL', {
+          sender: job.senderName,
+          senderId: truncateSenderId(job.senderId)
+        });
+        child.kill('SIGKILL');
+      }
+    }, KILL_GRACE_MS);
+  }, timeoutMs);
+
+  child.on('close', async (code, signal) => {
+    if (timeoutHandle) {
+      clearTimeout(timeoutHandle);
+      timeoutHandle = null;
+    }
+
+    if (didTimeout) {
+      console.error('[memory-extract] Extraction failed', {
+        sender: job.senderName,
+        senderId: truncateSenderId(job.senderId),
+        exitCode: code,
+        signal,
+        failureReason: 'timeout',
+        stderrTail: tailToString(getStderrTail())
+      });
+      await recordFailure('timeout', null);
+    } else if (code === 2) {
+      console.error('[memory-extract] Extraction failed', {
+        sender: job.senderName,
+        senderId: truncateSenderId(job.senderId),
+        exitCode: code,
+        signal,
+        failureReason: 'json_parse_failure',
+        stderrTail: tailToString(getStderrTail())
+      });
+      await recordFailure('json_parse_failure', code);
+    } else if (code !== 0) {
+      console.error('[memory-extract] Extraction failed', {
+        sender: job.senderName,
+        senderId: truncateSenderId(job.senderId),
+        exitCode: code,
+        signal,
+        failureReason: 'nonzero_exit',
+        stderrTail: tailToString(getStderrTail())
+      });
+      await recordFailure('nonzero_exit', code);
+    } else {
+      console.info('[memory-extract] Extraction complete', {
+        sender: job.senderName,
+        senderId: truncateSenderId(job.senderId)
+      });
+    }
+  });
+
+  child.on('error', async (err) => {
+    if (timeoutHandle) {
+      clearTimeout(timeoutHandle);
+      timeoutHandle = null;
+    }
+    console.error('[memory-extract] Spawn error', {
+      sender: job.senderName,
+      senderId: truncateSenderId(job.senderId),
+      failureReason: 'spawn_error',
+      error: err.message
+    });
+    await recordFailure('spawn_error', null);
+  });
+}
+
 const handler = async (event: any) => {
   try {
     console.info('[memory-extract] Hook triggered', {
@@ -471,121 +800,21 @@ const handler = async (event: any) => {
       return Number.isFinite(n) && n > 0 ? n : loadExtractionTimeoutMs();
     })();
 
-    const child = spawn(pythonCmd, [scriptPath], {
-      stdio: ['pipe', 'pipe', 'pipe'],
-      env: {
-        ...process.env,
-        SENDER_NAME: senderName,
-        SENDER_ID: senderId,
-        IS_GROUP: String(isGroup),
-        SOURCE_SESSION_ID: sessionKey,
-        SOURCE_TIMESTAMP: messageTimestamp,
-        // DB-level source pointers for entity_facts FK columns (may be empty string when not yet ingested)
-        SOURCE_CHANNEL_TRANSCRIPT_ID: channelTranscriptId,
-        SOURCE_CHANNEL_SESSION_ID: channelSessionId
-      }
-    });
-
-    const getStderrTail = attachTailBuffer(child.stderr, PIPE_TAIL_CAP_BYTES);
-    const getStdoutTail = attachTailBuffer(child.stdout, PIPE_TAIL_CAP_BYTES);
-
-    child.stdin.write(rawBody);
-    child.stdin.end();
-
-    let timeoutHandle: any = null;
-    let didTimeout = false;
-    let failureRecorded = false;
-
-    const recordFailure = async (reason: string, exitCode: number | null) => {
-      if (failureRecorded) return;
-      failureRecorded = true;
-      await insertExtractionFailure({
-        channelTranscriptId,
-        sessionKey,
-        senderName,
-        senderId,
-        content: rawBody,
-        stderrTail: tailToString(getStderrTail()),
-        stdoutTail: tailToString(getStdoutTail()),
-        exitCode,
-        failureReason: reason
-      });
-    };
-
-    timeoutHandle = setTimeout(() => {
-      didTimeout = true;
-      console.error('[memory-extract] Extraction timed out, terminating child', {
-        sender: senderName,
-        senderId: truncateSenderId(senderId)
-      });
-      child.kill('SIGTERM');
-      setTimeout(() => {
-        if (!child.killed) {
-          console.error('[memory-extract] Extraction child did not terminate gracefully, forcing SIGKILL', {
-            sender: senderName,
-            senderId: truncateSenderId(senderId)
-          });
-          child.kill('SIGKILL');
-        }
-      }, KILL_GRACE_MS);
-    }, timeoutMs);
-
-    child.on('close', async (code, signal) => {
-      if (timeoutHandle) {
-        clearTimeout(timeoutHandle);
-        timeoutHandle = null;
-      }
-
-      if (didTimeout) {
-        console.error('[memory-extract] Extraction failed', {
-          sender: senderName,
-          senderId: truncateSenderId(senderId),
-          exitCode: code,
-          signal,
-          failureReason: 'timeout',
-          stderrTail: tailToString(getStderrTail())
-        });
-        await recordFailure('timeout', null);
-      } else if (code === 2) {
-        console.error('[memory-extract] Extraction failed', {
-          sender: senderName,
-          senderId: truncateSenderId(senderId),
-          exitCode: code,
-          signal,
-          failureReason: 'json_parse_failure',
-          stderrTail: tailToString(getStderrTail())
-        });
-        await recordFailure('json_parse_failure', code);
-      } else if (code !== 0) {
-        console.error('[memory-extract] Extraction failed', {
-          sender: senderName,
-          senderId: truncateSenderId(senderId),
-          exitCode: code,
-          signal,
-          failureReason: 'nonzero_exit',
-          stderrTail: tailToString(getStderrTail())
-        });
-        await recordFailure('nonzero_exit', code);
-      } else {
-        console.info('[memory-extract] Extraction complete', {
-          sender: senderName,
-          senderId: truncateSenderId(senderId)
-        });
-      }
-    });
-
-    child.on('error', async (err) => {
-      if (timeoutHandle) {
-        clearTimeout(timeoutHandle);
-        timeoutHandle = null;
-      }
-      console.error('[memory-extract] Spawn error', {
-        sender: senderName,
-        senderId: truncateSenderId(senderId),
-        failureReason: 'spawn_error',
-        error: err.message
+    // Not awaited: the hook returns immediately and the outcome (including any
+    // dead-letter row) is handled in the background, as with the child process.
+    dispatchExtraction({
+      rawBody,
+      senderName,
+      senderId,
+      isGroup,
+      sessionKey,
+      messageTimestamp,
+      channelTranscriptId,
+      channelSessionId
+    }, pythonCmd, scriptPath, timeoutMs).catch((err) => {
+      console.error('[memory-extract] Extraction dispatch error', {
+        error: (err as Error).message
       });
-      await recordFailure('spawn_error', null);
     });
   } catch (handlerErr) {
     // Hook contract: handlers must not throw. Log and swallow so other handlers run.
@@ -0,0 +1,28 @@
+-- Migration 088: entities_changed NOTIFY trigger
+--
+-- extract_memories.py resolves entity mentions from an in-memory index
+-- (memory/scripts/entity_index.py). Long-lived processes such as
+-- extraction-worker.py LISTEN on entities_changed and reload only the ids
+-- named in the payload, so renames, nickname/alias edits and deletes reach
+-- the index without a full rebuild. New rows are also picked up by id, but
+-- INSERT notifies too so listeners see rows written by other processes.
+--
+-- Only the columns the index reads fire the trigger on UPDATE. Idempotent.
+
+CREATE OR REPLACE FUNCTION notify_entities_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+VOLATILE
+AS $$
+BEGIN
+    PERFORM pg_notify('entities_changed', (CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END)::text);
+    RETURN NULL;
+END;
+$$;
+
+COMMENT ON FUNCTION notify_entities_changed() IS 'Fires entities_changed NOTIFY with the entity id when an entity is inserted, deleted, or has its name/full_name/nicknames/alternate_spellings changed. Consumed by the entity index in extract_memories.py / extraction-worker.py.';
+
+CREATE OR REPLACE TRIGGER entities_notify
+    AFTER INSERT OR DELETE OR UPDATE OF name, full_name, nicknames, alternate_spellings ON entities
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_entities_changed();
@@ -0,0 +1,131 @@
+-- Migration 089: entity_identifiers lookup table
+--
+-- Sender and identity resolution used to scan entity_facts:
+-- extract_memories.py matched `value = sender_id` across every fact, and
+-- matched phone numbers with REGEXP_REPLACE(value, '[^0-9]', '', 'g') = digits.
+-- Neither predicate can use an index, so every message paid a sequential scan
+-- that grew with entity_facts.
+--
+-- entity_identifiers holds one row per normalized identifier, maintained by
+-- the entity_facts_identifiers trigger:
+--   kind 'handle': lower(value) for every whitespace-free value of at most 255
+--                  characters (platform ids, UUIDs, emails, handles, npubs);
+--   kind 'phone':  the digits of phone/has_phone_number/signal/signal_id values.
+-- The primary key (kind, identifier, fact_id) makes each lookup an index point
+-- query; callers join entity_facts on fact_id when they need the raw value,
+-- key case or confidence. Rows go away with their fact (ON DELETE CASCADE).
+--
+-- resolve_entity_by_identifier(key, value), shared by the comms ingest script
+-- and cognition migration 164, now resolves through the table as well. Values
+-- the trigger does not index (containing whitespace or longer than 255
+-- characters) still match: for those the function compares entity_facts
+-- directly, so it keeps matching any key/value pair case-insensitively.
+--
+-- Idempotent: re-running rebuilds the table contents from entity_facts.
+
+CREATE TABLE IF NOT EXISTS entity_identifiers (
+    fact_id integer NOT NULL,
+    entity_id integer NOT NULL,
+    kind varchar(10) NOT NULL,
+    key varchar(255) NOT NULL,
+    identifier text NOT NULL,
+    CONSTRAINT entity_identifiers_pkey PRIMARY KEY (kind, identifier, fact_id),
+    CONSTRAINT entity_identifiers_fact_id_fkey FOREIGN KEY (fact_id) REFERENCES entity_facts (id) ON DELETE CASCADE,
+    CONSTRAINT entity_identifiers_kind_check CHECK (kind IN ('handle'::text, 'phone'::text))
+);
+
+COMMENT ON TABLE entity_identifiers IS 'Normalized sender/platform identifiers derived from entity_facts (kind handle = lower(value) of whitespace-free values up to 255 chars; kind phone = digits of phone-like keys). Maintained by the entity_facts_identifiers trigger; read-only for everything else.';
+
+CREATE INDEX IF NOT EXISTS idx_entity_identifiers_fact_id ON entity_identifiers (fact_id);
+
+CREATE OR REPLACE FUNCTION sync_entity_identifiers()
+RETURNS trigger
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_digits text;
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM entity_identifiers WHERE fact_id = OLD.id;
+    END IF;
+
+    IF NEW.entity_id IS NULL OR NEW.value IS NULL OR NEW.value = '' THEN
+        RETURN NULL;
+    END IF;
+
+    IF length(NEW.value) <= 255 AND NEW.value !~ '\s' THEN
+        INSERT INTO entity_identifiers (fact_id, entity_id, kind, key, identifier)
+        VALUES (NEW.id, NEW.entity_id, 'handle', NEW.key, lower(NEW.value))
+        ON CONFLICT DO NOTHING;
+    END IF;
+
+    IF NEW.key IN ('phone', 'has_phone_number', 'signal', 'signal_id') THEN
+        v_digits := regexp_replace(NEW.value, '[^0-9]', '', 'g');
+        IF v_digits <> '' THEN
+            INSERT INTO entity_identifiers (fact_id, entity_id, kind, key, identifier)
+            VALUES (NEW.id, NEW.entity_id, 'phone', NEW.key, v_digits)
+            ON CONFLICT DO NOTHING;
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+COMMENT ON FUNCTION sync_entity_identifiers() IS 'Keeps entity_identifiers in step with entity_facts: on INSERT or an UPDATE of entity_id/key/value, replaces the fact''s handle and phone identifier rows. Deletes cascade through the fact_id foreign key.';
+
+CREATE OR REPLACE TRIGGER entity_facts_identifiers
+    AFTER INSERT OR UPDATE OF entity_id, key, value ON entity_facts
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_entity_identifiers();
+
+-- Backfill (and, on re-run, rebuild) from the existing facts.
+TRUNCATE entity_identifiers;
+
+INSERT INTO entity_identifiers (fact_id, entity_id, kind, key, identifier)
+SELECT id, entity_id, 'handle', key, lower(value)
+FROM entity_facts
+WHERE entity_id IS NOT NULL
+  AND value <> ''
+  AND length(value) <= 255
+  AND value !~ '\s'
+ON CONFLICT DO NOTHING;
+
+INSERT INTO entity_identifiers (fact_id, entity_id, kind, key, identifier)
+SELECT id, entity_id, 'phone', key, regexp_replace(value, '[^0-9]', '', 'g')
+FROM entity_facts
+WHERE entity_id IS NOT NULL
+  AND key IN ('phone', 'has_phone_number', 'signal', 'signal_id')
+  AND regexp_replace(value, '[^0-9]', '', 'g') <> ''
+ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION resolve_entity_by_identifier(key text, value text)
+RETURNS bigint
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT m.entity_id
+    FROM (
+        SELECT i.entity_id::bigint AS entity_id, f.confidence, f.last_confirmed_at, f.id
+        FROM entity_identifiers i
+        JOIN entity_facts f ON f.id = i.fact_id
+        WHERE i.kind = 'handle'
+          AND i.identifier = lower($2)
+          AND lower(i.key) = lower($1)
+        UNION ALL
+        -- Values the trigger does not index (whitespace, over 255 characters).
+        SELECT f.entity_id::bigint, f.confidence, f.last_confirmed_at, f.id
+        FROM entity_facts f
+        WHERE (length($2) > 255 OR $2 ~ '\s')
+          AND f.entity_id IS NOT NULL
+          AND lower(f.key) = lower($1)
+          AND lower(f.value) = lower($2)
+    ) m
+    ORDER BY m.confidence DESC NULLS LAST, m.last_confirmed_at DESC NULLS LAST, m.id
+    LIMIT 1
+$$;
+
+COMMENT ON FUNCTION resolve_entity_by_identifier(text, text) IS 'Resolve an entity from an identifier fact (any key/value, case-insensitive), preferring the highest-confidence then most recently confirmed fact. Whitespace-free values up to 255 chars are looked up in entity_identifiers; other values, which the trigger does not index, are matched against entity_facts directly. Returns NULL when nothing matches; callers normalize identifier formats (e.g. Nostr npub vs hex) first.';
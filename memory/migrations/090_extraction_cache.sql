@@ -0,0 +1,30 @@
+-- Migration 090: extraction_cache table
+--
+-- extract_memories.py sends every message to the LLM, so replays
+-- (extraction-replay.sh), catch-up runs (memory-catchup.sh) and retried hook
+-- calls paid full latency and token cost for input that was already
+-- extracted. extraction_cache stores the parsed JSON result keyed by
+-- (prompt_version, model, text_hash, context_hash):
+--   prompt_version  EXTRACTION_PROMPT_VERSION in extract_memories.py, bumped
+--                   whenever the prompt or response parsing changes;
+--   text_hash       sha256 of the trimmed message text;
+--   context_hash    sha256 of the other prompt inputs (sender, sender id and
+--                   provider, group flag, default visibility).
+-- Rows carry their own expires_at (TTL from MEMORY_EXTRACTION_CACHE_TTL_HOURS
+-- at write time); reads ignore expired rows and memory-maintenance.py deletes
+-- them. Idempotent.
+
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    prompt_version integer NOT NULL,
+    model text NOT NULL,
+    text_hash char(64) NOT NULL,
+    context_hash char(64) NOT NULL,
+    result jsonb NOT NULL,
+    created_at timestamptz DEFAULT now() NOT NULL,
+    expires_at timestamptz NOT NULL,
+    CONSTRAINT extraction_cache_pkey PRIMARY KEY (prompt_version, model, text_hash, context_hash)
+);
+
+COMMENT ON TABLE extraction_cache IS 'Parsed LLM extraction results from extract_memories.py, keyed by prompt version, model, message hash and context hash, so replays and catch-ups skip the LLM call. Entries expire at expires_at; memory-maintenance.py purges expired rows.';
+
+CREATE INDEX IF NOT EXISTS idx_extraction_cache_expires_at ON extraction_cache (expires_at);
@@ -0,0 +1,143 @@
+-- Migration 091: embedding_queue table and enqueue triggers
+--
+-- New and edited rows only became searchable at the next scheduled
+-- memory-maintenance.py run, which finds them by scanning every table in
+-- TABLE_EMBED_SPECS for rows without an embedding. Edits to text that is
+-- already embedded were never picked up at all.
+--
+-- Every embedded table now gets an <table>_embedding_queue trigger. It
+-- appends (source_type, source_id) to embedding_queue on INSERT, on DELETE,
+-- and on an UPDATE of the columns that make up the embedded text. It then
+-- fires a NOTIFY on the embedding_queue channel with the source_type as
+-- payload. Renaming an entity also queues its facts, because entity_fact
+-- text starts with the entity name.
+--
+-- `memory-maintenance.py --embed-queue-worker` LISTENs on the channel and
+-- drains the queue in FOR UPDATE SKIP LOCKED batches. It re-embeds rows that
+-- still have text and deletes the embeddings of rows that are gone. Scheduled
+-- maintenance runs drain whatever is left, so the full scan stays as a safety
+-- net. The queue has no unique key, so writers never wait on rows a worker
+-- holds; repeated entries for one row are collapsed when they are claimed.
+--
+-- Idempotent.
+
+CREATE TABLE IF NOT EXISTS embedding_queue (
+    id bigserial NOT NULL,
+    source_type varchar(50) NOT NULL,
+    source_id text NOT NULL,
+    enqueued_at timestamptz DEFAULT now() NOT NULL,
+    CONSTRAINT embedding_queue_pkey PRIMARY KEY (id)
+);
+
+COMMENT ON TABLE embedding_queue IS 'Rows whose embedded text changed (source_type/source_id as in memory_embeddings), appended by the <table>_embedding_queue triggers. Drained oldest-first with FOR UPDATE SKIP LOCKED by memory-maintenance.py (--embed-queue-worker or the scheduled run).';
+
+CREATE OR REPLACE FUNCTION enqueue_embedding()
+RETURNS trigger
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO embedding_queue (source_type, source_id) VALUES (TG_ARGV[0], OLD.id::text);
+    ELSE
+        INSERT INTO embedding_queue (source_type, source_id) VALUES (TG_ARGV[0], NEW.id::text);
+    END IF;
+
+    IF TG_TABLE_NAME = 'entities' AND TG_OP = 'UPDATE' THEN
+        INSERT INTO embedding_queue (source_type, source_id)
+        SELECT 'entity_fact', id::text FROM entity_facts WHERE entity_id = NEW.id;
+    END IF;
+
+    PERFORM pg_notify('embedding_queue', TG_ARGV[0]);
+    RETURN NULL;
+END;
+$$;
+
+COMMENT ON FUNCTION enqueue_embedding() IS 'Trigger function: queues the row (source_type from the first trigger argument) in embedding_queue and fires an embedding_queue NOTIFY. An entities UPDATE also queues the entity''s facts.';
+
+CREATE OR REPLACE TRIGGER agents_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF name ON agents
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('agent');
+
+CREATE OR REPLACE TRIGGER entities_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF name ON entities
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('entity');
+
+CREATE OR REPLACE TRIGGER entity_facts_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF entity_id, key, value ON entity_facts
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('entity_fact');
+
+CREATE OR REPLACE TRIGGER events_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF description ON events
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('event');
+
+CREATE OR REPLACE TRIGGER income_sources_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF name, description ON income_sources
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('income_source');
+
+CREATE OR REPLACE TRIGGER journal_entries_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF content ON journal_entries
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('journal_entry');
+
+CREATE OR REPLACE TRIGGER lessons_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF lesson ON lessons
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('lesson');
+
+CREATE OR REPLACE TRIGGER library_works_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title ON library_works
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('library');
+
+CREATE OR REPLACE TRIGGER media_consumed_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title ON media_consumed
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('media_consumed');
+
+CREATE OR REPLACE TRIGGER music_works_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title, description ON music_works
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('music_work');
+
+CREATE OR REPLACE TRIGGER projects_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF name ON projects
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('project');
+
+CREATE OR REPLACE TRIGGER research_conclusions_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title, summary, is_current ON research_conclusions
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('research_conclusion');
+
+CREATE OR REPLACE TRIGGER research_findings_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF content, is_current ON research_findings
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('research_finding');
+
+CREATE OR REPLACE TRIGGER research_tasks_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF query ON research_tasks
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('research_task');
+
+CREATE OR REPLACE TRIGGER tasks_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF title ON tasks
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('task');
+
+CREATE OR REPLACE TRIGGER vocabulary_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF word ON vocabulary
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('vocabulary');
+
+CREATE OR REPLACE TRIGGER workflow_runs_embedding_queue
+    AFTER INSERT OR DELETE OR UPDATE OF trigger_context, notes ON workflow_runs
+    FOR EACH ROW
+    EXECUTE FUNCTION enqueue_embedding('workflow_run');
@@ -0,0 +1,17 @@
+-- Migration 092: memory_embeddings.content_hash
+--
+-- memory-maintenance.py only embedded rows that had no embedding yet, so an
+-- edited task, lesson, event or library entry kept the vector of its old text
+-- for good; only the entity_facts rewritten by consolidation and dedup were
+-- re-embedded. content_hash is md5 of the stored content, kept up to date by
+-- PostgreSQL for every writer. The stale-embedding pass compares it with md5
+-- of each source row's current text, in one join per source_type, and
+-- re-embeds only rows whose text changed. Existing rows are hashed as the
+-- column is added, so the first run already catches older edits.
+--
+-- Adding a stored generated column rewrites memory_embeddings once. Idempotent.
+
+ALTER TABLE memory_embeddings
+    ADD COLUMN IF NOT EXISTS content_hash text GENERATED ALWAYS AS (md5(content)) STORED;
+
+COMMENT ON COLUMN memory_embeddings.content_hash IS 'md5(content), generated. Compared with md5 of the source row''s current text by memory-maintenance.py to find embeddings made from outdated text.';
@@ -0,0 +1,29 @@
+-- Migration 093: embedding_cache table
+--
+-- The same strings were embedded over and over: repeated entity names and
+-- boilerplate lesson text across TABLE_EMBED_SPECS source types, unchanged
+-- daily-log chunks on every --reindex-files run, and every domain description
+-- on each seed-domain-embeddings.py run. embedding_cache maps
+-- (model, text_hash) to the vector, where text_hash is sha256 of the
+-- normalized text (NFC, whitespace collapsed; the same canonical form
+-- proactive-recall.py uses for its query cache). The normalized text is what
+-- gets embedded, so a hit returns exactly the vector a miss would produce.
+--
+-- Writers look up each batch before calling Ollama and insert the vectors of
+-- their misses afterwards. embedding has no fixed dimension because the key
+-- includes the model. Lookups refresh last_used_at at most once a day;
+-- memory-maintenance.py purges entries unused for EMBED_CACHE_TTL_DAYS.
+-- Idempotent.
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model text NOT NULL,
+    text_hash char(64) NOT NULL,
+    embedding vector NOT NULL,
+    created_at timestamptz DEFAULT now() NOT NULL,
+    last_used_at timestamptz DEFAULT now() NOT NULL,
+    CONSTRAINT embedding_cache_pkey PRIMARY KEY (model, text_hash)
+);
+
+COMMENT ON TABLE embedding_cache IS 'Text-to-vector cache shared by every memory_embeddings writer (memory-maintenance.py, seed-domain-embeddings.py, embed-delegation-facts.sh), keyed by model and sha256 of the normalized text, so identical text is embedded once. Entries unused for 90 days are purged by memory-maintenance.py.';
+
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used_at ON embedding_cache (last_used_at);
@@ -0,0 +1,12 @@
+-- Migration 094: trigram index on lessons.lesson
+--
+-- phase_dedup_lessons() in memory-maintenance.py finds near-duplicate lessons
+-- with a self-join that adds a pg_trgm `%` predicate (cutoff 0.80, set with
+-- pg_trgm.similarity_threshold). This GIN index lets the planner probe each
+-- lesson's trigram neighbours instead of scoring every pair, as
+-- idx_entity_facts_value_trgm already does for same-key fact dedup.
+--
+-- Requires the pg_trgm extension, as idx_entity_facts_value_trgm does.
+-- Idempotent.
+
+CREATE INDEX IF NOT EXISTS idx_lessons_lesson_trgm ON lessons USING gin (lesson gin_trgm_ops);
@@ -1,8 +1,10 @@
 /**
  * Semantic Recall subsystem.
  *
- * Spawns proactive-recall.py asynchronously (NEVER spawnSync — that freezes
- * the event loop) and returns formatted memory context for injection.
+ * Queries the resident recall-server.py over its Unix socket when it is
+ * running, and otherwise spawns proactive-recall.py asynchronously (NEVER
+ * spawnSync — that freezes the event loop). Returns formatted memory context
+ * for injection.
  *
  * Ported from ~/.openclaw/hooks/semantic-recall/handler.ts
  * Root cause being fixed: the old hook used spawnSync which blocked the
@@ -13,6 +15,7 @@
 
 import { spawn } from "child_process";
 import { existsSync } from "fs";
+import { createConnection } from "net";
 import * as os from "os";
 import { join } from "path";
 
@@ -43,6 +46,11 @@ const PYTHON_BIN = existsSync(STANDARD_VENV) ? STANDARD_VENV : WORKSPACE_VENV;
 
 const RECALL_SCRIPT = join(os.homedir(), ".openclaw", "scripts", "proactive-recall.py");
 
+// Socket of the resident recall-server.py (same default as the server)
+const RECALL_SOCKET =
+  process.env.SEMANTIC_RECALL_SOCKET ||
+  join(os.homedir(), ".openclaw", "run", "recall.sock");
+
 // ── Configuration ─────────────────────────────────────────────────────────────
 
 const TOKEN_BUDGET = parseInt(
@@ -53,6 +61,7 @@ const HIGH_CONFIDENCE_THRESHOLD = parseFloat(
   process.env.SEMANTIC_RECALL_HIGH_CONFIDENCE || "0.7"
 );
 const SPAWN_TIMEOUT_MS = 5000; // 5 seconds
+const SOCKET_TIMEOUT_MS = 5000; // 5 seconds
 
 // ── Types ─────────────────────────────────────────────────────────────────────
 
@@ -64,6 +73,7 @@ interface RecallMemory {
 }
 
 interface RecallResult {
+  error?: string;
   memories?: RecallMemory[];
   tokens_used?: number;
   token_budget?: number;
@@ -88,14 +98,16 @@ export interface RecallInput {
 }
 
 /**
- * Run proactive-recall.py asynchronously and return formatted memory context,
- * or null if recall fails or finds nothing.
+ * Run semantic recall and return formatted memory context, or null if recall
+ * fails or finds nothing.
  *
- * Uses async spawn (child_process.spawn wrapped in a Promise) so the Node.js
- * event loop is NEVER blocked.
+ * Prefers the resident recall-server.py (warm DB pool, no interpreter
+ * startup). When its socket is missing or refuses connections, falls back to
+ * spawning proactive-recall.py with async spawn (child_process.spawn wrapped
+ * in a Promise) so the Node.js event loop is NEVER blocked.
  *
- * Sends a JSON payload via stdin (no --stdin flag; proactive-recall.py reads
- * JSON from stdin when no positional args are given).
+ * Both paths take the same JSON payload (proactive-recall.py reads it from
+ * stdin when no positional args are given).
  */
 export async function runSemanticRecall(
   input: RecallInput
@@ -131,7 +143,10 @@ export async function runSemanticRecall(
 
   let result: RecallResult | null = null;
   try {
-    result = await spawnWithTimeout(JSON.stringify(stdinPayload));
+    result = await queryRecallServer(stdinPayload);
+    if (result === null) {
+      result = await spawnWithTimeout(JSON.stringify(stdinPayload));
+    }
   } catch (err) {
     console.error(
       "[turn-context] Semantic recall error:",
@@ -140,6 +155,10 @@ export async function runSemanticRecall(
     return null;
   }
 
+  if (result?.error) {
+    console.error("[turn-context] Semantic recall error:", result.error);
+  }
+
   if (!result?.memories || result.memories.length === 0) {
     return null;
   }
@@ -162,6 +181,77 @@ export async function runSemanticRecall(
   return `🧠 **Relevant Context:**\n${memoryLines.join("\n\n")}`;
 }
 
+// ── Recall server client ──────────────────────────────────────────────────────
+
+/**
+ * Send one request to recall-server.py over its Unix socket.
+ *
+ * Resolves null when no server is listening (socket missing or refused) so the
+ * caller can fall back to spawning; rejects on timeouts and malformed replies.
+ */
+function queryRecallServer(
+  payload: Record<string, unknown>
+): Promise<RecallResult | null> {
+  if (!existsSync(RECALL_SOCKET)) return Promise.resolve(null);
+
+  return new Promise((resolve, reject) => {
+    const request = {
+      ...payload,
+      max_tokens: TOKEN_BUDGET,
+      high_confidence: HIGH_CONFIDENCE_THRESHOLD,
+    };
+    const socket = createConnection(RECALL_SOCKET);
+    let buffer = "";
+    let settled = false;
+
+    const finish = (fn: () => void) => {
+      if (settled) return;
+      settled = true;
+      clearTimeout(timer);
+      socket.destroy();
+      fn();
+    };
+
+    const timer = setTimeout(() => {
+      finish(() =>
+        reject(new Error(`recall-server timed out after ${SOCKET_TIMEOUT_MS}ms`))
+      );
+    }, SOCKET_TIMEOUT_MS);
+
+    socket.on("connect", () => {
+      socket.write(JSON.stringify(request) + "\n", "utf-8");
+    });
+
+    socket.on("data", (chunk: Buffer) => {
+      buffer += chunk.toString();
+      const newline = buffer.indexOf("\n");
+      if (newline === -1) return;
+      const line = buffer.substring(0, newline);
+      finish(() => {
+        try {
+          resolve(JSON.parse(line) as RecallResult);
+        } catch (parseErr) {
+          reject(
+            new Error(`Failed to parse recall-server reply: ${parseErr}; reply=${line.substring(0, 200)}`)
+          );
+        }
+      });
+    });
+
+    socket.on("error", (err: NodeJS.ErrnoException) => {
+      if (err.code === "ENOENT" || err.code === "ECONNREFUSED") {
+        finish(() => resolve(null));
+      } else {
+        finish(() => reject(err));
+      }
+    });
+
+    socket.on("close", () => {
+      finish(() => reject(new Error("recall-server closed the connection without a reply")));
+    });
+  });
+}
+
 // ── Async spawn helper ────────────────────────────────────────────────────────
 
 function spawnWithTimeout(stdinPayload: string): Promise<RecallResult> {
@@ -3,6 +3,10 @@
 # Generates embeddings for delegation facts and stores them in memory_embeddings
 # This makes delegation knowledge searchable via semantic recall
 #
+# Content is normalized (NFC, whitespace collapsed) and looked up in
+# embedding_cache (migration 093) by (model, sha256) before calling Ollama,
+# the same way memory-maintenance.py and seed-domain-embeddings.py do.
+#
 # Usage: ./scripts/embed-delegation-facts.sh
 
 set -e
@@ -26,6 +30,9 @@ PG_ENV="${HOME}/.openclaw/lib/pg-env.sh"
 echo "🧠 Embedding delegation facts for semantic recall..."
 echo "   Model: $OLLAMA_MODEL @ $OLLAMA_URL"
 
+# Shared vector cache, if migration 093 is applied
+USE_CACHE=$(psql -t -A -c "SELECT to_regclass('embedding_cache') IS NOT NULL" 2>/dev/null || true)
+
 # Get all delegation facts that aren't already embedded
 QUERY="
 SELECT 
@@ -86,15 +93,41 @@ echo "$FACTS" | while IFS='|' read -r fact_id key value confidence source_id; do
         continue
     fi
     
-    # Get embedding from Ollama (local, no API key needed)
-    EMBEDDING=$(curl -s --max-time 30 "${OLLAMA_URL}/api/embeddings" \
-        -H "Content-Type: application/json" \
-        -d "{\"model\": \"${OLLAMA_MODEL}\", \"prompt\": $(echo "$CONTENT" | jq -Rs .)}" \
-        | jq -r '.embedding | @json')
-    
-    if [ -z "$EMBEDDING" ] || [ "$EMBEDDING" = "null" ]; then
-        echo "⚠️  Failed to embed fact $fact_id: $CONTENT"
-        continue
+    # Canonical form used as the embedding_cache key and sent to Ollama
+    CONTENT=$(printf '%s' "$CONTENT" | python3 -c 'import sys, unicodedata; print(" ".join(unicodedata.normalize("NFC", sys.stdin.read()).split()), end="")')
+    TEXT_HASH=$(printf '%s' "$CONTENT" | sha256sum | cut -d' ' -f1)
+
+    EMBEDDING=""
+    if [ "$USE_CACHE" = "t" ]; then
+        EMBEDDING=$(psql -t -A -c "
+            WITH hit AS (
+                UPDATE embedding_cache SET last_used_at = NOW()
+                WHERE model = '$OLLAMA_MODEL' AND text_hash = '$TEXT_HASH'
+                RETURNING embedding
+            )
+            SELECT embedding::text FROM hit;
+        " 2>/dev/null || true)
+    fi
+
+    if [ -z "$EMBEDDING" ]; then
+        # Get embedding from Ollama (local, no API key needed)
+        EMBEDDING=$(curl -s --max-time 30 "${OLLAMA_URL}/api/embed" \
+            -H "Content-Type: application/json" \
+            -d "{\"model\": \"${OLLAMA_MODEL}\", \"input\": $(printf '%s' "$CONTENT" | jq -Rs .)}" \
+            | jq -r '.embeddings[0] | @json')
+
+        if [ -z "$EMBEDDING" ] || [ "$EMBEDDING" = "null" ]; then
+            echo "⚠️  Failed to embed fact $fact_id: $CONTENT"
+            continue
+        fi
+
+        if [ "$USE_CACHE" = "t" ]; then
+            psql -c "
+                INSERT INTO embedding_cache (model, text_hash, embedding)
+                VALUES ('$OLLAMA_MODEL', '$TEXT_HASH', '$EMBEDDING'::vector)
+                ON CONFLICT (model, text_hash) DO NOTHING;
+            " >/dev/null 2>&1 || true
+        fi
     fi
     
     # Insert into memory_embeddings
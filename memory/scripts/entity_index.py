@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+entity_index.py — In-memory entity name index for extract_memories.py.
+
+Without it, find_entity_id() resolves each mention with several table scans:
+a LOWER() match over name/full_name/unnest(nicknames)/unnest(alternate_spellings),
+a fetch of every entity for domain-base matching, and a
+LOWER(subject) LIKE '%' || LOWER(name) || '%' scan for containment. The index
+loads the name columns of ``entities`` once per process and answers the same
+questions from dicts, plus an Aho-Corasick automaton for whole-word containment.
+
+Refresh is incremental:
+  - refresh() picks up rows with an id above the highest id seen, so entities
+    inserted by this process (or any other) become visible with one PK range
+    scan;
+  - renames, nickname/alias edits and deletes arrive as ``entities_changed``
+    NOTIFY payloads (trigger from migration 088) on the LISTEN connection
+    opened by listen(), and refresh() reloads only those ids.
+
+Ties (several entities matching the same string) resolve to the lowest id so
+results are deterministic.
+"""
+
+import sys
+import threading
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+
+ENTITIES_CHANGED_CHANNEL = "entities_changed"
+MIN_CONTAINMENT_LENGTH = 3  # mirrors LENGTH(name) >= 3 in the old containment scan
+
+_ENTITY_COLUMNS = "id, name, full_name, nicknames, alternate_spellings"
+
+
+def _log(msg: str) -> None:
+    print(f"[entity_index] {msg}", file=sys.stderr)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ("a" <= ch <= "z") or ("0" <= ch <= "9")
+
+
+class _Automaton:
+    """Aho-Corasick automaton over lowercase patterns."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[str]] = [[]]
+        for pattern in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][ch] = nxt
+                node = nxt
+            self._out[node].append(pattern)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def matches(self, text: str) -> Iterator[tuple[int, str]]:
+        """Yield (start, pattern) for every occurrence of every pattern in text."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern in self._out[node]:
+                yield i - len(pattern) + 1, pattern
+
+
+def _add_key(mapping: dict, key: Optional[str], entity_id: int) -> None:
+    if key:
+        mapping.setdefault(key, set()).add(entity_id)
+
+
+def _drop_key(mapping: dict, key: Optional[str], entity_id: int) -> None:
+    if not key:
+        return
+    ids = mapping.get(key)
+    if ids is not None:
+        ids.discard(entity_id)
+        if not ids:
+            del mapping[key]
+
+
+def _first(ids: Optional[set]) -> Optional[int]:
+    return min(ids) if ids else None
+
+
+class EntityIndex:
+    """Name, nickname, alias, domain-base and containment lookups for entities.
+
+    ``domain_key`` normalizes an entity name for domain matching; it must be
+    the same function the caller applies to a domain base.
+    """
+
+    def __init__(self, domain_key: Callable[[str], str]):
+        self._domain_key = domain_key
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()  # one refresh (and LISTEN poll) at a time
+        self._rows: dict[int, tuple] = {}
+        self._names: dict[str, set] = {}
+        self._exact: dict[str, set] = {}       # name, full_name, nicknames
+        self._alternates: dict[str, set] = {}  # alternate_spellings
+        self._domains: dict[str, set] = {}
+        self._contained: dict[str, set] = {}   # names >= MIN_CONTAINMENT_LENGTH
+        self._automaton: Optional[_Automaton] = None
+        self.max_id = 0
+        self._connect: Optional[Callable] = None
+        self._listen_conn = None
+
+    @classmethod
+    def load(cls, conn, domain_key: Callable[[str], str]) -> "EntityIndex":
+        index = cls(domain_key)
+        index.reload(conn)
+        return index
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+
+    def reload(self, conn) -> None:
+        """Rebuild the whole index from ``entities``."""
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {_ENTITY_COLUMNS} FROM entities")
+            rows = cur.fetchall()
+        with self._lock:
+            self._rows.clear()
+            for mapping in (self._names, self._exact, self._alternates,
+                            self._domains, self._contained):
+                mapping.clear()
+            self.max_id = 0
+            for row in rows:
+                self._add(row)
+            self._automaton = None
+
+    def listen(self, connect: Callable) -> None:
+        """Open a LISTEN connection for ``entities_changed`` notifications.
+
+        ``connect`` returns a new psycopg2 connection; it is kept so the
+        listener can be re-established after a dropped connection.
+        """
+        self._connect = connect
+        conn = connect()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {ENTITIES_CHANGED_CHANNEL}")
+        self._listen_conn = conn
+
+    def refresh(self, conn) -> None:
+        """Apply entity changes made since the last load or refresh.
+
+        Reloads rows newer than ``max_id`` plus any ids named by pending
+        notifications. If the listener connection has failed, notifications
+        may have been missed, so the index is rebuilt and the listener reopened.
+        """
+        with self._refresh_lock:
+            changed = self._drain_notifications()
+            if changed is None:
+                self.reload(conn)
+                try:
+                    self.listen(self._connect)
+                except Exception as e:
+                    _log(f"WARNING: could not re-establish LISTEN {ENTITIES_CHANGED_CHANNEL}: {e}")
+                return
+
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT {_ENTITY_COLUMNS} FROM entities WHERE id > %s OR id = ANY(%s)",
+                    (self.max_id, sorted(changed)),
+                )
+                rows = cur.fetchall()
+            with self._lock:
+                for entity_id in changed:
+                    self._remove(entity_id)
+                for row in rows:
+                    self._remove(row[0])
+                    self._add(row)
+
+    def _drain_notifications(self) -> Optional[set]:
+        """Return ids named by pending notifications, or None if the listener broke."""
+        conn = self._listen_conn
+        if conn is None:
+            return None if self._connect is not None else set()
+        try:
+            conn.poll()
+            notifies = list(conn.notifies)
+            del conn.notifies[:]
+        except Exception as e:
+            _log(f"WARNING: LISTEN connection failed, rebuilding index: {e}")
+            self._listen_conn = None
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return None
+        changed = set()
+        for note in notifies:
+            try:
+                changed.add(int(note.payload))
+            except (TypeError, ValueError):
+                pass
+        return changed
+
+    def close(self) -> None:
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception:
+                pass
+            self._listen_conn = None
+
+    # ── Maintenance ──────────────────────────────────────────────────────────
+
+    def _add(self, row: tuple) -> None:
+        entity_id, name, full_name, nicknames, alternates = row
+        self._rows[entity_id] = row
+        self.max_id = max(self.max_id, entity_id)
+        for key, mapping in self._keys(row):
+            _add_key(mapping, key, entity_id)
+        if name and len(name) >= MIN_CONTAINMENT_LENGTH:
+            self._automaton = None
+
+    def _remove(self, entity_id: int) -> None:
+        row = self._rows.pop(entity_id, None)
+        if row is None:
+            return
+        for key, mapping in self._keys(row):
+            _drop_key(mapping, key, entity_id)
+        self._automaton = None
+
+    def _keys(self, row: tuple) -> Iterator[tuple[Optional[str], dict]]:
+        _entity_id, name, full_name, nicknames, alternates = row
+        if name:
+            lower = name.lower()
+            yield lower, self._names
+            yield lower, self._exact
+            yield self._domain_key(name), self._domains
+            if len(name) >= MIN_CONTAINMENT_LENGTH:
+                yield lower, self._contained
+        if full_name:
+            yield full_name.lower(), self._exact
+        for nickname in nicknames or []:
+            if nickname:
+                yield nickname.lower(), self._exact
+        for spelling in alternates or []:
+            if spelling:
+                yield spelling.lower(), self._alternates
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def lookup_name(self, name: str) -> Optional[int]:
+        """LOWER(name) = LOWER(%s)."""
+        with self._lock:
+            return _first(self._names.get(name.lower()))
+
+    def lookup(self, name: str, include_alternates: bool = True) -> Optional[int]:
+        """Match name, full_name or a nickname (and optionally an alternate spelling)."""
+        lower = name.lower()
+        with self._lock:
+            ids = set(self._exact.get(lower, ()))
+            if include_alternates:
+                ids |= self._alternates.get(lower, set())
+            return _first(ids)
+
+    def lookup_domain(self, domain_base: str) -> Optional[int]:
+        """Entity whose normalized name equals the normalized domain base."""
+        with self._lock:
+            return _first(self._domains.get(self._domain_key(domain_base)))
+
+    def lookup_contained(self, subject: str) -> Optional[int]:
+        """Entity whose name (>= 3 chars) appears in subject as a whole word."""
+        text = subject.lower()
+        with self._lock:
+            if self._automaton is None:
+                self._automaton = _Automaton(self._contained)
+            ids = set()
+            for start, pattern in self._automaton.matches(text):
+                end = start + len(pattern)
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]):
+                    continue
+                ids |= self._contained[pattern]
+            return _first(ids)
+
+    def find(self, subject: str, domain_base: Optional[str]) -> Optional[int]:
+        """find_entity_id() steps 2-4: exact/alias, domain base, containment."""
+        entity_id = self.lookup(subject)
+        if entity_id is None and domain_base:
+            entity_id = self.lookup_domain(domain_base)
+        if entity_id is None:
+            entity_id = self.lookup_contained(subject)
+        return entity_id
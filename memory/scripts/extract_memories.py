@@ -9,24 +9,36 @@ Interface:
   - Env vars: SENDER_NAME, SENDER_ID, IS_GROUP, SOURCE_SESSION_ID,
               SOURCE_TIMESTAMP, SOURCE_CHANNEL_TRANSCRIPT_ID,
               SOURCE_CHANNEL_SESSION_ID, OPENROUTER_API_KEY,
-              MEMORY_EXTRACTION_MODEL
+              MEMORY_EXTRACTION_MODEL, MEMORY_EXTRACTION_CACHE_TTL_HOURS,
+              MEMORY_EXTRACTION_CACHE_BYPASS, MEMORY_EXTRACTION_TRIAGE,
+              MEMORY_EXTRACTION_TRIAGE_AUDIT_RATE
   - Outputs extracted JSON to stdout
   - Exits 0 on success or empty extraction, non-zero on errors
 
+Batch mode (``extract_memories.py --batch``) reads extraction-worker job
+lines (JSONL) from stdin instead, extracts up to MAX_BATCH_MESSAGES messages
+per LLM request and prints one result line per job, in input order.
+
 Issues: #184 (bug), #112 (enhancement), #175 (enhancement), #141 (enhancement),
 #        #230 (ghost entity filtering), #267 (alternate_spellings column)
 """
 
+import hashlib
 import json
 import os
+import random
 import re
+import struct
 import sys
+import threading
 from typing import Any, Optional
 
 import psycopg2
 import psycopg2.extras
 import requests
 
+from entity_index import EntityIndex
+
 # ── Bootstrap: load OpenClaw env + pg config ──────────────────────────────────
 
 sys.path.insert(0, os.path.expanduser("~/.openclaw/lib"))
@@ -72,6 +84,64 @@ DEFAULT_MODEL = CONFIG.get("model") or "deepseek/deepseek-v4-flash"
 OPENROUTER_API_URL = CONFIG.get("api_url") or "https://openrouter.ai/api/v1/chat/completions"
 CONFIG_MAX_TOKENS = CONFIG.get("max_tokens") or 2048
 
+# Extraction cache (extraction_cache table, migration 090). Bump the prompt
+# version whenever EXTRACTION_INSTRUCTIONS, build_extraction_prompt() output
+# or call_llm() parsing changes, so cached results from the old prompt are
+# never served.
+EXTRACTION_PROMPT_VERSION = 2
+DEFAULT_CACHE_TTL_HOURS = 168.0
+
+# Mark the static instructions with an Anthropic-style cache_control
+# breakpoint (honoured by OpenRouter for providers that need explicit
+# breakpoints; providers with automatic prefix caching ignore it).
+PROMPT_CACHE_CONTROL = CONFIG.get("prompt_cache_control", True) is not False
+
+
+def _cache_ttl_hours() -> float:
+    """MEMORY_EXTRACTION_CACHE_TTL_HOURS > config cache_ttl_hours > default. 0 disables."""
+    raw = os.environ.get("MEMORY_EXTRACTION_CACHE_TTL_HOURS", "").strip()
+    if not raw and CONFIG.get("cache_ttl_hours") is not None:
+        raw = str(CONFIG["cache_ttl_hours"])
+    if raw:
+        try:
+            return max(0.0, float(raw))
+        except ValueError:
+            print(f"[extract_memories] WARNING: Invalid cache TTL {raw!r}, using default", file=sys.stderr)
+    return DEFAULT_CACHE_TTL_HOURS
+
+
+CACHE_TTL_HOURS = _cache_ttl_hours()
+
+# Micro-batching (extract_batch()): most messages folded into one LLM request.
+MAX_BATCH_MESSAGES = max(1, int(CONFIG.get("batch_max_messages") or 8))
+
+# Pre-LLM triage (triage()). The audit rate is the fraction of messages the
+# rules would skip that are extracted anyway, to measure false negatives.
+DEFAULT_TRIAGE_AUDIT_RATE = 0.05
+
+
+def _triage_settings() -> tuple:
+    """(enabled, audit rate): MEMORY_EXTRACTION_TRIAGE[_AUDIT_RATE] env > config > defaults."""
+    raw = os.environ.get("MEMORY_EXTRACTION_TRIAGE", "").strip().lower()
+    if raw:
+        enabled = raw not in ("0", "false", "no", "off")
+    else:
+        enabled = CONFIG.get("triage_enabled", True) is not False
+
+    raw = os.environ.get("MEMORY_EXTRACTION_TRIAGE_AUDIT_RATE", "").strip()
+    if not raw and CONFIG.get("triage_audit_rate") is not None:
+        raw = str(CONFIG["triage_audit_rate"])
+    rate = DEFAULT_TRIAGE_AUDIT_RATE
+    if raw:
+        try:
+            rate = min(1.0, max(0.0, float(raw)))
+        except ValueError:
+            print(f"[extract_memories] WARNING: Invalid triage audit rate {raw!r}, using default", file=sys.stderr)
+    return enabled, rate
+
+
+TRIAGE_ENABLED, TRIAGE_AUDIT_RATE = _triage_settings()
+
 # ── DB helpers ────────────────────────────────────────────────────────────────
 
 def get_db_connection():
@@ -79,10 +149,37 @@ def get_db_connection():
     return psycopg2.connect()
 
 
+# Process-wide entity name index (entity_index.py). None = resolve with SQL.
+_entity_index: Optional[EntityIndex] = None
+
+
+def use_entity_index(index: Optional[EntityIndex]) -> None:
+    """Install (or with None, remove) the index used by the entity resolvers."""
+    global _entity_index
+    _entity_index = index
+
+
+def get_entity_index() -> Optional[EntityIndex]:
+    return _entity_index
+
+
+def load_entity_index(conn) -> Optional[EntityIndex]:
+    """Build the entity index, or return None (SQL fallback) if loading fails."""
+    try:
+        return EntityIndex.load(conn, _normalize_for_domain_match)
+    except Exception as e:
+        print(f"[extract_memories] WARNING: Could not load entity index, using SQL lookups: {e}", file=sys.stderr)
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return None
+
+
 def lookup_default_visibility(sender_id: str, sender_provider: str, conn) -> str:
     """
     Look up the sender's default_visibility preference by matching
-    their SENDER_ID (phone / UUID) to an entity_fact.
+    their SENDER_ID (phone / UUID) to an entity_fact via entity_identifiers.
 
     Falls back to 'public' when not found.
     """
@@ -108,10 +205,10 @@ def lookup_default_visibility(sender_id: str, sender_provider: str, conn) -> str
                 cur.execute(
                     """
                     SELECT ef2.value
-                    FROM entity_facts ef1
-                    JOIN entity_facts ef2 ON ef1.entity_id = ef2.entity_id
-                    WHERE ef1.key IN ('phone', 'has_phone_number', 'signal')
-                      AND REGEXP_REPLACE(ef1.value, '[^0-9]', '', 'g') = %s
+                    FROM entity_identifiers i
+                    JOIN entity_facts ef2 ON i.entity_id = ef2.entity_id
+                    WHERE i.kind = 'phone' AND i.identifier = %s
+                      AND i.key IN ('phone', 'has_phone_number', 'signal')
                       AND ef2.key = 'default_visibility'
                     LIMIT 1
                     """,
@@ -125,10 +222,10 @@ def lookup_default_visibility(sender_id: str, sender_provider: str, conn) -> str
             cur.execute(
                 """
                 SELECT ef2.value
-                FROM entity_facts ef1
-                JOIN entity_facts ef2 ON ef1.entity_id = ef2.entity_id
-                WHERE ef1.key IN ('signal_uuid', 'discord_id', 'discord_username', 'github', 'email')
-                  AND LOWER(ef1.value) = LOWER(%s)
+                FROM entity_identifiers i
+                JOIN entity_facts ef2 ON i.entity_id = ef2.entity_id
+                WHERE i.kind = 'handle' AND i.identifier = LOWER(%s)
+                  AND i.key IN ('signal_uuid', 'discord_id', 'discord_username', 'github', 'email')
                   AND ef2.key = 'default_visibility'
                 LIMIT 1
                 """,
@@ -149,6 +246,10 @@ def _resolve_by_sender_id(sender_id: str, conn) -> Optional[int]:
     Platform IDs (Discord snowflakes, Telegram IDs, Signal UUIDs) are unique
     enough that matching on value alone is safe. We add a length/format guard
     to avoid false positives on short/common values.
+
+    The probe goes through entity_identifiers (migration 089), whose 'handle'
+    rows index lower(value) of every whitespace-free fact value; the join back
+    to entity_facts keeps the match case-sensitive.
     """
     if not sender_id or sender_id in ("", "unknown"):
         return None
@@ -170,11 +271,14 @@ def _resolve_by_sender_id(sender_id: str, conn) -> Optional[int]:
     with conn.cursor() as cur:
         cur.execute(
             """
-            SELECT DISTINCT entity_id FROM entity_facts
-            WHERE value = %s
+            SELECT i.entity_id
+            FROM entity_identifiers i
+            JOIN entity_facts ef ON ef.id = i.fact_id
+            WHERE i.kind = 'handle' AND i.identifier = LOWER(%s)
+              AND ef.value = %s
             LIMIT 1
             """,
-            (sender_id,)
+            (sender_id, sender_id)
         )
         row = cur.fetchone()
         if row:
@@ -203,9 +307,8 @@ def resolve_source_entity_id(
                 if digits_only:
                     cur.execute(
                         """
-                        SELECT DISTINCT entity_id FROM entity_facts
-                        WHERE key IN ('phone', 'has_phone_number', 'signal', 'signal_id')
-                          AND REGEXP_REPLACE(value, '[^0-9]', '', 'g') = %s
+                        SELECT entity_id FROM entity_identifiers
+                        WHERE kind = 'phone' AND identifier = %s
                         LIMIT 1
                         """,
                         (digits_only,),
@@ -215,6 +318,9 @@ def resolve_source_entity_id(
                         return row[0]
 
             # 3. Name / nickname match (lowest priority)
+            index = _entity_index
+            if index is not None:
+                return index.lookup(source_name, include_alternates=False)
             cur.execute(
                 """
                 SELECT id FROM entities
@@ -387,6 +493,9 @@ def find_entity_id(
       2. Exact/case-insensitive name, full_name, nicknames, alternate_spellings
       3. Domain-to-entity normalization (strip TLD -> normalize -> match names)
       4. Whole-word substring/containment matching
+
+    When an entity index is installed (use_entity_index()), steps 2-4 are
+    answered from memory instead of the queries below.
     """
     if not subject_name or subject_name in ("null", "unknown"):
         return None
@@ -403,6 +512,10 @@ def find_entity_id(
                 if value_match is not None:
                     return value_match
 
+            index = _entity_index
+            if index is not None:
+                return index.find(subject_name, _extract_domain_base(subject_name))
+
             # 2. Exact/case-insensitive name, full_name, nicknames, alternate_spellings
             cur.execute(
                 """
@@ -496,14 +609,20 @@ def ensure_entity(
             return existing_id
 
         # Second: name-only collision guard (RC-4) — catch type divergence before INSERT
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT id FROM entities WHERE LOWER(name) = LOWER(%s) LIMIT 1",
-                (name,),
-            )
-            row = cur.fetchone()
-            if row:
-                return row[0]
+        index = _entity_index
+        if index is not None:
+            existing_id = index.lookup_name(name)
+            if existing_id is not None:
+                return existing_id
+        else:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT id FROM entities WHERE LOWER(name) = LOWER(%s) LIMIT 1",
+                    (name,),
+                )
+                row = cur.fetchone()
+                if row:
+                    return row[0]
 
         # Third: INSERT
         with conn.cursor() as cur:
@@ -516,6 +635,8 @@ def ensure_entity(
                 (name, entity_type),
             )
             conn.commit()
+            if index is not None:
+                index.refresh(conn)  # pick up the row just inserted
             return find_entity_id(name, conn, sender_id, sender_provider, sender_name)
     except Exception as e:
         print(f"[extract_memories] WARNING: Could not ensure entity {name!r}: {e}", file=sys.stderr)
@@ -526,205 +647,243 @@ def ensure_entity(
         return None
 
 
-def find_existing_fact(entity_id: int, key: str, value: str, cur) -> Optional[dict]:
-    """Exact + fuzzy match for deduplication (mirrors dedup_helper.py)."""
-    # Exact match
-    cur.execute(
-        """
-        SELECT id, extraction_count
-        FROM entity_facts
-        WHERE entity_id = %s AND LOWER(key) = LOWER(%s) AND LOWER(value) = LOWER(%s)
-        LIMIT 1
-        """,
-        (entity_id, key, value),
-    )
-    row = cur.fetchone()
-    if row:
-        return {"id": row[0], "extraction_count": row[1]}
+FUZZY_MATCH_THRESHOLD = 0.85  # pg_trgm similarity() a fuzzy match must exceed
 
-    # Fuzzy match (pg_trgm)
-    try:
-        cur.execute(
-            """
-            SELECT id, extraction_count,
-                   similarity(LOWER(value), LOWER(%s)) AS sim
-            FROM entity_facts
-            WHERE entity_id = %s AND LOWER(key) = LOWER(%s)
-              AND similarity(LOWER(value), LOWER(%s)) > 0.85
-            ORDER BY sim DESC
-            LIMIT 1
-            """,
-            (value, entity_id, key, value),
-        )
-        row = cur.fetchone()
-        if row:
-            return {"id": row[0], "extraction_count": row[1], "fuzzy": True}
-    except Exception:
-        pass  # pg_trgm not installed — skip fuzzy
 
-    return None
+def _trigrams(text: str) -> set:
+    """pg_trgm's trigram set: each alphanumeric word padded as '  word '."""
+    grams = set()
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Python equivalent of pg_trgm similarity(), including its float4 result.
 
+    The float4 rounding matters at the cutoff: similarity() returns real, so
+    17/20 compares as 0.85000002 > 0.85 in SQL and must do so here as well.
+    """
+    ga, gb = _trigrams(a), _trigrams(b)
+    if not ga or not gb:
+        return 0.0
+    common = len(ga & gb)
+    return struct.unpack("f", struct.pack("f", common / (len(ga) + len(gb) - common)))[0]
+
+
+def _match_fact(candidates: list, value: str) -> Optional[dict]:
+    """Pick the existing fact ``value`` reinforces, or None.
 
-def store_or_reinforce_fact(
-    entity_id: int,
-    key: str,
-    value: str,
+    ``candidates`` holds the facts with the same entity and key (compared
+    case-insensitively), oldest first, with lower-cased values. A
+    case-insensitive exact value match wins; otherwise the candidate with the
+    highest trigram_similarity() above FUZZY_MATCH_THRESHOLD. Ties go to the
+    earliest fact.
+    """
+    lower = value.lower()
+    for cand in candidates:
+        if cand["value"] == lower:
+            return cand
+    best, best_sim = None, FUZZY_MATCH_THRESHOLD
+    for cand in candidates:
+        sim = trigram_similarity(cand["value"], lower)
+        if sim > best_sim:
+            best, best_sim = cand, sim
+    return best
+
+
+def store_facts_bulk(
+    facts: list[dict],
     source_entity_id: Optional[int],
-    visibility: str,
-    visibility_reason: Optional[str],
     conn,
     src_channel_transcript_id: str = "",
     src_channel_session_id: str = "",
-    durability: str = "long_term",
-    category: str = "observation",
-    expires: Optional[str] = None,
-    source_citation: Optional[str] = None,
-) -> str:
-    """Insert fact or reinforce if already exists. Returns 'created' or 'reinforced'."""
-    if src_channel_transcript_id:
-        print(f"[extract_memories]   channel_transcript_id={src_channel_transcript_id}", file=sys.stderr)
-    else:
-        print(f"[extract_memories]   channel_transcript_id NOT SET", file=sys.stderr)
-    if src_channel_session_id:
-        print(f"[extract_memories]   channel_session_id={src_channel_session_id}", file=sys.stderr)
-    else:
-        print(f"[extract_memories]   channel_session_id NOT SET", file=sys.stderr)
+) -> list[str]:
+    """Insert or reinforce many facts with a fixed number of statements.
+
+    Each fact dict carries entity_id, key and value plus the optional
+    columns visibility, visibility_reason, durability, category, expires and
+    source_citation. Facts are handled in order. A fact whose value matches
+    (_match_fact()) an existing fact with the same entity and key, or one
+    planned earlier in this batch, reinforces it: extraction_count goes up,
+    last_confirmed_at and updated_at are set to NOW(), and missing
+    source_channel_* ids are filled in. Any other fact is inserted. Given a
+    source_entity_id, each fact's attribution in entity_fact_sources is
+    upserted either way. The work is
+    one prefetch SELECT plus at most one multi-row INSERT, UPDATE and
+    entity_fact_sources upsert. Returns 'created' or 'reinforced' per fact.
+    The caller commits.
+    """
+    if not facts:
+        return []
 
-    with conn.cursor() as cur:
-        existing = find_existing_fact(entity_id, key, value, cur)
-        if existing:
-            # Reinforce
-            update_parts = [
-                "extraction_count = extraction_count + 1",
-                "last_confirmed_at = NOW()",
-                "updated_at = NOW()",
-            ]
-            params: list = []
-
-            if src_channel_transcript_id and src_channel_transcript_id.isdigit():
-                update_parts.append(
-                    "source_channel_transcript_id = COALESCE(source_channel_transcript_id, %s)"
-                )
-                params.append(int(src_channel_transcript_id))
-            if src_channel_session_id and src_channel_session_id.isdigit():
-                update_parts.append(
-                    "source_channel_session_id = COALESCE(source_channel_session_id, %s)"
-                )
-                params.append(int(src_channel_session_id))
+    transcript_id = (
+        int(src_channel_transcript_id)
+        if src_channel_transcript_id and src_channel_transcript_id.isdigit() else None
+    )
+    session_id = (
+        int(src_channel_session_id)
+        if src_channel_session_id and src_channel_session_id.isdigit() else None
+    )
+    print(
+        f"[extract_memories]   channel_transcript_id={transcript_id if transcript_id is not None else 'NOT SET'}"
+        f" channel_session_id={session_id if session_id is not None else 'NOT SET'}",
+        file=sys.stderr,
+    )
 
-            params.append(existing["id"])
-            cur.execute(
-                f"UPDATE entity_facts SET {', '.join(update_parts)} WHERE id = %s",
-                params,
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT id, entity_id, key, value
+            FROM entity_facts
+            WHERE entity_id = ANY(%s) AND LOWER(key) = ANY(%s)
+            ORDER BY id
+            """,
+            (
+                sorted({f["entity_id"] for f in facts}),
+                sorted({f["key"].lower() for f in facts}),
+            ),
+        )
+        candidates: dict[tuple, list] = {}
+        for fact_id, entity_id, key, value in cur.fetchall():
+            candidates.setdefault((entity_id, key.lower()), []).append(
+                {"id": fact_id, "value": value.lower()}
             )
 
-            # Upsert source attribution in entity_fact_sources
+        # Plan: every fact either matches a candidate (existing or planned
+        # earlier in this batch) or becomes a new planned row.
+        inserts: list[dict] = []
+        targets: list[dict] = []
+        actions: list[str] = []
+        for fact in facts:
+            bucket = candidates.setdefault((fact["entity_id"], fact["key"].lower()), [])
+            match = _match_fact(bucket, fact["value"])
+            if match is None:
+                match = {"id": None, "value": fact["value"].lower(), "fact": fact}
+                bucket.append(match)
+                inserts.append(match)
+                actions.append("created")
+            else:
+                actions.append("reinforced")
+            targets.append(match)
+
+        if inserts:
+            rows = psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO entity_facts (entity_id, key, value, visibility, durability, category,
+                                          visibility_reason, expires,
+                                          source_channel_transcript_id, source_channel_session_id)
+                VALUES %s
+                RETURNING id
+                """,
+                [
+                    (
+                        f["entity_id"], f["key"], f["value"],
+                        f.get("visibility") or "public",
+                        f.get("durability") or "long_term",
+                        f.get("category") or "observation",
+                        f.get("visibility_reason") or None,
+                        f.get("expires") or None,
+                        transcript_id, session_id,
+                    )
+                    for f in (planned["fact"] for planned in inserts)
+                ],
+                template="(%s, %s, %s, %s, %s, %s, %s, %s::timestamptz, %s, %s)",
+                page_size=len(inserts),
+                fetch=True,
+            )
+            for planned, row in zip(inserts, rows):
+                planned["id"] = row[0]
+
+        reinforcements: dict[int, int] = {}
+        attributions: dict[int, list] = {}
+        for fact, target, action in zip(facts, targets, actions):
+            if action == "reinforced":
+                reinforcements[target["id"]] = reinforcements.get(target["id"], 0) + 1
             if source_entity_id is not None:
-                cur.execute(
-                    """
-                    INSERT INTO entity_fact_sources (fact_id, source_entity_id, source_citation, attribution_count, first_seen, last_seen)
-                    VALUES (%s, %s, %s, 1, NOW(), NOW())
-                    ON CONFLICT (fact_id, source_entity_id)
-                    DO UPDATE SET
-                        attribution_count = entity_fact_sources.attribution_count + 1,
-                        last_seen = NOW()
-                    """,
-                    (existing["id"], source_entity_id, source_citation),
-                )
-
-            return "reinforced"
-        else:
-            # Insert new
-            cols = ["entity_id", "key", "value", "visibility", "durability", "category"]
-            vals: list = [entity_id, key, value, visibility, durability, category]
-            ph = ["%s"] * 6
-
-            if visibility_reason:
-                cols.append("visibility_reason")
-                vals.append(visibility_reason)
-                ph.append("%s")
-            if expires:
-                cols.append("expires")
-                vals.append(expires)
-                ph.append("%s")
-            if src_channel_transcript_id and src_channel_transcript_id.isdigit():
-                cols.append("source_channel_transcript_id")
-                vals.append(int(src_channel_transcript_id))
-                ph.append("%s")
-            if src_channel_session_id and src_channel_session_id.isdigit():
-                cols.append("source_channel_session_id")
-                vals.append(int(src_channel_session_id))
-                ph.append("%s")
+                if target["id"] in attributions:
+                    attributions[target["id"]][3] += 1
+                else:
+                    attributions[target["id"]] = [
+                        target["id"], source_entity_id, fact.get("source_citation") or None, 1,
+                    ]
 
-            cur.execute(
-                f"INSERT INTO entity_facts ({', '.join(cols)}) VALUES ({', '.join(ph)}) RETURNING id",
-                vals,
+        if reinforcements:
+            psycopg2.extras.execute_values(
+                cur,
+                """
+                UPDATE entity_facts AS f SET
+                    extraction_count = f.extraction_count + v.n,
+                    last_confirmed_at = NOW(),
+                    updated_at = NOW(),
+                    source_channel_transcript_id = COALESCE(f.source_channel_transcript_id, v.transcript_id),
+                    source_channel_session_id = COALESCE(f.source_channel_session_id, v.session_id)
+                FROM (VALUES %s) AS v(id, n, transcript_id, session_id)
+                WHERE f.id = v.id
+                """,
+                [(fact_id, n, transcript_id, session_id) for fact_id, n in reinforcements.items()],
+                template="(%s, %s, %s::bigint, %s::bigint)",
+                page_size=len(reinforcements),
             )
-            row = cur.fetchone()
-            new_fact_id = row[0] if row else None
 
-            # Insert source attribution
-            if new_fact_id and source_entity_id is not None:
-                cur.execute(
-                    """
-                    INSERT INTO entity_fact_sources (fact_id, source_entity_id, source_citation, attribution_count, first_seen, last_seen)
-                    VALUES (%s, %s, %s, 1, NOW(), NOW())
-                    ON CONFLICT (fact_id, source_entity_id)
-                    DO UPDATE SET
-                        attribution_count = entity_fact_sources.attribution_count + 1,
-                        last_seen = NOW()
-                    """,
-                    (new_fact_id, source_entity_id, source_citation),
-                )
+        if attributions:
+            psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO entity_fact_sources (fact_id, source_entity_id, source_citation, attribution_count, first_seen, last_seen)
+                VALUES %s
+                ON CONFLICT (fact_id, source_entity_id)
+                DO UPDATE SET
+                    attribution_count = entity_fact_sources.attribution_count + EXCLUDED.attribution_count,
+                    last_seen = NOW()
+                """,
+                [tuple(row) for row in attributions.values()],
+                template="(%s, %s, %s, %s, NOW(), NOW())",
+                page_size=len(attributions),
+            )
 
-            return "created"
+    return actions
 
 
 # ── Prompt builder ────────────────────────────────────────────────────────────
 
-def build_extraction_prompt(
-    text: str,
-    sender: str,
-    sender_id: str,
-    sender_provider: str,
-    is_group: bool,
-    default_visibility: str,
-) -> str:
-    # Build a platform-aware sender label
-    provider_label = sender_provider.lower() if sender_provider else "unknown"
-    is_agent_sender = sender_provider == "openclaw" or sender_id.startswith("agent:")
-
-    agent_instructions = ""
-    if is_agent_sender:
-        agent_instructions = """IMPORTANT: The sender is an AI agent, not a human user.
+def _agent_instructions(sender_id: str, sender_provider: str) -> str:
+    """Extra guidance for messages whose sender is an AI agent, else ""."""
+    if not (sender_provider == "openclaw" or sender_id.startswith("agent:")):
+        return ""
+    return """IMPORTANT: The sender is an AI agent, not a human user.
 - Statements expressing the agent's own opinions, preferences, or assessments are SELF-REPORTED facts. The subject is the agent itself.
 - Statements relaying information about other entities (users, systems, etc.) that the agent is parroting from prior knowledge are NOT the agent's own facts. Attribute them to the entity they are about, or skip if already known.
 - Examples:
   - "I find debugging satisfying" → subject=agent, key=preference_debugging, self-reported
   - "I)ruid prefers dark mode" → subject=I)ruid, key=preference_editor_theme — this is relayed, not the agent's opinion"""
 
-    if provider_label == "discord":
-        sender_label = f"Discord user ID: {sender_id}"
-    elif provider_label == "signal":
-        sender_label = f"Signal phone: {sender_id}"
-    elif provider_label == "telegram":
-        sender_label = f"Telegram user: {sender_id}"
-    else:
-        sender_label = f"{provider_label.capitalize()} user: {sender_id}" if sender_id else f"User: {sender}"
-
-    return f"""Extract memory data as JSON from a conversation message.
 
-SENDER: {sender}
-SENDER_ID_LABEL: {sender_label}
-IS_GROUP_CHAT: {is_group}
-USER_DEFAULT_VISIBILITY: {default_visibility}
-{agent_instructions}
-MESSAGE:
-{text}
+def _sender_label(sender: str, sender_id: str, sender_provider: str) -> str:
+    """Platform-aware description of the sender id for the prompt header."""
+    provider_label = sender_provider.lower() if sender_provider else "unknown"
+    if provider_label == "discord":
+        return f"Discord user ID: {sender_id}"
+    if provider_label == "signal":
+        return f"Signal phone: {sender_id}"
+    if provider_label == "telegram":
+        return f"Telegram user: {sender_id}"
+    return f"{provider_label.capitalize()} user: {sender_id}" if sender_id else f"User: {sender}"
+
+
+# The static instructions go first, as their own system message, so every
+# extraction request starts with the same bytes and provider-side prompt
+# caching can reuse the prefix. Only the message and its sender context (the
+# user turn built below) vary between calls. Keep this text free of anything
+# per-message; changing it invalidates the provider caches and requires an
+# EXTRACTION_PROMPT_VERSION bump.
+EXTRACTION_INSTRUCTIONS = """You extract memory data as JSON from conversation messages. The message to extract from, with its sender context, follows these instructions.
 
 IMPORTANT INSTRUCTIONS:
 
-1. EXTRACT facts, opinions, events, decisions, and other memory-worthy information from the message above.
+1. EXTRACT facts, opinions, events, decisions, and other memory-worthy information from the message at the end of this request.
 
 2. FOR EVERY EXTRACTED ITEM, include:
    - subject: who the fact is ABOUT (may be the sender or someone else they're talking about)
@@ -746,7 +905,7 @@ observation, preference, identity, mood, decision, routine, state, obligation
 The LLM may use other appropriate categories not in this list.
 
 PRIVACY DETECTION:
-The user's default visibility is "{default_visibility}".
+The sender's default visibility is the USER_DEFAULT_VISIBILITY given with the message.
 - If default is "private": everything is private UNLESS they explicitly say otherwise
 - If default is "public": everything is public UNLESS they explicitly say otherwise
 
@@ -780,9 +939,9 @@ Known agents: Coder (coding), Gidget (git-ops), Scout (research), IRIS (creative
 Return a JSON object. Omit empty arrays.
 
 TEMPLATE:
-{{
+{
   "facts": [
-    {{
+    {
       "subject": "Name of the person/entity this fact is ABOUT",
       "key": "descriptive_snake_case_key",
       "value": "the actual information",
@@ -792,18 +951,18 @@ TEMPLATE:
       "visibility": "public|private|trusted",
       "visibility_reason": "optional",
       "expires": "optional ISO-8601 timestamp"
-    }}
+    }
   ],
   "entities": [
-    {{"name": "Full name", "type": "person|ai|organization|place", "visibility": "public"}}
+    {"name": "Full name", "type": "person|ai|organization|place", "visibility": "public"}
   ],
   "events": [
-    {{"description": "what happened", "date": "ISO-8601 or natural language", "visibility": "public"}}
+    {"description": "what happened", "date": "ISO-8601 or natural language", "visibility": "public"}
   ],
   "vocabulary": [
-    {{"word": "the term", "category": "name|brand|technical|slang", "misheard_as": "optional", "visibility": "public"}}
+    {"word": "the term", "category": "name|brand|technical|slang", "misheard_as": "optional", "visibility": "public"}
   ]
-}}
+}
 
 RULES:
 - Source attribution is handled automatically. Do NOT include source_person in your output. The sender of the message is always the source.
@@ -820,11 +979,93 @@ PHONE NUMBER RULE: ANY extracted phone number MUST have visibility="private" reg
 
 TEMPORAL BOUNDARY RULE: When a statement implies a time limit (e.g., "I'll be in Austin until Friday", "working remotely this week"), set the "expires" field to an ISO-8601 timestamp. Do NOT set expires for permanent facts ("My name is Dustin").
 
-If the message contains NO extractable new information (casual chat, acknowledgments, etc), return: {{}}
+If the message contains NO extractable new information (casual chat, acknowledgments, etc), return: {}
+
+Return ONLY valid JSON, no markdown fences."""
+
+
+def build_extraction_prompt(
+    text: str,
+    sender: str,
+    sender_id: str,
+    sender_provider: str,
+    is_group: bool,
+    default_visibility: str,
+) -> str:
+    """Volatile part of a single-message request, sent after EXTRACTION_INSTRUCTIONS."""
+    return f"""Extract memory data as JSON from this conversation message.
+
+SENDER: {sender}
+SENDER_ID_LABEL: {_sender_label(sender, sender_id, sender_provider)}
+IS_GROUP_CHAT: {is_group}
+USER_DEFAULT_VISIBILITY: {default_visibility}
+{_agent_instructions(sender_id, sender_provider)}
+MESSAGE:
+{text}"""
+
+
+BATCH_EXTRACTION_INSTRUCTIONS = EXTRACTION_INSTRUCTIONS + """
+
+BATCH OUTPUT (replaces the single-message return format above):
+The request ends with several numbered messages instead of one. Return ONE JSON object of the form {"messages": [...]} with exactly one entry per message, in message order.
+Each entry is {"id": <message number>} plus that message's "facts", "entities", "events" and "vocabulary", following the TEMPLATE.
+Extract each message only from its own text and sender context. Never attribute one message's content to another message's sender.
+A message with NO extractable new information is just {"id": <message number>}.
 
 Return ONLY valid JSON, no markdown fences."""
 
 
+def build_batch_extraction_prompt(messages: list) -> str:
+    """
+    Volatile part of a batch request, sent after BATCH_EXTRACTION_INSTRUCTIONS.
+
+    ``messages`` are dicts with the build_extraction_prompt() arguments
+    (text, sender, sender_id, sender_provider, is_group, default_visibility).
+    They are numbered from 1; the reply is {"messages": [{"id": n, ...}]},
+    each entry shaped like a single-message result.
+    """
+    blocks = []
+    for n, m in enumerate(messages, 1):
+        blocks.append(f"""=== MESSAGE {n} ===
+SENDER: {m["sender"]}
+SENDER_ID_LABEL: {_sender_label(m["sender"], m["sender_id"], m["sender_provider"])}
+IS_GROUP_CHAT: {m["is_group"]}
+USER_DEFAULT_VISIBILITY: {m["default_visibility"]}
+{_agent_instructions(m["sender_id"], m["sender_provider"])}
+MESSAGE:
+{m["text"]}""")
+    return (
+        f"Extract memory data as JSON from each of the {len(messages)} conversation messages below. "
+        "Treat every message independently: its sender, group flag and default visibility apply to it alone.\n\n"
+        + "\n\n".join(blocks)
+    )
+
+
+def split_batch_result(parsed: dict, count: int) -> dict:
+    """
+    Map message number (1-based) to its result from a batch reply.
+
+    Entries without a usable id (missing, out of range, or repeating an
+    earlier entry's) are ignored; extract_batch() re-extracts any message
+    left without a result on its own.
+    """
+    results = {}
+    entries = parsed.get("messages") if isinstance(parsed, dict) else None
+    if not isinstance(entries, list):
+        return results
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            n = int(entry.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= n <= count or n in results:
+            continue
+        results[n] = {k: v for k, v in entry.items() if k != "id"}
+    return results
+
+
 # ── JSON repair (optional dependency) ─────────────────────────────────────────
 
 def _load_json_repair() -> Any:
@@ -858,19 +1099,105 @@ def _repair_json(content: str) -> Optional[str]:
 
 # ── LLM call ──────────────────────────────────────────────────────────────────
 
-def call_llm(prompt: str, api_key: str, model: str) -> dict:
+# ── LLM usage accounting ─────────────────────────────────────────────────────
+
+_usage_lock = threading.Lock()
+_usage_totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                 "cache_read_tokens": 0, "cache_write_tokens": 0}
+
+
+def parse_llm_usage(usage: Any) -> dict:
+    """
+    Token counts from a chat-completions ``usage`` object.
+
+    Cache reads and writes are reported differently per provider:
+    OpenRouter/OpenAI ``prompt_tokens_details.cached_tokens`` and
+    ``cache_write_tokens``, Anthropic ``cache_read_input_tokens`` and
+    ``cache_creation_input_tokens``, DeepSeek ``prompt_cache_hit_tokens``.
+    Missing fields count as 0.
+    """
+    if not isinstance(usage, dict):
+        usage = {}
+    details = usage.get("prompt_tokens_details")
+    if not isinstance(details, dict):
+        details = {}
+
+    def _int(*values):
+        for value in values:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return int(value)
+        return 0
+
+    return {
+        "prompt_tokens": _int(usage.get("prompt_tokens"), usage.get("input_tokens")),
+        "completion_tokens": _int(usage.get("completion_tokens"), usage.get("output_tokens")),
+        "cache_read_tokens": _int(
+            details.get("cached_tokens"),
+            usage.get("cache_read_input_tokens"),
+            usage.get("prompt_cache_hit_tokens"),
+        ),
+        "cache_write_tokens": _int(
+            details.get("cache_write_tokens"),
+            usage.get("cache_creation_input_tokens"),
+        ),
+    }
+
+
+def _record_llm_usage(usage: Any) -> None:
+    counts = parse_llm_usage(usage)
+    with _usage_lock:
+        _usage_totals["calls"] += 1
+        for key, value in counts.items():
+            _usage_totals[key] += value
+    print(
+        "[extract_memories] LLM usage: "
+        + " ".join(f"{key.replace('_tokens', '')}={value}" for key, value in counts.items()),
+        file=sys.stderr,
+    )
+
+
+def llm_usage_totals() -> dict:
+    """Token totals across this process's successful LLM calls (see parse_llm_usage())."""
+    with _usage_lock:
+        return dict(_usage_totals)
+
+
+def call_llm(
+    prompt: str,
+    api_key: str,
+    model: str,
+    session=None,
+    max_tokens: Optional[int] = None,
+    instructions: Optional[str] = None,
+) -> dict:
     """
     Call OpenRouter API and return parsed JSON dict.
 
+    ``session`` is an optional ``requests.Session``. Long-lived callers
+    (extraction-worker.py) pass one so the HTTPS connection to the endpoint
+    is kept alive between messages; without it every call connects afresh.
+    ``max_tokens`` overrides the configured completion budget (batch prompts
+    need room for several results). ``instructions`` is sent first as a
+    system message (the byte-stable, cacheable prefix) and ``prompt`` after
+    it as the user turn. Token usage, including provider prompt-cache reads
+    and writes, is logged and added to llm_usage_totals().
+
     Raises on HTTP errors or JSON parse failures.
     """
+    messages = [{"role": "user", "content": prompt}]
+    if instructions:
+        system = instructions
+        if PROMPT_CACHE_CONTROL:
+            system = [{"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}}]
+        messages.insert(0, {"role": "system", "content": system})
     payload = {
         "model": model,
-        "max_tokens": CONFIG_MAX_TOKENS,
-        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens or CONFIG_MAX_TOKENS,
+        "messages": messages,
     }
+    post = session.post if session is not None else requests.post
     try:
-        resp = requests.post(
+        resp = post(
             OPENROUTER_API_URL,
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -892,6 +1219,9 @@ def call_llm(prompt: str, api_key: str, model: str) -> dict:
     except ValueError as e:
         raise RuntimeError(f"LLM API returned non-JSON response: {e}") from e
 
+    if isinstance(resp_json, dict):
+        _record_llm_usage(resp_json.get("usage"))
+
     content = None
     try:
         content = resp_json["choices"][0]["message"]["content"]
@@ -948,6 +1278,162 @@ def call_llm(prompt: str, api_key: str, model: str) -> dict:
     return parsed
 
 
+# ── Pre-LLM triage ────────────────────────────────────────────────────────────
+
+# Same markers memory-catchup.sh skips: agent/tool plumbing, never user content.
+_RE_TOOL_CHATTER = re.compile(
+    r'^(?:HEARTBEAT|NO_REPLY|System:)|Read HEARTBEAT\.md|DASHBOARD UPDATE'
+)
+_RE_SLASH_COMMAND = re.compile(r'^/[A-Za-z][\w-]*(?:\s|$)')
+_RE_TRIAGE_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+_RE_LETTER = re.compile(r'[^\W\d_]')
+_RE_DIGIT = re.compile(r'\d')
+
+# Acknowledgements, greetings and reactions. No pronouns that can carry a
+# self-report ("I", "my", "we") and nothing that can name a person or place.
+_TRIAGE_FILLER_WORDS = frozenset("""
+    a ah agreed alright all also and any anytime appreciate appreciated awesome aww
+    back brb bye cheers cool cya day done exactly evening everyone fair fine for
+    gm gn good goodnight got great guys ha haha hahaha happy have hehe hello hey hi
+    hmm huh indeed it k kk later lmao lol makes man morning much nah neat nice
+    night no nope np oh ok okay omg oops perfect problem right see sense sounds
+    so sure that thank thanks that's the then this thx to too true ty u ugh up
+    very welcome well will wow ya yay yeah yep yes yo you yup
+""".split())
+TRIAGE_MAX_FILLER_WORDS = 8
+
+
+def triage_rule(text: str) -> Optional[str]:
+    """
+    Name of the rule that marks ``text`` as having nothing to extract, else None.
+
+    Conservative by design: a message is only ruled out when it is tool
+    chatter, a slash command, has no letters and too few digits for a phone
+    number, or is a short run of pure filler words ("ok thanks!", "good
+    morning everyone"). Anything else goes to the LLM.
+    """
+    text = text.strip()
+    if _RE_TOOL_CHATTER.search(text):
+        return "tool_chatter"
+    if _RE_SLASH_COMMAND.match(text):
+        return "command"
+    if not _RE_LETTER.search(text):
+        return "no_words" if len(_RE_DIGIT.findall(text)) < 7 else None
+    if _RE_DIGIT.search(text):
+        return None
+    words = [w.lower().replace("’", "'") for w in _RE_TRIAGE_WORD.findall(text)]
+    if 0 < len(words) <= TRIAGE_MAX_FILLER_WORDS and all(w in _TRIAGE_FILLER_WORDS for w in words):
+        return "filler"
+    return None
+
+
+def triage(text: str) -> tuple:
+    """
+    Pre-LLM triage for one message: returns ``(skip, rule)``.
+
+    ``skip`` is True when a triage rule matched and the message should be
+    answered with an empty extraction without calling the LLM. A matched
+    message is still extracted with probability TRIAGE_AUDIT_RATE; then
+    ``skip`` is False and ``rule`` is set, and the caller passes the result to
+    log_triage_audit(). Both decisions are logged. With triage disabled this
+    always returns (False, None).
+    """
+    if not TRIAGE_ENABLED:
+        return False, None
+    rule = triage_rule(text)
+    if rule is None:
+        return False, None
+    if random.random() < TRIAGE_AUDIT_RATE:
+        print(f"[extract_memories] Triage: rule={rule} matched, extracting anyway for audit", file=sys.stderr)
+        return False, rule
+    print(f"[extract_memories] Triage: skipped without LLM call (rule={rule}, len={len(text.strip())})",
+          file=sys.stderr)
+    return True, rule
+
+
+def log_triage_audit(rule: str, extracted: Any) -> None:
+    """Log what the LLM found in a message triage would have skipped."""
+    counts = {
+        section: len(extracted.get(section) or []) if isinstance(extracted, dict) else 0
+        for section in ("facts", "entities", "events", "vocabulary")
+    }
+    outcome = "false_negative" if any(counts.values()) else "confirmed_empty"
+    print(
+        f"[extract_memories] Triage audit: rule={rule} outcome={outcome} "
+        + " ".join(f"{k}={v}" for k, v in counts.items()),
+        file=sys.stderr,
+    )
+
+
+# ── Extraction cache ──────────────────────────────────────────────────────────
+
+def extraction_cache_key(text: str, model: str, context: dict) -> tuple:
+    """(prompt version, model, message hash, context hash) for one extraction.
+
+    ``context`` holds every other input build_extraction_prompt() renders
+    (sender, sender id/provider, group flag, default visibility), so two calls
+    share a key only when they would send the same prompt to the same model.
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    context_hash = hashlib.sha256(
+        json.dumps(context, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return (EXTRACTION_PROMPT_VERSION, model, text_hash, context_hash)
+
+
+def read_extraction_cache(key: tuple, conn) -> Optional[dict]:
+    """Return the unexpired cached result for ``key``, or None.
+
+    Cache errors (e.g. migration 090 not applied) are logged and treated as a
+    miss; they never fail the extraction.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT result FROM extraction_cache
+                WHERE prompt_version = %s AND model = %s AND text_hash = %s AND context_hash = %s
+                  AND expires_at > NOW()
+                """,
+                key,
+            )
+            row = cur.fetchone()
+        # call_llm() only ever returns dicts; anything else is not a usable entry
+        return row[0] if row and isinstance(row[0], dict) else None
+    except Exception as e:
+        print(f"[extract_memories] WARNING: extraction cache read failed: {e}", file=sys.stderr)
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return None
+
+
+def write_extraction_cache(key: tuple, result: dict, conn, ttl_hours: float) -> None:
+    """Store (or refresh) the parsed LLM result for ``key`` and commit."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO extraction_cache (prompt_version, model, text_hash, context_hash, result, expires_at)
+                VALUES (%s, %s, %s, %s, %s, NOW() + make_interval(secs => %s))
+                ON CONFLICT (prompt_version, model, text_hash, context_hash)
+                DO UPDATE SET
+                    result = EXCLUDED.result,
+                    created_at = NOW(),
+                    expires_at = EXCLUDED.expires_at
+                """,
+                (*key, psycopg2.extras.Json(result), ttl_hours * 3600),
+            )
+        conn.commit()
+    except Exception as e:
+        print(f"[extract_memories] WARNING: extraction cache write failed: {e}", file=sys.stderr)
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
+
 # ── Storage ───────────────────────────────────────────────────────────────────
 
 def coerce_fact_value(raw_value: Any, key: str = "") -> Optional[str]:
@@ -994,6 +1480,8 @@ def store_extracted(
         if ent.get("name")
     }
 
+    pending_facts: list[dict] = []
+
     def _store_fact(
         subject_name: str,
         key: str,
@@ -1005,7 +1493,7 @@ def store_extracted(
         expires: Optional[str] = None,
         source_citation: Optional[str] = None,
     ) -> None:
-        """Find/create entity and store a fact.
+        """Find/create entity and queue a fact for store_facts_bulk().
 
         Source is ALWAYS the message sender (source_entity_id), resolved once
         at the top of store_extracted() from the sender_id. The LLM only
@@ -1034,22 +1522,18 @@ def store_extracted(
             )
             return
 
-        action = store_or_reinforce_fact(
-            entity_id=entity_id,
-            key=key,
-            value=value,
-            source_entity_id=source_entity_id,  # always the sender
-            visibility=visibility,
-            visibility_reason=visibility_reason,
-            conn=conn,
-            src_channel_transcript_id=src_channel_transcript_id,
-            src_channel_session_id=src_channel_session_id,
-            durability=durability,
-            category=category,
-            expires=expires,
-            source_citation=source_citation,
-        )
-        print(f"[extract_memories]   {action}: {subject_name}.{key} = {value[:60]}", file=sys.stderr)
+        pending_facts.append({
+            "subject": subject_name,
+            "entity_id": entity_id,
+            "key": key,
+            "value": value,
+            "visibility": visibility,
+            "visibility_reason": visibility_reason,
+            "durability": durability,
+            "category": category,
+            "expires": expires,
+            "source_citation": source_citation,
+        })
 
     # ── entities ──────────────────────────────────────────────────────────────
     for ent in data.get("entities", []) or []:
@@ -1089,6 +1573,17 @@ def store_extracted(
 
         _store_fact(subject, key, value, visibility, visibility_reason, durability, category, expires, source_citation)
 
+    # One prefetch and a few multi-row writes for the whole fact list.
+    actions = store_facts_bulk(
+        pending_facts,
+        source_entity_id,  # always the sender
+        conn,
+        src_channel_transcript_id=src_channel_transcript_id,
+        src_channel_session_id=src_channel_session_id,
+    )
+    for fact, action in zip(pending_facts, actions):
+        print(f"[extract_memories]   {action}: {fact['subject']}.{fact['key']} = {fact['value'][:60]}", file=sys.stderr)
+
     # ── vocabulary ────────────────────────────────────────────────────────────
     for vocab in data.get("vocabulary", []) or []:
         word = (vocab.get("word") or "").strip()
@@ -1184,12 +1679,321 @@ def store_extracted(
 
 # ── Main entry point ──────────────────────────────────────────────────────────
 
-def main() -> int:
+def extract_message(
+    text: str,
+    conn,
+    api_key: str,
+    model: str,
+    sender_name: str = "unknown",
+    sender_id: str = "",
+    sender_provider: str = "",
+    is_group: bool = False,
+    session=None,
+    cache_bypass: bool = False,
+) -> dict:
+    """
+    Prepare the sender and run the LLM extraction for one message.
+
+    Looks up the sender's default visibility, ensures the sender entity (and a
+    phone fact for phone-number sender ids) exists, then calls the LLM. The
+    caller owns ``conn`` and passes the result to store_extracted(). Shared by
+    main() and extraction-worker.py; raises whatever call_llm() raises.
+
+    Parsed results are served from and written to the extraction cache unless
+    the TTL is 0. ``cache_bypass`` skips the read but still refreshes the entry.
+    """
+    default_visibility = prepare_sender(conn, sender_name, sender_id, sender_provider)
+    text = text.strip()
+
+    cache_key = None
+    if CACHE_TTL_HOURS > 0:
+        cache_key = extraction_cache_key(
+            text, model, _cache_context(sender_name, sender_id, sender_provider, is_group, default_visibility)
+        )
+        if not cache_bypass:
+            cached = read_extraction_cache(cache_key, conn)
+            if cached is not None:
+                print("[extract_memories] Extraction cache hit", file=sys.stderr)
+                return cached
+
+    # Call LLM
+    prompt = build_extraction_prompt(text, sender_name, sender_id, sender_provider, is_group, default_visibility)
+    extracted = call_llm(prompt, api_key, model, session=session, instructions=EXTRACTION_INSTRUCTIONS)
+    if cache_key is not None:
+        write_extraction_cache(cache_key, extracted, conn, CACHE_TTL_HOURS)
+    return extracted
+
+
+def prepare_sender(conn, sender_name: str, sender_id: str, sender_provider: str) -> str:
+    """
+    Sender bookkeeping done before extraction; returns the default visibility.
+
+    Ensures the sender entity exists and records a phone fact for phone-number
+    sender ids. Shared by extract_message() and extract_batch().
+    """
+    # Look up sender's default visibility preference
+    default_visibility = lookup_default_visibility(sender_id, sender_provider, conn)
+
+    # Ensure sender entity exists
+    if sender_name and sender_name != "unknown":
+        ensure_entity(sender_name, "person", conn, sender_id, sender_provider, sender_name)
+        # If we have a sender_id that looks like a phone number, store it
+        # Skip platform IDs (Discord snowflakes, Telegram chat IDs, etc.) — only store actual phone numbers
+        if sender_id and sender_id not in ("", "unknown") and sender_provider in ("signal", "whatsapp", "sms", ""):
+            entity_id = find_entity_id(sender_name, conn, sender_id, sender_provider, sender_name)
+            if entity_id is not None:
+                digits = re.sub(r"[^0-9+]", "", sender_id)
+                # Only store if it looks like a real phone number (starts with + or has 10-15 digits)
+                if digits and (digits.startswith("+") or 10 <= len(digits) <= 15):
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            """
+                            INSERT INTO entity_facts (entity_id, key, value, visibility, durability, category)
+                            VALUES (%s, 'phone', %s, 'private', 'permanent', 'identity')
+                            ON CONFLICT DO NOTHING
+                            """,
+                            (entity_id, sender_id),
+                        )
+                    conn.commit()
+
+    return default_visibility
+
+
+def _cache_context(
+    sender_name: str, sender_id: str, sender_provider: str, is_group: bool, default_visibility: str
+) -> dict:
+    """The prompt inputs besides the text that extraction_cache_key() hashes."""
+    return {
+        "sender": sender_name,
+        "sender_id": sender_id,
+        "sender_provider": sender_provider,
+        "is_group": is_group,
+        "default_visibility": default_visibility,
+    }
+
+
+def extract_batch(messages: list, conn, api_key: str, model: str, session=None) -> list:
+    """
+    Extract several messages with as few LLM requests as possible.
+
+    ``messages`` are dicts of extract_message() arguments: "text" plus
+    optional "sender_name", "sender_id", "sender_provider", "is_group" and
+    "cache_bypass". Each sender is prepared and the cache consulted exactly as
+    in extract_message(); the misses go to the LLM up to MAX_BATCH_MESSAGES
+    per request. A message the batch reply leaves out, or every message of a
+    batch whose reply cannot be parsed, is re-extracted on its own.
+
+    Returns one entry per message, in order: the extracted dict, or the
+    exception its extraction raised, so one bad message never fails the rest.
+    The caller stores each dict with store_extracted() and that message's
+    source metadata.
+    """
+    results = [None] * len(messages)
+    pending = []  # (index, build_extraction_prompt() kwargs, cache key)
+    for i, message in enumerate(messages):
+        fields = {
+            "text": (message.get("text") or "").strip(),
+            "sender": message.get("sender_name") or "unknown",
+            "sender_id": message.get("sender_id") or "",
+            "sender_provider": message.get("sender_provider") or "",
+            "is_group": bool(message.get("is_group")),
+        }
+        try:
+            fields["default_visibility"] = prepare_sender(
+                conn, fields["sender"], fields["sender_id"], fields["sender_provider"]
+            )
+        except Exception as e:
+            conn.rollback()
+            results[i] = e
+            continue
+
+        cache_key = None
+        if CACHE_TTL_HOURS > 0:
+            cache_key = extraction_cache_key(fields["text"], model, _cache_context(
+                fields["sender"], fields["sender_id"], fields["sender_provider"],
+                fields["is_group"], fields["default_visibility"],
+            ))
+            if not message.get("cache_bypass"):
+                cached = read_extraction_cache(cache_key, conn)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+        pending.append((i, fields, cache_key))
+
+    def _finish(i, extracted, cache_key):
+        results[i] = extracted
+        if cache_key is not None:
+            write_extraction_cache(cache_key, extracted, conn, CACHE_TTL_HOURS)
+
+    batched = alone = 0
+    for start in range(0, len(pending), MAX_BATCH_MESSAGES):
+        chunk = pending[start:start + MAX_BATCH_MESSAGES]
+        split = {}
+        if len(chunk) > 1:
+            prompt = build_batch_extraction_prompt([fields for _, fields, _ in chunk])
+            try:
+                split = split_batch_result(
+                    call_llm(prompt, api_key, model, session=session,
+                             max_tokens=CONFIG_MAX_TOKENS * len(chunk),
+                             instructions=BATCH_EXTRACTION_INSTRUCTIONS),
+                    len(chunk),
+                )
+            except JsonParseFailure as e:
+                print(f"[extract_memories] WARNING: Batch reply unusable, extracting one by one: {e}",
+                      file=sys.stderr)
+            except Exception as e:
+                # Endpoint/transport failure: retrying each message would fail the same way.
+                for i, _, _ in chunk:
+                    results[i] = e
+                continue
+
+        for n, (i, fields, cache_key) in enumerate(chunk, 1):
+            if n in split:
+                batched += 1
+                _finish(i, split[n], cache_key)
+                continue
+            alone += 1
+            try:
+                _finish(i, call_llm(build_extraction_prompt(**fields), api_key, model, session=session,
+                                    instructions=EXTRACTION_INSTRUCTIONS), cache_key)
+            except Exception as e:
+                results[i] = e
+
+    print(
+        f"[extract_memories] Batch of {len(messages)}: {len(messages) - len(pending)} cached or failed "
+        f"before the LLM, {batched} from batch requests, {alone} extracted alone",
+        file=sys.stderr,
+    )
+    return results
+
+
+def _job_field(job: dict, field: str, default: str = "") -> str:
+    value = job.get(field)
+    if value is None:
+        return default
+    return str(value).strip() or default
+
+
+def _failure_reply(e: Exception) -> dict:
+    """extraction-worker.py style reply for a failed job (exit-code contract of main())."""
+    if isinstance(e, JsonParseFailure):
+        return {"status": "failed", "exit_code": 2, "failure_reason": "json_parse_failure", "error": str(e)}
+    return {"status": "failed", "exit_code": 1, "failure_reason": "nonzero_exit", "error": str(e)}
+
+
+def main_batch() -> int:
+    """
+    ``--batch``: extract a backlog of jobs from stdin in batched LLM requests.
+
+    Each stdin line is an extraction-worker.py job object ("content",
+    "sender_name", ..., "source_channel_session_id", optional "model" and
+    "cache_bypass"). Each stdout line is the matching worker-style reply, in
+    input order. Every result is stored through store_extracted() with its own
+    job's source metadata. Returns 0 when every job succeeded, else 1.
+    """
+    api_key = os.environ.get("OPENROUTER_API_KEY", "").strip()
+    if not api_key:
+        print("[extract_memories] ERROR: OPENROUTER_API_KEY not set", file=sys.stderr)
+        return 1
+    default_model = os.environ.get("MEMORY_EXTRACTION_MODEL", DEFAULT_MODEL).strip() or DEFAULT_MODEL
+    env_bypass = os.environ.get("MEMORY_EXTRACTION_CACHE_BYPASS", "").lower() in ("true", "1", "yes")
+
+    jobs = []
+    replies = []
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        replies.append(None)
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("job must be a JSON object")
+        except ValueError as e:
+            replies[-1] = {"status": "failed", "exit_code": 1, "failure_reason": "nonzero_exit",
+                           "error": f"invalid job line: {e}"}
+            continue
+        text = job.get("content") or ""
+        if not isinstance(text, str) or len(text.strip()) < MIN_MESSAGE_LENGTH:
+            replies[-1] = {"status": "skipped", "exit_code": 0, "extracted": {}}
+            continue
+        skip, triage_rule_name = triage(text)
+        if skip:
+            replies[-1] = {"status": "skipped", "exit_code": 0, "extracted": {}}
+            continue
+        jobs.append((len(replies) - 1, job, triage_rule_name))
+
+    if jobs:
+        try:
+            conn = get_db_connection()
+        except Exception as e:
+            print(f"[extract_memories] ERROR: DB connection failed: {e}", file=sys.stderr)
+            return 1
+
+        try:
+            use_entity_index(load_entity_index(conn))
+            by_model = {}
+            for slot, job, rule in jobs:
+                by_model.setdefault(_job_field(job, "model", default_model), []).append((slot, job, rule))
+
+            for model, group in by_model.items():
+                messages = [{
+                    "text": job["content"],
+                    "sender_name": _job_field(job, "sender_name", "unknown"),
+                    "sender_id": _job_field(job, "sender_id"),
+                    "sender_provider": _job_field(job, "sender_provider"),
+                    "is_group": job.get("is_group") in (True, 1, "true", "1", "yes"),
+                    "cache_bypass": env_bypass or job.get("cache_bypass") in (True, 1, "true", "1", "yes"),
+                } for _, job, _ in group]
+                results = extract_batch(messages, conn, api_key, model)
+
+                for (slot, job, rule), message, extracted in zip(group, messages, results):
+                    if isinstance(extracted, Exception):
+                        print(f"[extract_memories] ERROR: {extracted}", file=sys.stderr)
+                        replies[slot] = _failure_reply(extracted)
+                        continue
+                    if rule:
+                        log_triage_audit(rule, extracted)
+                    try:
+                        if extracted:
+                            store_extracted(
+                                data=extracted,
+                                sender_name=message["sender_name"],
+                                sender_id=message["sender_id"],
+                                sender_provider=message["sender_provider"],
+                                src_timestamp=_job_field(job, "source_timestamp"),
+                                src_channel_transcript_id=_job_field(job, "source_channel_transcript_id"),
+                                src_channel_session_id=_job_field(job, "source_channel_session_id"),
+                                conn=conn,
+                            )
+                        replies[slot] = {"status": "complete", "exit_code": 0, "extracted": extracted}
+                    except Exception as e:
+                        print(f"[extract_memories] ERROR: {e}", file=sys.stderr)
+                        conn.rollback()
+                        replies[slot] = _failure_reply(e)
+        finally:
+            use_entity_index(None)
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    for reply in replies:
+        print(json.dumps(reply))
+    return 0 if all(r["exit_code"] == 0 for r in replies) else 1
+
+
+def main(argv: Optional[list] = None) -> int:
     """
     Read text from stdin, extract memories via LLM, store to DB.
 
+    ``--batch`` switches to main_batch() (JSONL jobs on stdin).
+
     Returns process exit code (0 = success, 1 = error).
     """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--batch"]:
+        return main_batch()
+
     # Read message from stdin
     try:
         text = sys.stdin.read()
@@ -1203,6 +2007,11 @@ def main() -> int:
         print("{}")
         return 0
 
+    skip, triage_rule_name = triage(text)
+    if skip:
+        print("{}")
+        return 0
+
     # Read environment variables
     api_key = os.environ.get("OPENROUTER_API_KEY", "").strip()
     if not api_key:
@@ -1230,6 +2039,7 @@ def main() -> int:
     if source_context:
         print(f"[extract_memories] Source context: {source_context}", file=sys.stderr)
     model = os.environ.get("MEMORY_EXTRACTION_MODEL", DEFAULT_MODEL).strip() or DEFAULT_MODEL
+    cache_bypass = os.environ.get("MEMORY_EXTRACTION_CACHE_BYPASS", "").lower() in ("true", "1", "yes")
 
     print(
         f"[extract_memories] Processing message from {sender_name!r} "
@@ -1245,36 +2055,22 @@ def main() -> int:
         return 1
 
     try:
-        # Look up sender's default visibility preference
-        default_visibility = lookup_default_visibility(sender_id, sender_provider, conn)
-
-        # Ensure sender entity exists
-        if sender_name and sender_name != "unknown":
-            ensure_entity(sender_name, "person", conn, sender_id, sender_provider, sender_name)
-            # If we have a sender_id that looks like a phone number, store it
-            # Skip platform IDs (Discord snowflakes, Telegram chat IDs, etc.) — only store actual phone numbers
-            if sender_id and sender_id not in ("", "unknown") and sender_provider in ("signal", "whatsapp", "sms", ""):
-                entity_id = find_entity_id(sender_name, conn, sender_id, sender_provider, sender_name)
-                if entity_id is not None:
-                    digits = re.sub(r"[^0-9+]", "", sender_id)
-                    # Only store if it looks like a real phone number (starts with + or has 10-15 digits)
-                    if digits and (digits.startswith("+") or 10 <= len(digits) <= 15):
-                        with conn.cursor() as cur:
-                            cur.execute(
-                                """
-                                INSERT INTO entity_facts (entity_id, key, value, visibility, durability, category)
-                                VALUES (%s, 'phone', %s, 'private', 'permanent', 'identity')
-                                ON CONFLICT DO NOTHING
-                                """,
-                                (entity_id, sender_id),
-                            )
-                        conn.commit()
-
-        # Build extraction prompt
-        prompt = build_extraction_prompt(text.strip(), sender_name, sender_id, sender_provider, is_group, default_visibility)
-
-        # Call LLM
-        extracted = call_llm(prompt, api_key, model)
+        # One scan of entities instead of several per mention (entity_index.py)
+        use_entity_index(load_entity_index(conn))
+
+        extracted = extract_message(
+            text,
+            conn,
+            api_key,
+            model,
+            sender_name=sender_name,
+            sender_id=sender_id,
+            sender_provider=sender_provider,
+            is_group=is_group,
+            cache_bypass=cache_bypass,
+        )
+        if triage_rule_name:
+            log_triage_audit(triage_rule_name, extracted)
 
         # Output extracted JSON to stdout
         print(json.dumps(extracted))
@@ -1312,6 +2108,7 @@ def main() -> int:
         traceback.print_exc(file=sys.stderr)
         return 1
     finally:
+        use_entity_index(None)
         try:
             conn.close()
         except Exception:
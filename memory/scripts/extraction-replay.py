@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Extraction Replay: concurrent in-process replay of the extraction_failures
+dead-letter table (#485).
+
+extraction-replay.sh walks pending rows serially under a flock, BATCH_LIMIT
+at a time, spawning extract_memories.py for each row through psql/jq
+plumbing. This engine replays in one process instead:
+
+  - each worker claims pending rows with SELECT ... FOR UPDATE SKIP LOCKED on
+    its own claim connection and holds the row locks until the outcome is
+    written, so several replayers (or several workers) never take the same
+    row and no flock is needed; a crash simply releases the rows;
+  - each worker keeps one extraction context (a work connection, the shared
+    entity index and keep-alive HTTP session) and extracts its claim with
+    extract_memories.extract_batch(), storing every result through
+    store_extracted() with the row's own sender and transcript;
+  - rate limits and endpoint outages (HTTP 429/5xx, transport errors) pause
+    every worker with a shared exponential backoff and leave the row's
+    retry budget untouched; the run stops after --give-up consecutive
+    throttled claims;
+  - every row is attempted at most once per run, and throughput is logged.
+
+Row outcomes follow extraction-replay.sh: resolved, retry_count + 1 (then
+retry_exhausted at --max-retries), or unreplayable when neither the linked
+channel_transcripts row nor the stored content has a body.
+
+Usage:
+    python extraction-replay.py
+    python extraction-replay.py --workers 8 --claim-size 8 --max-rows 2000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+import requests
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import extract_memories  # noqa: E402  (loads OpenClaw env + pg config on import)
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = int(os.environ.get("EXTRACTION_REPLAY_MAX_RETRIES") or 5)
+DEFAULT_GIVE_UP = 6
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 60.0
+PROGRESS_INTERVAL_S = 30.0
+
+# call_llm() failures that say nothing about the message itself.
+_RE_THROTTLED = re.compile(r"^LLM API call failed: (?:HTTP (?:429|5\d\d)\b|(?!HTTP ))")
+
+CLAIM_SQL = """
+    SELECT f.id,
+           f.channel_transcript_id,
+           f.sender_name,
+           f.sender_id,
+           f.retry_count,
+           COALESCE(NULLIF(ct.content, ''), NULLIF(f.content, '')) AS body,
+           ct.session_id
+    FROM extraction_failures f
+    LEFT JOIN channel_transcripts ct ON ct.id = f.channel_transcript_id
+    WHERE f.status = 'pending'
+      AND (f.last_attempt_at IS NULL OR f.last_attempt_at < %s)
+    ORDER BY f.retry_count ASC, f.created_at ASC, f.id ASC
+    LIMIT %s
+    FOR UPDATE OF f SKIP LOCKED
+"""
+
+OUTCOME_SQL = {
+    "resolved": """
+        UPDATE extraction_failures
+        SET status = 'resolved', resolved_at = NOW(), updated_at = NOW()
+        WHERE id = ANY(%(ids)s)
+    """,
+    "failed": """
+        UPDATE extraction_failures
+        SET retry_count = retry_count + 1,
+            last_attempt_at = NOW(),
+            status = CASE WHEN retry_count + 1 >= %(max_retries)s THEN 'retry_exhausted' ELSE status END,
+            updated_at = NOW()
+        WHERE id = ANY(%(ids)s)
+    """,
+    "throttled": """
+        UPDATE extraction_failures
+        SET last_attempt_at = NOW(), updated_at = NOW()
+        WHERE id = ANY(%(ids)s)
+    """,
+    "unreplayable": """
+        UPDATE extraction_failures
+        SET status = 'unreplayable', updated_at = NOW()
+        WHERE id = ANY(%(ids)s)
+    """,
+}
+
+
+def log(msg):
+    print(f"[extraction-replay] {msg}", file=sys.stderr, flush=True)
+
+
+def is_throttled(error):
+    """True for rate limits and endpoint/transport failures from call_llm()."""
+    return isinstance(error, RuntimeError) and not isinstance(error, extract_memories.JsonParseFailure) \
+        and bool(_RE_THROTTLED.match(str(error)))
+
+
+class Backoff:
+    """Exponential pause shared by all workers while the LLM endpoint throttles.
+
+    ``throttled()`` doubles the delay (with jitter, capped at ``cap``) and
+    pushes the shared resume time out; ``ok()`` resets it. ``exhausted``
+    turns true after ``give_up`` throttled claims in a row.
+    """
+
+    def __init__(self, base=BACKOFF_BASE_S, cap=BACKOFF_MAX_S, give_up=DEFAULT_GIVE_UP):
+        self.base = base
+        self.cap = cap
+        self.give_up = give_up
+        self.consecutive = 0
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def throttled(self):
+        with self._lock:
+            self.consecutive += 1
+            delay = min(self.cap, self.base * 2 ** (self.consecutive - 1)) * (0.5 + random.random() / 2)
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+            return delay
+
+    def ok(self):
+        with self._lock:
+            self.consecutive = 0
+
+    @property
+    def exhausted(self):
+        return self.give_up > 0 and self.consecutive >= self.give_up
+
+    def wait(self, stop):
+        """Sleep until the shared resume time (returns early once ``stop`` is set)."""
+        while not stop.is_set():
+            with self._lock:
+                remaining = self._resume_at - time.monotonic()
+            if remaining <= 0:
+                return
+            stop.wait(min(remaining, 1.0))
+
+
+class ReplayEngine:
+    """Drains pending extraction_failures rows with ``workers`` threads.
+
+    ``connect`` opens a DB connection; each worker opens two (claim and
+    work). ``max_rows`` (0 = no limit) caps the rows claimed in this run.
+    """
+
+    def __init__(self, connect, api_key, model, workers=DEFAULT_WORKERS, claim_size=None,
+                 max_rows=0, max_retries=DEFAULT_MAX_RETRIES, backoff=None, session=None):
+        self.connect = connect
+        self.api_key = api_key
+        self.model = model
+        self.workers = max(1, workers)
+        self.claim_size = max(1, claim_size or extract_memories.MAX_BATCH_MESSAGES)
+        self.max_rows = max(0, max_rows)
+        self.max_retries = max_retries
+        self.backoff = backoff or Backoff()
+        self.session = session or requests.Session()
+        self.stop = threading.Event()
+        self.run_started_at = None
+        self._lock = threading.Lock()
+        self._claimed = 0
+        self.stats = {"processed": 0, "resolved": 0, "failed": 0, "retry_exhausted": 0,
+                      "unreplayable": 0, "throttled": 0}
+        self._started = time.monotonic()
+
+    # ── Run ──────────────────────────────────────────────────────────────────
+
+    def run(self):
+        """Replay until nothing is claimable, then return the stats dict."""
+        conn = self.connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT NOW()")
+                self.run_started_at = cur.fetchone()[0]
+            conn.rollback()
+            index = extract_memories.load_entity_index(conn)
+            conn.rollback()
+        finally:
+            conn.close()
+        if index is not None:
+            try:
+                index.listen(self.connect)
+            except Exception as e:
+                log(f"WARNING: could not LISTEN for entity changes, picking up new ids only: {e}")
+            extract_memories.use_entity_index(index)
+
+        self._started = time.monotonic()
+        threads = [threading.Thread(target=self._worker, args=(n,), daemon=True)
+                   for n in range(self.workers)]
+        try:
+            for t in threads:
+                t.start()
+            next_report = time.monotonic() + PROGRESS_INTERVAL_S
+            while any(t.is_alive() for t in threads):
+                for t in threads:
+                    t.join(0.5)
+                if time.monotonic() >= next_report:
+                    log(f"progress: {self.summary()}")
+                    next_report += PROGRESS_INTERVAL_S
+        except KeyboardInterrupt:
+            log("interrupted; letting workers finish their current claims")
+            self.stop.set()
+            for t in threads:
+                t.join()
+        finally:
+            if index is not None:
+                extract_memories.use_entity_index(None)
+                index.close()
+        return self.snapshot()
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        elapsed = time.monotonic() - self._started
+        stats["elapsed_s"] = round(elapsed, 1)
+        stats["rows_per_min"] = round(stats["processed"] * 60 / elapsed, 1) if elapsed > 0 else 0.0
+        return stats
+
+    def summary(self):
+        return " ".join(f"{key}={value}" for key, value in self.snapshot().items())
+
+    # ── Worker ───────────────────────────────────────────────────────────────
+
+    def _reserve(self):
+        """How many rows this worker may claim next (0 once max_rows is reached)."""
+        with self._lock:
+            if not self.max_rows:
+                return self.claim_size
+            n = min(self.claim_size, self.max_rows - self._claimed)
+            self._claimed += max(0, n)
+            return max(0, n)
+
+    def _unreserve(self, n):
+        if self.max_rows and n > 0:
+            with self._lock:
+                self._claimed -= n
+
+    def _worker(self, n):
+        try:
+            claim_conn = self.connect()
+            work_conn = self.connect()
+        except Exception as e:
+            log(f"worker {n}: DB connection failed: {e}")
+            return
+        try:
+            while not self.stop.is_set():
+                self.backoff.wait(self.stop)
+                limit = self._reserve()
+                if not limit:
+                    return
+                try:
+                    rows = self.claim(claim_conn, limit)
+                except Exception as e:
+                    log(f"worker {n}: claim failed: {e}")
+                    return
+                self._unreserve(limit - len(rows))
+                if not rows:
+                    claim_conn.rollback()
+                    return
+                try:
+                    outcomes = self.replay(rows, work_conn)
+                    self.record(claim_conn, outcomes)
+                    claim_conn.commit()
+                except Exception as e:
+                    log(f"worker {n}: replay of rows {[r[0] for r in rows]} aborted: {e}")
+                    claim_conn.rollback()
+                    return
+                if self.backoff.exhausted:
+                    log(f"LLM endpoint still throttling after {self.backoff.consecutive} attempts; stopping run")
+                    self.stop.set()
+        finally:
+            for conn in (claim_conn, work_conn):
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def claim(self, conn, limit):
+        """Lock up to ``limit`` pending rows not yet attempted in this run."""
+        with conn.cursor() as cur:
+            cur.execute(CLAIM_SQL, (self.run_started_at, limit))
+            return cur.fetchall()
+
+    def replay(self, rows, conn):
+        """Extract and store the claimed rows; returns {row id: outcome}."""
+        outcomes = {}
+        jobs = []
+        for row in rows:
+            row_id, body = row[0], row[5]
+            if not body:
+                outcomes[row_id] = "unreplayable"
+            elif len(body.strip()) < extract_memories.MIN_MESSAGE_LENGTH or extract_memories.triage(body)[0]:
+                outcomes[row_id] = "resolved"  # extract_memories.py exits 0 for these
+            else:
+                jobs.append(row)
+        if not jobs:
+            return outcomes
+
+        index = extract_memories.get_entity_index()
+        if index is not None:
+            index.refresh(conn)
+        messages = [{"text": row[5], "sender_name": row[2] or "unknown", "sender_id": row[3] or ""}
+                    for row in jobs]
+        results = extract_memories.extract_batch(messages, conn, self.api_key, self.model,
+                                                 session=self.session)
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        throttled = []
+        for row, message, extracted in zip(jobs, messages, results):
+            row_id, transcript_id, session_id = row[0], row[1], row[6]
+            if isinstance(extracted, Exception):
+                if is_throttled(extracted):
+                    throttled.append((row_id, extracted))
+                    outcomes[row_id] = "throttled"
+                else:
+                    log(f"row id={row_id} replay failed: {extracted}")
+                    outcomes[row_id] = "failed"
+                continue
+            try:
+                if extracted:
+                    extract_memories.store_extracted(
+                        data=extracted,
+                        sender_name=message["sender_name"],
+                        sender_id=message["sender_id"],
+                        sender_provider="",
+                        src_timestamp=timestamp,
+                        src_channel_transcript_id=str(transcript_id or ""),
+                        src_channel_session_id=str(session_id or ""),
+                        conn=conn,
+                    )
+                outcomes[row_id] = "resolved"
+            except Exception as e:
+                log(f"row id={row_id} store failed: {e}")
+                conn.rollback()
+                outcomes[row_id] = "failed"
+
+        # The backoff counts claims, not rows: one throttled batch is one step.
+        if throttled:
+            delay = self.backoff.throttled()
+            log(f"rows {[row_id for row_id, _ in throttled]} throttled ({throttled[0][1]}); "
+                f"backing off {delay:.1f}s")
+        else:
+            self.backoff.ok()
+        return outcomes
+
+    def record(self, conn, outcomes):
+        """Write the outcomes on the claim connection (one UPDATE per outcome)."""
+        by_outcome = {}
+        for row_id, outcome in outcomes.items():
+            by_outcome.setdefault(outcome, []).append(row_id)
+        with conn.cursor() as cur:
+            for outcome, ids in by_outcome.items():
+                cur.execute(OUTCOME_SQL[outcome], {"ids": ids, "max_retries": self.max_retries})
+            exhausted = 0
+            if by_outcome.get("failed"):
+                cur.execute(
+                    "SELECT COUNT(*) FROM extraction_failures WHERE id = ANY(%s) AND status = 'retry_exhausted'",
+                    (by_outcome["failed"],),
+                )
+                exhausted = cur.fetchone()[0]
+        with self._lock:
+            self.stats["processed"] += sum(len(ids) for o, ids in by_outcome.items() if o != "throttled")
+            for outcome, ids in by_outcome.items():
+                self.stats[outcome] += len(ids)
+            self.stats["retry_exhausted"] += exhausted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay extraction_failures concurrently")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent replay workers (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--claim-size", type=int, default=extract_memories.MAX_BATCH_MESSAGES,
+                        help="Rows each worker claims and extracts per batch "
+                             f"(default: {extract_memories.MAX_BATCH_MESSAGES})")
+    parser.add_argument("--max-rows", type=int,
+                        default=int(os.environ.get("EXTRACTION_REPLAY_MAX_ROWS") or 0),
+                        help="Stop after claiming this many rows (default: 0, drain the backlog)")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f"Failed attempts before retry_exhausted (default: {DEFAULT_MAX_RETRIES})")
+    parser.add_argument("--give-up", type=int, default=DEFAULT_GIVE_UP,
+                        help="Stop the run after this many throttled claims in a row "
+                             f"(default: {DEFAULT_GIVE_UP}, 0 = never)")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("OPENROUTER_API_KEY", "").strip()
+    if not api_key:
+        log("ERROR: OPENROUTER_API_KEY not set")
+        return 1
+    model = os.environ.get("MEMORY_EXTRACTION_MODEL", "").strip() or extract_memories.DEFAULT_MODEL
+
+    engine = ReplayEngine(
+        extract_memories.get_db_connection,
+        api_key,
+        model,
+        workers=args.workers,
+        claim_size=args.claim_size,
+        max_rows=args.max_rows,
+        max_retries=args.max_retries,
+        backoff=Backoff(give_up=args.give_up),
+    )
+    engine.session.mount(
+        "https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=engine.workers)
+    )
+    log(f"replaying with {engine.workers} workers, claim size {engine.claim_size}, model {model}")
+    try:
+        engine.run()
+    finally:
+        engine.session.close()
+    log(f"Run complete: {engine.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Extraction Worker: resident memory-extraction service on a local Unix socket.
+
+The memory-extract hook used to spawn extract_memories.py for every message,
+paying for interpreter startup, load_openclaw_env()/load_pg_env(), a fresh
+psycopg2.connect() and a new HTTPS connection to the LLM endpoint each time.
+This service does all of that once: it keeps a pooled set of DB connections
+and one keep-alive requests.Session, and runs jobs with bounded concurrency,
+so extraction throughput is limited by the LLM rather than by process churn.
+
+Usage:
+    python extraction-worker.py
+    python extraction-worker.py --socket ~/.openclaw/run/extract.sock --workers 4 --queue-depth 16
+    python extraction-worker.py --batch-window-ms 250 --batch-size 8
+
+Protocol (newline-delimited JSON, one job per line, connections may be reused
+for several jobs; each reply is written when its job finishes):
+
+    → {"content": "message", "sender_name": "...", "sender_id": "...",
+       "sender_provider": "...", "is_group": false,
+       "source_session_id": "...", "source_timestamp": "...",
+       "source_channel_transcript_id": "42", "source_channel_session_id": "7",
+       "model": "optional override", "cache_bypass": false}
+    ← {"status": "complete", "exit_code": 0, "extracted": {...}}
+
+Job fields are the environment variables extract_memories.py reads, lower
+cased. "exit_code" follows the script's exit-code contract (0 success or
+nothing to extract, 1 error, 2 JSON parse failure) and "failure_reason" uses
+the extraction_failures taxonomy, so the hook dead-letters worker failures
+exactly like child-process failures.
+
+Backpressure: at most --workers jobs run at once and at most --queue-depth
+more wait for a slot. A job arriving beyond that is answered immediately with
+{"status": "busy"} instead of queueing without bound; the hook then falls
+back to spawning extract_memories.py for that message. Jobs that
+extract_memories.triage() rules out are answered {"status": "skipped"} before
+admission, so fact-free chatter never occupies a slot.
+{"op": "ping"} returns {"ok": true, "stats": {...}} for health checks.
+
+Micro-batching (--batch-window-ms > 0): admitted jobs are collected for up to
+that many milliseconds (or until --batch-size jobs, per model) and extracted
+with extract_memories.extract_batch(), one LLM request for the whole group.
+Each job still gets its own reply and its own store_extracted() call, so
+bursts cost fewer requests and prompt tokens without changing attribution.
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import psycopg2
+import requests
+from psycopg2 import pool as pg_pool
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import extract_memories  # noqa: E402  (loads OpenClaw env + pg config on import)
+import socket_server  # noqa: E402
+from extract_memories import _failure_reply, _job_field  # noqa: E402
+
+DEFAULT_SOCKET_PATH = os.environ.get(
+    "MEMORY_EXTRACT_SOCKET",
+    os.path.expanduser("~/.openclaw/run/extract.sock"),
+)
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_DEPTH = 16
+DEFAULT_BATCH_WINDOW_MS = 0  # off: one LLM request per job
+MAX_REQUEST_BYTES = 256 * 1024
+
+
+def log(msg):
+    socket_server.log("extraction-worker", msg)
+
+
+class ExtractionService:
+    """Runs extraction jobs against pooled DB connections and one HTTP session.
+
+    ``workers`` bounds concurrent jobs (and the connection pool); ``queue_depth``
+    bounds how many more may wait for a slot before new jobs are refused.
+    With ``batch_window_ms`` > 0, jobs are grouped into micro-batches of at
+    most ``batch_size``; each batch occupies one slot while it runs.
+    """
+
+    def __init__(self, api_key, workers=DEFAULT_WORKERS, queue_depth=DEFAULT_QUEUE_DEPTH,
+                 default_model=None, batch_window_ms=DEFAULT_BATCH_WINDOW_MS, batch_size=None):
+        self.api_key = api_key
+        self.default_model = default_model or extract_memories.DEFAULT_MODEL
+        self.workers = workers
+        self.capacity = workers + queue_depth
+        self.pool = pg_pool.ThreadedConnectionPool(1, workers)
+        self.session = requests.Session()
+        self.session.mount(
+            "https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        )
+        self._slots = threading.BoundedSemaphore(workers)
+        self._admit_lock = threading.Lock()
+        self._admitted = 0
+        self.started_at = time.time()
+        self._stats_lock = threading.Lock()
+        self.stats = {"jobs": 0, "complete": 0, "skipped": 0, "triaged": 0, "failed": 0,
+                      "busy": 0, "batches": 0, "total_ms": 0.0}
+        self.batch_window = max(0, batch_window_ms) / 1000.0
+        self.batch_size = max(1, batch_size or extract_memories.MAX_BATCH_MESSAGES)
+        self._batch_queue = queue.Queue()
+        self._collector = None
+        if self.batch_window > 0:
+            self._collector = threading.Thread(target=self._collect_batches, daemon=True)
+            self._collector.start()
+
+    def start_entity_index(self):
+        """Load the shared entity index and LISTEN for entity changes.
+
+        The index lives for the whole process; each job refreshes it
+        incrementally (new ids plus ids from entities_changed notifications).
+        If it cannot be loaded, resolution falls back to SQL lookups.
+        """
+        conn = self.pool.getconn()
+        try:
+            index = extract_memories.load_entity_index(conn)
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn, close=bool(conn.closed))
+        if index is None:
+            return
+        try:
+            index.listen(psycopg2.connect)
+        except Exception as e:
+            log(f"WARNING: could not LISTEN for entity changes, picking up new ids only: {e}")
+        extract_memories.use_entity_index(index)
+        log(f"entity index loaded ({len(index)} entities)")
+
+    def handle(self, request):
+        """Run one job dict (or a ping) and return the reply dict."""
+        if request.get("op") == "ping":
+            return {"ok": True, "stats": self.snapshot_stats()}
+
+        text = request.get("content") or ""
+        if not isinstance(text, str) or len(text.strip()) < extract_memories.MIN_MESSAGE_LENGTH:
+            self._count("skipped")
+            return {"status": "skipped", "exit_code": 0, "extracted": {}}
+
+        skip, triage_rule = extract_memories.triage(text)
+        if skip:
+            self._count("triaged")
+            return {"status": "skipped", "exit_code": 0, "extracted": {}}
+
+        if not self._admit():
+            self._count("busy")
+            return {"status": "busy", "error": f"extraction queue full ({self.capacity} jobs)"}
+        try:
+            if self._collector is not None:
+                future = Future()
+                self._batch_queue.put((request, text, triage_rule, future))
+                reply, elapsed_ms = future.result()
+            else:
+                with self._slots:
+                    started = time.monotonic()
+                    reply = self._run(request, text, triage_rule)
+                    elapsed_ms = (time.monotonic() - started) * 1000
+        finally:
+            with self._admit_lock:
+                self._admitted -= 1
+
+        with self._stats_lock:
+            self.stats["jobs"] += 1
+            self.stats["total_ms"] += elapsed_ms
+            self.stats["complete" if reply["exit_code"] == 0 else "failed"] += 1
+        return reply
+
+    def _admit(self):
+        with self._admit_lock:
+            if self._admitted >= self.capacity:
+                return False
+            self._admitted += 1
+            return True
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _run(self, job, text, triage_rule=None):
+        sender_name = _job_field(job, "sender_name", "unknown")
+        sender_id = _job_field(job, "sender_id")
+        sender_provider = _job_field(job, "sender_provider")
+        model = _job_field(job, "model", self.default_model)
+        is_group = job.get("is_group") in (True, 1, "true", "1", "yes")
+        cache_bypass = job.get("cache_bypass") in (True, 1, "true", "1", "yes")
+        log(
+            f"job from {sender_name!r} (len={len(text.strip())}, model={model}, "
+            f"transcript_id={_job_field(job, 'source_channel_transcript_id')!r})"
+        )
+
+        try:
+            conn = self.pool.getconn()
+        except Exception as e:
+            log(f"ERROR: DB connection failed: {e}")
+            return {"status": "failed", "exit_code": 1, "failure_reason": "nonzero_exit",
+                    "error": f"DB connection failed: {e}"}
+
+        try:
+            index = extract_memories.get_entity_index()
+            if index is not None:
+                index.refresh(conn)
+            extracted = extract_memories.extract_message(
+                text,
+                conn,
+                self.api_key,
+                model,
+                sender_name=sender_name,
+                sender_id=sender_id,
+                sender_provider=sender_provider,
+                is_group=is_group,
+                session=self.session,
+                cache_bypass=cache_bypass,
+            )
+            if triage_rule:
+                extract_memories.log_triage_audit(triage_rule, extracted)
+            if extracted:
+                extract_memories.store_extracted(
+                    data=extracted,
+                    sender_name=sender_name,
+                    sender_id=sender_id,
+                    sender_provider=sender_provider,
+                    src_timestamp=_job_field(job, "source_timestamp"),
+                    src_channel_transcript_id=_job_field(job, "source_channel_transcript_id"),
+                    src_channel_session_id=_job_field(job, "source_channel_session_id"),
+                    conn=conn,
+                )
+            return {"status": "complete", "exit_code": 0, "extracted": extracted}
+        except Exception as e:
+            log(f"ERROR: {e}")
+            return _failure_reply(e)
+        finally:
+            # Never hand a connection back mid-transaction; drop dead ones.
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            self.pool.putconn(conn, close=bool(conn.closed))
+
+    def _collect_batches(self):
+        """Group queued jobs by model into batches and start each on its own thread.
+
+        A batch closes when ``batch_window`` has passed since its first job or
+        when it holds ``batch_size`` jobs. A None item stops the collector.
+        """
+        while True:
+            item = self._batch_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._batch_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._batch_queue.put(None)
+                    break
+                batch.append(item)
+
+            by_model = {}
+            for item in batch:
+                by_model.setdefault(_job_field(item[0], "model", self.default_model), []).append(item)
+            for model, items in by_model.items():
+                threading.Thread(target=self._run_batch_slot, args=(model, items), daemon=True).start()
+
+    def _run_batch_slot(self, model, items):
+        """Run one batch under a worker slot and resolve each job's future."""
+        try:
+            with self._slots:
+                started = time.monotonic()
+                replies = self._run_batch(model, [item[:3] for item in items])
+                elapsed_ms = (time.monotonic() - started) * 1000
+            self._count("batches")
+        except Exception as e:
+            log(f"ERROR: batch failed: {e}")
+            replies = [{"status": "failed", "exit_code": 1, "failure_reason": "nonzero_exit",
+                        "error": str(e)}] * len(items)
+            elapsed_ms = 0.0
+        for (_, _, _, future), reply in zip(items, replies):
+            future.set_result((reply, elapsed_ms))
+
+    def _run_batch(self, model, jobs):
+        """Extract ``jobs`` ((job, text, triage rule) tuples) together; one reply per job, in order."""
+        messages = [{
+            "text": text,
+            "sender_name": _job_field(job, "sender_name", "unknown"),
+            "sender_id": _job_field(job, "sender_id"),
+            "sender_provider": _job_field(job, "sender_provider"),
+            "is_group": job.get("is_group") in (True, 1, "true", "1", "yes"),
+            "cache_bypass": job.get("cache_bypass") in (True, 1, "true", "1", "yes"),
+        } for job, text, _ in jobs]
+        log(f"batch of {len(jobs)} jobs (model={model})")
+
+        try:
+            conn = self.pool.getconn()
+        except Exception as e:
+            log(f"ERROR: DB connection failed: {e}")
+            return [{"status": "failed", "exit_code": 1, "failure_reason": "nonzero_exit",
+                     "error": f"DB connection failed: {e}"}] * len(jobs)
+
+        try:
+            index = extract_memories.get_entity_index()
+            if index is not None:
+                index.refresh(conn)
+            results = extract_memories.extract_batch(
+                messages, conn, self.api_key, model, session=self.session
+            )
+            replies = []
+            for (job, _, triage_rule), message, extracted in zip(jobs, messages, results):
+                try:
+                    if isinstance(extracted, Exception):
+                        raise extracted
+                    if triage_rule:
+                        extract_memories.log_triage_audit(triage_rule, extracted)
+                    if extracted:
+                        extract_memories.store_extracted(
+                            data=extracted,
+                            sender_name=message["sender_name"],
+                            sender_id=message["sender_id"],
+                            sender_provider=message["sender_provider"],
+                            src_timestamp=_job_field(job, "source_timestamp"),
+                            src_channel_transcript_id=_job_field(job, "source_channel_transcript_id"),
+                            src_channel_session_id=_job_field(job, "source_channel_session_id"),
+                            conn=conn,
+                        )
+                    replies.append({"status": "complete", "exit_code": 0, "extracted": extracted})
+                except Exception as e:
+                    log(f"ERROR: {e}")
+                    if not conn.closed:
+                        conn.rollback()
+                    replies.append(_failure_reply(e))
+            return replies
+        finally:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            self.pool.putconn(conn, close=bool(conn.closed))
+
+    def snapshot_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        with self._admit_lock:
+            stats["in_flight"] = self._admitted
+        stats["workers"] = self.workers
+        stats["capacity"] = self.capacity
+        stats["batch_window_ms"] = round(self.batch_window * 1000)
+        stats["llm_usage"] = extract_memories.llm_usage_totals()
+        stats["uptime_s"] = round(time.time() - self.started_at, 1)
+        stats["avg_ms"] = round(stats["total_ms"] / stats["jobs"], 1) if stats["jobs"] else 0.0
+        stats["total_ms"] = round(stats["total_ms"], 1)
+        return stats
+
+    def close(self):
+        if self._collector is not None:
+            self._batch_queue.put(None)
+            self._collector.join(timeout=5)
+        index = extract_memories.get_entity_index()
+        if index is not None:
+            extract_memories.use_entity_index(None)
+            index.close()
+        self.session.close()
+        self.pool.closeall()
+
+
+class ExtractionServer(socket_server.JsonLineServer):
+    name = "extraction-worker"
+    max_request_bytes = MAX_REQUEST_BYTES
+
+    def error_reply(self, error):
+        return {"status": "failed", "exit_code": 1, "failure_reason": "nonzero_exit", "error": error}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident memory-extraction service (Unix socket)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH,
+                        help=f"Unix socket path (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent extractions and pooled DB connections (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--queue-depth", type=int, default=DEFAULT_QUEUE_DEPTH,
+                        help=f"Jobs allowed to wait for a worker before replying busy (default: {DEFAULT_QUEUE_DEPTH})")
+    parser.add_argument("--batch-window-ms", type=int, default=DEFAULT_BATCH_WINDOW_MS,
+                        help="Collect jobs for this long and extract them in one LLM request (default: 0, off)")
+    parser.add_argument("--batch-size", type=int, default=extract_memories.MAX_BATCH_MESSAGES,
+                        help=f"Most jobs per micro-batch (default: {extract_memories.MAX_BATCH_MESSAGES})")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("OPENROUTER_API_KEY", "").strip()
+    if not api_key:
+        log("ERROR: OPENROUTER_API_KEY not set")
+        sys.exit(1)
+    model = os.environ.get("MEMORY_EXTRACTION_MODEL", "").strip() or extract_memories.DEFAULT_MODEL
+
+    socket_path = os.path.expanduser(args.socket)
+    service = ExtractionService(
+        api_key,
+        workers=max(1, args.workers),
+        queue_depth=max(0, args.queue_depth),
+        default_model=model,
+        batch_window_ms=args.batch_window_ms,
+        batch_size=args.batch_size,
+    )
+    service.start_entity_index()
+    socket_server.prepare_socket_path(socket_path, ExtractionServer.name)
+    server = ExtractionServer(socket_path, service)
+    log(
+        f"listening on {socket_path} (model {model}, {service.workers} workers, "
+        f"capacity {service.capacity}, batch window {args.batch_window_ms}ms)"
+    )
+    socket_server.serve(server, socket_path, service.close)
+
+
+if __name__ == "__main__":
+    main()
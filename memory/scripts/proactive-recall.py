@@ -16,9 +16,15 @@ Output: JSON with relevant memories to inject into context.
 import os
 import sys
 import json
+import array
+import sqlite3
+import hashlib
 import argparse
+import threading
+import unicodedata
 import urllib.request
 import urllib.error
+from collections import OrderedDict
 from pathlib import Path
 
 # Load OpenClaw environment (API keys from openclaw.json)
@@ -44,6 +50,20 @@ DEFAULT_TOKEN_BUDGET = 1000  # Max tokens to inject
 DEFAULT_THRESHOLD = 0.4  # Minimum similarity
 HIGH_CONFIDENCE_THRESHOLD = 0.7  # Above this, inject full content
 
+# Two-stage ANN search: fetch max_results * overfetch nearest neighbours via the
+# ivfflat index, then re-rank by priority.  probes trades recall for latency.
+DEFAULT_OVERFETCH = int(os.environ.get("RECALL_OVERFETCH", "4"))
+DEFAULT_IVFFLAT_PROBES = int(os.environ.get("RECALL_IVFFLAT_PROBES", "10"))
+
+# Query-embedding cache: in-process LRU + on-disk SQLite store.
+# Set RECALL_EMBED_CACHE=off to disable the disk tier.
+EMBED_CACHE_PATH = os.environ.get(
+    "RECALL_EMBED_CACHE",
+    os.path.expanduser("~/.openclaw/cache/recall-embeddings.sqlite"),
+)
+EMBED_CACHE_MEMORY_SIZE = int(os.environ.get("RECALL_EMBED_CACHE_MEMORY_SIZE", "512"))
+EMBED_CACHE_DISK_SIZE = int(os.environ.get("RECALL_EMBED_CACHE_DISK_SIZE", "20000"))
+
 # Dynamic content limits - adjusted based on result count
 # Fewer results = more content each, more results = less content each
 CONTENT_LIMITS = {
@@ -64,8 +84,156 @@ def load_embedding_config():
         return json.load(f)
 
 
-def get_embedding(config, text):
-    """Get single embedding via Ollama API."""
+def normalize_query_text(text):
+    """Canonical form used both as the cache key and as the text sent to Ollama."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier query-embedding cache keyed by (model, sha256(normalized text)).
+
+    Tier 1 is an in-process LRU (useful to the long-lived recall-server.py);
+    tier 2 is a small SQLite file that survives restarts and is shared by the
+    per-message CLI spawns.  Both tiers are size-capped; the disk tier evicts
+    least-recently-used rows.  A disk tier that cannot be opened or written is
+    disabled with a warning rather than failing recall.
+    """
+
+    def __init__(self, path=None, memory_size=EMBED_CACHE_MEMORY_SIZE,
+                 disk_size=EMBED_CACHE_DISK_SIZE):
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db = None
+        self._disk_rows = 0
+        if path and disk_size > 0:
+            self._open_disk(path)
+
+    def _open_disk(self, path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            db = sqlite3.connect(path, timeout=1.0, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    last_used REAL NOT NULL DEFAULT (julianday('now')),
+                    PRIMARY KEY (model, text_hash)
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS idx_query_embeddings_last_used "
+                       "ON query_embeddings (last_used)")
+            db.commit()
+            self._disk_rows = db.execute("SELECT count(*) FROM query_embeddings").fetchone()[0]
+            self._db = db
+        except (OSError, sqlite3.Error) as e:
+            print(f"[proactive-recall] embedding cache disk tier disabled: {e}", file=sys.stderr)
+
+    @staticmethod
+    def key(model, normalized_text):
+        return model, hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._lru[key]
+            embedding = self._disk_get(key)
+            if embedding is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, embedding)
+                return embedding
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, embedding):
+        with self._lock:
+            self._remember(key, embedding)
+            self._disk_put(key, embedding)
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._lru)
+            stats["disk_entries"] = self._disk_rows if self._db is not None else None
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _remember(self, key, embedding):
+        if self.memory_size <= 0:
+            return
+        self._lru[key] = embedding
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_size:
+            self._lru.popitem(last=False)
+
+    def _disk_get(self, key):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT embedding FROM query_embeddings WHERE model = ? AND text_hash = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE query_embeddings SET last_used = julianday('now') "
+                "WHERE model = ? AND text_hash = ?", key
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[proactive-recall] embedding cache read failed: {e}", file=sys.stderr)
+            return None
+        return array.array("f", row[0]).tolist()
+
+    def _disk_put(self, key, embedding):
+        if self._db is None:
+            return
+        try:
+            cur = self._db.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, text_hash, embedding) "
+                "VALUES (?, ?, ?)",
+                (*key, array.array("f", embedding).tobytes()),
+            )
+            if cur.rowcount > 0:
+                self._disk_rows += 1
+            if self._disk_rows > self.disk_size:
+                # Trim back to 90% so eviction runs once per batch of inserts.
+                keep = int(self.disk_size * 0.9)
+                self._db.execute("""
+                    DELETE FROM query_embeddings WHERE rowid IN (
+                        SELECT rowid FROM query_embeddings
+                        ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                """, (keep,))
+                self._disk_rows = self._db.execute(
+                    "SELECT count(*) FROM query_embeddings").fetchone()[0]
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[proactive-recall] embedding cache write failed: {e}", file=sys.stderr)
+
+
+_embedding_cache = None
+
+
+def get_embedding_cache():
+    """Return the process-wide EmbeddingCache, creating it on first use."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        path = None if EMBED_CACHE_PATH.lower() in ("", "off", "none") else EMBED_CACHE_PATH
+        _embedding_cache = EmbeddingCache(path=path)
+    return _embedding_cache
+
+
+def fetch_embedding(config, text):
+    """Get single embedding via Ollama API (uncached)."""
     url = f"{config['base_url']}/api/embeddings"
     payload = json.dumps({"model": config["model"], "prompt": text}).encode()
     req = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
@@ -77,6 +245,25 @@ def get_embedding(config, text):
     return embedding
 
 
+def get_embedding(config, text, cache=None, use_cache=True):
+    """
+    Get a query embedding, consulting the two-tier cache before Ollama.
+
+    The normalized text is what gets embedded, so a cache hit returns exactly
+    the vector a miss would have produced.
+    """
+    normalized = normalize_query_text(text)
+    if not use_cache:
+        return fetch_embedding(config, normalized)
+    cache = cache if cache is not None else get_embedding_cache()
+    key = cache.key(config["model"], normalized)
+    embedding = cache.get(key)
+    if embedding is None:
+        embedding = fetch_embedding(config, normalized)
+        cache.put(key, embedding)
+    return embedding
+
+
 def estimate_tokens(text):
     """Rough token estimate: ~4 chars per token for English."""
     return len(text) // 4
@@ -123,9 +310,62 @@ def truncate_content(content, similarity, result_count=5, high_threshold=HIGH_CO
     return content[:max_len].rsplit(' ', 1)[0] + suffix
 
 
+def _ann_search(cur, query_embedding, threshold, max_results, overfetch,
+                scope_sql=None, scope_params=(), public_only=False):
+    """
+    Two-stage nearest-neighbour search over memory_embeddings.
+
+    Stage 1 orders by raw cosine distance with a plain LIMIT, which is the
+    only shape the ivfflat vector_cosine_ops index can drive.  The scope and,
+    for group channels, the entity_fact visibility gate (#168) are applied
+    there, so private facts never take up candidate slots.  Stage 2 re-ranks
+    those max_results * overfetch candidates by
+    similarity * memory_type_priorities.priority and applies the threshold.
+
+    A candidate that ranks past the overfetch window on raw distance cannot
+    surface even if its priority would lift it; raise overfetch if a
+    high-priority source_type is being crowded out.
+
+    Returns rows of (source_type, source_id, content, similarity, weighted_score).
+    """
+    conditions = [scope_sql] if scope_sql else []
+    if public_only:
+        conditions.append("""(m.source_type != 'entity_fact' OR EXISTS (
+                SELECT 1 FROM entity_facts ef
+                WHERE ef.id::text = m.source_id AND ef.visibility = 'public'))""")
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cur.execute(f"""
+        WITH candidates AS (
+            SELECT
+                m.source_type,
+                m.source_id,
+                m.content,
+                m.embedding <=> %s::vector AS distance
+            FROM memory_embeddings m
+            {where_sql}
+            ORDER BY distance
+            LIMIT %s
+        )
+        SELECT
+            c.source_type,
+            c.source_id,
+            c.content,
+            1 - c.distance AS similarity,
+            (1 - c.distance) * COALESCE(p.priority, 1.0) AS weighted_score
+        FROM candidates c
+        LEFT JOIN memory_type_priorities p ON p.source_type = c.source_type
+        WHERE 1 - c.distance > %s
+        ORDER BY weighted_score DESC
+        LIMIT %s
+    """, (query_embedding, *scope_params, max_results * overfetch, threshold, max_results))
+    return cur.fetchall()
+
+
 def recall(config, message, token_budget=DEFAULT_TOKEN_BUDGET, threshold=DEFAULT_THRESHOLD,
            max_results=DEFAULT_MAX_RESULTS, high_confidence=HIGH_CONFIDENCE_THRESHOLD,
-           is_group=False, entity_id=None, domain_hints=None):
+           is_group=False, entity_id=None, domain_hints=None, conn=None,
+           overfetch=DEFAULT_OVERFETCH, probes=DEFAULT_IVFFLAT_PROBES, use_cache=True):
     """
     Get relevant memories for a message with token budget control.
 
@@ -139,14 +379,27 @@ def recall(config, message, token_budget=DEFAULT_TOKEN_BUDGET, threshold=DEFAULT
         is_group: Whether this is a group channel; gates entity_fact visibility filter (#168)
         entity_id: Resolved entity ID for fine-grained filtering (optional)
         domain_hints: Domain keywords from classifier for domain-scoped search (optional)
+        conn: Existing psycopg2 connection to use (optional). When given, the
+              caller owns it and it is left open; recall-server.py passes a
+              pooled connection here. Otherwise a new one is opened and closed.
+        overfetch: Candidate multiplier for the index-driven ANN stage
+        probes: ivfflat.probes for the candidate stage (recall vs. latency)
+        use_cache: Consult the query-embedding cache before calling Ollama
     """
+    owns_conn = conn is None
     try:
-        conn = psycopg2.connect()
-        query_embedding = get_embedding(config, message)
+        if owns_conn:
+            conn = psycopg2.connect()
+        query_embedding = get_embedding(config, message, use_cache=use_cache)
 
         cur = conn.cursor()
         results = None  # Set by whichever recall path runs below
 
+        # Candidate stage runs against the ivfflat index.  is_local=true scopes
+        # the probe count to this transaction, like SET LOCAL, so pooled
+        # connections do not keep it once recall-server.py rolls back.
+        cur.execute("SELECT set_config('ivfflat.probes', %s, true)", (str(probes),))
+
         # Tiered recall: domain-scoped search first when domain_hints provided (#150).
         # If the domain-scoped pass returns enough results (>= 3 above threshold),
         # use those.  Otherwise fall through to the full unscoped search.
@@ -155,22 +408,11 @@ def recall(config, message, token_budget=DEFAULT_TOKEN_BUDGET, threshold=DEFAULT
                 f"[proactive-recall] tiered recall: trying domain-scoped search hints={domain_hints}",
                 file=sys.stderr
             )
-            cur.execute("""
-                SELECT
-                    m.source_type,
-                    m.source_id,
-                    m.content,
-                    1 - (m.embedding <=> %s::vector) AS similarity,
-                    (1 - (m.embedding <=> %s::vector)) * COALESCE(p.priority, 1.0) AS weighted_score
-                FROM memory_embeddings m
-                LEFT JOIN memory_type_priorities p ON p.source_type = m.source_type
-                WHERE m.source_type = 'agent_domain'
-                  AND m.source_id = ANY(%s)
-                  AND 1 - (m.embedding <=> %s::vector) > %s
-                ORDER BY weighted_score DESC
-                LIMIT %s
-            """, (query_embedding, query_embedding, domain_hints, query_embedding, threshold, max_results))
-            domain_results = cur.fetchall()
+            domain_results = _ann_search(
+                cur, query_embedding, threshold, max_results, overfetch,
+                scope_sql="m.source_type = 'agent_domain' AND m.source_id = ANY(%s)",
+                scope_params=(domain_hints,),
+            )
             if len(domain_results) >= 3:
                 print(
                     f"[proactive-recall] tiered recall path: domain-scoped "
@@ -193,47 +435,22 @@ def recall(config, message, token_budget=DEFAULT_TOKEN_BUDGET, threshold=DEFAULT
                     f"[proactive-recall] applying visibility filter: is_group=True entity_id={entity_id}",
                     file=sys.stderr
                 )
-                # Priority-weighted semantic search with entity_fact visibility gating
-                cur.execute("""
-                    SELECT
-                        m.source_type,
-                        m.source_id,
-                        m.content,
-                        1 - (m.embedding <=> %s::vector) AS similarity,
-                        (1 - (m.embedding <=> %s::vector)) * COALESCE(p.priority, 1.0) AS weighted_score
-                    FROM memory_embeddings m
-                    LEFT JOIN memory_type_priorities p ON p.source_type = m.source_type
-                    LEFT JOIN entity_facts ef
-                        ON m.source_type = 'entity_fact' AND m.source_id = ef.id::text
-                    WHERE 1 - (m.embedding <=> %s::vector) > %s
-                      AND (m.source_type != 'entity_fact' OR ef.visibility = 'public')
-                    ORDER BY weighted_score DESC
-                    LIMIT %s
-                """, (query_embedding, query_embedding, query_embedding, threshold, max_results))
             else:
                 # Standard priority-weighted semantic search (#53)
-                # Joins memory_type_priorities for configurable source_type boosting
                 print(
                     "[proactive-recall] tiered recall path: full unscoped search",
                     file=sys.stderr
                 )
-                cur.execute("""
-                    SELECT
-                        m.source_type,
-                        m.source_id,
-                        m.content,
-                        1 - (m.embedding <=> %s::vector) AS similarity,
-                        (1 - (m.embedding <=> %s::vector)) * COALESCE(p.priority, 1.0) AS weighted_score
-                    FROM memory_embeddings m
-                    LEFT JOIN memory_type_priorities p ON p.source_type = m.source_type
-                    WHERE 1 - (m.embedding <=> %s::vector) > %s
-                    ORDER BY weighted_score DESC
-                    LIMIT %s
-                """, (query_embedding, query_embedding, query_embedding, threshold, max_results))
-            results = cur.fetchall()
-
-        conn.close()
-        
+            results = _ann_search(
+                cur, query_embedding, threshold, max_results, overfetch,
+                public_only=is_group,
+            )
+
+        cur.close()
+        if owns_conn:
+            conn.close()
+
+
         # Apply token budget with tiered retrieval and dynamic limits
         memories = []
         tokens_used = 0
@@ -279,6 +496,8 @@ def recall(config, message, token_budget=DEFAULT_TOKEN_BUDGET, threshold=DEFAULT
         }
         
     except Exception as e:
+        if owns_conn and conn is not None:
+            conn.close()
         return {"error": str(e), "memories": []}
 
 
@@ -295,6 +514,31 @@ def format_for_injection(recall_result):
     return "\n".join(lines)
 
 
+def parse_request_payload(raw):
+    """
+    Parse a recall request into (message_text, is_group, entity_id, domain_hints).
+
+    Accepts the structured JSON payload sent by the turn-context plugin and
+    falls back to treating the input as plain query text.  Shared by main()
+    and recall-server.py so both entry points read requests identically.
+    """
+    is_group = False
+    entity_id = None
+    domain_hints = None
+    try:
+        parsed = json.loads(raw) if isinstance(raw, str) else raw
+        message_text = parsed.get("content", "").strip()
+        # New fields for tiered recall and visibility filtering (#150, #140, #168)
+        is_group = bool(parsed.get("is_group", False))
+        entity_id = parsed.get("entity_id")  # int or None
+        raw_hints = parsed.get("domain_hints")
+        if isinstance(raw_hints, list):
+            domain_hints = [h for h in raw_hints if isinstance(h, str)]
+    except (json.JSONDecodeError, AttributeError):
+        message_text = raw.strip() if isinstance(raw, str) else ""
+    return message_text, is_group, entity_id, domain_hints
+
+
 def main():
     parser = argparse.ArgumentParser(description="Proactive memory recall with semantic search")
     parser.add_argument("--max-tokens", type=int, default=DEFAULT_TOKEN_BUDGET,
@@ -303,6 +547,12 @@ def main():
                         help=f"Minimum similarity threshold (default: {DEFAULT_THRESHOLD})")
     parser.add_argument("--high-confidence", type=float, default=HIGH_CONFIDENCE_THRESHOLD,
                         help=f"Threshold for full content (default: {HIGH_CONFIDENCE_THRESHOLD})")
+    parser.add_argument("--overfetch", type=int, default=DEFAULT_OVERFETCH,
+                        help=f"ANN candidate multiplier before priority re-ranking (default: {DEFAULT_OVERFETCH})")
+    parser.add_argument("--probes", type=int, default=DEFAULT_IVFFLAT_PROBES,
+                        help=f"ivfflat.probes for the candidate scan (default: {DEFAULT_IVFFLAT_PROBES})")
+    parser.add_argument("--no-embed-cache", action="store_true",
+                        help="Bypass the query-embedding cache and always call Ollama")
     parser.add_argument("--inject", action="store_true",
                         help="Output formatted for context injection")
     
@@ -315,20 +565,7 @@ def main():
         sys.exit(1)
     # Try to parse as JSON first (structured input from semantic-recall hook)
     # Fall back to treating stdin as plain text for backward compatibility
-    is_group = False
-    entity_id = None
-    domain_hints = None
-    try:
-        parsed = json.loads(raw_stdin)
-        message_text = parsed.get("content", "").strip()
-        # New fields for tiered recall and visibility filtering (#150, #140, #168)
-        is_group = bool(parsed.get("is_group", False))
-        entity_id = parsed.get("entity_id")  # int or None
-        raw_hints = parsed.get("domain_hints")
-        if isinstance(raw_hints, list):
-            domain_hints = [h for h in raw_hints if isinstance(h, str)]
-    except (json.JSONDecodeError, AttributeError):
-        message_text = raw_stdin
+    message_text, is_group, entity_id, domain_hints = parse_request_payload(raw_stdin)
 
     if not message_text:
         parser.print_help()
@@ -345,7 +582,12 @@ def main():
         is_group=is_group,
         entity_id=entity_id,
         domain_hints=domain_hints,
+        overfetch=max(1, args.overfetch),
+        probes=max(1, args.probes),
+        use_cache=not args.no_embed_cache,
     )
+    if not args.no_embed_cache:
+        print(f"[proactive-recall] embedding cache: {get_embedding_cache().snapshot_stats()}", file=sys.stderr)
     
     if args.inject:
         print(format_for_injection(result))
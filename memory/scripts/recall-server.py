@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Recall Server: resident proactive-recall service on a local Unix socket.
+
+Spawning proactive-recall.py per message pays for interpreter startup, the
+psycopg2/urllib imports, load_pg_env() and a fresh psycopg2.connect() every
+time. This service loads all of that once and keeps a warm connection pool,
+so the per-message hot path is one embedding call plus the recall query (and
+repeat queries skip the embedding call via the in-process cache tier).
+
+Usage:
+    python recall-server.py
+    python recall-server.py --socket ~/.openclaw/run/recall.sock --pool-size 4
+
+Protocol (newline-delimited JSON, one request per line, connections may be
+reused for several requests):
+
+    → {"content": "message", "is_group": false, "domain_hints": [...],
+       "max_tokens": 1000, "high_confidence": 0.7, "inject": false}
+    ← {"query": ..., "memories": [...], "count": ..., "tokens_used": ...}
+
+Request fields are the same JSON payload proactive-recall.py reads from stdin,
+plus optional per-request overrides of its CLI flags (max_tokens, threshold,
+high_confidence, overfetch, probes, no_embed_cache). With "inject": true the
+response also carries "injection" (format_for_injection() output).
+{"op": "ping"} returns {"ok": true, "stats": {...}} for health checks.
+
+The turn-context plugin falls back to spawning proactive-recall.py when the
+socket is absent, so running this service is optional.
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+from psycopg2 import pool as pg_pool
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import socket_server  # noqa: E402
+
+DEFAULT_SOCKET_PATH = os.environ.get(
+    "SEMANTIC_RECALL_SOCKET",
+    os.path.expanduser("~/.openclaw/run/recall.sock"),
+)
+DEFAULT_POOL_SIZE = 4
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+def _load_recall_module():
+    """Import proactive-recall.py by path (the filename contains a hyphen)."""
+    path = os.path.join(SCRIPTS_DIR, "proactive-recall.py")
+    spec = importlib.util.spec_from_file_location("proactive_recall", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["proactive_recall"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+proactive_recall = _load_recall_module()
+
+
+def log(msg):
+    socket_server.log("recall-server", msg)
+
+
+class RecallService:
+    """Holds the loaded embedding config and a pooled set of DB connections.
+
+    The server starts a thread per connection, so ``_slots`` bounds recalls to
+    ``pool_size`` at once: getconn() raises PoolError when the pool is
+    exhausted instead of waiting.
+    """
+
+    def __init__(self, config, pool_size=DEFAULT_POOL_SIZE):
+        self.config = config
+        self.pool = pg_pool.ThreadedConnectionPool(1, pool_size)
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self.started_at = time.time()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "total_ms": 0.0}
+
+    def handle(self, request):
+        """Run one recall request dict and return the response dict."""
+        if request.get("op") == "ping":
+            return {"ok": True, "stats": self.snapshot_stats()}
+
+        message_text, is_group, entity_id, domain_hints = (
+            proactive_recall.parse_request_payload(request)
+        )
+        if not message_text:
+            return {"error": "empty content", "memories": []}
+
+        started = time.monotonic()
+        with self._slots:
+            conn = self.pool.getconn()
+            try:
+                result = proactive_recall.recall(
+                    self.config,
+                    message_text,
+                    token_budget=int(request.get("max_tokens", proactive_recall.DEFAULT_TOKEN_BUDGET)),
+                    threshold=float(request.get("threshold", proactive_recall.DEFAULT_THRESHOLD)),
+                    high_confidence=float(
+                        request.get("high_confidence", proactive_recall.HIGH_CONFIDENCE_THRESHOLD)
+                    ),
+                    is_group=is_group,
+                    entity_id=entity_id,
+                    domain_hints=domain_hints,
+                    conn=conn,
+                    overfetch=max(1, int(request.get("overfetch", proactive_recall.DEFAULT_OVERFETCH))),
+                    probes=max(1, int(request.get("probes", proactive_recall.DEFAULT_IVFFLAT_PROBES))),
+                    use_cache=not request.get("no_embed_cache", False),
+                )
+            finally:
+                # recall() only reads; end the implicit transaction so the pooled
+                # connection goes back idle.  Dead connections are discarded.
+                if not conn.closed:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                self.pool.putconn(conn, close=bool(conn.closed))
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["total_ms"] += elapsed_ms
+            if "error" in result:
+                self.stats["errors"] += 1
+
+        if request.get("inject"):
+            result["injection"] = proactive_recall.format_for_injection(result)
+        return result
+
+    def snapshot_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["uptime_s"] = round(time.time() - self.started_at, 1)
+        stats["avg_ms"] = round(stats["total_ms"] / stats["requests"], 1) if stats["requests"] else 0.0
+        stats["total_ms"] = round(stats["total_ms"], 1)
+        stats["embedding_cache"] = proactive_recall.get_embedding_cache().snapshot_stats()
+        return stats
+
+    def close(self):
+        self.pool.closeall()
+
+
+class RecallServer(socket_server.JsonLineServer):
+    name = "recall-server"
+    max_request_bytes = MAX_REQUEST_BYTES
+
+    def error_reply(self, error):
+        return {"error": error, "memories": []}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident proactive-recall service (Unix socket)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH,
+                        help=f"Unix socket path (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help=f"Maximum pooled DB connections (default: {DEFAULT_POOL_SIZE})")
+    args = parser.parse_args()
+
+    socket_path = os.path.expanduser(args.socket)
+    config = proactive_recall.load_embedding_config()
+    log(f"Using Ollama config: {config['provider']} / {config['model']} ({config['dimensions']} dims)")
+
+    service = RecallService(config, pool_size=args.pool_size)
+    socket_server.prepare_socket_path(socket_path, RecallServer.name)
+    server = RecallServer(socket_path, service)
+    log(f"listening on {socket_path} (pool size {args.pool_size})")
+    socket_server.serve(server, socket_path, service.close)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,9 @@ and upserts into memory_embeddings with source_type='agent_domain'.
 Usage:
     python seed-domain-embeddings.py [--dry-run]
 
-Idempotent: uses ON CONFLICT to update existing rows.
+Idempotent: uses ON CONFLICT to update existing rows. Vectors are looked up
+in embedding_cache (migration 093) first, so unchanged descriptions are not
+re-embedded.
 
 Issue: nova-mind #150
 """
@@ -17,6 +19,8 @@ import os
 import sys
 import json
 import argparse
+import hashlib
+import unicodedata
 import urllib.request
 import urllib.error
 
@@ -39,18 +43,47 @@ def load_embedding_config():
 
 
 def get_embedding(config, text):
-    """Get embedding vector via Ollama API."""
-    url = f"{config['base_url']}/api/embeddings"
-    payload = json.dumps({"model": config["model"], "prompt": text}).encode()
+    """Get embedding vector via Ollama API (/api/embed, as memory-maintenance.py uses)."""
+    url = f"{config['base_url'].rstrip('/')}/api/embed"
+    payload = json.dumps({"model": config["model"], "input": [text]}).encode()
     req = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
     with urllib.request.urlopen(req, timeout=30) as resp:
         result = json.loads(resp.read())
-    embedding = result["embedding"]
+    embedding = result["embeddings"][0]
     if len(embedding) != config["dimensions"]:
         raise ValueError(f"Dimension mismatch: got {len(embedding)}, expected {config['dimensions']}")
     return embedding
 
 
+def normalize_embed_text(text):
+    """Canonical form used as the embedding_cache key and sent to Ollama
+    (the same as memory-maintenance.py's normalize_embed_text())."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(config, text):
+    return config["model"], hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cached_embedding(cur, config, text):
+    """Vector for normalized ``text`` from embedding_cache, or None."""
+    cur.execute(
+        "UPDATE embedding_cache SET last_used_at = NOW() WHERE model = %s AND text_hash = %s "
+        "RETURNING embedding::text",
+        cache_key(config, text),
+    )
+    row = cur.fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def cache_embedding(cur, config, text, embedding):
+    cur.execute(
+        "INSERT INTO embedding_cache (model, text_hash, embedding) VALUES (%s, %s, %s::vector) "
+        "ON CONFLICT (model, text_hash) DO NOTHING",
+        (*cache_key(config, text), json.dumps(embedding)),
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(description="Seed domain description embeddings into memory_embeddings")
     parser.add_argument("--dry-run", action="store_true", help="Print domains without embedding or writing")
@@ -86,19 +119,29 @@ def main():
         conn.close()
         return
 
+    cur.execute("SELECT to_regclass('embedding_cache')")
+    use_cache = cur.fetchone()[0] is not None  # migration 093 applied
+
     embedded = 0
     skipped = 0
     errors = 0
+    from_cache = 0
 
     for topic, notes, agent in domains:
         # Build embedding content: domain name + description for rich context
         embed_text = f"Subject matter domain: {topic}. {notes}"
-        try:
-            embedding = get_embedding(config, embed_text)
-        except Exception as e:
-            print(f"  ERROR embedding '{topic}': {e}", file=sys.stderr)
-            errors += 1
-            continue
+        normalized = normalize_embed_text(embed_text)
+        embedding = cached_embedding(cur, config, normalized) if use_cache else None
+        fresh = embedding is None
+        if fresh:
+            try:
+                embedding = get_embedding(config, normalized)
+            except Exception as e:
+                print(f"  ERROR embedding '{topic}': {e}", file=sys.stderr)
+                errors += 1
+                continue
+        else:
+            from_cache += 1
 
         try:
             # Upsert into memory_embeddings
@@ -109,6 +152,8 @@ def main():
                 ON CONFLICT (source_type, source_id)
                 DO UPDATE SET content = EXCLUDED.content, embedding = EXCLUDED.embedding
             """, (topic, embed_text, embedding))
+            if fresh and use_cache:
+                cache_embedding(cur, config, normalized, embedding)
             embedded += 1
             print(f"  ✓ {topic} ({agent})", file=sys.stderr)
         except Exception as e:
@@ -119,7 +164,8 @@ def main():
     conn.commit()
     conn.close()
 
-    print(f"\nDone: {embedded} embedded, {skipped} skipped, {errors} errors", file=sys.stderr)
+    print(f"\nDone: {embedded} embedded ({from_cache} from cache), {skipped} skipped, {errors} errors",
+          file=sys.stderr)
     if errors > 0:
         sys.exit(1)
 
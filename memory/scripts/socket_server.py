@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+socket_server.py — Newline-delimited JSON service on a local Unix socket.
+
+Shared by recall-server.py and extraction-worker.py. Each connection gets its
+own thread and may carry several requests: one JSON object per line in, one
+JSON line out per request, written when service.handle(request) returns.
+
+A subclass of JsonLineServer sets ``name`` (log prefix), ``max_request_bytes``
+and ``error_reply()`` (the reply shape its clients expect on failure); serve()
+owns the socket file's lifetime and SIGTERM/SIGINT shutdown.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from typing import Callable
+
+
+def log(name: str, msg: str) -> None:
+    print(f"[{name}] {msg}", file=sys.stderr, flush=True)
+
+
+class JsonLineHandler(socketserver.StreamRequestHandler):
+    """Reads newline-delimited JSON requests and writes one JSON line back each."""
+
+    def handle(self):
+        server = self.server
+        while True:
+            line = self.rfile.readline(server.max_request_bytes + 1)
+            if not line:
+                return
+            if len(line) > server.max_request_bytes:
+                self._reply(server.error_reply("request too large"))
+                return
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+                response = server.service.handle(request)
+            except Exception as e:
+                server.log(f"request failed: {e}")
+                response = server.error_reply(str(e))
+            try:
+                self._reply(response)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class JsonLineServer(socketserver.ThreadingUnixStreamServer):
+    """Threaded Unix-socket server handing each request dict to ``service.handle()``."""
+
+    daemon_threads = True
+    name = "socket-server"
+    max_request_bytes = 64 * 1024
+
+    def __init__(self, socket_path, service):
+        self.service = service
+        super().__init__(socket_path, JsonLineHandler)
+
+    def error_reply(self, error: str) -> dict:
+        return {"error": error}
+
+    def log(self, msg: str) -> None:
+        log(self.name, msg)
+
+
+def prepare_socket_path(socket_path: str, name: str) -> None:
+    """Create the parent directory and clear a stale socket left by a crash.
+
+    Exits if another process is still listening on ``socket_path``.
+    """
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    log(name, f"another {name} is already listening on {socket_path}")
+    sys.exit(1)
+
+
+def serve(server: JsonLineServer, socket_path: str, on_close: Callable[[], None]) -> None:
+    """Serve until SIGTERM/SIGINT, then call ``on_close()`` and remove the socket."""
+    os.chmod(socket_path, 0o600)
+
+    def _shutdown(signum, frame):
+        server.log(f"received signal {signum}, shutting down")
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        on_close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Transcript Catch-up: streaming ingest of session transcripts with byte-offset
+checkpoints.
+
+memory-catchup.sh re-reads whole transcripts with jq on every run, tracks
+progress by timestamp and only extracts from the most recent session. This
+ingester instead remembers, per ``~/.openclaw/agents/*/sessions/*.jsonl``
+file, the byte offset (and inode) up to which it has ingested, so each run
+only reads and parses the lines appended since the last one:
+
+  - complete new lines are upserted into channel_sessions/channel_transcripts
+    with the same field mapping as memory-catchup.sh (ON CONFLICT DO NOTHING,
+    so re-reading a chunk after a crash is harmless);
+  - a trailing partial line (the agent is mid-write) is left for the next run;
+  - a file whose inode changed or that shrank below its offset is treated as
+    rotated or truncated and read again from the start;
+  - with --extract, newly inserted user/assistant messages are extracted with
+    extract_memories.extract_batch() and stored with their transcript ids;
+    failures are dead-lettered to extraction_failures for extraction-replay.
+    The jobs are saved as ``pending`` together with the new offset and cleared
+    once extracted, so a run killed mid-extraction retries them next time;
+  - source files are left in place (the state file replaces deletion).
+
+State lives in ``~/.openclaw/transcript-catchup-state.json``:
+
+    {"files": {"<path>": {"inode": 123, "offset": 4096, "session_id": 7, "messages": 12,
+                          "pending": [<extraction jobs not yet done>]}}}
+
+Usage:
+    python transcript-catchup.py
+    python transcript-catchup.py --extract --max-bytes 4194304
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import sys
+import tempfile
+import time
+
+import psycopg2.extras
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import extract_memories  # noqa: E402  (loads OpenClaw env + pg config on import)
+
+OPENCLAW_DIR = os.path.expanduser("~/.openclaw")
+AGENTS_DIR = os.path.join(OPENCLAW_DIR, "agents")
+STATE_FILE = os.path.join(OPENCLAW_DIR, "transcript-catchup-state.json")
+LOCK_FILE = os.path.join(OPENCLAW_DIR, "run", "transcript-catchup.lock")
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024  # per file per run; the rest waits for the next run
+CONTENT_MAX = 65535  # matches memory-catchup.sh's head -c 65535
+EXTRACT_ROLES = ("user", "assistant")
+
+
+def log(msg):
+    print(f"[transcript-catchup] {msg}", file=sys.stderr, flush=True)
+
+
+# ── State ─────────────────────────────────────────────────────────────────────
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {"files": {}}
+    except (OSError, ValueError) as e:
+        log(f"WARNING: unreadable state file {path}, starting over: {e}")
+        return {"files": {}}
+    if not isinstance(state.get("files"), dict):
+        state["files"] = {}
+    return state
+
+
+def save_state(state, path=STATE_FILE):
+    """Write the state atomically (temp file + rename)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".transcript-catchup-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def transcript_files(agents_dir=AGENTS_DIR):
+    """Every agents/<agent_id>/sessions/*.jsonl file, sorted."""
+    found = []
+    try:
+        agents = os.listdir(agents_dir)
+    except OSError:
+        return found
+    for agent_id in agents:
+        sessions = os.path.join(agents_dir, agent_id, "sessions")
+        try:
+            names = os.listdir(sessions)
+        except OSError:
+            continue
+        found.extend(os.path.join(sessions, n) for n in names if n.endswith(".jsonl"))
+    return sorted(found)
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+def read_new_lines(path, offset, max_bytes=DEFAULT_MAX_BYTES):
+    """Complete lines appended after ``offset``; returns (lines, new offset).
+
+    Stops before a trailing line without a newline (still being written) and
+    after roughly ``max_bytes``. A line longer than ``max_bytes`` is still
+    read whole, so a run always makes progress.
+    """
+    lines = []
+    start = offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while offset - start < max_bytes:
+            raw = f.readline()
+            if not raw.endswith(b"\n"):
+                break
+            lines.append(raw)
+            offset += len(raw)
+    return lines, offset
+
+
+def parse_lines(raw_lines, path):
+    """Decode JSONL lines, skipping (and logging) malformed ones."""
+    entries = []
+    for raw in raw_lines:
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            log(f"WARNING: Malformed JSON in {os.path.basename(path)}, skipping line")
+            continue
+        if isinstance(entry, dict):
+            entries.append(entry)
+    return entries
+
+
+def message_content(entry):
+    """Text of a message entry (text parts of an array, or a plain string)."""
+    content = (entry.get("message") or {}).get("content")
+    if isinstance(content, list):
+        text = "\n".join(
+            part.get("text") or "" for part in content if isinstance(part, dict) and part.get("type") == "text"
+        )
+    elif isinstance(content, str):
+        text = content
+    else:
+        text = ""
+    return text[:CONTENT_MAX]
+
+
+def raw_metadata(entry):
+    """The entry as JSON for raw_metadata: at most CONTENT_MAX characters and always valid.
+
+    An oversized entry keeps its other fields with its message text cut short
+    (the text itself is in the content column), and ``"truncated": true``; if
+    that is still too long, only a stub with the entry's ids is stored.
+    """
+    raw = json.dumps(entry)
+    if len(raw) <= CONTENT_MAX:
+        return raw
+    message = entry.get("message")
+    if isinstance(message, dict):
+        text = message_content(entry)[: CONTENT_MAX // 4]
+        raw = json.dumps(dict(entry, message=dict(message, content=text), truncated=True))
+        if len(raw) <= CONTENT_MAX:
+            return raw
+    stub = {k: entry[k] for k in ("type", "id", "message_id", "timestamp") if k in entry}
+    return json.dumps(dict(stub, truncated=True))
+
+
+def session_fields(path, entries):
+    """channel_sessions columns derived from a file's first entries (memory-catchup.sh rules)."""
+    agent_id = os.path.basename(os.path.dirname(os.path.dirname(path)))
+    stem = os.path.basename(path)[: -len(".jsonl")]
+    started_at = next((e["timestamp"] for e in entries if e.get("timestamp")), None)
+    session_key = next((e["session_key"] for e in entries if e.get("session_key")), None)
+    meta = next((e for e in entries if e.get("chat_id")), None)
+
+    fields = {"agent_id": agent_id, "provider": "openclaw", "external_chat_id": stem,
+              "chat_type": "direct", "group_subject": None, "title": None, "group_space_id": None,
+              "started_at": started_at or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    if meta is not None:
+        chat_id = str(meta["chat_id"])
+        if chat_id.startswith("channel:"):
+            fields["provider"] = "discord"
+        elif chat_id.startswith(("group:", "+")):
+            fields["provider"] = "signal"
+        fields["external_chat_id"] = chat_id
+        fields["chat_type"] = "group" if meta.get("is_group_chat") is True else "direct"
+        if meta.get("group_subject"):
+            fields["group_subject"] = fields["title"] = meta["group_subject"]
+        fields["group_space_id"] = meta.get("group_space") or None
+    fields["session_key"] = session_key or fields["external_chat_id"]
+    return fields
+
+
+def transcript_rows(entries, seq):
+    """channel_transcripts rows for the message entries; returns (rows, new seq).
+
+    ``seq`` counts message lines across the whole file so the timestamp-based
+    fallback id (``<timestamp>_<n>``) stays stable between runs.
+    """
+    rows = []
+    for entry in entries:
+        if entry.get("type") != "message":
+            continue
+        ts = entry.get("timestamp")
+        ext_id = entry.get("id") or entry.get("message_id") or (f"{ts}_{seq}" if ts else None)
+        if not ext_id or not ts:
+            continue
+        seq += 1
+        rows.append({
+            "external_message_id": str(ext_id),
+            "timestamp": ts,
+            "role": (entry.get("message") or {}).get("role") or "user",
+            "content": message_content(entry),
+            "raw_metadata": raw_metadata(entry),
+            "sender_id": entry.get("sender_id") or None,
+            "sender_name": entry.get("sender") or None,
+            "sender_username": entry.get("sender_username") or None,
+            "sender_tag": entry.get("sender_tag") or None,
+        })
+    return rows, seq
+
+
+# ── Database ──────────────────────────────────────────────────────────────────
+
+def upsert_session(cur, fields):
+    cur.execute(
+        """
+        INSERT INTO channel_sessions
+            (session_key, agent_id, provider, external_chat_id, chat_type, started_at,
+             group_subject, title, group_space_id)
+        VALUES (%(session_key)s, %(agent_id)s, %(provider)s, %(external_chat_id)s, %(chat_type)s,
+                %(started_at)s, %(group_subject)s, %(title)s, %(group_space_id)s)
+        ON CONFLICT (provider, external_chat_id, COALESCE(external_thread_id, ''))
+        DO UPDATE SET updated_at = NOW()
+        RETURNING id
+        """,
+        fields,
+    )
+    return cur.fetchone()[0]
+
+
+def insert_transcripts(cur, session_id, rows):
+    """Insert new rows; returns {external_message_id: transcript id} for rows actually inserted."""
+    if not rows:
+        return {}
+    inserted = psycopg2.extras.execute_values(
+        cur,
+        """
+        INSERT INTO channel_transcripts
+            (session_id, external_message_id, timestamp, role, content, raw_metadata,
+             sender_id, sender_name, sender_username, sender_tag)
+        VALUES %s
+        ON CONFLICT (session_id, external_message_id) DO NOTHING
+        RETURNING external_message_id, id
+        """,
+        [(session_id, r["external_message_id"], r["timestamp"], r["role"], r["content"], r["raw_metadata"],
+          r["sender_id"], r["sender_name"], r["sender_username"], r["sender_tag"]) for r in rows],
+        template="(%s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s)",
+        fetch=True,
+    )
+    ids = dict(inserted)
+    if ids:
+        cur.execute(
+            """
+            UPDATE channel_sessions SET
+                message_count = COALESCE(message_count, 0) + %s,
+                last_message_at = GREATEST(last_message_at, (SELECT MAX(timestamp) FROM channel_transcripts
+                                                             WHERE id = ANY(%s))),
+                updated_at = NOW()
+            WHERE id = %s
+            """,
+            (len(ids), list(ids.values()), session_id),
+        )
+    return ids
+
+
+def record_extraction_failure(conn, job, error):
+    """Dead-letter a failed extraction the way the memory-extract hook does."""
+    reply = extract_memories._failure_reply(error)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO extraction_failures
+                    (channel_transcript_id, session_key, sender_name, sender_id, content,
+                     stderr_tail, exit_code, failure_reason)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                (job["transcript_id"], job["session_key"], job["sender_name"], job["sender_id"],
+                 job["text"], reply["error"][-2000:], reply["exit_code"], reply["failure_reason"]),
+            )
+        conn.commit()
+    except Exception as e:
+        log(f"WARNING: could not dead-letter transcript {job['transcript_id']}: {e}")
+        conn.rollback()
+
+
+# ── Ingest ────────────────────────────────────────────────────────────────────
+
+def ingest_file(conn, path, entry, max_bytes):
+    """Ingest the lines appended to ``path`` since ``entry``.
+
+    Returns (new state entry, number of messages inserted, extraction jobs).
+    """
+    st = os.stat(path)
+    if entry.get("inode") != st.st_ino or st.st_size < entry.get("offset", 0):
+        if entry:
+            log(f"{os.path.basename(path)} was rotated or truncated; reading from the start")
+        entry = {"inode": st.st_ino, "offset": 0, "messages": 0}
+    if st.st_size == entry["offset"]:
+        return entry, 0, []
+
+    raw_lines, offset = read_new_lines(path, entry["offset"], max_bytes)
+    if not raw_lines:
+        return entry, 0, []
+    entries = parse_lines(raw_lines, path)
+    rows, seq = transcript_rows(entries, entry.get("messages", 0))
+    agent_id = os.path.basename(os.path.dirname(os.path.dirname(path)))
+
+    with conn.cursor() as cur:
+        session_id = entry.get("session_id")
+        fields = None
+        if session_id is None:
+            fields = session_fields(path, entries)
+            session_id = upsert_session(cur, fields)
+        inserted = insert_transcripts(cur, session_id, rows)
+    conn.commit()
+
+    jobs = []
+    for row in rows:
+        transcript_id = inserted.get(row["external_message_id"])
+        if transcript_id is None or row["role"] not in EXTRACT_ROLES:
+            continue
+        jobs.append({
+            "text": row["content"],
+            "sender_name": row["sender_name"] or (agent_id if row["role"] == "assistant" else "unknown"),
+            "sender_id": row["sender_id"] or "",
+            "transcript_id": transcript_id,
+            "session_id": session_id,
+            "session_key": (fields or {}).get("session_key") or entry.get("session_key"),
+            "timestamp": row["timestamp"],
+        })
+
+    new_entry = dict(entry, offset=offset, messages=seq, session_id=session_id)
+    if fields is not None:
+        new_entry["session_key"] = fields["session_key"]
+    log(f"{os.path.basename(path)}: {len(raw_lines)} new lines, {len(inserted)} new messages "
+        f"(offset {entry['offset']} → {offset}, session {session_id})")
+    return new_entry, len(inserted), jobs
+
+
+def extract_jobs(conn, jobs, api_key, model):
+    """Extract and store new messages; failures go to extraction_failures. Returns (ok, failed)."""
+    jobs = [j for j in jobs
+            if len(j["text"].strip()) >= extract_memories.MIN_MESSAGE_LENGTH
+            and not extract_memories.triage(j["text"])[0]]
+    if not jobs:
+        return 0, 0
+    ok = failed = 0
+    results = extract_memories.extract_batch(
+        [{"text": j["text"], "sender_name": j["sender_name"], "sender_id": j["sender_id"]} for j in jobs],
+        conn, api_key, model,
+    )
+    for job, extracted in zip(jobs, results):
+        if not isinstance(extracted, Exception) and extracted:
+            try:
+                extract_memories.store_extracted(
+                    data=extracted,
+                    sender_name=job["sender_name"],
+                    sender_id=job["sender_id"],
+                    sender_provider="",
+                    src_timestamp=job["timestamp"],
+                    src_channel_transcript_id=str(job["transcript_id"]),
+                    src_channel_session_id=str(job["session_id"]),
+                    conn=conn,
+                )
+            except Exception as e:
+                conn.rollback()
+                extracted = e
+        if isinstance(extracted, Exception):
+            log(f"extraction failed for transcript {job['transcript_id']}: {extracted}")
+            record_extraction_failure(conn, job, extracted)
+            failed += 1
+        else:
+            ok += 1
+    return ok, failed
+
+
+def run(conn, state, files, max_bytes=DEFAULT_MAX_BYTES, extract=None, state_path=STATE_FILE):
+    """Ingest every file, saving the state after each one. ``extract`` is (api_key, model) or None.
+
+    A file's new offset is saved with its extraction jobs as ``pending``, and
+    the state is saved again without them once they are extracted; pending
+    jobs left by an interrupted run are extracted before the file is read.
+    """
+    known = state["files"]
+    vanished = [path for path in known if path not in files]
+    for path in vanished:
+        del known[path]
+    if vanished:
+        save_state(state, state_path)
+    totals = {"files": 0, "messages": 0, "extracted": 0, "extract_failed": 0, "errors": 0}
+
+    def extract_pending(entry):
+        ok, failed = extract_jobs(conn, entry["pending"], *extract)
+        totals["extracted"] += ok
+        totals["extract_failed"] += failed
+        del entry["pending"]
+        save_state(state, state_path)
+
+    for path in files:
+        before = known.get(path, {})
+        if extract and before.get("pending"):
+            log(f"{os.path.basename(path)}: extracting {len(before['pending'])} message(s) "
+                "left by an interrupted run")
+            extract_pending(before)
+        try:
+            entry, inserted, jobs = ingest_file(conn, path, before, max_bytes)
+        except Exception as e:
+            log(f"WARNING: could not ingest {path}: {e}")
+            conn.rollback()
+            totals["errors"] += 1
+            continue
+        if entry == before:
+            continue
+        if extract and jobs:
+            entry["pending"] = jobs
+        known[path] = entry
+        save_state(state, state_path)
+        totals["files"] += 1
+        totals["messages"] += inserted
+        if extract and jobs:
+            extract_pending(entry)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream new transcript lines into channel_transcripts")
+    parser.add_argument("--extract", action="store_true",
+                        help="Also extract memories from newly ingested user/assistant messages")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                        help=f"Max bytes read per file per run (default: {DEFAULT_MAX_BYTES})")
+    parser.add_argument("--agents-dir", default=AGENTS_DIR, help=f"Transcript root (default: {AGENTS_DIR})")
+    parser.add_argument("--state-file", default=STATE_FILE, help=f"Offset state (default: {STATE_FILE})")
+    args = parser.parse_args(argv)
+
+    extract = None
+    if args.extract:
+        api_key = os.environ.get("OPENROUTER_API_KEY", "").strip()
+        if not api_key:
+            log("WARNING: OPENROUTER_API_KEY not set — ingesting without extraction")
+        else:
+            model = os.environ.get("MEMORY_EXTRACTION_MODEL", "").strip() or extract_memories.DEFAULT_MODEL
+            extract = (api_key, model)
+
+    os.makedirs(os.path.dirname(LOCK_FILE), exist_ok=True)
+    with open(LOCK_FILE, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            log("another catch-up run holds the lock; exiting")
+            return 0
+
+        conn = extract_memories.get_db_connection()
+        try:
+            if extract:
+                extract_memories.use_entity_index(extract_memories.load_entity_index(conn))
+            state = load_state(args.state_file)
+            totals = run(conn, state, transcript_files(args.agents_dir), args.max_bytes, extract,
+                         args.state_file)
+        finally:
+            extract_memories.use_entity_index(None)
+            conn.close()
+    log("Run complete: " + " ".join(f"{k}={v}" for k, v in totals.items()))
+    return 1 if totals["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
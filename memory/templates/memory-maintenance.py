@@ -6,22 +6,35 @@ Replaces: embed-full-database.py, embed-memories.py, embed-research.py,
 
 Phases:
   1. Cooldown check
-  2. Embed (database rows, research, memory files)
-  3. Cross-key consolidation
-  4. Same-key deduplication
-  5. Confidence decay
+  2. Confidence decay (own connection, committed per chunk)
+  3. Embed (queued changes, database rows, research, edited rows, memory files)
+  4. Cross-key consolidation
+  5. Same-key deduplication
   6. Ghost entity cleanup
   7. Entity-level deduplication
   8. Clean orphaned embeddings
   9. Archive & purge low-confidence facts
+
+--embed-queue-worker runs only the embedding-queue drain, as a long-lived
+LISTEN worker (migration 091).
 """
 
 import argparse
+import hashlib
+import io
 import json
 import logging
 import os
 import re
+import random
+import select
+import struct
 import sys
+import threading
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
@@ -70,11 +83,24 @@ class OllamaConnectionError(Exception):
 # Configuration
 # ---------------------------------------------------------------------------
 DEFAULT_STATE_FILE = os.path.expanduser("~/.openclaw/state/memory-maintenance-last-run.json")
+DEFAULT_FILE_MANIFEST = os.path.expanduser("~/.openclaw/state/memory-file-manifest.json")
 COOLDOWN_HOURS = 4
 DECAY_COOLDOWN_HOURS = 24
 EMBED_BATCH_SIZE = 64
+EMBED_CONCURRENCY = 2  # /api/embed requests in flight per embedding pipeline
+EMBED_TIMEOUT_S = 300
+EMBED_RETRIES = 2  # per single text, after batches have been split down to one
+EMBED_GROW_AFTER = 4  # clean requests before a shrunken batch size doubles again
+EMBED_BACKOFF_BASE_S = 1.0
+EMBED_BACKOFF_MAX_S = 30.0
+EMBED_BREAKER_THRESHOLD = 5  # consecutive failed requests before pausing
+EMBED_BREAKER_COOLDOWN_S = 30.0
+EMBED_CACHE_TTL_DAYS = 90  # embedding_cache entries unused this long are purged
 ARCHIVE_THRESHOLD = 0.1
 MIN_AGE_DAYS = 7
+DECAY_CHUNK_SIZE = 5000
+FACT_DEDUP_THRESHOLD = 0.50
+LESSON_NEAR_DUP_THRESHOLD = 0.80
 
 DECAY_RATES = {
     'permanent': 0,
@@ -156,76 +182,551 @@ def update_state(state_file, ran_decay=False):
 # ---------------------------------------------------------------------------
 # Phase 2: Embed
 # ---------------------------------------------------------------------------
-def _already_embedded(cur, source_type, source_id):
-    cur.execute(
-        "SELECT 1 FROM memory_embeddings WHERE source_type = %s AND source_id = %s LIMIT 1",
-        (source_type, str(source_id)),
+# Wraps a TABLE_EMBED_SPECS-style "SELECT id, text" query in an anti-join so
+# the server returns only rows with no embedding yet.  The NOT EXISTS probe is
+# served by uq_memory_embeddings_source (source_type, source_id).  Queries are
+# executed with parameters, so a literal % in one must be written as %%.
+_UNEMBEDDED_SQL = """
+    SELECT src.id, src.text
+    FROM ({query}) AS src
+    WHERE src.text IS NOT NULL AND src.text <> ''
+      AND NOT EXISTS (
+          SELECT 1 FROM memory_embeddings me
+          WHERE me.source_type = %s AND me.source_id = src.id::text
+      )
+"""
+
+
+# Rows whose embedding was made from different text.  content_hash
+# (migration 092) is md5 of the stored content, so the join compares hashes
+# instead of reading the stored text back.
+_STALE_SQL = """
+    SELECT src.id, src.text
+    FROM ({query}) AS src
+    JOIN memory_embeddings me
+      ON me.source_type = %s AND me.source_id = src.id::text
+    WHERE src.text IS NOT NULL AND src.text <> ''
+      AND me.content_hash <> md5(src.text)
+"""
+
+
+def _stream_batches(cur, name, sql, params, batch_size):
+    """Yield batches of ``{"id", "text"}`` rows from ``sql`` on a named cursor.
+
+    The named (server-side) cursor streams rows in ``batch_size`` pages.
+    Writes made through ``cur`` while iterating do not disturb the cursor's
+    snapshot.
+    """
+    stream = cur.connection.cursor(name=name)
+    try:
+        stream.itersize = batch_size
+        stream.execute(sql, params)
+        while True:
+            rows = stream.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [{"id": r[0], "text": r[1]} for r in rows]
+    finally:
+        try:
+            stream.close()
+        except psycopg2.Error:
+            pass  # transaction already aborted; the savepoint rollback cleans up
+
+
+def _iter_unembedded(cur, query, source_type, batch_size=EMBED_BATCH_SIZE):
+    """Yield batches of ``{"id", "text"}`` rows from ``query`` lacking an embedding.
+
+    Runs one set-based anti-join per source_type, so only the missing rows
+    cross the wire.
+    """
+    return _stream_batches(
+        cur, f"unembedded_{source_type}", _UNEMBEDDED_SQL.format(query=query), (source_type,), batch_size,
     )
-    return cur.fetchone() is not None
 
 
-def embed_batch(texts, cfg):
+def _iter_stale(cur, query, source_type, batch_size=EMBED_BATCH_SIZE):
+    """Yield batches of ``{"id", "text"}`` rows from ``query`` whose text changed
+    since they were embedded (one join per source_type)."""
+    return _stream_batches(
+        cur, f"stale_{source_type}", _STALE_SQL.format(query=query), (source_type,), batch_size,
+    )
+
+
+class EmbeddingCircuitOpen(OllamaConnectionError):
+    """Raised when Ollama keeps failing after the circuit breaker's pause."""
+    pass
+
+
+class _EmbedRequestFailed(Exception):
+    """One /api/embed request failed.
+
+    ``kind`` is "overload" (timeout/5xx/429: a smaller batch may succeed),
+    "rejected" (4xx or a malformed reply: some text in the batch is bad) or
+    "transport" (Ollama unreachable: retry the same batch).
+    """
+
+    def __init__(self, message, kind):
+        super().__init__(message)
+        self.kind = kind
+
+
+class EmbeddingClient:
+    """/api/embed client with adaptive batch size, retries and a circuit breaker.
+
+    Batches start at _embed_batch_size(cfg). A timeout or 5xx (Ollama
+    reports OOM and runner crashes as 500) halves the batch size and splits
+    the failing batch; every ``EMBED_GROW_AFTER`` clean requests grow it
+    again, up to the configured size. A batch the server rejects (4xx, wrong
+    vector count) is split to isolate the bad text. A single text that still
+    fails after ``retries`` jittered backoffs is skipped (empty embedding,
+    which _store_embeddings() leaves for the next run). Connection failures
+    retry the same batch with jittered backoff until the breaker decides.
+
+    ``breaker_threshold`` overloaded or unreachable requests in a row open
+    the breaker: every caller pauses for ``breaker_cooldown_s``, then requests
+    resume. If the first such failure after the pause comes too,
+    EmbeddingCircuitOpen is raised and the embed phase ends, so an unhealthy
+    backend costs bounded time. Rejections come from a healthy server and
+    never count, so bisecting a large batch around one bad text cannot trip it.
+    Thread-safe: _embed_pipeline() calls it from several workers at once.
+    """
+
+    def __init__(self, cfg):
+        self.url = f"{cfg['base_url'].rstrip('/')}/api/embed"
+        self.model = cfg["model"]
+        self.max_batch = _embed_batch_size(cfg)
+        self.batch_size = self.max_batch
+        self.timeout = float(cfg.get("timeout_s") or EMBED_TIMEOUT_S)
+        self.retries = max(0, int(cfg.get("retries", EMBED_RETRIES)))
+        self.breaker_threshold = max(1, int(cfg.get("breaker_threshold") or EMBED_BREAKER_THRESHOLD))
+        self.breaker_cooldown = float(cfg.get("breaker_cooldown_s", EMBED_BREAKER_COOLDOWN_S))
+        self.session = requests.Session()
+        self.stats = {
+            "texts": 0, "requests": 0, "failures": 0, "retries": 0,
+            "shrinks": 0, "grows": 0, "skipped": 0, "breaker_pauses": 0, "request_s": 0.0,
+        }
+        self._lock = threading.Lock()
+        self._failures = 0      # consecutive failed requests
+        self._clean = 0         # consecutive successful requests (growth)
+        self._paused_until = 0.0
+        self._half_open = False
+        self._dead = None
+        self._started = time.monotonic()
+
+    # -- public ---------------------------------------------------------------
+
+    def embed(self, texts):
+        """Embeddings for ``texts`` in order; ``[]`` for any text that could not be embedded."""
+        out = []
+        i = 0
+        while i < len(texts):
+            chunk = texts[i:i + self.batch_size]
+            out.extend(self._embed_chunk(chunk))
+            i += len(chunk)
+        return out
+
+    def summary(self):
+        with self._lock:
+            stats = dict(self.stats)
+            size = self.batch_size
+        elapsed = time.monotonic() - self._started
+        rate = stats["texts"] / stats["request_s"] if stats["request_s"] else 0.0
+        return (
+            f"{stats['texts']} texts in {stats['requests']} requests "
+            f"({rate:.1f} texts/s of request time, {elapsed:.0f}s elapsed), "
+            f"failures={stats['failures']} retries={stats['retries']} skipped={stats['skipped']} "
+            f"shrinks={stats['shrinks']} grows={stats['grows']} "
+            f"breaker_pauses={stats['breaker_pauses']} batch_size={size}/{self.max_batch}"
+        )
+
+    # -- internals ------------------------------------------------------------
+
+    def _embed_chunk(self, chunk):
+        attempt = 0
+        while True:
+            started = self._admit()
+            try:
+                embeddings = self._request(chunk)
+            except _EmbedRequestFailed as e:
+                self._failed(started, e, len(chunk))
+                if e.kind == "transport":
+                    attempt += 1
+                    with self._lock:
+                        self.stats["retries"] += 1
+                    time.sleep(_jittered_backoff(attempt))
+                    continue
+                if len(chunk) > 1:
+                    half = (len(chunk) + 1) // 2
+                    return self._embed_chunk(chunk[:half]) + self._embed_chunk(chunk[half:])
+                if attempt >= self.retries:
+                    logger.warning(f"Embedding skipped after {attempt + 1} attempt(s): {e}")
+                    with self._lock:
+                        self.stats["skipped"] += 1
+                    return [[]]
+                attempt += 1
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(_jittered_backoff(attempt))
+                continue
+            self._succeeded(len(chunk))
+            return embeddings
+
+    def _request(self, texts):
+        t0 = time.monotonic()
+        try:
+            resp = self.session.post(self.url, json={"model": self.model, "input": texts}, timeout=self.timeout)
+        except requests.exceptions.Timeout as e:
+            raise _EmbedRequestFailed(f"timed out after {self.timeout:.0f}s", "overload") from e
+        except requests.exceptions.ConnectionError as e:
+            raise _EmbedRequestFailed(f"cannot reach Ollama at {self.url}: {e}", "transport") from e
+        finally:
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["request_s"] += time.monotonic() - t0
+        if resp.status_code >= 500 or resp.status_code == 429:
+            raise _EmbedRequestFailed(f"HTTP {resp.status_code}: {resp.text[:200]}", "overload")
+        if resp.status_code >= 400:
+            raise _EmbedRequestFailed(f"HTTP {resp.status_code}: {resp.text[:200]}", "rejected")
+        try:
+            embeddings = resp.json().get("embeddings") or []
+        except ValueError as e:
+            raise _EmbedRequestFailed(f"unparseable response: {e}", "rejected") from e
+        if len(embeddings) != len(texts):
+            raise _EmbedRequestFailed(
+                f"{len(embeddings)} embeddings for {len(texts)} texts", "rejected"
+            )
+        return embeddings
+
+    def _admit(self):
+        """Wait out a breaker pause; returns the request's start time."""
+        while True:
+            with self._lock:
+                if self._dead is not None:
+                    raise EmbeddingCircuitOpen(self._dead)
+                wait = self._paused_until - time.monotonic()
+            if wait <= 0:
+                return time.monotonic()
+            time.sleep(min(wait, 1.0))
+
+    def _failed(self, started, error, size):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._clean = 0
+            if error.kind == "overload" and size // 2 < self.batch_size:
+                self.batch_size = max(1, size // 2)
+                self.stats["shrinks"] += 1
+                logger.warning(f"Embedding request failed ({error}); batch size now {self.batch_size}")
+            if error.kind == "rejected":
+                return  # the server answered; bad input says nothing about its health
+            if started < self._paused_until:
+                return  # in flight before the pause; says nothing about the probe
+            if self._half_open:
+                self._dead = f"Ollama still failing after a {self.breaker_cooldown:.0f}s pause: {error}"
+                logger.error(f"[ERROR] Embedding circuit open: {self._dead}")
+                return
+            self._failures += 1
+            if self._failures >= self.breaker_threshold:
+                self._failures = 0
+                self._half_open = True
+                self._paused_until = time.monotonic() + self.breaker_cooldown
+                self.stats["breaker_pauses"] += 1
+                logger.warning(
+                    f"Embedding circuit breaker tripped after {self.breaker_threshold} failed requests; "
+                    f"pausing {self.breaker_cooldown:.0f}s (last error: {error})"
+                )
+
+    def _succeeded(self, size):
+        with self._lock:
+            self.stats["texts"] += size
+            self._failures = 0
+            self._half_open = False
+            self._clean += 1
+            if self._clean >= EMBED_GROW_AFTER and self.batch_size < self.max_batch:
+                self.batch_size = min(self.max_batch, self.batch_size * 2)
+                self._clean = 0
+                self.stats["grows"] += 1
+
+
+def _jittered_backoff(attempt):
+    """Seconds to wait before retry ``attempt`` (1-based): exponential, capped, jittered."""
+    return min(EMBED_BACKOFF_MAX_S, EMBED_BACKOFF_BASE_S * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+_embedding_clients = {}
+_embedding_clients_lock = threading.Lock()
+
+
+def embedding_client(cfg):
+    """Shared EmbeddingClient for ``cfg`` (one per endpoint, model and batch size)."""
+    key = (cfg["base_url"], cfg["model"], _embed_batch_size(cfg))
+    with _embedding_clients_lock:
+        client = _embedding_clients.get(key)
+        if client is None:
+            client = _embedding_clients[key] = EmbeddingClient(cfg)
+        return client
+
+
+def embed_texts(texts, cfg):
     if not texts:
         return []
-    url = f"{cfg['base_url'].rstrip('/')}/api/embed"
-    payload = {"model": cfg["model"], "input": texts}
+    return embedding_client(cfg).embed(texts)
+
+
+# ---- Shared text -> vector cache (migration 093) ----
+def normalize_embed_text(text):
+    """Canonical form used both as the cache key and as the text sent to Ollama
+    (the same as proactive-recall.py's normalize_query_text())."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+_CACHE_LOOKUP_SQL = """
+    SELECT text_hash, embedding::text, last_used_at < NOW() - INTERVAL '1 day' AS touch
+    FROM embedding_cache
+    WHERE model = %s AND text_hash = ANY(%s)
+"""
+
+
+class EmbeddingCache:
+    """embedding_cache lookups and fills, keyed by (model, sha256(normalized text)).
+
+    Uses its own autocommit connection: cached vectors stay valid whether or
+    not the caller's transaction commits, and short statements never hold
+    cache keys locked for the length of a maintenance run.  Any database
+    error disables the cache for the rest of the run with a warning; callers
+    then simply embed everything.
+    """
+
+    def __init__(self, conn, model):
+        self.conn = conn
+        self.model = model
+        self.disabled = False
+        self.stats = {"hits": 0, "misses": 0, "filled": 0}
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def lookup(self, texts):
+        """Return {text: vector} for the normalized ``texts`` already cached."""
+        hashes = {self.text_hash(t): t for t in texts}
+        if self.disabled or not hashes:
+            return {}
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(_CACHE_LOOKUP_SQL, (self.model, list(hashes)))
+                rows = cur.fetchall()
+                touch = [h for h, _emb, stale in rows if stale]
+                if touch:
+                    cur.execute(
+                        "UPDATE embedding_cache SET last_used_at = NOW() WHERE model = %s AND text_hash = ANY(%s)",
+                        (self.model, touch),
+                    )
+        except psycopg2.Error as e:
+            self._disable(e)
+            return {}
+        found = {hashes[h.strip()]: json.loads(emb) for h, emb, _stale in rows}
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(hashes) - len(found)
+        return found
+
+    def fill(self, vectors):
+        """Cache {normalized text: vector} for texts that were just embedded."""
+        if self.disabled or not vectors:
+            return
+        rows = [(self.model, self.text_hash(t), json.dumps(emb)) for t, emb in vectors.items()]
+        try:
+            with self.conn.cursor() as cur:
+                psycopg2.extras.execute_values(
+                    cur,
+                    "INSERT INTO embedding_cache (model, text_hash, embedding) VALUES %s "
+                    "ON CONFLICT (model, text_hash) DO NOTHING",
+                    rows,
+                    template="(%s, %s, %s::vector)",
+                )
+        except psycopg2.Error as e:
+            self._disable(e)
+            return
+        self.stats["filled"] += len(rows)
+
+    def summary(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (f"{self.stats['hits']} hits, {self.stats['misses']} misses ({rate:.0%}), "
+                f"{self.stats['filled']} filled")
+
+    def close(self):
+        try:
+            self.conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _disable(self, error):
+        logger.warning(f"[WARN] Embedding cache disabled for this run: {error}")
+        self.disabled = True
+
+
+def open_embedding_cache(cfg):
+    """EmbeddingCache for ``cfg["model"]`` on a new connection, or None when the
+    database is unreachable or migration 093 is not applied."""
     try:
-        resp = requests.post(url, json=payload, timeout=300)
-        resp.raise_for_status()
-        data = resp.json()
-        return data.get("embeddings", [])
-    except requests.exceptions.ConnectionError as e:
-        raise OllamaConnectionError(f"Cannot reach Ollama at {url}: {e}") from e
-    except requests.exceptions.Timeout as e:
-        raise OllamaConnectionError(f"Ollama connection timed out at {url}: {e}") from e
-    except Exception as e:
-        logger.error(f"Batch embed failed: {e}")
-        return []
+        conn = psycopg2.connect("")
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('embedding_cache')")
+            if cur.fetchone()[0] is None:
+                conn.close()
+                return None
+    except psycopg2.Error as e:
+        logger.warning(f"[WARN] Embedding cache unavailable: {e}")
+        return None
+    return EmbeddingCache(conn, cfg["model"])
+
+
+def _embed_batch_size(cfg):
+    """Rows per /api/embed request: embedding-config.json "batch_size" or EMBED_BATCH_SIZE."""
+    return max(1, int(cfg.get("batch_size") or EMBED_BATCH_SIZE))
 
 
-def embed_single(text, cfg):
-    url = f"{cfg['base_url'].rstrip('/')}/api/embeddings"
-    payload = {"model": cfg["model"], "prompt": text}
+def _embed_concurrency(cfg):
+    """Requests kept in flight: embedding-config.json "concurrency" or EMBED_CONCURRENCY."""
+    return max(1, int(cfg.get("concurrency") or EMBED_CONCURRENCY))
+
+
+def _embed_pipeline(batches, cfg, store):
+    """Embed ``batches`` with several /api/embed requests in flight.
+
+    ``batches`` (lists of ``{"id", "text"}`` items, typically a streaming
+    _iter_unembedded() cursor) is read and ``store(batch, embeddings)`` is
+    called on the calling thread, so all database work stays on the caller's
+    connection and transaction; only embed_texts() runs on the worker threads.
+    Up to _embed_concurrency(cfg) batches are embedded at once and at most
+    that many are read ahead, so the next page is fetched and the previous
+    one written while Ollama works.  Batches are stored in input order.
+    Returns the sum of store()'s return values.  An OllamaConnectionError
+    from any batch stops reading and propagates.
+
+    Texts are normalized before embedding.  With an EmbeddingCache in
+    ``cfg["cache"]``, each batch is looked up first, only the misses (once
+    each) go to Ollama, and their vectors are cached before the batch is
+    stored.
+    """
+    concurrency = _embed_concurrency(cfg)
+    cache = cfg.get("cache")
+    total = 0
+
+    def prepare(batch):
+        texts = [normalize_embed_text(it["text"]) for it in batch]
+        vectors = cache.lookup(texts) if cache is not None else {}
+        misses = list(dict.fromkeys(t for t in texts if t not in vectors))
+        return texts, vectors, misses
+
+    def finish(batch, texts, vectors, misses, embeddings):
+        fresh = {t: emb for t, emb in zip(misses, embeddings) if emb}
+        if cache is not None:
+            cache.fill(fresh)
+        vectors.update(fresh)
+        return store(batch, [vectors.get(t, []) for t in texts])
+
+    if concurrency == 1:
+        for batch in batches:
+            texts, vectors, misses = prepare(batch)
+            total += finish(batch, texts, vectors, misses, embed_texts(misses, cfg))
+        return total
+
+    pending = deque()
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
     try:
-        resp = requests.post(url, json=payload, timeout=120)
-        resp.raise_for_status()
-        data = resp.json()
-        return data.get("embedding", [])
-    except requests.exceptions.ConnectionError as e:
-        raise OllamaConnectionError(f"Cannot reach Ollama at {url}: {e}") from e
-    except requests.exceptions.Timeout as e:
-        raise OllamaConnectionError(f"Ollama connection timed out at {url}: {e}") from e
-    except Exception as e:
-        logger.error(f"Single embed failed: {e}")
-        return []
+        for batch in batches:
+            texts, vectors, misses = prepare(batch)
+            pending.append((batch, texts, vectors, misses, pool.submit(embed_texts, misses, cfg)))
+            # Write whatever is already done; block only once the window is full.
+            while pending and (len(pending) >= concurrency or pending[0][-1].done()):
+                *done, future = pending.popleft()
+                total += finish(*done, future.result())
+        while pending:
+            *done, future = pending.popleft()
+            total += finish(*done, future.result())
+    finally:
+        for *_done, future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+    return total
 
 
-def embed_texts(texts, cfg):
-    if not texts:
-        return []
-    result = embed_batch(texts, cfg)
-    if result and len(result) == len(texts):
-        return result
-    logger.warning("Batch embed incomplete, falling back to single embeds")
-    return [embed_single(t, cfg) for t in texts]
+# Binary COPY framing (https://www.postgresql.org/docs/current/sql-copy.html):
+# 11-byte signature, int32 flags, int32 header-extension length; int16 -1 ends.
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack("!h", -1)
+
+_STAGING_TABLE = "memory_embeddings_staging"
+
+
+def _encode_vector(emb):
+    """pgvector's binary wire format: int16 dim, int16 unused, float4[dim] (big-endian)."""
+    return struct.pack(f"!hh{len(emb)}f", len(emb), 0, *emb)
+
+
+def _encode_copy_rows(rows):
+    """Encode (source_type, source_id, content, embedding) tuples as a binary COPY stream."""
+    buf = io.BytesIO()
+    buf.write(_PGCOPY_HEADER)
+    for source_type, source_id, content, emb in rows:
+        buf.write(struct.pack("!h", 4))
+        for text in (source_type, source_id, content):
+            data = text.encode("utf-8")
+            buf.write(struct.pack("!i", len(data)))
+            buf.write(data)
+        vec = _encode_vector(emb)
+        buf.write(struct.pack("!i", len(vec)))
+        buf.write(vec)
+    buf.write(_PGCOPY_TRAILER)
+    buf.seek(0)
+    return buf
 
 
 def _store_embeddings(cur, source_type, items, embeddings):
+    """Upsert embeddings in bulk: binary COPY into a temp staging table, then one
+    INSERT ... ON CONFLICT.
+
+    Vectors travel as packed float4 rather than JSON text, and the whole batch
+    is a single upsert statement instead of one round trip per row.  Items
+    whose embedding came back empty are skipped.  Returns rows written.
+    """
+    rows = {}
     for item, emb in zip(items, embeddings):
         if not emb:
             continue
-        emb_json = json.dumps(emb)
-        cur.execute(
-            """
-            INSERT INTO memory_embeddings (source_type, source_id, content, embedding)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (source_type, source_id) DO UPDATE
-            SET content = EXCLUDED.content,
-                embedding = EXCLUDED.embedding,
-                updated_at = NOW()
-            """,
-            (source_type, str(item["id"]), item["text"], emb_json),
-        )
+        # Last write wins for a repeated source_id, as with row-by-row upserts;
+        # a single INSERT ... ON CONFLICT cannot touch the same row twice.
+        rows[str(item["id"])] = (source_type, str(item["id"]), item["text"], emb)
+    if not rows:
+        return 0
+
+    # Created per call: a rolled-back savepoint also drops a temp table made
+    # inside it.  ON COMMIT DELETE ROWS keeps it empty across transactions.
+    cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {_STAGING_TABLE} (
+            source_type TEXT,
+            source_id TEXT,
+            content TEXT,
+            embedding vector
+        ) ON COMMIT DELETE ROWS
+    """)
+    cur.copy_expert(
+        f"COPY {_STAGING_TABLE} (source_type, source_id, content, embedding) "
+        "FROM STDIN WITH (FORMAT binary)",
+        _encode_copy_rows(rows.values()),
+    )
+    cur.execute(f"""
+        INSERT INTO memory_embeddings (source_type, source_id, content, embedding)
+        SELECT source_type, source_id, content, embedding FROM {_STAGING_TABLE}
+        ON CONFLICT (source_type, source_id) DO UPDATE
+        SET content = EXCLUDED.content,
+            embedding = EXCLUDED.embedding,
+            updated_at = NOW()
+    """)
+    cur.execute(f"TRUNCATE {_STAGING_TABLE}")
+    return len(rows)
 
 
 # ---- Embed database tables ----
@@ -300,19 +801,12 @@ TABLE_EMBED_SPECS = {
 
 
 def _embed_table(cur, query, source_type, cfg):
-    cur.execute(query)
-    rows = cur.fetchall()
-    items = [{"id": r[0], "text": r[1]} for r in rows if r[1] and not _already_embedded(cur, source_type, r[0])]
-    if not items:
-        return 0
-    total = 0
-    for i in range(0, len(items), EMBED_BATCH_SIZE):
-        batch = items[i : i + EMBED_BATCH_SIZE]
-        texts = [it["text"] for it in batch]
-        embeddings = embed_texts(texts, cfg)
+    def store(batch, embeddings):
         _store_embeddings(cur, source_type, batch, embeddings)
-        total += len(batch)
-    return total
+        return len(batch)
+
+    batches = _iter_unembedded(cur, query, source_type, _embed_batch_size(cfg))
+    return _embed_pipeline(batches, cfg, store)
 
 
 def phase_embed_database(conn, cfg, dry_run=False, verbose=False):
@@ -349,6 +843,28 @@ def phase_embed_database(conn, cfg, dry_run=False, verbose=False):
 
 
 # ---- Embed research tables ----
+RESEARCH_EMBED_SPECS = {
+    "research_task": "SELECT id, query AS text FROM research_tasks WHERE query IS NOT NULL",
+    # is_current=true only
+    "research_finding": (
+        "SELECT id, content AS text FROM research_findings WHERE is_current = true AND content IS NOT NULL"
+    ),
+    # #259 fix: research_conclusion uses COALESCE(title, summary) as text source -- title+summary columns only
+    "research_conclusion": """
+        SELECT id, trim(COALESCE(title || ' ', '') || summary) AS text
+        FROM research_conclusions
+        WHERE is_current = true AND summary IS NOT NULL
+    """,
+}
+
+
+def _embed_specs():
+    """source_type -> text query for every embedded database source."""
+    specs = {source_type: query for query, source_type in TABLE_EMBED_SPECS.values()}
+    specs.update(RESEARCH_EMBED_SPECS)
+    return specs
+
+
 def phase_embed_research(conn, cfg, dry_run=False, verbose=False):
     """Embed research tables with per-sub-query error isolation.
 
@@ -360,76 +876,193 @@ def phase_embed_research(conn, cfg, dry_run=False, verbose=False):
     total = 0
     warn_count = 0
 
-    # research_task
-    try:
-        cur.execute("SAVEPOINT embed_research_task")
-        cur.execute("SELECT id, query AS text FROM research_tasks WHERE query IS NOT NULL")
-        rows = cur.fetchall()
-        items = [{"id": r[0], "text": r[1]} for r in rows if not _already_embedded(cur, "research_task", r[0])]
-        if items:
-            for i in range(0, len(items), EMBED_BATCH_SIZE):
-                batch = items[i : i + EMBED_BATCH_SIZE]
-                embeddings = embed_texts([it["text"] for it in batch], cfg)
-                _store_embeddings(cur, "research_task", batch, embeddings)
-                total += len(batch)
-        cur.execute("RELEASE SAVEPOINT embed_research_task")
-    except psycopg2.Error as e:
+    for source_type, query in RESEARCH_EMBED_SPECS.items():
+        sp = f"embed_{source_type}"
         try:
-            cur.execute("ROLLBACK TO SAVEPOINT embed_research_task")
-        except psycopg2.Error:
-            pass
-        logger.warning(f"[WARN] Skipping research_task: {e}")
-        warn_count += 1
+            cur.execute(f"SAVEPOINT {sp}")
+            total += _embed_table(cur, query, source_type, cfg)
+            cur.execute(f"RELEASE SAVEPOINT {sp}")
+        except psycopg2.Error as e:
+            try:
+                cur.execute(f"ROLLBACK TO SAVEPOINT {sp}")
+            except psycopg2.Error:
+                pass
+            logger.warning(f"[WARN] Skipping {source_type}: {e}")
+            warn_count += 1
+
+    if verbose and total:
+        logger.info(f"  Embedded {total} research records")
+    return total, warn_count
+
+
+# ---- Re-embed edited rows ----
+def phase_reembed_stale(conn, cfg, dry_run=False, verbose=False):
+    """Re-embed rows of every embedded table whose text changed since embedding.
+
+    Returns (total_reembedded, warn_count).
+    psycopg2 errors per source_type are caught, logged as warnings, and the source is skipped.
+    OllamaConnectionError propagates (fatal).
+    """
+    cur = conn.cursor()
+    total = 0
+    warn_count = 0
+
+    for source_type, query in _embed_specs().items():
+        sp = f"reembed_{source_type}"
+
+        def store(batch, embeddings, source_type=source_type):
+            _store_embeddings(cur, source_type, batch, embeddings)
+            return len(batch)
 
-    # research_finding (is_current=true)
-    try:
-        cur.execute("SAVEPOINT embed_research_finding")
-        cur.execute("SELECT id, content AS text FROM research_findings WHERE is_current = true AND content IS NOT NULL")
-        rows = cur.fetchall()
-        items = [{"id": r[0], "text": r[1]} for r in rows if not _already_embedded(cur, "research_finding", r[0])]
-        if items:
-            for i in range(0, len(items), EMBED_BATCH_SIZE):
-                batch = items[i : i + EMBED_BATCH_SIZE]
-                embeddings = embed_texts([it["text"] for it in batch], cfg)
-                _store_embeddings(cur, "research_finding", batch, embeddings)
-                total += len(batch)
-        cur.execute("RELEASE SAVEPOINT embed_research_finding")
-    except psycopg2.Error as e:
         try:
-            cur.execute("ROLLBACK TO SAVEPOINT embed_research_finding")
-        except psycopg2.Error:
-            pass
-        logger.warning(f"[WARN] Skipping research_finding: {e}")
-        warn_count += 1
+            cur.execute(f"SAVEPOINT {sp}")
+            count = _embed_pipeline(_iter_stale(cur, query, source_type, _embed_batch_size(cfg)), cfg, store)
+            cur.execute(f"RELEASE SAVEPOINT {sp}")
+            total += count
+            if verbose and count:
+                logger.info(f"  Re-embedded {count} edited {source_type} records")
+        except psycopg2.Error as e:
+            try:
+                cur.execute(f"ROLLBACK TO SAVEPOINT {sp}")
+            except psycopg2.Error:
+                pass
+            logger.warning(f"[WARN] Skipping stale {source_type} embeddings: {e}")
+            warn_count += 1
+    return total, warn_count
 
-    # #259 fix: research_conclusion uses COALESCE(title, summary) as text source -- title+summary columns only
-    try:
-        cur.execute("SAVEPOINT embed_research_conclusion")
-        cur.execute("""
-            SELECT id, trim(COALESCE(title || ' ', '') || summary) AS text
-            FROM research_conclusions
-            WHERE is_current = true AND summary IS NOT NULL
-        """)
-        rows = cur.fetchall()
-        items = [{"id": r[0], "text": r[1]} for r in rows if not _already_embedded(cur, "research_conclusion", r[0])]
-        if items:
-            for i in range(0, len(items), EMBED_BATCH_SIZE):
-                batch = items[i : i + EMBED_BATCH_SIZE]
-                embeddings = embed_texts([it["text"] for it in batch], cfg)
-                _store_embeddings(cur, "research_conclusion", batch, embeddings)
-                total += len(batch)
-        cur.execute("RELEASE SAVEPOINT embed_research_conclusion")
-    except psycopg2.Error as e:
+
+# ---- Embedding queue ----
+# Migration 091 triggers append (source_type, source_id) to embedding_queue
+# whenever an embedded row is inserted, deleted or has its text columns
+# updated, and NOTIFY on EMBED_QUEUE_CHANNEL.  Claiming deletes the entries
+# inside the claiming transaction, so a rollback puts them back and SKIP
+# LOCKED keeps concurrent drainers off each other's entries.
+EMBED_QUEUE_CHANNEL = "embedding_queue"
+EMBED_QUEUE_POLL_S = 60  # drain this often even without a NOTIFY
+
+_CLAIM_QUEUE_SQL = """
+    DELETE FROM embedding_queue
+    WHERE id IN (
+        SELECT id FROM embedding_queue
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING source_type, source_id
+"""
+
+# Every spec query is a plain SELECT from its table, so the id filter is
+# pushed down onto the primary key.  ``current`` is true when the stored
+# embedding was made from the same text (content_hash, migration 092).
+_QUEUED_TEXT_SQL = """
+    SELECT src.id, src.text, me.content_hash = md5(src.text) AS current
+    FROM ({query}) AS src
+    LEFT JOIN memory_embeddings me
+      ON me.source_type = %s AND me.source_id = src.id::text
+    WHERE src.id = ANY(%s::bigint[])
+      AND src.text IS NOT NULL AND src.text <> ''
+"""
+
+
+def _embed_queued(cur, cfg, source_type, query, source_ids):
+    """Re-embed queued rows whose text changed; drop the embeddings of rows without text.
+
+    Rows that were deleted, or no longer match their spec query (e.g. a
+    research finding that is no longer current), lose their embedding.
+    Rows whose embedding already matches their text are left alone.
+    Returns (embedded, removed).
+    """
+    ids = sorted({int(i) for i in source_ids if i.isdigit()})
+    cur.execute(_QUEUED_TEXT_SQL.format(query=query), (source_type, ids))
+    rows = cur.fetchall()
+    items = [{"id": r[0], "text": r[1]} for r in rows if not r[2]]
+
+    def store(batch, embeddings):
+        _store_embeddings(cur, source_type, batch, embeddings)
+        return len(batch)
+
+    size = _embed_batch_size(cfg)
+    embedded = _embed_pipeline((items[i:i + size] for i in range(0, len(items), size)), cfg, store)
+
+    gone = sorted(set(source_ids) - {str(r[0]) for r in rows})
+    removed = 0
+    if gone:
+        cur.execute(
+            "DELETE FROM memory_embeddings WHERE source_type = %s AND source_id = ANY(%s)",
+            (source_type, gone),
+        )
+        removed = cur.rowcount
+    return embedded, removed
+
+
+def drain_embedding_queue(conn, cfg, dry_run=False, verbose=False, commit=False):
+    """Embed the changes queued in embedding_queue until it is empty.
+
+    Entries are claimed oldest-first, ``batch_size * concurrency`` at a time,
+    and repeats of one row are collapsed.  With ``commit`` each claimed batch
+    is committed on its own (the queue worker); otherwise the claims stay in
+    the caller's transaction (scheduled runs).
+
+    Returns (embedded, removed).  psycopg2 errors for one source_type are
+    logged and its entries dropped; the full scan still covers new rows.  A
+    failed claim (e.g. migration 091 not applied) and OllamaConnectionError
+    roll the current batch back into the queue and propagate.
+    """
+    cur = conn.cursor()
+    specs = _embed_specs()
+    claim_size = _embed_batch_size(cfg) * _embed_concurrency(cfg)
+    embedded = removed = 0
+    while True:
+        cur.execute("SAVEPOINT embed_queue")
         try:
-            cur.execute("ROLLBACK TO SAVEPOINT embed_research_conclusion")
+            if dry_run:
+                cur.execute("SELECT COUNT(*) FROM embedding_queue")
+                logger.info(f"  {cur.fetchone()[0]} queued embedding changes (not drained in dry run)")
+                cur.execute("RELEASE SAVEPOINT embed_queue")
+                return 0, 0
+            cur.execute(_CLAIM_QUEUE_SQL, (claim_size,))
         except psycopg2.Error:
-            pass
-        logger.warning(f"[WARN] Skipping research_conclusion: {e}")
-        warn_count += 1
+            cur.execute("ROLLBACK TO SAVEPOINT embed_queue")
+            raise
+        claimed = cur.fetchall()
+        if not claimed:
+            cur.execute("RELEASE SAVEPOINT embed_queue")
+            break
 
-    if verbose and total:
-        logger.info(f"  Embedded {total} research records")
-    return total, warn_count
+        by_type = {}
+        for source_type, source_id in claimed:
+            by_type.setdefault(source_type, set()).add(source_id)
+        try:
+            for source_type, source_ids in by_type.items():
+                query = specs.get(source_type)
+                if query is None:
+                    logger.warning(f"[WARN] Dropping {len(source_ids)} queued '{source_type}' rows: no embed spec")
+                    continue
+                sp = f"embed_queue_{source_type}"
+                try:
+                    cur.execute(f"SAVEPOINT {sp}")
+                    n_embedded, n_removed = _embed_queued(cur, cfg, source_type, query, source_ids)
+                    cur.execute(f"RELEASE SAVEPOINT {sp}")
+                    embedded += n_embedded
+                    removed += n_removed
+                except psycopg2.Error as e:
+                    try:
+                        cur.execute(f"ROLLBACK TO SAVEPOINT {sp}")
+                    except psycopg2.Error:
+                        pass
+                    logger.warning(f"[WARN] Dropping {len(source_ids)} queued '{source_type}' rows: {e}")
+        except OllamaConnectionError:
+            cur.execute("ROLLBACK TO SAVEPOINT embed_queue")
+            if commit:
+                conn.rollback()
+            raise
+        cur.execute("RELEASE SAVEPOINT embed_queue")
+        if commit:
+            conn.commit()
+
+    if verbose and (embedded or removed):
+        logger.info(f"  Embedding queue: embedded {embedded}, removed {removed}")
+    return embedded, removed
 
 
 # ---- Embed memory files ----
@@ -769,24 +1402,144 @@ def _find_overlap_boundary(text, overlap):
     return min_pos
 
 
+def load_file_manifest(path):
+    """Load the memory-file manifest: {file path: {source_name, size, mtime_ns, sha256}}."""
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_file_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _chunk_source_id(source_name, chunk):
+    """Content-addressed chunk identity: unchanged text keeps its source_id."""
+    digest = hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:16]
+    return f"{source_name}#{digest}"
+
+
+def _existing_file_chunks(cur, source_name):
+    """Return {source_id: content} of the memory_file rows stored for one file."""
+    prefix = f"{source_name}#"
+    cur.execute(
+        """
+        SELECT source_id, content FROM memory_embeddings
+        WHERE source_type = 'memory_file' AND left(source_id, %s) = %s
+        """,
+        (len(prefix), prefix),
+    )
+    return dict(cur.fetchall())
+
+
 def _embed_file_chunks(cur, cfg, source_name, text, dry_run=False, verbose=False):
-    """Embed chunks for a single memory file. Returns count embedded."""
-    chunks = _chunk_text(text)
-    total = 0
-    for idx, chunk in enumerate(chunks):
-        source_id = f"{source_name}#{idx}"
-        if _already_embedded(cur, "memory_file", source_id):
-            continue
-        if dry_run:
-            if verbose:
-                logger.info(f"    DRY RUN would embed {source_id}")
-            total += 1
+    """Bring one memory file's chunk embeddings in line with ``text``.
+
+    Chunks are identified by a hash of their text, so only chunks whose text is
+    new are sent to Ollama.  Rows stored under an older identity (including
+    the legacy positional ``name#<index>`` ids) whose text is unchanged are
+    renamed in place rather than re-embedded, and rows whose text no longer
+    appears in the file are deleted in one statement.  Returns (count embedded,
+    complete), where complete is False if any new chunk was not stored (an
+    Ollama failure or an open breaker) and the file must be retried.
+    """
+    wanted = {}
+    for chunk in _chunk_text(text):
+        wanted.setdefault(_chunk_source_id(source_name, chunk), chunk)
+
+    existing = _existing_file_chunks(cur, source_name)
+    reusable = {content: sid for sid, content in existing.items() if sid not in wanted}
+
+    to_embed, renames = [], []
+    for source_id, chunk in wanted.items():
+        if source_id in existing:
             continue
-        emb = embed_single(chunk, cfg)
-        if emb:
-            _store_embeddings(cur, "memory_file", [{"id": source_id, "text": chunk}], [emb])
-            total += 1
-    return total
+        old_id = reusable.pop(chunk, None)
+        if old_id is not None:
+            renames.append((old_id, source_id))
+        else:
+            to_embed.append({"id": source_id, "text": chunk})
+    renamed = {old_id for old_id, _ in renames}
+    stale = [sid for sid in existing if sid not in wanted and sid not in renamed]
+
+    if dry_run:
+        if verbose and (to_embed or renames or stale):
+            logger.info(
+                f"    DRY RUN {source_name}: would embed {len(to_embed)}, "
+                f"rename {len(renames)}, delete {len(stale)} chunk(s)"
+            )
+        return len(to_embed), True
+
+    if stale:
+        cur.execute(
+            "DELETE FROM memory_embeddings WHERE source_type = 'memory_file' AND source_id = ANY(%s)",
+            (stale,),
+        )
+    if renames:
+        psycopg2.extras.execute_values(
+            cur,
+            """
+            UPDATE memory_embeddings me
+            SET source_id = v.new_id, updated_at = NOW()
+            FROM (VALUES %s) AS v(old_id, new_id)
+            WHERE me.source_type = 'memory_file' AND me.source_id = v.old_id
+            """,
+            renames,
+        )
+
+    size = _embed_batch_size(cfg)
+    total = _embed_pipeline(
+        (to_embed[i : i + size] for i in range(0, len(to_embed), size)),
+        cfg,
+        lambda batch, embeddings: _store_embeddings(cur, "memory_file", batch, embeddings),
+    )
+    if verbose and (to_embed or renames or stale):
+        logger.info(
+            f"    {source_name}: embedded {total}, kept {len(wanted) - len(to_embed)}, "
+            f"deleted {len(stale)} stale chunk(s)"
+        )
+    return total, total == len(to_embed)
+
+
+def _embed_memory_file(cur, cfg, path, source_name, manifest, dry_run=False, verbose=False):
+    """Embed one memory file unless the manifest shows it unchanged.
+
+    A matching (size, mtime) skips the read entirely; a matching content hash
+    after a touch skips chunking.  ``manifest`` is updated in place (not in dry
+    runs) and is only persisted by the caller after the transaction commits.
+    A file with chunks left unstored gets no entry, so the next run retries it.
+    """
+    key = str(path)
+    stat = path.stat()
+    entry = manifest.get(key)
+    if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return 0
+
+    text = path.read_text(encoding="utf-8")
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    if entry and entry.get("sha256") == digest:
+        count, complete = 0, True
+    else:
+        count, complete = _embed_file_chunks(cur, cfg, source_name, text, dry_run=dry_run, verbose=verbose)
+
+    if not dry_run:
+        if complete:
+            manifest[key] = {
+                "source_name": source_name,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": digest,
+            }
+        else:
+            manifest.pop(key, None)
+    return count
 
 
 def _delete_file_embeddings(cur, source_types, verbose=False):
@@ -808,20 +1561,38 @@ def _delete_file_embeddings(cur, source_types, verbose=False):
     return counts
 
 
-def phase_embed_files(conn, cfg, dry_run=False, verbose=False, reindex_files=False):
-    """Embed memory files (daily logs and MEMORY.md).
+def _memory_file_paths():
+    """Return [(path, source_name)] for daily logs and MEMORY.md that exist."""
+    memory_dir = Path.home() / ".openclaw" / "workspace" / "memory"
+    memory_md = Path.home() / ".openclaw" / "workspace" / "MEMORY.md"
+    paths = []
+    if memory_dir.exists():
+        paths.extend((md_file, md_file.name) for md_file in sorted(memory_dir.glob("*.md")))
+    if memory_md.exists():
+        paths.append((memory_md, "MEMORY.md"))
+    return paths
+
+
+def phase_embed_files(conn, cfg, dry_run=False, verbose=False, reindex_files=False, manifest=None):
+    """Embed memory files (daily logs and MEMORY.md) incrementally.
+
+    ``manifest`` (see ``load_file_manifest``) lets unchanged files be skipped
+    without reading them; pass None to examine every file.  Within a changed
+    file only chunks with new text are embedded (see ``_embed_file_chunks``).
 
     When ``reindex_files`` is True, all existing ``memory_file`` and stale
     ``daily_log`` embeddings are deleted inside a single SAVEPOINT before
-    re-chunking and re-embedding. A failure at any point during the delete or
-    reinsert rolls back to that savepoint, leaving the database in its
-    pre-run state.
+    re-chunking and re-embedding, and the manifest is rebuilt from scratch. A
+    failure at any point during the delete or reinsert rolls back to that
+    savepoint, leaving the database in its pre-run state.
 
     ``dry_run`` with ``reindex_files`` performs no database mutations and
     makes no Ollama calls.
     """
     cur = conn.cursor()
     total = 0
+    if manifest is None:
+        manifest = {}
 
     if reindex_files and dry_run:
         if verbose:
@@ -831,9 +1602,6 @@ def phase_embed_files(conn, cfg, dry_run=False, verbose=False, reindex_files=Fal
             )
         return 0
 
-    memory_dir = Path.home() / ".openclaw" / "workspace" / "memory"
-    memory_md = Path.home() / ".openclaw" / "workspace" / "MEMORY.md"
-
     if reindex_files:
         cur.execute("SAVEPOINT reindex_files")
         try:
@@ -848,22 +1616,13 @@ def phase_embed_files(conn, cfg, dry_run=False, verbose=False, reindex_files=Fal
             logger.error(f"[ERROR] Reindex deletion failed: {e}")
             raise
 
+        manifest.clear()
         try:
-            if memory_dir.exists():
-                for md_file in sorted(memory_dir.glob("*.md")):
-                    text = md_file.read_text(encoding="utf-8")
-                    total += _embed_file_chunks(
-                        cur, cfg, md_file.name, text,
-                        dry_run=dry_run, verbose=verbose
-                    )
-
-            if memory_md.exists():
-                text = memory_md.read_text(encoding="utf-8")
-                total += _embed_file_chunks(
-                    cur, cfg, "MEMORY.md", text,
+            for path, source_name in _memory_file_paths():
+                total += _embed_memory_file(
+                    cur, cfg, path, source_name, manifest,
                     dry_run=dry_run, verbose=verbose
                 )
-
             cur.execute("RELEASE SAVEPOINT reindex_files")
         except psycopg2.Error as e:
             try:
@@ -880,18 +1639,9 @@ def phase_embed_files(conn, cfg, dry_run=False, verbose=False, reindex_files=Fal
             logger.error(f"[ERROR] Reindex embedding failed: {e}")
             raise
     else:
-        if memory_dir.exists():
-            for md_file in sorted(memory_dir.glob("*.md")):
-                text = md_file.read_text(encoding="utf-8")
-                total += _embed_file_chunks(
-                    cur, cfg, md_file.name, text,
-                    dry_run=dry_run, verbose=verbose
-                )
-
-        if memory_md.exists():
-            text = memory_md.read_text(encoding="utf-8")
-            total += _embed_file_chunks(
-                cur, cfg, "MEMORY.md", text,
+        for path, source_name in _memory_file_paths():
+            total += _embed_memory_file(
+                cur, cfg, path, source_name, manifest,
                 dry_run=dry_run, verbose=verbose
             )
 
@@ -900,6 +1650,26 @@ def phase_embed_files(conn, cfg, dry_run=False, verbose=False, reindex_files=Fal
     return total
 
 
+# ---------------------------------------------------------------------------
+# Trigram candidate blocking (shared by lesson and same-key fact dedup)
+# ---------------------------------------------------------------------------
+def _set_trgm_threshold(cur, threshold):
+    """Set the pg_trgm ``%`` cutoff for the rest of the current transaction.
+
+    ``a % b`` is true exactly when ``similarity(a, b) >= threshold``, but unlike
+    a bare similarity() predicate it can be answered from a gin_trgm_ops
+    index, so self-joins only score pairs that share enough trigrams instead of
+    every pair.  Queries keep their explicit similarity() filter as well, so
+    the result set is identical to the unblocked form.  set_config(..., true)
+    is used rather than set_limit() so the setting cannot leak past the
+    maintenance transaction.
+    """
+    cur.execute(
+        "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+        (str(threshold),),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Lessons deduplication phase (runs BEFORE embedding to avoid wasted embed calls)
 # ---------------------------------------------------------------------------
@@ -950,6 +1720,7 @@ def phase_dedup_lessons(conn, dry_run=False, verbose=False):
 
     # --- Near-duplicate detection (write review report, do not auto-merge) ---
     try:
+        _set_trgm_threshold(cur, LESSON_NEAR_DUP_THRESHOLD)
         cur.execute("""
             SELECT l1.id AS id1, l2.id AS id2,
                    LEFT(l1.lesson, 80) AS lesson1_preview,
@@ -957,11 +1728,12 @@ def phase_dedup_lessons(conn, dry_run=False, verbose=False):
                    similarity(l1.lesson, l2.lesson) AS sim
             FROM lessons l1
             JOIN lessons l2 ON l1.id < l2.id
-            WHERE similarity(l1.lesson, l2.lesson) >= 0.80
+                           AND l2.lesson %% l1.lesson
+            WHERE similarity(l1.lesson, l2.lesson) >= %s
               AND l1.lesson != l2.lesson
             ORDER BY sim DESC
             LIMIT 100
-        """)
+        """, (LESSON_NEAR_DUP_THRESHOLD,))
         near_dups = cur.fetchall()
         if near_dups:
             logs_dir = Path.home() / ".openclaw" / "logs"
@@ -981,23 +1753,59 @@ def phase_dedup_lessons(conn, dry_run=False, verbose=False):
     return total_deleted
 
 
+def _args_embedding_config(args):
+    """load_embedding_config() with the --embed-* command-line overrides applied."""
+    cfg = load_embedding_config()
+    if getattr(args, "embed_batch_size", None):
+        cfg["batch_size"] = args.embed_batch_size
+    if getattr(args, "embed_concurrency", None):
+        cfg["concurrency"] = args.embed_concurrency
+    return cfg
+
+
 def phase_embed(conn, args):
     """Run all embedding sub-phases. Returns (total_embedded, total_warns)."""
-    cfg = load_embedding_config()
+    cfg = _args_embedding_config(args)
+    cfg["cache"] = None if args.dry_run else open_embedding_cache(cfg)
     total = 0
     total_warns = 0
 
-    db_total, _db_success, db_warns = phase_embed_database(conn, cfg, args.dry_run, args.verbose)
-    total += db_total
-    total_warns += db_warns
-
-    research_total, research_warns = phase_embed_research(conn, cfg, args.dry_run, args.verbose)
-    total += research_total
-    total_warns += research_warns
-
-    total += phase_embed_files(
-        conn, cfg, args.dry_run, args.verbose, reindex_files=args.reindex_files
-    )
+    try:
+        # Drain queued changes first so the full scan below does not embed
+        # new rows that the queue would then embed again.
+        try:
+            queue_total, _queue_removed = drain_embedding_queue(conn, cfg, args.dry_run, args.verbose)
+            total += queue_total
+        except psycopg2.Error as e:
+            logger.warning(f"[WARN] Skipping embedding queue: {e}")
+            total_warns += 1
+
+        db_total, _db_success, db_warns = phase_embed_database(conn, cfg, args.dry_run, args.verbose)
+        total += db_total
+        total_warns += db_warns
+
+        research_total, research_warns = phase_embed_research(conn, cfg, args.dry_run, args.verbose)
+        total += research_total
+        total_warns += research_warns
+
+        stale_total, stale_warns = phase_reembed_stale(conn, cfg, args.dry_run, args.verbose)
+        total += stale_total
+        total_warns += stale_warns
+
+        # Persisted by main() only after commit, so a rolled-back run never marks
+        # files as embedded.
+        args._file_manifest = load_file_manifest(args.file_manifest)
+        total += phase_embed_files(
+            conn, cfg, args.dry_run, args.verbose, reindex_files=args.reindex_files,
+            manifest=args._file_manifest,
+        )
+    finally:
+        client = embedding_client(cfg)
+        if client.stats["requests"]:
+            logger.info(f"Embedding client: {client.summary()}")
+        if cfg["cache"] is not None:
+            logger.info(f"Embedding cache: {cfg['cache'].summary()}")
+            cfg["cache"].close()
 
     if args.verbose:
         logger.info(f"Embed phase complete: {total} items embedded, {total_warns} warning(s)")
@@ -1086,6 +1894,10 @@ def merge_duplicates(conn, dry_run=False, verbose=False):
     """
     cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
 
+    # LOWER(f2.value) % LOWER(f1.value) lets the planner probe
+    # idx_entity_facts_value_trgm per fact instead of scoring every same-key
+    # pair; the similarity() filter keeps the output unchanged.
+    _set_trgm_threshold(cur, FACT_DEDUP_THRESHOLD)
     cur.execute("""
         SELECT
             f1.id as id1, f2.id as id2,
@@ -1099,9 +1911,10 @@ def merge_duplicates(conn, dry_run=False, verbose=False):
             f1.entity_id = f2.entity_id
             AND f1.key = f2.key
             AND f1.id < f2.id
-        WHERE similarity(LOWER(f1.value), LOWER(f2.value)) >= 0.50
+            AND LOWER(f2.value) %% LOWER(f1.value)
+        WHERE similarity(LOWER(f1.value), LOWER(f2.value)) >= %s
         ORDER BY sim DESC, f1.id, f2.id
-    """)
+    """, (FACT_DEDUP_THRESHOLD,))
 
     pairs = cur.fetchall()
 
@@ -1140,7 +1953,7 @@ def merge_duplicates(conn, dry_run=False, verbose=False):
             if verbose:
                 logger.info(f"  [high, sim={sim:.2f}] {row['key']}: auto-merged ID {absorbed} into ID {survivor}")
 
-        elif sim >= 0.50:
+        elif sim >= FACT_DEDUP_THRESHOLD:
             medium_candidates.append({
                 'id1': id1, 'id2': id2,
                 'entity_id': row['entity_id'], 'key': row['key'],
@@ -1178,7 +1991,7 @@ def write_dedup_report(candidates, dry_run=False):
 
 
 # ---------------------------------------------------------------------------
-# Phase 5: Confidence decay (original production logic preserved)
+# Phase 5: Confidence decay
 # ---------------------------------------------------------------------------
 import math
 
@@ -1191,43 +2004,94 @@ def calculate_decay(durability, days_since_confirmed, custom_rate=None):
     return math.exp(-rate * days_since_confirmed)
 
 
-def apply_decay_to_entity_facts(conn, dry_run=False, verbose=False):
-    """Apply confidence decay to entity_facts table."""
-    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cur.execute("""
-        SELECT id, entity_id, key, durability, confidence,
-               last_confirmed_at, decay_rate, expires
-        FROM entity_facts
-        WHERE durability != 'permanent'
+# Whole days since last confirmation, floored like timedelta.days.
+_DAYS_SINCE_SQL = "floor(extract(epoch FROM NOW() - last_confirmed_at) / 86400)::double precision"
+# exp() raises on underflow in Postgres where math.exp() returns 0.0; clamping
+# the exponent keeps ancient rows decaying to ~0 instead of failing the chunk.
+_DECAY_MIN_EXPONENT = -700
+
+
+def _decay_in_chunks(conn, table_name, new_confidence_sql, where_sql, params,
+                     set_updated_at, dry_run=False):
+    """Apply a server-side confidence update over ``table_name`` in id ranges.
+
+    ``new_confidence_sql`` and ``where_sql`` are evaluated per row by Postgres,
+    so no rows cross the wire.  Each DECAY_CHUNK_SIZE id range is one UPDATE
+    followed by a commit, which keeps row locks short; ``conn`` must therefore
+    be a connection of its own (see apply_decay).  Rows whose confidence would
+    move by 0.001 or less are left untouched.  Returns the number of rows
+    updated (or that would be, under dry_run).
+    """
+    cur = conn.cursor()
+    cur.execute(f"SELECT min(id), max(id) FROM {table_name}")
+    lo, hi = cur.fetchone()
+    if lo is None:
+        return 0
+
+    decayed = f"""
+        SELECT id, {new_confidence_sql} AS new_confidence
+        FROM {table_name}
+        WHERE id >= %s AND id < %s
           AND confidence > %s
-    """, (ARCHIVE_THRESHOLD,))
-    rows = cur.fetchall()
-    updates = []
-    for row in rows:
-        if row['last_confirmed_at'] is None:
-            continue
-        days_since = (datetime.now(timezone.utc) - row['last_confirmed_at']).days
-        if days_since <= 0:
-            continue
-        if row['expires'] is not None and row['expires'] < datetime.now(timezone.utc):
-            decay_factor = 0.0
+          AND last_confirmed_at IS NOT NULL
+          AND {_DAYS_SINCE_SQL} > 0
+          {where_sql}
+    """
+    if dry_run:
+        sql = f"""
+            SELECT COUNT(*) FROM ({decayed}) d
+            JOIN {table_name} t ON t.id = d.id
+            WHERE abs(d.new_confidence - t.confidence) > 0.001
+        """
+    else:
+        updated_at = ", updated_at = NOW()" if set_updated_at else ""
+        sql = f"""
+            UPDATE {table_name} t
+            SET confidence = d.new_confidence{updated_at}
+            FROM ({decayed}) d
+            WHERE t.id = d.id
+              AND abs(d.new_confidence - t.confidence) > 0.001
+        """
+
+    total = 0
+    for start in range(lo, hi + 1, DECAY_CHUNK_SIZE):
+        cur.execute(sql, (*params, start, start + DECAY_CHUNK_SIZE, ARCHIVE_THRESHOLD))
+        if dry_run:
+            total += cur.fetchone()[0]
         else:
-            decay_factor = calculate_decay(row['durability'], days_since, row['decay_rate'])
-        new_confidence = decay_factor
-        if abs(new_confidence - row['confidence']) > 0.001:
-            updates.append({'id': row['id'], 'new_confidence': new_confidence})
+            total += cur.rowcount
+            conn.commit()
+    return total
+
+
+def apply_decay_to_entity_facts(conn, dry_run=False, verbose=False):
+    """Apply confidence decay to entity_facts table.
+
+    Same rule as calculate_decay(): a per-fact decay_rate overrides the
+    DECAY_RATES entry for its durability, and expired facts drop to 0.
+    """
+    count = _decay_in_chunks(
+        conn, "entity_facts",
+        f"""CASE WHEN expires IS NOT NULL AND expires < NOW() THEN 0.0
+                 ELSE exp(GREATEST(
+                     -COALESCE(decay_rate::double precision,
+                               (%s::jsonb ->> durability)::double precision,
+                               0.01) * {_DAYS_SINCE_SQL},
+                     {_DECAY_MIN_EXPONENT}))
+            END""",
+        "AND durability != 'permanent'",
+        (psycopg2.extras.Json(DECAY_RATES),),
+        set_updated_at=True,
+        dry_run=dry_run,
+    )
     if verbose:
-        logger.info(f"Entity facts to decay: {len(updates)}")
-    if not dry_run and updates:
-        psycopg2.extras.execute_batch(cur, """
-            UPDATE entity_facts SET confidence = %(new_confidence)s, updated_at = NOW() WHERE id = %(id)s
-        """, updates, page_size=100)
-    return len(updates)
+        logger.info(f"Entity facts to decay: {count}")
+    return count
 
 
 def apply_decay_to_table(conn, table_name, decay_rate, dry_run=False, verbose=False):
     """Apply confidence decay to a specific table."""
-    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    cur = conn.cursor()
 
     # Check if table has updated_at column
     cur.execute("""
@@ -1236,43 +2100,40 @@ def apply_decay_to_table(conn, table_name, decay_rate, dry_run=False, verbose=Fa
     """, (table_name,))
     has_updated_at = cur.fetchone() is not None
 
-    cur.execute(f"""
-        SELECT id, confidence, last_confirmed_at FROM {table_name} WHERE confidence > %s
-    """, (ARCHIVE_THRESHOLD,))
-    rows = cur.fetchall()
-    updates = []
-    for row in rows:
-        if row['last_confirmed_at'] is None:
-            continue
-        days_since = (datetime.now(timezone.utc) - row['last_confirmed_at']).days
-        if days_since <= 0:
-            continue
-        decay_factor = math.exp(-decay_rate * days_since)
-        new_confidence = decay_factor
-        if abs(new_confidence - row['confidence']) > 0.001:
-            updates.append({'id': row['id'], 'new_confidence': new_confidence})
-    if verbose and updates:
-        logger.info(f"{table_name} to decay: {len(updates)}")
-    if not dry_run and updates:
-        if has_updated_at:
-            psycopg2.extras.execute_batch(cur, f"""
-                UPDATE {table_name} SET confidence = %(new_confidence)s, updated_at = NOW() WHERE id = %(id)s
-            """, updates, page_size=100)
-        else:
-            psycopg2.extras.execute_batch(cur, f"""
-                UPDATE {table_name} SET confidence = %(new_confidence)s WHERE id = %(id)s
-            """, updates, page_size=100)
-    return len(updates)
+    count = _decay_in_chunks(
+        conn, table_name,
+        f"exp(GREATEST(-%s::double precision * {_DAYS_SINCE_SQL}, {_DECAY_MIN_EXPONENT}))",
+        "",
+        (decay_rate,),
+        set_updated_at=has_updated_at,
+        dry_run=dry_run,
+    )
+    if verbose and count:
+        logger.info(f"{table_name} to decay: {count}")
+    return count
 
 
 def apply_decay(conn, args):
-    """Run confidence decay across all tables."""
+    """Run confidence decay across all tables.
+
+    Decay commits per id chunk, so it runs on a connection of its own and
+    those commits never cover the phases main() keeps in its one transaction.
+    main() calls it before any phase writes, so it never waits on rows that
+    transaction holds.  The new confidence depends only on last_confirmed_at,
+    so repeating decay after a failed run is harmless.  A dry run only counts,
+    on ``conn``.
+    """
     if not check_decay_cooldown(args.state_file, args.force):
         return 0, 0, 0, 0
-    decayed_facts = apply_decay_to_entity_facts(conn, args.dry_run, args.verbose)
-    decayed_events = apply_decay_to_table(conn, 'events', TABLE_DECAY_RATES['events'], args.dry_run, args.verbose)
-    decayed_lessons = apply_decay_to_table(conn, 'lessons', TABLE_DECAY_RATES['lessons'], args.dry_run, args.verbose)
-    decayed_embeddings = apply_decay_to_table(conn, 'memory_embeddings', TABLE_DECAY_RATES['memory_embeddings'], args.dry_run, args.verbose)
+    decay_conn = conn if args.dry_run else psycopg2.connect("")
+    try:
+        decayed_facts = apply_decay_to_entity_facts(decay_conn, args.dry_run, args.verbose)
+        decayed_events = apply_decay_to_table(decay_conn, 'events', TABLE_DECAY_RATES['events'], args.dry_run, args.verbose)
+        decayed_lessons = apply_decay_to_table(decay_conn, 'lessons', TABLE_DECAY_RATES['lessons'], args.dry_run, args.verbose)
+        decayed_embeddings = apply_decay_to_table(decay_conn, 'memory_embeddings', TABLE_DECAY_RATES['memory_embeddings'], args.dry_run, args.verbose)
+    finally:
+        if decay_conn is not conn:
+            decay_conn.close()
     args._ran_decay = True
     return decayed_facts, decayed_events, decayed_lessons, decayed_embeddings
 
@@ -1332,6 +2193,54 @@ def purge_old_archives(conn, dry_run=False, verbose=False):
     return purged
 
 
+def _table_exists(cur, name):
+    """True when ``name`` resolves to a relation (to_regclass, no error if absent)."""
+    cur.execute("SELECT to_regclass(%s)", (name,))
+    return cur.fetchone()[0] is not None
+
+
+def purge_expired_extraction_cache(conn, dry_run=False, verbose=False):
+    """Delete extraction_cache entries past their expires_at (migration 090).
+
+    Skipped when the table does not exist, so a missing migration never
+    aborts the run's transaction.
+    """
+    cur = conn.cursor()
+    if not _table_exists(cur, "extraction_cache"):
+        if verbose:
+            logger.info("  extraction_cache not found (migration 090 not applied); purge skipped")
+        return 0
+    if dry_run:
+        cur.execute("SELECT COUNT(*) FROM extraction_cache WHERE expires_at < NOW()")
+        return cur.fetchone()[0]
+    cur.execute("DELETE FROM extraction_cache WHERE expires_at < NOW()")
+    purged = cur.rowcount
+    if verbose:
+        logger.info(f"  Purged {purged} expired extraction cache entries")
+    return purged
+
+
+def purge_unused_embedding_cache(conn, dry_run=False, verbose=False):
+    """Delete embedding_cache entries unused for EMBED_CACHE_TTL_DAYS (migration 093).
+
+    Skipped when the table does not exist, like open_embedding_cache().
+    """
+    cur = conn.cursor()
+    if not _table_exists(cur, "embedding_cache"):
+        if verbose:
+            logger.info("  embedding_cache not found (migration 093 not applied); purge skipped")
+        return 0
+    where = "last_used_at < NOW() - make_interval(days => %s)"
+    if dry_run:
+        cur.execute(f"SELECT COUNT(*) FROM embedding_cache WHERE {where}", (EMBED_CACHE_TTL_DAYS,))
+        return cur.fetchone()[0]
+    cur.execute(f"DELETE FROM embedding_cache WHERE {where}", (EMBED_CACHE_TTL_DAYS,))
+    purged = cur.rowcount
+    if verbose:
+        logger.info(f"  Purged {purged} unused embedding cache entries")
+    return purged
+
+
 # ---------------------------------------------------------------------------
 # Phase 6: Ghost entity cleanup
 # ---------------------------------------------------------------------------
@@ -1560,19 +2469,59 @@ def reembed_modified_facts(conn, modified_fact_ids, dry_run=False, verbose=False
     items = [{"id": r[0], "text": r[1]} for r in rows if r[1]]
     if not items:
         return 0
-    total = 0
-    for i in range(0, len(items), EMBED_BATCH_SIZE):
-        batch = items[i:i+EMBED_BATCH_SIZE]
-        texts = [it["text"] for it in batch]
-        embeddings = embed_texts(texts, cfg)
+    def store(batch, embeddings):
         if not dry_run:
             _store_embeddings(cur, "entity_fact", batch, embeddings)
-        total += len(batch)
+        return len(batch)
+
+    size = _embed_batch_size(cfg)
+    cfg["cache"] = None if dry_run else open_embedding_cache(cfg)
+    try:
+        total = _embed_pipeline((items[i:i+size] for i in range(0, len(items), size)), cfg, store)
+    finally:
+        if cfg["cache"] is not None:
+            cfg["cache"].close()
     if verbose:
         logger.info(f"  Re-embedded {total} modified facts")
     return total
 
 
+# ---------------------------------------------------------------------------
+# Embedding queue worker
+# ---------------------------------------------------------------------------
+def run_embed_queue_worker(conn, listener, cfg, verbose=False, poll_s=EMBED_QUEUE_POLL_S, cycles=None):
+    """Drain embedding_queue whenever a NOTIFY arrives on ``listener``.
+
+    ``listener`` is an autocommit connection that has run LISTEN on
+    EMBED_QUEUE_CHANNEL.  The queue is also drained every ``poll_s`` seconds
+    in case a notification was missed.  When Ollama is unreachable the
+    claimed batch goes back to the queue and the worker backs off, starting
+    a fresh embedding client so an open circuit breaker does not outlive the
+    outage.  ``cycles`` bounds the number of drains (tests); None runs forever.
+    """
+    failures = 0
+    while cycles is None or cycles > 0:
+        if cycles is not None:
+            cycles -= 1
+        try:
+            embedded, removed = drain_embedding_queue(conn, cfg, verbose=verbose, commit=True)
+        except OllamaConnectionError as e:
+            failures += 1
+            delay = _jittered_backoff(failures)
+            logger.warning(f"[WARN] Ollama unavailable, retrying the embedding queue in {delay:.1f}s: {e}")
+            with _embedding_clients_lock:
+                _embedding_clients.clear()
+            time.sleep(delay)
+            continue
+        failures = 0
+        if embedded or removed:
+            logger.info(f"Embedding queue: embedded {embedded}, removed {removed}")
+
+        if select.select([listener], [], [], poll_s) != ([], [], []):
+            listener.poll()
+            del listener.notifies[:]
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -1582,7 +2531,35 @@ def parse_args():
     parser.add_argument("--verbose", action="store_true", help="Log detailed per-item actions")
     parser.add_argument("--force", action="store_true", help="Ignore cooldown")
     parser.add_argument("--state-file", default=DEFAULT_STATE_FILE, help="Path to cooldown state file")
+    parser.add_argument(
+        "--file-manifest",
+        default=DEFAULT_FILE_MANIFEST,
+        help="Path to the memory-file manifest (size/mtime/hash per embedded file)",
+    )
     parser.add_argument("--skip-embed", action="store_true", help="Skip embedding phase")
+    parser.add_argument(
+        "--embed-batch-size",
+        type=int,
+        default=None,
+        help=f"Texts per /api/embed request (default: embedding-config.json batch_size, else {EMBED_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--embed-concurrency",
+        type=int,
+        default=None,
+        help=(
+            "Embedding requests kept in flight while rows are read and written "
+            f"(default: embedding-config.json concurrency, else {EMBED_CONCURRENCY})"
+        ),
+    )
+    parser.add_argument(
+        "--embed-queue-worker",
+        action="store_true",
+        help=(
+            "Run as a long-lived worker that LISTENs on the embedding_queue channel and embeds "
+            "queued row changes within seconds (migration 091). Skips the cooldown and all other phases."
+        ),
+    )
     parser.add_argument("--skip-consolidation", action="store_true", help="Skip cross-key consolidation")
     parser.add_argument("--skip-dedup", action="store_true", help="Skip same-key deduplication")
     parser.add_argument("--skip-decay", action="store_true", help="Skip confidence decay")
@@ -1601,9 +2578,35 @@ def parse_args():
     return parser.parse_args()
 
 
+def embed_queue_worker_main(args):
+    """--embed-queue-worker entry point: LISTEN, then drain until interrupted."""
+    cfg = _args_embedding_config(args)
+    conn = psycopg2.connect("")
+    conn.autocommit = False
+    listener = psycopg2.connect("")
+    listener.autocommit = True
+    cfg["cache"] = open_embedding_cache(cfg)
+    try:
+        with listener.cursor() as cur:
+            cur.execute(f"LISTEN {EMBED_QUEUE_CHANNEL}")
+        logger.info(f"Embedding queue worker listening on {EMBED_QUEUE_CHANNEL}")
+        run_embed_queue_worker(conn, listener, cfg, args.verbose)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if cfg["cache"] is not None:
+            cfg["cache"].close()
+        listener.close()
+        conn.close()
+    return 0
+
+
 def main():
     args = parse_args()
 
+    if args.embed_queue_worker:
+        return embed_queue_worker_main(args)
+
     if not check_cooldown(args.state_file, args.force):
         return 0
 
@@ -1616,6 +2619,11 @@ def main():
     embed_ollama_failed = False
 
     try:
+        # Decay commits as it goes on its own connection; run it before this
+        # transaction takes any row locks it would have to wait on.
+        if not args.skip_decay:
+            apply_decay(conn, args)
+
         # Phase: Lessons deduplication (must run BEFORE embed to avoid wasted calls)
         lessons_deduped = 0
         if not args.skip_lesson_dedup:
@@ -1644,9 +2652,6 @@ def main():
             medium_report_count = dedup_result['medium_count']
             modified_fact_ids.update(dedup_result.get('modified_ids', set()))
 
-        if not args.skip_decay:
-            apply_decay(conn, args)
-
         pattern_merges = deleted_orphans = low_fact_count = 0
         if not args.skip_ghost_cleanup:
             pattern_merges, deleted_orphans, low_fact_count = ghost_entity_cleanup(
@@ -1667,10 +2672,14 @@ def main():
 
         archived = archive_low_confidence(conn, args.dry_run, args.verbose)
         purged = purge_old_archives(conn, args.dry_run, args.verbose)
+        cache_purged = purge_expired_extraction_cache(conn, args.dry_run, args.verbose)
+        embed_cache_purged = purge_unused_embedding_cache(conn, args.dry_run, args.verbose)
 
         if not args.dry_run:
             conn.commit()
             update_state(args.state_file, ran_decay=getattr(args, '_ran_decay', False))
+            if getattr(args, '_file_manifest', None) is not None:
+                save_file_manifest(args.file_manifest, args._file_manifest)
             logger.info("Committed all changes.")
         else:
             logger.info("DRY RUN — no changes committed.")
@@ -1694,6 +2703,8 @@ def main():
         logger.info(f"  Orphaned embeddings:    {cleaned}")
         logger.info(f"  Archived facts:         {archived}")
         logger.info(f"  Purged old archives:    {purged}")
+        logger.info(f"  Expired extract cache:  {cache_purged}")
+        logger.info(f"  Unused embed cache:     {embed_cache_purged}")
         if embed_ollama_failed:
             logger.error("[ERROR] Embed phase failed: Ollama was unreachable. Other phases ran normally.")
     except Exception as e:
@@ -0,0 +1,48 @@
+"""Shared fixtures for the Unix-socket services (recall-server, extraction-worker).
+
+``serve_unix(server_cls, service)`` starts a real ``socket_server.JsonLineServer``
+subclass on a temporary socket and returns its path; ``roundtrip(path, *lines)``
+sends request lines over one connection and returns the decoded replies.
+"""
+
+import json
+import socket
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def serve_unix(tmp_path):
+    servers = []
+
+    def _serve(server_cls, service, name="service.sock"):
+        sock_path = str(tmp_path / name)
+        server = server_cls(sock_path, service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return sock_path
+
+    yield _serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _roundtrip(sock_path, *lines):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(sock_path)
+    reader = client.makefile("rb")
+    replies = []
+    try:
+        for line in lines:
+            client.sendall(line + b"\n")
+            replies.append(json.loads(reader.readline()))
+    finally:
+        client.close()
+    return replies
+
+
+@pytest.fixture
+def roundtrip():
+    return _roundtrip
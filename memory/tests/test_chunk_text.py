@@ -594,17 +594,18 @@ class TestIntegration:
 
         recorded = []
 
-        def fake_embed_single(text, cfg):
-            return [0.0] * 1024
+        def fake_embed_texts(texts, cfg):
+            return [[0.0] * 1024 for _ in texts]
 
-        def fake_already_embedded(cur, source_type, source_id):
-            return False
+        def fake_existing_file_chunks(cur, source_name):
+            return {}
 
         def fake_store_embeddings(cur, source_type, rows, embeddings):
             recorded.extend((row["id"], row["text"]) for row in rows)
+            return len(rows)
 
-        monkeypatch.setattr(_memory_maintenance, "embed_single", fake_embed_single)
-        monkeypatch.setattr(_memory_maintenance, "_already_embedded", fake_already_embedded)
+        monkeypatch.setattr(_memory_maintenance, "embed_texts", fake_embed_texts)
+        monkeypatch.setattr(_memory_maintenance, "_existing_file_chunks", fake_existing_file_chunks)
         monkeypatch.setattr(_memory_maintenance, "_store_embeddings", fake_store_embeddings)
 
         class FakeConn:
@@ -618,7 +619,9 @@ class TestIntegration:
 
         assert count > 0
         source_ids = [sid for sid, _ in recorded]
-        assert source_ids == [f"2026-07-05.md#{i}" for i in range(len(source_ids))]
+        # Content-addressed ids: "<file>#<sha256(chunk)[:16]>"
+        assert all(re.fullmatch(r"2026-07-05\.md#[0-9a-f]{16}", sid) for sid in source_ids)
+        assert len(set(source_ids)) == len(source_ids)
 
         # Every recorded chunk should start at a paragraph or header boundary.
         # Strip overlap before measuring so we check the start of new content.
@@ -646,17 +649,18 @@ class TestIntegration:
 
         recorded = []
 
-        def fake_embed_single(text, cfg):
-            return [0.0] * 1024
+        def fake_embed_texts(texts, cfg):
+            return [[0.0] * 1024 for _ in texts]
 
-        def fake_already_embedded(cur, source_type, source_id):
-            return False
+        def fake_existing_file_chunks(cur, source_name):
+            return {}
 
         def fake_store_embeddings(cur, source_type, rows, embeddings):
             recorded.extend((row["id"], row["text"]) for row in rows)
+            return len(rows)
 
-        monkeypatch.setattr(_memory_maintenance, "embed_single", fake_embed_single)
-        monkeypatch.setattr(_memory_maintenance, "_already_embedded", fake_already_embedded)
+        monkeypatch.setattr(_memory_maintenance, "embed_texts", fake_embed_texts)
+        monkeypatch.setattr(_memory_maintenance, "_existing_file_chunks", fake_existing_file_chunks)
         monkeypatch.setattr(_memory_maintenance, "_store_embeddings", fake_store_embeddings)
 
         class FakeConn:
@@ -670,7 +674,9 @@ class TestIntegration:
 
         assert count > 0
         source_ids = [sid for sid, _ in recorded]
-        assert source_ids == [f"MEMORY.md#{i}" for i in range(len(source_ids))]
+        # Content-addressed ids: "<file>#<sha256(chunk)[:16]>"
+        assert all(re.fullmatch(r"MEMORY\.md#[0-9a-f]{16}", sid) for sid in source_ids)
+        assert len(set(source_ids)) == len(source_ids)
 
         chunk_texts = [text for _, text in recorded]
         stripped = [chunk_texts[0]]
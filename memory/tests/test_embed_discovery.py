@@ -0,0 +1,144 @@
+"""Unit tests for set-based "needs embedding" discovery in memory-maintenance.
+
+``_iter_unembedded()`` replaces the per-row ``_already_embedded()`` probe with
+one anti-join per source_type on a named cursor; ``_iter_stale()`` finds rows
+whose text no longer matches memory_embeddings.content_hash with one join.
+The connection is faked, so these tests check the query shape, batching and
+cursor lifecycle.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from unittest import mock
+
+_MAINTENANCE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "memory-maintenance.py"
+)
+_spec = importlib.util.spec_from_file_location("memory_maintenance", str(_MAINTENANCE_PATH))
+_memory_maintenance = importlib.util.module_from_spec(_spec)
+sys.modules["memory_maintenance"] = _memory_maintenance
+_spec.loader.exec_module(_memory_maintenance)
+
+
+class FakeNamedCursor:
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = list(rows)
+        self.executed = []
+        self.closed = False
+        self.itersize = None
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchmany(self, size):
+        page, self.rows = self.rows[:size], self.rows[size:]
+        return page
+
+    def close(self):
+        self.closed = True
+
+
+def _fake_cur(rows):
+    cur = mock.MagicMock()
+    named = {}
+
+    def _cursor(name=None):
+        named[name] = FakeNamedCursor(name, rows)
+        return named[name]
+
+    cur.connection.cursor.side_effect = _cursor
+    return cur, named
+
+
+def test_iter_unembedded_runs_one_anti_join_on_named_cursor():
+    rows = [(i, f"text {i}") for i in range(5)]
+    cur, named = _fake_cur(rows)
+
+    batches = list(_memory_maintenance._iter_unembedded(
+        cur, "SELECT id, name AS text FROM entities", "entity", batch_size=2
+    ))
+
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert batches[0][0] == {"id": 0, "text": "text 0"}
+    stream = named["unembedded_entity"]
+    assert stream.closed
+    assert stream.itersize == 2
+    (sql, params), = stream.executed
+    assert "FROM (SELECT id, name AS text FROM entities) AS src" in sql
+    assert "NOT EXISTS" in sql
+    assert "me.source_id = src.id::text" in sql
+    assert params == ("entity",)
+    cur.execute.assert_not_called()  # no per-row probes on the write cursor
+
+
+def test_embed_table_embeds_only_streamed_rows(monkeypatch):
+    cur, _named = _fake_cur([(1, "a"), (2, "b"), (3, "c")])
+    stored = []
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", lambda texts, cfg: [[0.0]] * len(texts))
+    monkeypatch.setattr(
+        _memory_maintenance, "_store_embeddings",
+        lambda c, st, items, embs: stored.append((st, [it["id"] for it in items])),
+    )
+
+    total = _memory_maintenance._embed_table(cur, "SELECT id, x AS text FROM t", "lesson", {})
+
+    assert total == 3
+    assert stored == [("lesson", [1, 2, 3])]
+
+
+def test_spec_queries_have_no_bare_percent():
+    for query, _source_type in _memory_maintenance.TABLE_EMBED_SPECS.values():
+        assert "%" not in query.replace("%%", "")
+
+
+def test_iter_stale_joins_on_the_content_hash():
+    cur, named = _fake_cur([(7, "new text")])
+
+    batches = list(_memory_maintenance._iter_stale(cur, "SELECT id, title AS text FROM tasks", "task"))
+
+    assert batches == [[{"id": 7, "text": "new text"}]]
+    stream = named["stale_task"]
+    assert stream.closed
+    (sql, params), = stream.executed
+    assert "FROM (SELECT id, title AS text FROM tasks) AS src" in sql
+    assert "JOIN memory_embeddings me" in sql and "NOT EXISTS" not in sql
+    assert "me.content_hash <> md5(src.text)" in sql
+    assert params == ("task",)
+
+
+def test_reembed_stale_covers_every_source_and_isolates_errors(monkeypatch):
+    conn = mock.MagicMock()
+    cur = conn.cursor.return_value
+    stored = []
+
+    def iter_stale(c, query, source_type, batch_size):
+        if source_type == "music_work":
+            raise _memory_maintenance.psycopg2.ProgrammingError("no music_works")
+        return iter([[{"id": 1, "text": f"{source_type} text"}]])
+
+    monkeypatch.setattr(_memory_maintenance, "_iter_stale", iter_stale)
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", lambda texts, cfg: [[0.0]] * len(texts))
+    monkeypatch.setattr(
+        _memory_maintenance, "_store_embeddings",
+        lambda c, st, items, embs: stored.append(st),
+    )
+
+    total, warns = _memory_maintenance.phase_reembed_stale(conn, {"concurrency": 1})
+
+    sources = set(_memory_maintenance._embed_specs())
+    assert {"lesson", "library", "research_conclusion"} <= sources
+    assert set(stored) == sources - {"music_work"}
+    assert (total, warns) == (len(sources) - 1, 1)
+    cur.execute.assert_any_call("ROLLBACK TO SAVEPOINT reembed_music_work")
+
+
+def test_schema_and_migration_add_the_same_content_hash():
+    root = Path(__file__).resolve().parents[2]
+    migration = (root / "memory" / "migrations" / "092_memory_embeddings_content_hash.sql").read_text()
+    schema = (root / "database" / "schema.sql").read_text()
+    column = "content_hash text GENERATED ALWAYS AS (md5(content)) STORED"
+    assert column in migration
+    table = schema[schema.index("CREATE TABLE IF NOT EXISTS memory_embeddings ("):]
+    assert column in table[:table.index(");")]
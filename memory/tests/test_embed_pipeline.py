@@ -0,0 +1,143 @@
+"""Unit tests for the pipelined embedding path in memory-maintenance.
+
+``_embed_pipeline()`` keeps several ``embed_texts()`` calls in flight on
+worker threads while the calling thread reads the next batch and stores
+finished ones. ``embed_texts()`` is replaced with slow fakes, so these tests
+check overlap, read-ahead bounds, ordering and error propagation without
+Ollama or a database.
+"""
+
+import importlib.util
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+_MAINTENANCE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "memory-maintenance.py"
+)
+_spec = importlib.util.spec_from_file_location("memory_maintenance", str(_MAINTENANCE_PATH))
+_memory_maintenance = importlib.util.module_from_spec(_spec)
+sys.modules["memory_maintenance"] = _memory_maintenance
+_spec.loader.exec_module(_memory_maintenance)
+
+
+def _batches(n, size=2, log=None):
+    for b in range(n):
+        if log is not None:
+            log.append(("read", b))
+        yield [{"id": b * size + i, "text": f"text {b * size + i}"} for i in range(size)]
+
+
+class SlowEmbed:
+    """embed_texts() stand-in that records how many calls overlap."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.threads = set()
+
+    def __call__(self, texts, cfg):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.threads.add(threading.current_thread().name)
+        # Later batches finish first, so ordering is really exercised.
+        time.sleep(self.delay / (1 + int(texts[0].split()[1])))
+        with self.lock:
+            self.active -= 1
+        return [[float(t.split()[1])] for t in texts]
+
+
+def test_batches_overlap_and_are_stored_in_order(monkeypatch):
+    embed = SlowEmbed()
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", embed)
+    stored = []
+    main = threading.current_thread().name
+
+    def store(batch, embeddings):
+        assert threading.current_thread().name == main  # DB work stays on the caller
+        stored.append(([it["id"] for it in batch], embeddings))
+        return len(batch)
+
+    total = _memory_maintenance._embed_pipeline(_batches(6), {"concurrency": 3}, store)
+
+    assert total == 12
+    assert [ids for ids, _ in stored] == [[2 * b, 2 * b + 1] for b in range(6)]
+    assert all(emb == [[float(i)] for i in ids] for ids, emb in stored)
+    assert 1 < embed.peak <= 3
+    assert main not in embed.threads
+
+
+def test_read_ahead_is_bounded_by_concurrency(monkeypatch):
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", SlowEmbed(delay=0.01))
+    log = []
+
+    def store(batch, embeddings):
+        log.append(("store", batch[0]["id"] // 2))
+        return len(batch)
+
+    _memory_maintenance._embed_pipeline(_batches(8, log=log), {"concurrency": 2}, store)
+
+    reads = stores = 0
+    for event, _ in log:
+        reads += event == "read"
+        stores += event == "store"
+        assert reads - stores <= 2
+
+
+def test_concurrency_one_runs_inline(monkeypatch):
+    embed = SlowEmbed(delay=0)
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", embed)
+    total = _memory_maintenance._embed_pipeline(_batches(3), {"concurrency": 1}, lambda b, e: len(b))
+    assert total == 6
+    assert embed.threads == {threading.current_thread().name}
+
+
+def test_ollama_failure_stops_reading_and_propagates(monkeypatch):
+    def embed(texts, cfg):
+        if texts[0] == "text 4":
+            raise _memory_maintenance.OllamaConnectionError("down")
+        return [[0.0]] * len(texts)
+
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", embed)
+    log = []
+    with pytest.raises(_memory_maintenance.OllamaConnectionError):
+        _memory_maintenance._embed_pipeline(_batches(50, log=log), {"concurrency": 2}, lambda b, e: len(b))
+    assert len(log) < 50
+
+
+@pytest.mark.parametrize("cfg, size, concurrency", [
+    ({}, _memory_maintenance.EMBED_BATCH_SIZE, _memory_maintenance.EMBED_CONCURRENCY),
+    ({"batch_size": 16, "concurrency": 6}, 16, 6),
+    ({"batch_size": 0, "concurrency": -1}, _memory_maintenance.EMBED_BATCH_SIZE, 1),
+])
+def test_settings_come_from_embedding_config(cfg, size, concurrency):
+    assert _memory_maintenance._embed_batch_size(cfg) == size
+    assert _memory_maintenance._embed_concurrency(cfg) == concurrency
+
+
+def test_cli_overrides_reach_the_embedding_config(monkeypatch):
+    seen = {}
+
+    def fake_db(conn, cfg, dry_run, verbose):
+        seen.update(cfg)
+        return 0, 0, 0
+
+    monkeypatch.setattr(_memory_maintenance, "load_embedding_config", lambda: {"model": "m", "base_url": "http://ollama"})
+    monkeypatch.setattr(_memory_maintenance, "drain_embedding_queue", lambda *a: (0, 0))
+    monkeypatch.setattr(_memory_maintenance, "phase_embed_database", fake_db)
+    monkeypatch.setattr(_memory_maintenance, "phase_embed_research", lambda *a: (0, 0))
+    monkeypatch.setattr(_memory_maintenance, "phase_reembed_stale", lambda *a: (0, 0))
+    monkeypatch.setattr(_memory_maintenance, "phase_embed_files", lambda *a, **k: 0)
+    monkeypatch.setattr(_memory_maintenance, "load_file_manifest", lambda path: {})
+    monkeypatch.setattr(_memory_maintenance, "open_embedding_cache", lambda cfg: None)
+    args = SimpleNamespace(dry_run=False, verbose=False, reindex_files=False, file_manifest="x",
+                           embed_batch_size=32, embed_concurrency=8)
+    _memory_maintenance.phase_embed(object(), args)
+    assert (seen["batch_size"], seen["concurrency"]) == (32, 8)
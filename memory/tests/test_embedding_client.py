@@ -0,0 +1,159 @@
+"""Unit tests for the adaptive embedding client in memory-maintenance.
+
+``EmbeddingClient`` replaces the old "batch, then embed_single() for every
+text" fallback. The HTTP session is faked and backoff sleeps are disabled,
+so these tests check batch shrinking and growth, bad-text isolation, retries,
+the circuit breaker and the metrics summary.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+import requests
+
+_MAINTENANCE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "memory-maintenance.py"
+)
+_spec = importlib.util.spec_from_file_location("memory_maintenance", str(_MAINTENANCE_PATH))
+_memory_maintenance = importlib.util.module_from_spec(_spec)
+sys.modules["memory_maintenance"] = _memory_maintenance
+_spec.loader.exec_module(_memory_maintenance)
+
+CFG = {"base_url": "http://ollama:11434/", "model": "m", "batch_size": 8, "breaker_cooldown_s": 0}
+
+
+def _response(status=200, embeddings=None, text=""):
+    resp = mock.MagicMock()
+    resp.status_code = status
+    resp.text = text
+    resp.json.return_value = {"embeddings": embeddings or []}
+    return resp
+
+
+class FakeOllama:
+    """Answers /api/embed with one vector per text unless ``fail(texts)`` says otherwise."""
+
+    def __init__(self, fail=lambda texts: None):
+        self.fail = fail
+        self.sizes = []
+
+    def post(self, url, json, timeout):
+        texts = json["input"]
+        self.sizes.append(len(texts))
+        outcome = self.fail(texts)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome is not None:
+            return outcome
+        return _response(embeddings=[[float(len(t))] for t in texts])
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(_memory_maintenance.time, "sleep", lambda s: None)
+
+
+def _client(fake, **cfg):
+    client = _memory_maintenance.EmbeddingClient(dict(CFG, **cfg))
+    client.session = fake
+    return client
+
+
+def test_batches_follow_the_configured_size():
+    fake = FakeOllama()
+    client = _client(fake)
+    texts = [f"t{i}" for i in range(20)]
+    assert client.embed(texts) == [[float(len(t))] for t in texts]
+    assert fake.sizes == [8, 8, 4]
+    assert client.stats["texts"] == 20
+
+
+def test_timeouts_shrink_the_batch_and_split_it():
+    fake = FakeOllama(lambda texts: requests.exceptions.Timeout() if len(texts) > 2 else None)
+    client = _client(fake)
+    result = client.embed([f"t{i}" for i in range(8)])
+    assert all(result)
+    assert fake.sizes[:3] == [8, 4, 2]
+    assert client.batch_size == 2
+    assert client.stats["shrinks"] == 2
+
+
+def test_batch_size_grows_back_after_clean_requests():
+    overloaded = {"on": True}
+    fake = FakeOllama(lambda texts: _response(500, text="out of memory")
+                      if overloaded["on"] and len(texts) > 1 else None)
+    client = _client(fake)
+    client.embed(["a", "b"])
+    assert client.batch_size == 1
+    overloaded["on"] = False
+    client.embed(["x"] * (_memory_maintenance.EMBED_GROW_AFTER + 1))
+    assert client.batch_size == 2 and client.stats["grows"] == 1
+
+
+def test_rejected_text_is_isolated_and_skipped_without_a_storm():
+    fake = FakeOllama(lambda texts: _response(400, text="input too long") if "bad" in texts else None)
+    client = _client(fake, retries=1)
+    result = client.embed(["a", "b", "bad", "c"])
+    assert result == [[1.0], [1.0], [], [1.0]]
+    assert client.stats["skipped"] == 1
+    assert len(fake.sizes) <= 8  # splits + one retry, not one call per text per failure
+    assert client.batch_size == 8  # a bad input is not an overload
+
+
+def test_bisecting_a_large_batch_does_not_trip_the_breaker():
+    fake = FakeOllama(lambda texts: _response(400, text="input too long") if "bad" in texts else None)
+    client = _client(fake, batch_size=64, retries=0)
+    texts = ["bad"] + [f"t{i}" for i in range(63)]
+    result = client.embed(texts)
+    assert result[0] == [] and result[1:] == [[float(len(t))] for t in texts[1:]]
+    assert fake.sizes[:7] == [64, 32, 16, 8, 4, 2, 1]  # seven rejections in a row
+    assert client.stats["breaker_pauses"] == 0 and not client._half_open
+    assert client.embed(["more"]) == [[4.0]]
+
+
+def test_wrong_vector_count_counts_as_rejected():
+    fake = FakeOllama(lambda texts: _response(embeddings=[[0.0]]) if len(texts) > 1 else None)
+    client = _client(fake)
+    assert client.embed(["a", "b"]) == [[1.0], [1.0]]
+
+
+def test_breaker_pauses_then_gives_up_with_circuit_open():
+    fake = FakeOllama(lambda texts: requests.exceptions.ConnectionError("refused"))
+    client = _client(fake, breaker_threshold=3)
+    with pytest.raises(_memory_maintenance.OllamaConnectionError) as exc:
+        client.embed(["a", "b"])
+    assert isinstance(exc.value, _memory_maintenance.EmbeddingCircuitOpen)
+    assert len(fake.sizes) == 4  # three failures trip the breaker, the probe after the pause fails
+    assert client.stats["breaker_pauses"] == 1
+    with pytest.raises(_memory_maintenance.EmbeddingCircuitOpen):
+        client.embed(["c"])  # stays open for the rest of the run
+    assert len(fake.sizes) == 4
+
+
+def test_breaker_closes_when_the_probe_succeeds():
+    calls = {"n": 0}
+
+    def flaky(texts):
+        calls["n"] += 1
+        return requests.exceptions.ConnectionError("refused") if calls["n"] <= 3 else None
+
+    client = _client(FakeOllama(flaky), breaker_threshold=3)
+    assert client.embed(["a"]) == [[1.0]]
+    assert not client._half_open and client.stats["breaker_pauses"] == 1
+
+
+def test_summary_reports_throughput():
+    client = _client(FakeOllama())
+    client.embed(["a", "b", "c"])
+    summary = client.summary()
+    assert summary.startswith("3 texts in 1 requests")
+    assert "texts/s" in summary and "batch_size=8/8" in summary
+
+
+def test_embed_texts_shares_one_client_per_endpoint_and_batch_size():
+    a = _memory_maintenance.embedding_client(dict(CFG))
+    assert _memory_maintenance.embedding_client(dict(CFG)) is a
+    assert _memory_maintenance.embedding_client(dict(CFG, batch_size=16)) is not a
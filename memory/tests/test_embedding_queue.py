@@ -0,0 +1,279 @@
+"""Unit tests for the trigger-driven embedding queue (migration 091).
+
+``drain_embedding_queue()`` claims embedding_queue entries with FOR UPDATE
+SKIP LOCKED, re-embeds the rows that still have text and drops the
+embeddings of the rest; ``run_embed_queue_worker()`` repeats that whenever
+a NOTIFY arrives.  The cursor is faked and ``embed_texts()`` /
+``_store_embeddings()`` are replaced, so no database or Ollama is needed.
+The last tests check that schema.sql and the migration agree and that every
+embedded source has a queue trigger.
+"""
+
+import importlib.util
+import re
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import psycopg2
+import pytest
+
+_MAINTENANCE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "memory-maintenance.py"
+)
+_spec = importlib.util.spec_from_file_location("memory_maintenance", str(_MAINTENANCE_PATH))
+_memory_maintenance = importlib.util.module_from_spec(_spec)
+sys.modules["memory_maintenance"] = _memory_maintenance
+_spec.loader.exec_module(_memory_maintenance)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MIGRATION = REPO_ROOT / "memory" / "migrations" / "091_embedding_queue.sql"
+SCHEMA = REPO_ROOT / "database" / "schema.sql"
+
+CFG = {"base_url": "http://ollama", "model": "m", "batch_size": 2, "concurrency": 1}
+
+
+class FakeCursor:
+    """Serves queue claims and spec-query lookups from in-memory tables."""
+
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        db = self.db
+        db.statements.append(sql.strip())
+        if sql == _memory_maintenance._CLAIM_QUEUE_SQL:
+            if db.fail_claim:
+                raise psycopg2.ProgrammingError('relation "embedding_queue" does not exist')
+            limit = params[0]
+            db.claim_sizes.append(limit)
+            self.result, db.queue = db.queue[:limit], db.queue[limit:]
+            db.claimed = self.result
+        elif sql == "ROLLBACK TO SAVEPOINT embed_queue":
+            db.queue[:0], db.claimed = db.claimed, []  # entries go back to the queue
+        elif "FROM embedding_queue" in sql:
+            self.result = [(len(db.queue),)]
+        elif sql.strip().startswith("DELETE FROM memory_embeddings"):
+            source_type, ids = params
+            db.removed.append((source_type, ids))
+            self.rowcount = len(ids)
+        elif "src.id = ANY" in sql:
+            source_type, ids = params
+            assert sql == _memory_maintenance._QUEUED_TEXT_SQL.format(
+                query=_memory_maintenance._embed_specs()[source_type])
+            if source_type in db.broken:
+                raise psycopg2.ProgrammingError(f"{source_type} is broken")
+            db.lookups.append((source_type, ids))
+            rows = db.rows.get(source_type, {})
+            embedded = db.embedded.get(source_type, {})
+            self.result = [(i, rows[i], embedded.get(i) == rows[i]) for i in ids if rows.get(i)]
+
+    def fetchall(self):
+        return list(self.result)
+
+    def fetchone(self):
+        return self.result[0]
+
+
+class FakeDB:
+    def __init__(self, queue, rows=None, broken=()):
+        self.queue = list(queue)
+        self.rows = rows or {}
+        self.embedded = {}  # source_type -> {id: text the stored embedding was made from}
+        self.broken = set(broken)
+        self.fail_claim = False
+        self.statements = []
+        self.claim_sizes = []
+        self.claimed = []
+        self.lookups = []
+        self.removed = []
+        self.stored = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture(autouse=True)
+def fake_embedding(monkeypatch):
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", lambda texts, cfg: [[1.0]] * len(texts))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDB([])
+
+    def store(cur, source_type, items, embeddings):
+        db.stored.append((source_type, [it["id"] for it in items]))
+
+    monkeypatch.setattr(_memory_maintenance, "_store_embeddings", store)
+    return db
+
+
+# ---------------------------------------------------------------------------
+# Draining
+# ---------------------------------------------------------------------------
+
+def test_drain_embeds_live_rows_and_drops_deleted_ones(db):
+    db.queue = [("entity_fact", "1"), ("entity_fact", "1"), ("lesson", "7"), ("entity_fact", "2"),
+                ("lesson", "8")]
+    db.rows = {"entity_fact": {1: "Alice - city: Austin", 2: "Bob - pet: cat"}, "lesson": {7: "Measure first"}}
+
+    embedded, removed = _memory_maintenance.drain_embedding_queue(db, dict(CFG, batch_size=8), commit=True)
+
+    assert (embedded, removed) == (3, 1)
+    assert db.lookups == [("entity_fact", [1, 2]), ("lesson", [7, 8])]  # repeats collapsed
+    assert sorted(db.stored) == [("entity_fact", [1, 2]), ("lesson", [7])]
+    assert db.removed == [("lesson", ["8"])]
+    assert db.queue == [] and db.commits == 1
+
+
+def test_claims_follow_batch_size_times_concurrency(db):
+    db.queue = [("task", str(i)) for i in range(1, 10)]
+    db.rows = {"task": {i: f"task {i}" for i in range(1, 10)}}
+    cfg = dict(CFG, batch_size=2, concurrency=2)
+
+    embedded, _ = _memory_maintenance.drain_embedding_queue(db, cfg, commit=True)
+
+    assert embedded == 9
+    assert db.claim_sizes == [4, 4, 4, 4]  # the last claim finds the queue empty
+    assert db.commits == 3
+    claim = _memory_maintenance._CLAIM_QUEUE_SQL
+    assert "FOR UPDATE SKIP LOCKED" in claim and "ORDER BY id" in claim
+
+
+def test_without_commit_claims_stay_in_the_callers_transaction(db):
+    db.queue = [("event", "3")]
+    db.rows = {"event": {3: "Moved to Austin"}}
+    assert _memory_maintenance.drain_embedding_queue(db, CFG) == (1, 0)
+    assert db.commits == 0
+
+
+def test_ollama_failure_puts_the_batch_back(db, monkeypatch):
+    db.queue = [("lesson", "7")]
+    db.rows = {"lesson": {7: "Measure first"}}
+
+    def down(texts, cfg):
+        raise _memory_maintenance.OllamaConnectionError("refused")
+
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", down)
+    with pytest.raises(_memory_maintenance.OllamaConnectionError):
+        _memory_maintenance.drain_embedding_queue(db, CFG, commit=True)
+    assert db.queue == [("lesson", "7")]
+    assert db.rollbacks == 1 and db.commits == 0
+
+
+def test_broken_source_is_skipped_without_losing_the_others(db):
+    db.queue = [("music_work", "4"), ("event", "3"), ("mystery", "9")]
+    db.rows = {"event": {3: "Moved to Austin"}}
+    db.broken = {"music_work"}
+
+    assert _memory_maintenance.drain_embedding_queue(db, CFG, commit=True) == (1, 0)
+    assert "ROLLBACK TO SAVEPOINT embed_queue_music_work" in db.statements
+    assert db.stored == [("event", [3])]
+
+
+def test_dry_run_only_counts_the_queue(db):
+    db.queue = [("task", "1"), ("task", "2")]
+    assert _memory_maintenance.drain_embedding_queue(db, CFG, dry_run=True) == (0, 0)
+    assert len(db.queue) == 2 and db.claim_sizes == []
+
+
+def test_unchanged_rows_keep_their_embedding(db):
+    db.queue = [("entity_fact", "1"), ("entity_fact", "2")]  # e.g. queued by an entity rename
+    db.rows = {"entity_fact": {1: "Alice - city: Austin", 2: "Alicia - city: Austin"}}
+    db.embedded = {"entity_fact": {1: "Alice - city: Austin", 2: "Alice - city: Austin"}}
+
+    assert _memory_maintenance.drain_embedding_queue(db, CFG, commit=True) == (1, 0)
+    assert db.stored == [("entity_fact", [2])] and db.removed == []
+
+
+def test_phase_embed_drains_before_the_full_scan(db, monkeypatch):
+    calls = []
+    db.queue = [("task", "1")]
+    db.rows = {"task": {1: "Ship it"}}
+    monkeypatch.setattr(_memory_maintenance, "load_embedding_config", lambda: dict(CFG))
+    monkeypatch.setattr(_memory_maintenance, "phase_embed_database",
+                        lambda *a: calls.append("database") or (5, 1, 0))
+    monkeypatch.setattr(_memory_maintenance, "phase_embed_research", lambda *a: (0, 0))
+    monkeypatch.setattr(_memory_maintenance, "phase_reembed_stale", lambda *a: (0, 0))
+    monkeypatch.setattr(_memory_maintenance, "phase_embed_files", lambda *a, **k: 0)
+    monkeypatch.setattr(_memory_maintenance, "load_file_manifest", lambda path: {})
+    monkeypatch.setattr(_memory_maintenance, "open_embedding_cache", lambda cfg: None)
+    args = SimpleNamespace(dry_run=False, verbose=False, reindex_files=False, file_manifest="x")
+
+    assert _memory_maintenance.phase_embed(db, args) == (6, 0)
+    assert db.stored == [("task", [1])] and calls == ["database"]
+
+    db.fail_claim = True  # migration 091 not applied: warn and carry on
+    assert _memory_maintenance.phase_embed(db, args) == (5, 1)
+    assert db.statements[-1] == "ROLLBACK TO SAVEPOINT embed_queue"
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def test_worker_backs_off_on_ollama_outage_then_drains(db, monkeypatch):
+    db.queue = [("lesson", "7")]
+    db.rows = {"lesson": {7: "Measure first"}}
+    attempts = {"n": 0}
+    sleeps = []
+
+    def flaky(texts, cfg):
+        attempts["n"] += 1
+        if attempts["n"] == 1:
+            raise _memory_maintenance.EmbeddingCircuitOpen("open")
+        return [[1.0]] * len(texts)
+
+    listener = SimpleNamespace(notifies=["n1", "n2"], poll=lambda: None)
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", flaky)
+    monkeypatch.setattr(_memory_maintenance.time, "sleep", sleeps.append)
+    monkeypatch.setattr(_memory_maintenance.select, "select", lambda r, w, x, t: (r, [], []))
+    _memory_maintenance._embedding_clients["stale"] = object()
+
+    _memory_maintenance.run_embed_queue_worker(db, listener, CFG, cycles=2)
+
+    assert len(sleeps) == 1
+    assert "stale" not in _memory_maintenance._embedding_clients  # fresh breaker after the outage
+    assert db.stored == [("lesson", [7])]
+    assert listener.notifies == []
+
+
+# ---------------------------------------------------------------------------
+# Migration / schema.sql parity and coverage
+# ---------------------------------------------------------------------------
+
+def _statement(text, start):
+    """Whitespace-normalized statement from ``start`` to its terminating ';'."""
+    i = text.index(start)
+    return " ".join(text[i:text.index(";", i) + 1].split())
+
+
+def test_schema_and_migration_define_the_same_objects():
+    migration = MIGRATION.read_text()
+    schema = SCHEMA.read_text()
+
+    triggers = re.findall(r"CREATE OR REPLACE TRIGGER (\w+)", migration)
+    for start in ["CREATE TABLE IF NOT EXISTS embedding_queue"] + [
+        f"CREATE OR REPLACE TRIGGER {name}\n" for name in triggers
+    ]:
+        assert _statement(migration, start) == _statement(schema, start), start
+
+    body = re.compile(r"CREATE OR REPLACE FUNCTION enqueue_embedding\(.*?\$\$(.*?)\$\$;", re.S)
+    assert body.search(migration).group(1) == body.search(schema).group(1)
+
+
+def test_every_embedded_source_has_a_queue_trigger():
+    migration = MIGRATION.read_text()
+    queued = set(re.findall(r"EXECUTE FUNCTION enqueue_embedding\('(\w+)'\)", migration))
+    assert queued == set(_memory_maintenance._embed_specs())
@@ -0,0 +1,112 @@
+"""Unit tests for sender resolution through entity_identifiers (migration 089).
+
+The lookups in extract_memories.py must probe the normalized identifier table
+by (kind, identifier) instead of scanning entity_facts, and schema.sql must
+declare the same table, trigger and resolver function as the migration.
+Cursors are mocked, so no database is required.
+"""
+
+import os
+import re
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR))
+
+sys.modules.setdefault("env_loader", MagicMock())
+sys.modules.setdefault("pg_env", MagicMock())
+
+import extract_memories as em  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MIGRATION = REPO_ROOT / "memory" / "migrations" / "089_entity_identifiers.sql"
+SCHEMA = REPO_ROOT / "database" / "schema.sql"
+
+
+def make_conn(fetchone_results):
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.side_effect = list(fetchone_results)
+    return conn, cur
+
+
+def _sql(call):
+    return " ".join(call.args[0].split())
+
+
+def test_sender_id_probe_uses_handle_index():
+    conn, cur = make_conn([(77,)])
+    assert em._resolve_by_sender_id("330189773371080716", conn) == 77
+    sql = _sql(cur.execute.call_args)
+    assert "FROM entity_identifiers i" in sql
+    assert "i.kind = 'handle' AND i.identifier = LOWER(%s)" in sql
+    assert "ef.value = %s" in sql  # join back keeps the match case-sensitive
+    assert "WHERE value = %s" not in sql
+    assert cur.execute.call_args.args[1] == ("330189773371080716", "330189773371080716")
+
+
+def test_short_sender_id_skips_lookup():
+    conn, cur = make_conn([])
+    assert em._resolve_by_sender_id("1234", conn) is None
+    cur.execute.assert_not_called()
+
+
+def test_source_entity_phone_fallback_uses_digits():
+    conn, cur = make_conn([None, (12,)])
+    assert em.resolve_source_entity_id("Alice", "+1 (512) 555-0199", "signal", conn) == 12
+    sql = _sql(cur.execute.call_args_list[-1])
+    assert "FROM entity_identifiers WHERE kind = 'phone' AND identifier = %s" in sql
+    assert "REGEXP_REPLACE" not in sql
+    assert cur.execute.call_args_list[-1].args[1] == ("15125550199",)
+
+
+def test_default_visibility_phone_and_handle_paths():
+    # sender-id probe misses, phone path misses, handle path hits
+    conn, cur = make_conn([None, None, ("private",)])
+    assert em.lookup_default_visibility("+15125550199", "signal", conn) == "private"
+    phone_sql, handle_sql = (_sql(c) for c in cur.execute.call_args_list[1:])
+    assert "i.kind = 'phone' AND i.identifier = %s" in phone_sql
+    assert "i.kind = 'handle' AND i.identifier = LOWER(%s)" in handle_sql
+    for sql in (phone_sql, handle_sql):
+        assert "REGEXP_REPLACE" not in sql
+        assert "FROM entity_facts ef1" not in sql
+
+
+# ---------------------------------------------------------------------------
+# Migration / schema.sql parity
+# ---------------------------------------------------------------------------
+
+def _statement(text, start):
+    """Whitespace-normalized statement from ``start`` to its terminating ';'."""
+    i = text.index(start)
+    return " ".join(text[i:text.index(";", i) + 1].split())
+
+
+def test_schema_and_migration_define_the_same_objects():
+    migration = MIGRATION.read_text()
+    schema = SCHEMA.read_text()
+
+    for start in (
+        "CREATE TABLE IF NOT EXISTS entity_identifiers",
+        "CREATE OR REPLACE TRIGGER entity_facts_identifiers",
+        "CREATE INDEX IF NOT EXISTS idx_entity_identifiers_fact_id",
+    ):
+        assert _statement(migration, start) == _statement(schema, start), start
+
+    for name in ("sync_entity_identifiers", "resolve_entity_by_identifier"):
+        body = re.compile(r"CREATE OR REPLACE FUNCTION " + name + r"\(.*?\$\$(.*?)\$\$;", re.S)
+        assert body.search(migration).group(1) == body.search(schema).group(1), name
+
+
+def test_resolver_matches_unindexed_values_in_entity_facts():
+    migration = MIGRATION.read_text()
+    body = re.compile(r"CREATE OR REPLACE FUNCTION (\w+)\(.*?\$\$(.*?)\$\$;", re.S)
+    bodies = {m.group(1): " ".join(m.group(2).split()) for m in body.finditer(migration)}
+    resolver = bodies["resolve_entity_by_identifier"]
+    assert "i.kind = 'handle' AND i.identifier = lower($2)" in resolver
+    # The entity_facts branch must cover exactly the values the trigger skips.
+    assert "IF length(NEW.value) <= 255 AND NEW.value !~ '\\s' THEN" in bodies["sync_entity_identifiers"]
+    assert "WHERE (length($2) > 255 OR $2 ~ '\\s')" in resolver
+    assert "lower(f.key) = lower($1) AND lower(f.value) = lower($2)" in resolver
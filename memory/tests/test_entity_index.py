@@ -0,0 +1,255 @@
+"""Unit tests for the in-memory entity name index (memory/scripts/entity_index.py).
+
+The index must answer find_entity_id() steps 2-4 the same way the SQL path
+does: name/full_name/nickname/alternate_spelling matches, domain-base
+normalization and whole-word containment. Connections are faked, so no
+database is required.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR))
+
+sys.modules.setdefault("env_loader", MagicMock())
+sys.modules.setdefault("pg_env", MagicMock())
+
+import entity_index  # noqa: E402
+import extract_memories as em  # noqa: E402
+
+ROWS = [
+    (2, "I)ruid", "Dustin Webber", ["druid"], None),
+    (6, "Rayven", None, None, ["raven", "ravens", "Raven"]),
+    (11, "Rogue Signal", None, None, None),
+    (3450, "VALID", None, None, None),
+    (5384, "Renaissance Machine", None, ["RM"], None),
+]
+
+
+class FakeConn:
+    """Connection whose cursor answers SELECTs from an in-memory entities table."""
+
+    def __init__(self, rows):
+        self.table = {row[0]: row for row in rows}
+        self.queries = []
+
+    def cursor(self):
+        conn = self
+
+        class _Cur:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=None):
+                conn.queries.append((sql, params))
+                rows = sorted(conn.table.values())
+                if params:
+                    max_id, ids = params
+                    rows = [r for r in rows if r[0] > max_id or r[0] in ids]
+                self._rows = rows
+
+            def fetchall(self):
+                return self._rows
+
+        return _Cur()
+
+
+class FakeListenConn:
+    def __init__(self):
+        self.notifies = []
+        self.autocommit = False
+        self.closed = False
+        self.fail = False
+
+    def poll(self):
+        if self.fail:
+            raise OSError("server closed the connection")
+
+    def cursor(self):
+        return MagicMock()
+
+    def close(self):
+        self.closed = True
+
+    def notify(self, entity_id):
+        self.notifies.append(SimpleNamespace(channel="entities_changed", payload=str(entity_id)))
+
+
+@pytest.fixture
+def index():
+    return entity_index.EntityIndex.load(FakeConn(ROWS), em._normalize_for_domain_match)
+
+
+# ---------------------------------------------------------------------------
+# Lookups
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("subject, expected", [
+    ("Rayven", 6),
+    ("dustin webber", 2),       # full_name
+    ("DRUID", 2),               # nickname
+    ("RAVEN", 6),               # alternate_spellings
+    ("ravens", 6),
+    ("RavenX", None),
+])
+def test_exact_and_alias_lookup(index, subject, expected):
+    assert index.find(subject, em._extract_domain_base(subject)) == expected
+
+
+def test_source_lookup_ignores_alternate_spellings(index):
+    assert index.lookup("raven", include_alternates=False) is None
+    assert index.lookup("druid", include_alternates=False) == 2
+
+
+@pytest.mark.parametrize("subject, expected", [
+    ("roguesignal.io", 11),
+    ("www.roguesignal.com", 11),
+    ("renaissancemachine.ai", 5384),
+    ("VALID.ai", 3450),
+    ("example.com", None),
+])
+def test_domain_lookup(index, subject, expected):
+    assert index.find(subject, em._extract_domain_base(subject)) == expected
+
+
+@pytest.mark.parametrize("subject, expected", [
+    ("VALID movement", 3450),
+    ("the VALID movement", 3450),
+    ("invalid.io", None),            # 'valid' inside 'invalid' is not a whole word
+    ("Rogue Signal's lab", 11),
+    ("a rogue signaling device", None),
+])
+def test_containment_lookup(index, subject, expected):
+    assert index.find(subject, em._extract_domain_base(subject)) == expected
+
+
+def test_containment_skips_short_names():
+    idx = entity_index.EntityIndex.load(FakeConn([(1, "Al", None, None, None)]), str.lower)
+    assert idx.lookup_contained("Al Green") is None
+
+
+def test_automaton_reports_overlapping_patterns():
+    automaton = entity_index._Automaton(["he", "she", "hers"])
+    assert sorted(automaton.matches("ushers")) == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_ties_resolve_to_lowest_id():
+    rows = [(9, "Sam", None, None, None), (4, "Samantha", None, ["sam"], None)]
+    idx = entity_index.EntityIndex.load(FakeConn(rows), str.lower)
+    assert idx.lookup("SAM") == 4
+
+
+# ---------------------------------------------------------------------------
+# Incremental refresh
+# ---------------------------------------------------------------------------
+
+def test_refresh_picks_up_new_ids_without_listener():
+    conn = FakeConn(ROWS)
+    idx = entity_index.EntityIndex.load(conn, em._normalize_for_domain_match)
+    conn.table[6000] = (6000, "Blockhenge", None, None, None)
+
+    idx.refresh(conn)
+
+    assert idx.lookup("blockhenge") == 6000
+    assert idx.lookup_contained("the Blockhenge team") == 6000
+    sql, params = conn.queries[-1]
+    assert "id > %s OR id = ANY(%s)" in sql
+    assert params == (5384, [])
+
+
+def test_refresh_applies_notified_renames_and_deletes():
+    conn = FakeConn(ROWS)
+    listener = FakeListenConn()
+    idx = entity_index.EntityIndex.load(conn, em._normalize_for_domain_match)
+    idx.listen(lambda: listener)
+    assert listener.autocommit is True
+
+    conn.table[6] = (6, "Ray", None, None, ["raevyn"])
+    del conn.table[3450]
+    listener.notify(6)
+    listener.notify(3450)
+
+    idx.refresh(conn)
+
+    assert idx.lookup("rayven") is None
+    assert idx.lookup("raevyn") == 6
+    assert idx.lookup("VALID") is None
+    assert idx.lookup_contained("the VALID movement") is None
+    assert conn.queries[-1][1] == (5384, [6, 3450])
+    assert listener.notifies == []
+
+
+def test_broken_listener_triggers_full_reload_and_relisten():
+    conn = FakeConn(ROWS)
+    listeners = [FakeListenConn(), FakeListenConn()]
+    idx = entity_index.EntityIndex.load(conn, em._normalize_for_domain_match)
+    idx.listen(lambda: listeners.pop(0))
+
+    first = idx._listen_conn
+    first.fail = True
+    conn.table[6] = (6, "Ray", None, None, None)  # change whose NOTIFY was lost
+
+    idx.refresh(conn)
+
+    assert first.closed
+    assert idx.lookup("ray") == 6
+    assert idx.lookup("rayven") is None
+    assert conn.queries[-1] == ("SELECT id, name, full_name, nicknames, alternate_spellings FROM entities", None)
+    assert idx._listen_conn is not None and not listeners
+
+
+# ---------------------------------------------------------------------------
+# extract_memories integration
+# ---------------------------------------------------------------------------
+
+def test_find_entity_id_uses_installed_index(index):
+    conn = MagicMock()
+    em.use_entity_index(index)
+    try:
+        assert em.find_entity_id("the VALID movement", conn) == 3450
+        assert em.find_entity_id("roguesignal.io", conn) == 11
+        assert em.resolve_source_entity_id("Dustin Webber", "", "", conn) == 2
+    finally:
+        em.use_entity_index(None)
+    conn.cursor.return_value.__enter__.return_value.execute.assert_not_called()
+
+
+def test_ensure_entity_refreshes_index_after_insert():
+    conn = FakeConn(ROWS)
+    idx = entity_index.EntityIndex.load(conn, em._normalize_for_domain_match)
+    inserted = []
+
+    class _Conn(FakeConn):
+        def cursor(self):
+            inner = FakeConn.cursor(self)
+            original = inner.execute
+
+            def execute(sql, params=None):
+                if sql.lstrip().startswith("INSERT INTO entities"):
+                    inserted.append(params)
+                    self.table[7000] = (7000, params[0], None, None, None)
+                    return
+                original(sql, params)
+
+            inner.execute = execute
+            return inner
+
+        def commit(self):
+            pass
+
+    write_conn = _Conn([])
+    write_conn.table = conn.table
+    em.use_entity_index(idx)
+    try:
+        assert em.ensure_entity("Newhart", "ai", write_conn) == 7000
+    finally:
+        em.use_entity_index(None)
+    assert inserted == [("Newhart", "ai")]
@@ -0,0 +1,238 @@
+"""Unit tests for micro-batched extraction in extract_memories.py.
+
+extract_batch() must fold the cache misses of several messages into one LLM
+request, hand each message back its own result (re-extracting any the batch
+reply leaves out), and main_batch() must store every result through
+store_extracted() with that job's own source metadata. The LLM, sender
+bookkeeping and database are mocked.
+"""
+
+import io
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR))
+
+sys.modules.setdefault("env_loader", MagicMock())
+sys.modules.setdefault("pg_env", MagicMock())
+
+import extract_memories as em  # noqa: E402
+
+MESSAGES = [
+    {"text": "I moved to Austin last month.", "sender_name": "Alice",
+     "sender_id": "+15125550199", "sender_provider": "signal"},
+    {"text": "  My favorite color is teal.  ", "sender_name": "Bob",
+     "sender_id": "330189773371080716", "sender_provider": "discord", "is_group": True},
+    {"text": "We adopted a cat named Miso.", "sender_name": "Carol"},
+]
+RESULTS = [
+    {"facts": [{"subject": "Alice", "key": "current_city", "value": "Austin"}]},
+    {"facts": [{"subject": "Bob", "key": "favorite_color", "value": "teal"}]},
+    {"facts": [{"subject": "Carol", "key": "pet", "value": "cat named Miso"}]},
+]
+
+
+def batch_reply(*ids, results=RESULTS):
+    """Batch reply carrying ``results[n - 1]`` for each message number n."""
+    return {"messages": [dict(results[n - 1], id=n) for n in ids]}
+
+
+@pytest.fixture
+def no_cache():
+    with patch.object(em, "prepare_sender", return_value="public") as prep, \
+            patch.object(em, "CACHE_TTL_HOURS", 0.0):
+        yield prep
+
+
+# ---------------------------------------------------------------------------
+# Prompt and reply splitting
+# ---------------------------------------------------------------------------
+
+def test_batch_prompt_numbers_messages_with_their_own_sender_context():
+    prompt = em.build_batch_extraction_prompt([
+        dict(text="first text", sender="Alice", sender_id="+1512", sender_provider="signal",
+             is_group=False, default_visibility="private"),
+        dict(text="second text", sender="Nova", sender_id="agent:nova", sender_provider="openclaw",
+             is_group=True, default_visibility="public"),
+    ])
+    first, second = prompt.index("=== MESSAGE 1 ==="), prompt.index("=== MESSAGE 2 ===")
+    assert first < prompt.index("first text") < second < prompt.index("second text")
+    assert "Signal phone: +1512" in prompt[first:second]
+    assert "USER_DEFAULT_VISIBILITY: private" in prompt[first:second]
+    assert "The sender is an AI agent" in prompt[second:]
+    assert "The sender is an AI agent" not in prompt[first:second]
+    assert "DURABILITY GUIDANCE:" not in prompt  # instructions travel separately
+
+
+def test_batch_instructions_extend_the_single_message_prefix():
+    assert em.BATCH_EXTRACTION_INSTRUCTIONS.startswith(em.EXTRACTION_INSTRUCTIONS)
+    tail = em.BATCH_EXTRACTION_INSTRUCTIONS[len(em.EXTRACTION_INSTRUCTIONS):]
+    assert '{"messages": [...]}' in tail
+
+
+def test_split_ignores_bad_duplicate_and_out_of_range_ids():
+    parsed = {"messages": [
+        {"id": 2, "facts": ["b"]},
+        {"id": "1", "facts": ["a"]},
+        {"id": 2, "facts": ["dup"]},
+        {"id": 9, "facts": ["x"]},
+        {"facts": ["no id"]},
+        "junk",
+    ]}
+    assert em.split_batch_result(parsed, 3) == {1: {"facts": ["a"]}, 2: {"facts": ["b"]}}
+    assert em.split_batch_result({"facts": []}, 3) == {}
+
+
+# ---------------------------------------------------------------------------
+# extract_batch
+# ---------------------------------------------------------------------------
+
+def test_one_request_for_the_whole_batch(no_cache):
+    with patch.object(em, "call_llm", return_value=batch_reply(3, 1, 2)) as llm:
+        assert em.extract_batch(MESSAGES, MagicMock(), "key", "m") == RESULTS
+    llm.assert_called_once()
+    assert "=== MESSAGE 3 ===" in llm.call_args.args[0]
+    assert llm.call_args.kwargs["max_tokens"] == em.CONFIG_MAX_TOKENS * 3
+    assert llm.call_args.kwargs["instructions"] is em.BATCH_EXTRACTION_INSTRUCTIONS
+    assert [c.args[1:] for c in no_cache.call_args_list] == [
+        ("Alice", "+15125550199", "signal"),
+        ("Bob", "330189773371080716", "discord"),
+        ("Carol", "", ""),
+    ]
+
+
+def test_messages_missing_from_reply_are_extracted_alone(no_cache):
+    with patch.object(em, "call_llm", side_effect=[batch_reply(1, 3), RESULTS[1]]) as llm:
+        assert em.extract_batch(MESSAGES, MagicMock(), "key", "m") == RESULTS
+    retry_prompt = llm.call_args_list[1].args[0]
+    assert "=== MESSAGE" not in retry_prompt
+    assert llm.call_args_list[1].kwargs["instructions"] is em.EXTRACTION_INSTRUCTIONS
+    assert "My favorite color is teal." in retry_prompt
+
+
+def test_unparseable_batch_falls_back_to_single_prompts(no_cache):
+    replies = [em.JsonParseFailure("truncated"), RESULTS[0], em.JsonParseFailure("bad"), RESULTS[2]]
+    with patch.object(em, "call_llm", side_effect=replies) as llm:
+        results = em.extract_batch(MESSAGES, MagicMock(), "key", "m")
+    assert llm.call_count == 4
+    assert results[0] == RESULTS[0] and results[2] == RESULTS[2]
+    assert isinstance(results[1], em.JsonParseFailure)
+
+
+def test_endpoint_failure_fails_the_batch_without_retries(no_cache):
+    err = RuntimeError("LLM API call failed: HTTP 502")
+    with patch.object(em, "call_llm", side_effect=err) as llm:
+        results = em.extract_batch(MESSAGES, MagicMock(), "key", "m")
+    llm.assert_called_once()
+    assert results == [err, err, err]
+
+
+def test_batches_are_capped_at_max_batch_messages(no_cache):
+    with patch.object(em, "MAX_BATCH_MESSAGES", 2), \
+            patch.object(em, "call_llm", side_effect=[batch_reply(1, 2), RESULTS[2]]) as llm:
+        assert em.extract_batch(MESSAGES, MagicMock(), "key", "m") == RESULTS
+    assert llm.call_count == 2
+    assert "=== MESSAGE" not in llm.call_args_list[1].args[0]  # lone remainder
+
+
+def test_cache_hits_are_served_and_misses_written_per_message():
+    conn = MagicMock()
+    with patch.object(em, "prepare_sender", return_value="public"), \
+            patch.object(em, "read_extraction_cache", side_effect=[RESULTS[0], None, None]), \
+            patch.object(em, "write_extraction_cache") as write, \
+            patch.object(em, "call_llm", return_value=batch_reply(1, 2, results=RESULTS[1:])) as llm:
+        results = em.extract_batch(MESSAGES, conn, "key", "m")
+
+    assert results == RESULTS
+    prompt = llm.call_args.args[0]
+    assert "moved to Austin" not in prompt and "teal" in prompt and "Miso" in prompt
+    assert [c.args[1] for c in write.call_args_list] == [RESULTS[1], RESULTS[2]]
+    keys = [c.args[0] for c in write.call_args_list]
+    assert keys[0] == em.extraction_cache_key("My favorite color is teal.", "m", em._cache_context(
+        "Bob", "330189773371080716", "discord", True, "public"))
+
+
+def test_cache_bypass_is_per_message():
+    with patch.object(em, "prepare_sender", return_value="public"), \
+            patch.object(em, "read_extraction_cache", return_value={}) as read, \
+            patch.object(em, "write_extraction_cache"), \
+            patch.object(em, "call_llm", return_value=RESULTS[0]):
+        results = em.extract_batch([dict(MESSAGES[0], cache_bypass=True), MESSAGES[1]],
+                                   MagicMock(), "key", "m")
+    assert read.call_count == 1
+    assert results == [RESULTS[0], {}]
+
+
+def test_sender_preparation_failure_only_fails_that_message():
+    conn = MagicMock()
+    with patch.object(em, "prepare_sender", side_effect=[Exception("db hiccup"), "public", "public"]), \
+            patch.object(em, "CACHE_TTL_HOURS", 0.0), \
+            patch.object(em, "call_llm", return_value=batch_reply(1, 2, results=RESULTS[1:])) as llm:
+        results = em.extract_batch(MESSAGES, conn, "key", "m")
+    assert isinstance(results[0], Exception)
+    assert results[1:] == RESULTS[1:]
+    assert "moved to Austin" not in llm.call_args.args[0]  # misses are renumbered from 1
+    conn.rollback.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# main --batch
+# ---------------------------------------------------------------------------
+
+def _job(message, **extra):
+    job = {"content": message["text"], "sender_name": message.get("sender_name"),
+           "sender_id": message.get("sender_id"), "sender_provider": message.get("sender_provider")}
+    job.update(extra)
+    return job
+
+
+def test_main_batch_stores_each_result_with_its_own_source(monkeypatch, capsys):
+    lines = [
+        json.dumps(_job(MESSAGES[0], source_channel_transcript_id="41")),
+        "not json",
+        json.dumps({"content": "ok"}),
+        json.dumps(_job(MESSAGES[1], source_channel_transcript_id="42", is_group="true")),
+    ]
+    monkeypatch.setenv("OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    with patch.object(em, "get_db_connection") as get_conn, \
+            patch.object(em, "load_entity_index", return_value=None), \
+            patch.object(em, "extract_batch", return_value=[RESULTS[0], {}]) as batch, \
+            patch.object(em, "store_extracted") as store:
+        code = em.main(["--batch"])
+
+    assert code == 1  # the malformed line failed
+    messages = batch.call_args.args[0]
+    assert [m["sender_name"] for m in messages] == ["Alice", "Bob"]
+    assert messages[1]["is_group"] is True
+    store.assert_called_once()
+    assert store.call_args.kwargs["data"] == RESULTS[0]
+    assert store.call_args.kwargs["sender_name"] == "Alice"
+    assert store.call_args.kwargs["src_channel_transcript_id"] == "41"
+    get_conn.return_value.close.assert_called_once()
+
+    replies = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["status"] for r in replies] == ["complete", "failed", "skipped", "complete"]
+    assert replies[0]["extracted"] == RESULTS[0]
+
+
+def test_main_batch_maps_failures_per_job(monkeypatch, capsys):
+    stdin = "\n".join(json.dumps(_job(m)) for m in MESSAGES[:2]) + "\n"
+    monkeypatch.setenv("OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(sys, "stdin", io.StringIO(stdin))
+    results = [em.JsonParseFailure("bad"), RuntimeError("HTTP 502")]
+    with patch.object(em, "get_db_connection"), \
+            patch.object(em, "load_entity_index", return_value=None), \
+            patch.object(em, "extract_batch", return_value=results), \
+            patch.object(em, "store_extracted") as store:
+        assert em.main(["--batch"]) == 1
+    store.assert_not_called()
+    replies = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r["exit_code"], r["failure_reason"]) for r in replies] == [
+        (2, "json_parse_failure"), (1, "nonzero_exit"),
+    ]
@@ -0,0 +1,200 @@
+"""Unit tests for the extraction result cache in extract_memories.py.
+
+extract_message() must serve a cached parsed result instead of calling the
+LLM when (prompt version, model, message hash, context hash) match an
+unexpired extraction_cache row, write fresh results back, honour the bypass
+flag and treat a TTL of 0 as "cache off". memory-maintenance.py purges
+expired rows, and skips that when migration 090 is not applied. Connections
+are mocked.
+"""
+
+import importlib.util
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR))
+
+sys.modules.setdefault("env_loader", MagicMock())
+sys.modules.setdefault("pg_env", MagicMock())
+
+import extract_memories as em  # noqa: E402
+
+CONTEXT = {
+    "sender": "Alice",
+    "sender_id": "+15125550199",
+    "sender_provider": "signal",
+    "is_group": False,
+    "default_visibility": "public",
+}
+EXTRACTED = {"facts": [{"subject": "Alice", "key": "current_city", "value": "Austin"}]}
+
+
+def make_conn(cached=None):
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = (cached,) if cached is not None else None
+    return conn, cur
+
+
+@pytest.fixture
+def quiet_sender():
+    """Skip the sender bookkeeping extract_message() does before the LLM call."""
+    with patch.object(em, "lookup_default_visibility", return_value="public"), \
+            patch.object(em, "ensure_entity"), \
+            patch.object(em, "find_entity_id", return_value=None):
+        yield
+
+
+def _extract(conn, **kwargs):
+    return em.extract_message(
+        "  I moved to Austin last month.  ", conn, "key", "m",
+        sender_name="Alice", sender_id="+15125550199", sender_provider="signal", **kwargs
+    )
+
+
+# ---------------------------------------------------------------------------
+# Key
+# ---------------------------------------------------------------------------
+
+def test_key_components():
+    version, model, text_hash, context_hash = em.extraction_cache_key("hello", "m", CONTEXT)
+    assert version == em.EXTRACTION_PROMPT_VERSION
+    assert model == "m"
+    assert len(text_hash) == len(context_hash) == 64
+
+
+@pytest.mark.parametrize("change", [
+    {"text": "hello!"},
+    {"model": "other"},
+    {"context": dict(CONTEXT, default_visibility="private")},
+    {"context": dict(CONTEXT, is_group=True)},
+])
+def test_key_changes_with_any_prompt_input(change):
+    base = dict(text="hello", model="m", context=CONTEXT)
+    assert em.extraction_cache_key(**base) != em.extraction_cache_key(**dict(base, **change))
+
+
+def test_key_ignores_context_ordering():
+    reordered = dict(reversed(list(CONTEXT.items())))
+    assert em.extraction_cache_key("x", "m", CONTEXT) == em.extraction_cache_key("x", "m", reordered)
+
+
+# ---------------------------------------------------------------------------
+# extract_message
+# ---------------------------------------------------------------------------
+
+def test_cache_hit_skips_llm(quiet_sender):
+    conn, cur = make_conn(cached=EXTRACTED)
+    with patch.object(em, "call_llm") as llm:
+        assert _extract(conn) == EXTRACTED
+    llm.assert_not_called()
+    sql, params = cur.execute.call_args.args
+    assert "FROM extraction_cache" in sql and "expires_at > NOW()" in sql
+    assert params == em.extraction_cache_key("I moved to Austin last month.", "m", CONTEXT)
+
+
+def test_cache_miss_calls_llm_and_writes_result(quiet_sender):
+    conn, cur = make_conn()
+    with patch.object(em, "call_llm", return_value=EXTRACTED) as llm, \
+            patch.object(em, "CACHE_TTL_HOURS", 2.0):
+        assert _extract(conn) == EXTRACTED
+    llm.assert_called_once()
+    sql, params = cur.execute.call_args.args
+    assert sql.lstrip().startswith("INSERT INTO extraction_cache")
+    assert "ON CONFLICT (prompt_version, model, text_hash, context_hash)" in sql
+    assert params[4].adapted == EXTRACTED
+    assert params[5] == 7200
+    conn.commit.assert_called_once()
+
+
+def test_empty_results_are_cached_too(quiet_sender):
+    conn, cur = make_conn(cached={})
+    with patch.object(em, "call_llm") as llm:
+        assert _extract(conn) == {}
+    llm.assert_not_called()
+
+
+def test_bypass_skips_read_but_refreshes_entry(quiet_sender):
+    conn, cur = make_conn(cached={"stale": True})
+    with patch.object(em, "call_llm", return_value=EXTRACTED) as llm:
+        assert _extract(conn, cache_bypass=True) == EXTRACTED
+    llm.assert_called_once()
+    statements = [c.args[0].lstrip() for c in cur.execute.call_args_list]
+    assert not any(s.startswith("SELECT result FROM extraction_cache") for s in statements)
+    assert statements[-1].startswith("INSERT INTO extraction_cache")
+
+
+def test_zero_ttl_disables_cache(quiet_sender):
+    conn, cur = make_conn(cached=EXTRACTED)
+    with patch.object(em, "call_llm", return_value={}) as llm, \
+            patch.object(em, "CACHE_TTL_HOURS", 0.0):
+        assert _extract(conn) == {}
+    llm.assert_called_once()
+    cur.execute.assert_not_called()
+
+
+def test_cache_errors_fall_through_to_llm(quiet_sender):
+    conn, cur = make_conn()
+    cur.execute.side_effect = Exception('relation "extraction_cache" does not exist')
+    with patch.object(em, "call_llm", return_value=EXTRACTED) as llm:
+        assert _extract(conn) == EXTRACTED
+    llm.assert_called_once()
+    assert conn.rollback.call_count == 2  # failed read, failed write
+
+
+def test_llm_failures_are_not_cached(quiet_sender):
+    conn, cur = make_conn()
+    with patch.object(em, "call_llm", side_effect=em.JsonParseFailure("bad")):
+        with pytest.raises(em.JsonParseFailure):
+            _extract(conn)
+    statements = [c.args[0].lstrip() for c in cur.execute.call_args_list]
+    assert not any(s.startswith("INSERT INTO extraction_cache") for s in statements)
+
+
+# ---------------------------------------------------------------------------
+# TTL configuration
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("env, config, expected", [
+    ("", {}, em.DEFAULT_CACHE_TTL_HOURS),
+    ("12", {"cache_ttl_hours": 48}, 12.0),
+    ("", {"cache_ttl_hours": 0}, 0.0),
+    ("soon", {}, em.DEFAULT_CACHE_TTL_HOURS),
+    ("-3", {}, 0.0),
+])
+def test_cache_ttl_resolution(monkeypatch, env, config, expected):
+    monkeypatch.setenv("MEMORY_EXTRACTION_CACHE_TTL_HOURS", env)
+    monkeypatch.setattr(em, "CONFIG", config)
+    assert em._cache_ttl_hours() == expected
+
+
+def _load_maintenance():
+    path = os.path.join(os.path.dirname(__file__), "..", "templates", "memory-maintenance.py")
+    spec = importlib.util.spec_from_file_location("memory_maintenance", os.path.abspath(path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["memory_maintenance"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("dry_run", [False, True])
+def test_maintenance_purge_skips_a_missing_table(dry_run):
+    conn = MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchone.return_value = (None,)
+    assert _load_maintenance().purge_expired_extraction_cache(conn, dry_run=dry_run) == 0
+    (sql, params), = [c.args for c in cur.execute.call_args_list]
+    assert sql == "SELECT to_regclass(%s)" and params == ("extraction_cache",)
+
+
+def test_maintenance_purge_deletes_expired_rows():
+    conn = MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchone.return_value = ("extraction_cache",)
+    cur.rowcount = 3
+    assert _load_maintenance().purge_expired_extraction_cache(conn) == 3
+    assert cur.execute.call_args.args[0] == "DELETE FROM extraction_cache WHERE expires_at < NOW()"
@@ -0,0 +1,130 @@
+"""Unit tests for the prompt-cache-friendly request layout in extract_memories.py.
+
+Every extraction request must start with the same bytes: the static
+EXTRACTION_INSTRUCTIONS as a system message (with a cache_control breakpoint),
+followed by the per-message user turn. call_llm() must report provider
+prompt-cache reads and writes from the response usage. HTTP is mocked.
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR))
+
+sys.modules.setdefault("env_loader", MagicMock())
+sys.modules.setdefault("pg_env", MagicMock())
+
+import extract_memories as em  # noqa: E402
+
+
+def make_session(usage=None, content="{}"):
+    session = MagicMock()
+    resp = session.post.return_value
+    resp.status_code = 200
+    resp.json.return_value = {"choices": [{"message": {"content": content}}], "usage": usage}
+    return session
+
+
+def _payload(session):
+    return session.post.call_args.kwargs["json"]
+
+
+# ---------------------------------------------------------------------------
+# Layout
+# ---------------------------------------------------------------------------
+
+def test_instructions_hold_nothing_per_message():
+    a = em.build_extraction_prompt("I live in Tacoma", "Alice", "+4420", "signal", False, "private")
+    b = em.build_extraction_prompt("I live in Duluth", "Bob", "4242", "discord", True, "public")
+    assert a != b
+    for volatile in ("Alice", "Bob", "Tacoma", "Duluth", "+4420", "Signal phone"):
+        assert volatile not in em.EXTRACTION_INSTRUCTIONS
+    assert "USER_DEFAULT_VISIBILITY given with the message" in em.EXTRACTION_INSTRUCTIONS
+
+
+def test_message_text_is_last_in_the_user_turn():
+    prompt = em.build_extraction_prompt("I live in Austin", "Alice", "+1512", "signal", False, "private")
+    assert prompt.endswith("MESSAGE:\nI live in Austin")
+    assert "USER_DEFAULT_VISIBILITY: private" in prompt
+    assert "IMPORTANT INSTRUCTIONS" not in prompt
+
+
+def test_system_prefix_is_byte_stable_with_cache_breakpoint():
+    payloads = []
+    for text in ("first message here", "second message here"):
+        session = make_session()
+        em.call_llm(text, "key", "m", session=session, instructions=em.EXTRACTION_INSTRUCTIONS)
+        payloads.append(_payload(session))
+
+    systems = [p["messages"][0] for p in payloads]
+    assert systems[0] == systems[1]
+    assert systems[0]["role"] == "system"
+    assert systems[0]["content"] == [{"type": "text", "text": em.EXTRACTION_INSTRUCTIONS,
+                                      "cache_control": {"type": "ephemeral"}}]
+    assert [p["messages"][1] for p in payloads] == [
+        {"role": "user", "content": "first message here"},
+        {"role": "user", "content": "second message here"},
+    ]
+
+
+def test_cache_control_can_be_turned_off():
+    session = make_session()
+    with patch.object(em, "PROMPT_CACHE_CONTROL", False):
+        em.call_llm("text", "key", "m", session=session, instructions="static")
+    assert _payload(session)["messages"][0] == {"role": "system", "content": "static"}
+
+
+def test_plain_prompt_keeps_single_user_message():
+    session = make_session()
+    em.call_llm("prompt", "key", "m", session=session)
+    assert _payload(session)["messages"] == [{"role": "user", "content": "prompt"}]
+
+
+def test_extract_message_sends_instructions_first():
+    with patch.object(em, "prepare_sender", return_value="public"), \
+            patch.object(em, "CACHE_TTL_HOURS", 0.0), \
+            patch.object(em, "call_llm", return_value={}) as llm:
+        em.extract_message("I moved to Austin last month.", MagicMock(), "key", "m", sender_name="Alice")
+    assert llm.call_args.kwargs["instructions"] is em.EXTRACTION_INSTRUCTIONS
+    assert llm.call_args.args[0].endswith("I moved to Austin last month.")
+
+
+# ---------------------------------------------------------------------------
+# Usage reporting
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("usage, expected", [
+    # OpenRouter / OpenAI
+    ({"prompt_tokens": 1800, "completion_tokens": 40,
+      "prompt_tokens_details": {"cached_tokens": 1500, "cache_write_tokens": 0}},
+     (1800, 40, 1500, 0)),
+    # Anthropic
+    ({"input_tokens": 300, "output_tokens": 20,
+      "cache_read_input_tokens": 0, "cache_creation_input_tokens": 1500},
+     (300, 20, 0, 1500)),
+    # DeepSeek
+    ({"prompt_tokens": 1800, "completion_tokens": 40, "prompt_cache_hit_tokens": 1664},
+     (1800, 40, 1664, 0)),
+    (None, (0, 0, 0, 0)),
+])
+def test_parse_llm_usage_provider_shapes(usage, expected):
+    counts = em.parse_llm_usage(usage)
+    assert (counts["prompt_tokens"], counts["completion_tokens"],
+            counts["cache_read_tokens"], counts["cache_write_tokens"]) == expected
+
+
+def test_call_llm_logs_and_totals_cache_usage(capsys):
+    before = em.llm_usage_totals()
+    usage = {"prompt_tokens": 1800, "completion_tokens": 40,
+             "prompt_tokens_details": {"cached_tokens": 1500, "cache_write_tokens": 12}}
+    em.call_llm("text", "key", "m", session=make_session(usage), instructions="static")
+
+    after = em.llm_usage_totals()
+    assert after["calls"] == before["calls"] + 1
+    assert after["cache_read_tokens"] - before["cache_read_tokens"] == 1500
+    assert after["cache_write_tokens"] - before["cache_write_tokens"] == 12
+    assert "LLM usage: prompt=1800 completion=40 cache_read=1500 cache_write=12" in capsys.readouterr().err
@@ -0,0 +1,216 @@
+"""Unit tests for the concurrent dead-letter replayer.
+
+These tests exercise ``memory/scripts/extraction-replay.py``. A small fake
+database hands out pending extraction_failures rows the way FOR UPDATE SKIP
+LOCKED does (each row to one claimer) and records the outcome UPDATEs;
+``extract_batch()`` and ``store_extracted()`` are mocked, so no database or
+LLM endpoint is required.
+"""
+
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+# Stub the centralized env loaders so importing the scripts never touches
+# ~/.openclaw or the live environment.
+sys.modules.setdefault("env_loader", mock.MagicMock())
+sys.modules.setdefault("pg_env", mock.MagicMock())
+
+_REPLAY_PATH = Path(__file__).resolve().parent.parent / "scripts" / "extraction-replay.py"
+_spec = importlib.util.spec_from_file_location("extraction_replay", str(_REPLAY_PATH))
+extraction_replay = importlib.util.module_from_spec(_spec)
+sys.modules["extraction_replay"] = extraction_replay
+_spec.loader.exec_module(extraction_replay)
+
+extract_memories = extraction_replay.extract_memories
+
+EXTRACTED = {"facts": [{"subject": "Alice", "key": "current_city", "value": "Austin"}]}
+
+
+def row(row_id, body="I moved to Austin last month.", retry_count=0, transcript_id=None, session_id=None):
+    """A claimed row in CLAIM_SQL column order."""
+    return (row_id, transcript_id, "Alice", "+15125550199", retry_count, body, session_id)
+
+
+class FakeDB:
+    """Pending rows handed out at most once each, plus the outcome UPDATEs."""
+
+    def __init__(self, rows):
+        self.pending = list(rows)
+        self.retry_counts = {r[0]: r[4] for r in rows}
+        self.updates = []
+        self.claims = []
+        self.lock = threading.Lock()
+
+    def connect(self):
+        conn = mock.MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        result = []
+
+        def execute(sql, params=None):
+            with self.lock:
+                if "SELECT NOW()" in sql:
+                    result[:] = [("2026-10-17 00:00:00+00",)]
+                elif "FOR UPDATE OF f SKIP LOCKED" in sql:
+                    self.claims.append((sql, params))
+                    limit = params[1]
+                    result[:], self.pending = self.pending[:limit], self.pending[limit:]
+                elif sql.lstrip().startswith("UPDATE extraction_failures"):
+                    outcome = next(k for k, v in extraction_replay.OUTCOME_SQL.items() if v == sql)
+                    self.updates.append((outcome, sorted(params["ids"])))
+                elif "SELECT COUNT(*)" in sql:
+                    result[:] = [(sum(1 for i in params[0] if self.retry_counts[i] + 1 >= 5),)]
+
+        cur.execute.side_effect = execute
+        cur.fetchall.side_effect = lambda: list(result)
+        cur.fetchone.side_effect = lambda: result[0]
+        return conn
+
+    def outcome_of(self, row_id):
+        return [outcome for outcome, ids in self.updates if row_id in ids]
+
+
+def _engine(db, **kwargs):
+    kwargs.setdefault("backoff", extraction_replay.Backoff(base=0, cap=0))
+    return extraction_replay.ReplayEngine(db.connect, "key", "m", max_retries=5, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_entity_index():
+    with mock.patch.object(extract_memories, "load_entity_index", return_value=None), \
+            mock.patch.object(extract_memories, "TRIAGE_ENABLED", False):
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Claiming and outcomes
+# ---------------------------------------------------------------------------
+
+def test_claim_locks_pending_rows_in_replay_order():
+    sql = extraction_replay.CLAIM_SQL
+    assert "FOR UPDATE OF f SKIP LOCKED" in sql
+    assert "f.status = 'pending'" in sql
+    assert "ORDER BY f.retry_count ASC, f.created_at ASC, f.id ASC" in sql
+    # the transcript body wins over the stored copy, as in extraction-replay.sh
+    assert "COALESCE(NULLIF(ct.content, ''), NULLIF(f.content, ''))" in sql
+
+
+def test_rows_get_their_shell_compatible_outcomes():
+    db = FakeDB([row(1), row(2), row(3, body=None), row(4, retry_count=4), row(5, body="ok")])
+    results = [EXTRACTED, {}, RuntimeError("LLM API call failed: HTTP 400: bad request")]
+    with mock.patch.object(extract_memories, "extract_batch", return_value=results) as batch, \
+            mock.patch.object(extract_memories, "store_extracted") as store:
+        stats = _engine(db, workers=1).run()
+
+    assert [m["text"] for m in batch.call_args.args[0]] == ["I moved to Austin last month."] * 3
+    store.assert_called_once()  # the empty result has nothing to store
+    assert db.outcome_of(1) == db.outcome_of(2) == db.outcome_of(5) == ["resolved"]
+    assert db.outcome_of(3) == ["unreplayable"]
+    assert db.outcome_of(4) == ["failed"]
+    assert stats["processed"] == 5
+    assert (stats["resolved"], stats["failed"], stats["retry_exhausted"], stats["unreplayable"]) == (3, 1, 1, 1)
+
+
+def test_results_are_stored_with_the_rows_transcript():
+    db = FakeDB([row(1, transcript_id=41, session_id=7)])
+    with mock.patch.object(extract_memories, "extract_batch", return_value=[EXTRACTED]), \
+            mock.patch.object(extract_memories, "store_extracted") as store:
+        _engine(db, workers=1).run()
+    kwargs = store.call_args.kwargs
+    assert kwargs["data"] == EXTRACTED
+    assert (kwargs["sender_name"], kwargs["sender_id"]) == ("Alice", "+15125550199")
+    assert (kwargs["src_channel_transcript_id"], kwargs["src_channel_session_id"]) == ("41", "7")
+
+
+def test_store_failure_fails_only_that_row():
+    db = FakeDB([row(1), row(2)])
+    with mock.patch.object(extract_memories, "extract_batch", return_value=[EXTRACTED, EXTRACTED]), \
+            mock.patch.object(extract_memories, "store_extracted", side_effect=[Exception("fk"), None]):
+        _engine(db, workers=1).run()
+    assert db.outcome_of(1) == ["failed"]
+    assert db.outcome_of(2) == ["resolved"]
+
+
+# ---------------------------------------------------------------------------
+# Concurrency and limits
+# ---------------------------------------------------------------------------
+
+def test_workers_drain_the_backlog_without_sharing_rows():
+    db = FakeDB([row(i) for i in range(1, 41)])
+    with mock.patch.object(extract_memories, "extract_batch",
+                           side_effect=lambda messages, *a, **k: [{} for _ in messages]), \
+            mock.patch.object(extract_memories, "store_extracted"):
+        stats = _engine(db, workers=4, claim_size=3).run()
+    resolved = sorted(i for outcome, ids in db.updates for i in ids if outcome == "resolved")
+    assert resolved == list(range(1, 41))
+    assert stats["processed"] == 40 and stats["rows_per_min"] > 0
+    assert all(params[1] == 3 for _, params in db.claims)
+
+
+def test_max_rows_caps_the_run():
+    db = FakeDB([row(i) for i in range(1, 11)])
+    with mock.patch.object(extract_memories, "extract_batch",
+                           side_effect=lambda messages, *a, **k: [{} for _ in messages]):
+        stats = _engine(db, workers=2, claim_size=3, max_rows=4).run()
+    assert stats["processed"] == 4
+    assert len(db.pending) == 6
+
+
+# ---------------------------------------------------------------------------
+# Rate limits
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("error, throttled", [
+    (RuntimeError("LLM API call failed: HTTP 429: slow down"), True),
+    (RuntimeError("LLM API call failed: HTTP 503: overloaded"), True),
+    (RuntimeError("LLM API call failed: Read timed out."), True),
+    (RuntimeError("LLM API call failed: HTTP 400: bad request"), False),
+    (extract_memories.JsonParseFailure("LLM API call failed: truncated"), False),
+    (ValueError("boom"), False),
+])
+def test_throttle_classification(error, throttled):
+    assert extraction_replay.is_throttled(error) is throttled
+
+
+def test_throttled_rows_keep_their_retry_budget_and_run_gives_up():
+    db = FakeDB([row(i) for i in range(1, 5)])
+    backoff = extraction_replay.Backoff(base=0, cap=0, give_up=2)
+    err = RuntimeError("LLM API call failed: HTTP 429: slow down")
+    with mock.patch.object(extract_memories, "extract_batch",
+                           side_effect=lambda messages, *a, **k: [err for _ in messages]) as batch:
+        stats = _engine(db, workers=1, claim_size=1, backoff=backoff).run()
+    assert batch.call_count == 2  # stopped after two throttled claims in a row
+    assert [u[0] for u in db.updates] == ["throttled", "throttled"]
+    assert stats["throttled"] == 2 and stats["processed"] == 0
+    assert len(db.pending) == 2
+
+
+def test_backoff_counts_claims_not_rows():
+    db = FakeDB([row(i) for i in range(1, 25)])
+    backoff = extraction_replay.Backoff(base=0, cap=0, give_up=6)
+    calls = {"n": 0}
+
+    def _batch(messages, *args, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return [RuntimeError("LLM API call failed: HTTP 503: overloaded") for _ in messages]
+        return [{} for _ in messages]
+
+    with mock.patch.object(extract_memories, "extract_batch", side_effect=_batch):
+        stats = _engine(db, workers=1, claim_size=8, backoff=backoff).run()
+    assert calls["n"] == 3  # one throttled claim of 8 rows does not end the run
+    assert (stats["throttled"], stats["resolved"]) == (8, 16)
+    assert backoff.consecutive == 0
+
+
+def test_backoff_grows_exponentially_and_resets():
+    backoff = extraction_replay.Backoff(base=2, cap=10, give_up=3)
+    with mock.patch.object(extraction_replay.random, "random", return_value=1.0):
+        assert [backoff.throttled() for _ in range(4)] == [2, 4, 8, 10]
+    assert backoff.exhausted
+    backoff.ok()
+    assert backoff.consecutive == 0 and not backoff.exhausted
@@ -0,0 +1,134 @@
+"""Unit tests for pre-LLM triage in extract_memories.py.
+
+triage_rule() must rule out only fact-free messages (tool chatter, slash
+commands, letterless noise, short filler), triage() must honour the enable
+switch and audit sample rate, and main() must answer skipped messages with
+"{}" without touching the database or the LLM.
+"""
+
+import io
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR))
+
+sys.modules.setdefault("env_loader", MagicMock())
+sys.modules.setdefault("pg_env", MagicMock())
+
+import extract_memories as em  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("text, rule", [
+    ("HEARTBEAT_OK nothing to report", "tool_chatter"),
+    ("NO_REPLY", "tool_chatter"),
+    ("System: gateway restarted", "tool_chatter"),
+    ("Please Read HEARTBEAT.md and follow it", "tool_chatter"),
+    ("/reset the session", "command"),
+    ("👍👍👍 !!!", "no_words"),
+    ("ok thanks!!", "filler"),
+    ("Good morning everyone :)", "filler"),
+    ("haha yeah that's true", "filler"),
+    ("Thank you so much, see you later", "filler"),
+    ("have a great day", "filler"),
+])
+def test_fact_free_messages_match_a_rule(text, rule):
+    assert em.triage_rule(text) == rule
+
+
+@pytest.mark.parametrize("text", [
+    "I moved to Austin last month.",
+    "ok thanks, I'll be in Denver until Friday",
+    "thanks Alice",                                      # names a person
+    "+1 512 555 0199",                                   # phone number, no letters
+    "ok see you at 5",                                   # digits carry a time
+    "yes yes yes yes yes yes yes yes yes",               # too long to be filler
+    "I'm good thanks",                                   # first-person self-report
+    "/home/alice is my home directory",                  # path, not a command
+])
+def test_messages_with_possible_content_go_to_the_llm(text):
+    assert em.triage_rule(text) is None
+
+
+# ---------------------------------------------------------------------------
+# triage(): switch and audit sampling
+# ---------------------------------------------------------------------------
+
+def test_matched_message_is_skipped(capsys):
+    with patch.object(em, "TRIAGE_ENABLED", True), patch.object(em, "TRIAGE_AUDIT_RATE", 0.0):
+        assert em.triage("ok thanks!!") == (True, "filler")
+        assert em.triage("I moved to Austin last month.") == (False, None)
+    assert "Triage: skipped without LLM call (rule=filler" in capsys.readouterr().err
+
+
+def test_audit_sample_is_extracted_with_its_rule(capsys):
+    with patch.object(em, "TRIAGE_ENABLED", True), patch.object(em, "TRIAGE_AUDIT_RATE", 0.25), \
+            patch.object(em.random, "random", return_value=0.1):
+        assert em.triage("ok thanks!!") == (False, "filler")
+    assert "extracting anyway for audit" in capsys.readouterr().err
+
+
+def test_disabled_triage_never_skips():
+    with patch.object(em, "TRIAGE_ENABLED", False):
+        assert em.triage("NO_REPLY") == (False, None)
+
+
+@pytest.mark.parametrize("extracted, outcome", [
+    ({}, "confirmed_empty"),
+    ({"facts": [], "entities": []}, "confirmed_empty"),
+    ({"facts": [{"key": "mood", "value": "happy"}]}, "false_negative"),
+])
+def test_audit_log_reports_false_negatives(capsys, extracted, outcome):
+    em.log_triage_audit("filler", extracted)
+    assert f"Triage audit: rule=filler outcome={outcome}" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("env, config, expected", [
+    ({}, {}, (True, em.DEFAULT_TRIAGE_AUDIT_RATE)),
+    ({"MEMORY_EXTRACTION_TRIAGE": "off"}, {}, (False, em.DEFAULT_TRIAGE_AUDIT_RATE)),
+    ({}, {"triage_enabled": False, "triage_audit_rate": 0.5}, (False, 0.5)),
+    ({"MEMORY_EXTRACTION_TRIAGE": "1", "MEMORY_EXTRACTION_TRIAGE_AUDIT_RATE": "2"},
+     {"triage_enabled": False}, (True, 1.0)),
+    ({"MEMORY_EXTRACTION_TRIAGE_AUDIT_RATE": "often"}, {}, (True, em.DEFAULT_TRIAGE_AUDIT_RATE)),
+])
+def test_triage_settings_resolution(monkeypatch, env, config, expected):
+    monkeypatch.delenv("MEMORY_EXTRACTION_TRIAGE", raising=False)
+    monkeypatch.delenv("MEMORY_EXTRACTION_TRIAGE_AUDIT_RATE", raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(em, "CONFIG", config)
+    assert em._triage_settings() == expected
+
+
+# ---------------------------------------------------------------------------
+# main()
+# ---------------------------------------------------------------------------
+
+def test_main_skips_triaged_message_before_db_and_llm(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("Good morning everyone :)"))
+    with patch.object(em, "TRIAGE_ENABLED", True), patch.object(em, "TRIAGE_AUDIT_RATE", 0.0), \
+            patch.object(em, "get_db_connection") as get_conn, \
+            patch.object(em, "call_llm") as llm:
+        assert em.main([]) == 0
+    get_conn.assert_not_called()
+    llm.assert_not_called()
+    assert capsys.readouterr().out.strip() == "{}"
+
+
+def test_main_logs_audit_outcome(monkeypatch, capsys):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(sys, "stdin", io.StringIO("Good morning everyone :)"))
+    with patch.object(em, "TRIAGE_ENABLED", True), patch.object(em, "TRIAGE_AUDIT_RATE", 1.0), \
+            patch.object(em, "get_db_connection"), \
+            patch.object(em, "load_entity_index", return_value=None), \
+            patch.object(em, "extract_message", return_value={}) as ext:
+        assert em.main([]) == 0
+    ext.assert_called_once()
+    assert "Triage audit: rule=filler outcome=confirmed_empty" in capsys.readouterr().err
@@ -0,0 +1,297 @@
+"""Unit tests for the resident extraction worker.
+
+These tests exercise ``memory/scripts/extraction-worker.py``. The connection
+pool, ``extract_message()`` and ``store_extracted()`` are mocked, so no
+database or LLM endpoint is required; the socket test runs a real server on
+a temporary Unix socket through the shared fixtures in ``conftest.py``.
+"""
+
+import importlib.util
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+# Stub the centralized env loaders so importing the scripts never touches
+# ~/.openclaw or the live environment.
+sys.modules.setdefault("env_loader", mock.MagicMock())
+sys.modules.setdefault("pg_env", mock.MagicMock())
+
+_WORKER_PATH = Path(__file__).resolve().parent.parent / "scripts" / "extraction-worker.py"
+_spec = importlib.util.spec_from_file_location("extraction_worker", str(_WORKER_PATH))
+extraction_worker = importlib.util.module_from_spec(_spec)
+sys.modules["extraction_worker"] = extraction_worker
+_spec.loader.exec_module(extraction_worker)
+
+extract_memories = extraction_worker.extract_memories
+
+JOB = {
+    "content": "I moved to Austin last month.",
+    "sender_name": "Alice",
+    "sender_id": "+15125550199",
+    "sender_provider": "signal",
+    "is_group": "true",
+    "source_timestamp": "2026-10-17T00:00:00Z",
+    "source_channel_transcript_id": "42",
+    "source_channel_session_id": "7",
+}
+EXTRACTED = {"facts": [{"subject": "Alice", "key": "current_city", "value": "Austin"}]}
+
+
+def _make_service(workers=2, queue_depth=2, **kwargs):
+    with mock.patch.object(extraction_worker.pg_pool, "ThreadedConnectionPool") as pool_cls:
+        conn = mock.MagicMock()
+        conn.closed = 0
+        pool_cls.return_value.getconn.return_value = conn
+        svc = extraction_worker.ExtractionService(
+            "key", workers=workers, queue_depth=queue_depth, default_model="m", **kwargs
+        )
+        svc._conn = conn
+        return svc
+
+
+@pytest.fixture
+def service():
+    return _make_service()
+
+
+# ---------------------------------------------------------------------------
+# ExtractionService.handle
+# ---------------------------------------------------------------------------
+
+def test_job_uses_pooled_connection_and_shared_session(service):
+    with mock.patch.object(extract_memories, "extract_message", return_value=EXTRACTED) as ext, \
+            mock.patch.object(extract_memories, "store_extracted") as store:
+        reply = service.handle(dict(JOB))
+
+    assert reply == {"status": "complete", "exit_code": 0, "extracted": EXTRACTED}
+    args, kwargs = ext.call_args
+    assert args == (JOB["content"], service._conn, "key", "m")
+    assert kwargs["session"] is service.session
+    assert kwargs["is_group"] is True
+    assert kwargs["sender_provider"] == "signal"
+    store_kwargs = store.call_args.kwargs
+    assert store_kwargs["conn"] is service._conn
+    assert store_kwargs["src_channel_transcript_id"] == "42"
+    assert store_kwargs["src_channel_session_id"] == "7"
+    service.pool.putconn.assert_called_once_with(service._conn, close=False)
+    assert service.snapshot_stats()["complete"] == 1
+
+
+def test_job_cache_bypass_flag(service):
+    with mock.patch.object(extract_memories, "extract_message", return_value={}) as ext:
+        service.handle(dict(JOB))
+        service.handle(dict(JOB, cache_bypass=True))
+
+    assert [c.kwargs["cache_bypass"] for c in ext.call_args_list] == [False, True]
+
+
+def test_job_model_override(service):
+    with mock.patch.object(extract_memories, "extract_message", return_value={}) as ext, \
+            mock.patch.object(extract_memories, "store_extracted") as store:
+        reply = service.handle(dict(JOB, model="other/model"))
+
+    assert reply["exit_code"] == 0
+    assert ext.call_args.args[3] == "other/model"
+    store.assert_not_called()  # nothing extracted, nothing stored
+
+
+def test_json_parse_failure_maps_to_exit_2(service):
+    err = extract_memories.JsonParseFailure("bad json")
+    with mock.patch.object(extract_memories, "extract_message", side_effect=err):
+        reply = service.handle(dict(JOB))
+
+    assert reply["exit_code"] == 2
+    assert reply["failure_reason"] == "json_parse_failure"
+    service._conn.rollback.assert_called_once()
+    service.pool.putconn.assert_called_once_with(service._conn, close=False)
+    assert service.snapshot_stats()["failed"] == 1
+
+
+def test_runtime_error_maps_to_nonzero_exit_and_drops_dead_connection(service):
+    def _die(*args, **kwargs):
+        service._conn.closed = 2
+        raise RuntimeError("LLM API call failed: HTTP 502")
+
+    with mock.patch.object(extract_memories, "extract_message", side_effect=_die):
+        reply = service.handle(dict(JOB))
+
+    assert reply["exit_code"] == 1
+    assert reply["failure_reason"] == "nonzero_exit"
+    assert "HTTP 502" in reply["error"]
+    service.pool.putconn.assert_called_once_with(service._conn, close=True)
+
+
+def test_short_message_is_skipped_without_pool(service):
+    reply = service.handle({"content": "ok"})
+    assert reply == {"status": "skipped", "exit_code": 0, "extracted": {}}
+    service.pool.getconn.assert_not_called()
+
+
+def test_triaged_job_is_skipped_before_admission(service):
+    with mock.patch.object(extract_memories, "TRIAGE_ENABLED", True), \
+            mock.patch.object(extract_memories, "TRIAGE_AUDIT_RATE", 0.0), \
+            mock.patch.object(extract_memories, "extract_message") as ext:
+        reply = service.handle(dict(JOB, content="ok thanks, sounds good!"))
+
+    assert reply == {"status": "skipped", "exit_code": 0, "extracted": {}}
+    ext.assert_not_called()
+    service.pool.getconn.assert_not_called()
+    stats = service.snapshot_stats()
+    assert (stats["triaged"], stats["in_flight"]) == (1, 0)
+
+
+def test_audited_job_is_extracted_and_logged(service, capsys):
+    with mock.patch.object(extract_memories, "TRIAGE_ENABLED", True), \
+            mock.patch.object(extract_memories, "TRIAGE_AUDIT_RATE", 1.0), \
+            mock.patch.object(extract_memories, "extract_message", return_value=EXTRACTED), \
+            mock.patch.object(extract_memories, "store_extracted"):
+        reply = service.handle(dict(JOB, content="ok thanks, sounds good!"))
+
+    assert reply["extracted"] == EXTRACTED
+    assert "Triage audit: rule=filler outcome=false_negative facts=1" in capsys.readouterr().err
+
+
+def test_full_queue_replies_busy():
+    service = _make_service(workers=1, queue_depth=1)
+    release = threading.Event()
+    entered = threading.Event()
+    running = []
+
+    def _block(*args, **kwargs):
+        running.append(1)
+        entered.set()
+        release.wait(5)
+        return {}
+
+    with mock.patch.object(extract_memories, "extract_message", side_effect=_block):
+        threads = [threading.Thread(target=service.handle, args=(dict(JOB),)) for _ in range(2)]
+        for t in threads:
+            t.start()
+        assert entered.wait(2)
+        deadline = time.monotonic() + 2
+        while service.snapshot_stats()["in_flight"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert len(running) == 1  # second job waits for the single worker slot
+        reply = service.handle(dict(JOB))
+        assert reply["status"] == "busy"
+
+        release.set()
+        for t in threads:
+            t.join(5)
+
+    stats = service.snapshot_stats()
+    assert stats["busy"] == 1
+    assert stats["complete"] == 2
+    assert stats["in_flight"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Micro-batching
+# ---------------------------------------------------------------------------
+
+def _handle_concurrently(service, jobs):
+    replies = [None] * len(jobs)
+
+    def _one(i):
+        replies[i] = service.handle(jobs[i])
+
+    threads = [threading.Thread(target=_one, args=(i,)) for i in range(len(jobs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return replies
+
+
+def test_jobs_in_one_window_share_one_batch():
+    service = _make_service(batch_window_ms=200, batch_size=8)
+    jobs = [dict(JOB, sender_name=name, source_channel_transcript_id=str(n))
+            for n, name in enumerate(["Alice", "Bob", "Carol"], 1)]
+    results = [{"facts": [n]} for n in range(3)]
+
+    def _batch(messages, conn, api_key, model, session=None):
+        return [results[["Alice", "Bob", "Carol"].index(m["sender_name"])] for m in messages]
+
+    try:
+        with mock.patch.object(extract_memories, "extract_batch", side_effect=_batch) as batch, \
+                mock.patch.object(extract_memories, "store_extracted") as store:
+            replies = _handle_concurrently(service, jobs)
+    finally:
+        service.close()
+
+    batch.assert_called_once()
+    assert batch.call_args.args[1] is service._conn
+    assert batch.call_args.kwargs["session"] is service.session
+    assert [r["extracted"] for r in replies] == results
+    stored = {c.kwargs["sender_name"]: c.kwargs["src_channel_transcript_id"] for c in store.call_args_list}
+    assert stored == {"Alice": "1", "Bob": "2", "Carol": "3"}
+    stats = service.snapshot_stats()
+    assert (stats["batches"], stats["complete"], stats["in_flight"]) == (1, 3, 0)
+
+
+def test_batch_failures_stay_per_job():
+    service = _make_service(batch_window_ms=200)
+    results = [extract_memories.JsonParseFailure("bad"), EXTRACTED]
+    jobs = [dict(JOB, sender_name="Alice"), dict(JOB, sender_name="Bob")]
+
+    def _batch(messages, *args, **kwargs):
+        return [results[0] if m["sender_name"] == "Alice" else results[1] for m in messages]
+
+    try:
+        with mock.patch.object(extract_memories, "extract_batch", side_effect=_batch), \
+                mock.patch.object(extract_memories, "store_extracted") as store:
+            alice, bob = _handle_concurrently(service, jobs)
+    finally:
+        service.close()
+
+    assert (alice["exit_code"], alice["failure_reason"]) == (2, "json_parse_failure")
+    assert bob == {"status": "complete", "exit_code": 0, "extracted": EXTRACTED}
+    assert store.call_args.kwargs["sender_name"] == "Bob"
+
+
+def test_batches_split_by_model():
+    service = _make_service(batch_window_ms=200)
+    try:
+        with mock.patch.object(extract_memories, "extract_batch",
+                               side_effect=lambda messages, *a, **k: [{}] * len(messages)) as batch:
+            _handle_concurrently(service, [dict(JOB), dict(JOB, model="other/model"), dict(JOB)])
+    finally:
+        service.close()
+
+    sizes = sorted((c.args[3], len(c.args[0])) for c in batch.call_args_list)
+    assert sizes == [("m", 2), ("other/model", 1)]
+
+
+# ---------------------------------------------------------------------------
+# Socket protocol
+# ---------------------------------------------------------------------------
+
+def test_socket_serves_jobs_and_ping(serve_unix, roundtrip, service):
+    sock_path = serve_unix(extraction_worker.ExtractionServer, service, "extract.sock")
+    with mock.patch.object(extract_memories, "extract_message", return_value={}):
+        replies = roundtrip(sock_path, json.dumps(JOB).encode(), b'{"op": "ping"}', b"[1]")
+
+    assert replies[0]["status"] == "complete"
+    assert replies[1]["ok"] is True
+    assert replies[1]["stats"]["complete"] == 1
+    assert "cache_read_tokens" in replies[1]["stats"]["llm_usage"]
+    assert replies[2]["exit_code"] == 1
+    assert "JSON object" in replies[2]["error"]
+
+
+def test_call_llm_uses_supplied_session():
+    session = mock.MagicMock()
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = {
+        "choices": [{"message": {"content": "{}"}}]
+    }
+    with mock.patch.object(extract_memories.requests, "post") as module_post:
+        assert extract_memories.call_llm("prompt", "key", "m", session=session) == {}
+    session.post.assert_called_once()
+    module_post.assert_not_called()
@@ -644,8 +644,8 @@ class TestInBatchDeduplication(unittest.TestCase):
         - find_entity_id('VALID') returns 3450 via exact name match.
         - find_entity_id('VALID.ai') returns 3450 via domain normalization
           (domain base 'valid' matches entity name 'VALID').
-        - No second entity is created; both store_or_reinforce_fact calls use
-          entity_id=3450.
+        - No second entity is created; both facts handed to store_facts_bulk
+          use entity_id=3450.
         """
         data = {
             "entities": [
@@ -674,7 +674,7 @@ class TestInBatchDeduplication(unittest.TestCase):
 
         with patch.object(em, "resolve_source_entity_id", return_value=1), \
              patch.object(em, "find_entity_id", return_value=3450) as mock_find, \
-             patch.object(em, "store_or_reinforce_fact", return_value="STORED") as mock_store:
+             patch.object(em, "store_facts_bulk", return_value=["created", "created"]) as mock_store:
 
             conn = MagicMock()
             em.store_extracted(
@@ -689,11 +689,13 @@ class TestInBatchDeduplication(unittest.TestCase):
             )
 
         # Both facts must have been stored using entity_id=3450
+        mock_store.assert_called_once()
+        stored_facts = mock_store.call_args.args[0]
         self.assertEqual(
-            mock_store.call_count, 2,
-            "F11: store_or_reinforce_fact must be called exactly twice (one fact per subject)",
+            len(stored_facts), 2,
+            "F11: store_facts_bulk must receive exactly two facts (one fact per subject)",
         )
-        entity_ids = [c.kwargs["entity_id"] for c in mock_store.call_args_list]
+        entity_ids = [f["entity_id"] for f in stored_facts]
         self.assertTrue(
             all(eid == 3450 for eid in entity_ids),
             f"F11: Both facts must route to entity_id=3450, got {entity_ids}",
@@ -773,12 +775,12 @@ class TestPhonePrivacy(unittest.TestCase):
     visibility value the LLM extracted."""
 
     def _run_store_extracted_with_fact(self, fact_dict):
-        """Helper: call store_extracted with a single fact, return the mock_store
-        MagicMock so tests can inspect call args."""
+        """Helper: call store_extracted with a single fact, return the
+        store_facts_bulk MagicMock so tests can inspect the queued fact."""
         data = {"entities": [], "facts": [fact_dict]}
         with patch.object(em, "resolve_source_entity_id", return_value=1), \
              patch.object(em, "find_entity_id", return_value=100), \
-             patch.object(em, "store_or_reinforce_fact", return_value="STORED") as mock_store:
+             patch.object(em, "store_facts_bulk", return_value=["created"]) as mock_store:
             conn = MagicMock()
             em.store_extracted(
                 data=data,
@@ -797,7 +799,7 @@ class TestPhonePrivacy(unittest.TestCase):
 
         The hard rule in store_extracted's facts loop:
             if key == 'phone': visibility = 'private'
-        must fire before _store_fact() and thus before store_or_reinforce_fact().
+        must fire before _store_fact() and thus before store_facts_bulk().
         The LLM-extracted visibility ('public') must never reach the DB for phone facts.
         """
         mock_store = self._run_store_extracted_with_fact({
@@ -809,7 +811,8 @@ class TestPhonePrivacy(unittest.TestCase):
             "category": "observation",
         })
         mock_store.assert_called_once()
-        stored_visibility = mock_store.call_args.kwargs["visibility"]
+        (stored_fact,) = mock_store.call_args.args[0]
+        stored_visibility = stored_fact["visibility"]
         self.assertEqual(
             stored_visibility, "private",
             "H2-1: phone fact must be stored with visibility='private', "
@@ -830,7 +833,8 @@ class TestPhonePrivacy(unittest.TestCase):
             "category": "observation",
         })
         mock_store.assert_called_once()
-        stored_visibility = mock_store.call_args.kwargs["visibility"]
+        (stored_fact,) = mock_store.call_args.args[0]
+        stored_visibility = stored_fact["visibility"]
         self.assertEqual(
             stored_visibility, "private",
             "H2-2: phone fact with visibility='shared' must be stored as 'private'",
@@ -851,7 +855,8 @@ class TestPhonePrivacy(unittest.TestCase):
             "category": "observation",
         })
         mock_store.assert_called_once()
-        stored_visibility = mock_store.call_args.kwargs["visibility"]
+        (stored_fact,) = mock_store.call_args.args[0]
+        stored_visibility = stored_fact["visibility"]
         self.assertEqual(
             stored_visibility, "public",
             "H2-3: non-phone key must preserve original visibility, "
@@ -0,0 +1,177 @@
+"""Unit tests for incremental, content-addressed memory-file embedding.
+
+Covers ``_embed_file_chunks()`` (chunk diffing against stored rows) and
+``_embed_memory_file()`` (manifest-based skipping). The database and Ollama
+are replaced by in-memory fakes.
+"""
+
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+_MAINTENANCE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "memory-maintenance.py"
+)
+_spec = importlib.util.spec_from_file_location("memory_maintenance", str(_MAINTENANCE_PATH))
+mm = importlib.util.module_from_spec(_spec)
+sys.modules["memory_maintenance"] = mm
+_spec.loader.exec_module(mm)
+
+PARAS = [f"Paragraph {i}. " + ("Some daily log content here. " * 12) for i in range(4)]
+
+
+class FakeStore:
+    """Stands in for the memory_file rows of memory_embeddings."""
+
+    def __init__(self, rows=None):
+        self.rows = dict(rows or {})
+        self.embedded = []
+        self.deleted = []
+        self.renamed = []
+        self.fail = None  # embed_texts returns [] for a batch containing this text
+
+
+@pytest.fixture
+def store(monkeypatch):
+    st = FakeStore()
+
+    def fake_existing(cur, source_name):
+        prefix = f"{source_name}#"
+        return {k: v for k, v in st.rows.items() if k.startswith(prefix)}
+
+    def fake_embed_texts(texts, cfg):
+        if st.fail is not None and any(st.fail in t for t in texts):
+            return []
+        st.embedded.extend(texts)
+        return [[0.0] for _ in texts]
+
+    def fake_store(cur, source_type, items, embeddings):
+        stored = 0
+        for it, emb in zip(items, embeddings):
+            if emb:
+                st.rows[it["id"]] = it["text"]
+                stored += 1
+        return stored
+
+    class FakeCursor:
+        def execute(self, sql, params=None):
+            assert "DELETE" in sql
+            for sid in params[0]:
+                st.deleted.append(sid)
+                st.rows.pop(sid)
+
+    def fake_execute_values(cur, sql, pairs):
+        for old, new in pairs:
+            st.renamed.append((old, new))
+            st.rows[new] = st.rows.pop(old)
+
+    monkeypatch.setattr(mm, "_existing_file_chunks", fake_existing)
+    monkeypatch.setattr(mm, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(mm, "_store_embeddings", fake_store)
+    monkeypatch.setattr(mm.psycopg2.extras, "execute_values", fake_execute_values)
+    st.cur = FakeCursor()
+    return st
+
+
+def _embed(store, text, name="2026-07-05.md"):
+    count, _complete = mm._embed_file_chunks(store.cur, {}, name, text)
+    return count
+
+
+def test_unchanged_file_embeds_nothing(store):
+    text = "\n\n".join(PARAS)
+    first = _embed(store, text)
+    assert first == len(store.embedded) > 0
+    store.embedded.clear()
+
+    assert _embed(store, text) == 0
+    assert store.embedded == [] and store.deleted == []
+
+
+def test_edit_embeds_only_changed_chunks_and_deletes_stale(store):
+    _embed(store, "\n\n".join(PARAS))
+    before = set(store.rows)
+    store.embedded.clear()
+
+    edited = PARAS[:-1] + ["Paragraph 3 rewritten. " + ("Different text now. " * 12)]
+    _embed(store, "\n\n".join(edited))
+
+    new_chunks = mm._chunk_text("\n\n".join(edited))
+    assert set(store.rows) == {mm._chunk_source_id("2026-07-05.md", c) for c in new_chunks}
+    assert len(store.embedded) < len(new_chunks)
+    assert store.deleted and set(store.deleted) <= before
+
+
+def test_legacy_positional_ids_are_renamed_not_reembedded(store):
+    text = "\n\n".join(PARAS)
+    chunks = mm._chunk_text(text)
+    store.rows = {f"2026-07-05.md#{i}": c for i, c in enumerate(chunks)}
+
+    assert _embed(store, text) == 0
+    assert store.embedded == []
+    assert len(store.renamed) == len(set(chunks))
+    assert all(sid.split("#")[1] not in {str(i) for i in range(len(chunks))} for sid in store.rows)
+
+
+def test_other_files_are_untouched(store):
+    store.rows = {"MEMORY.md#abc": "keep me"}
+    _embed(store, "\n\n".join(PARAS))
+    assert store.rows["MEMORY.md#abc"] == "keep me"
+
+
+def test_dry_run_counts_without_writing(store):
+    count, _complete = mm._embed_file_chunks(store.cur, {}, "x.md", "\n\n".join(PARAS), dry_run=True)
+    assert count > 0
+    assert store.rows == {} and store.embedded == []
+
+
+def test_manifest_skips_unchanged_and_touched_files(store, tmp_path, monkeypatch):
+    path = tmp_path / "2026-07-05.md"
+    path.write_text("\n\n".join(PARAS), encoding="utf-8")
+    manifest = {}
+
+    assert mm._embed_memory_file(store.cur, {}, path, path.name, manifest) > 0
+    entry = manifest[str(path)]
+    assert entry["size"] == path.stat().st_size and len(entry["sha256"]) == 64
+
+    # Same size + mtime: not even read.
+    store.embedded.clear()
+    assert mm._embed_memory_file(store.cur, {}, path, path.name, manifest) == 0
+
+    # Touched but identical content: hash matches, no chunk diff needed.
+    os.utime(path, ns=(entry["mtime_ns"] + 10**9, entry["mtime_ns"] + 10**9))
+    calls = []
+    monkeypatch.setattr(mm, "_embed_file_chunks", lambda *a, **k: calls.append(a) or (0, True))
+    assert mm._embed_memory_file(store.cur, {}, path, path.name, manifest) == 0
+    assert calls == []
+    assert manifest[str(path)]["mtime_ns"] == entry["mtime_ns"] + 10**9
+
+
+def test_manifest_round_trip(tmp_path):
+    path = str(tmp_path / "state" / "manifest.json")
+    assert mm.load_file_manifest(path) == {}
+    mm.save_file_manifest(path, {"/a.md": {"size": 1}})
+    assert mm.load_file_manifest(path) == {"/a.md": {"size": 1}}
+
+
+def test_failed_chunk_leaves_file_out_of_manifest_and_is_retried(store, tmp_path):
+    path = tmp_path / "2026-07-05.md"
+    path.write_text("\n\n".join(PARAS), encoding="utf-8")
+    manifest = {}
+    cfg = {"batch_size": 1}
+    chunks = mm._chunk_text(path.read_text(encoding="utf-8"))
+    failing = next(c for c in chunks if "Paragraph 2" in c)
+
+    store.fail = "Paragraph 2"
+    assert mm._embed_memory_file(store.cur, cfg, path, path.name, manifest) == len(chunks) - 1
+    assert str(path) not in manifest
+    assert mm._chunk_source_id(path.name, failing) not in store.rows
+
+    store.fail = None
+    store.embedded.clear()
+    assert mm._embed_memory_file(store.cur, cfg, path, path.name, manifest) == 1
+    assert store.embedded == [mm.normalize_embed_text(failing)]
+    assert str(path) in manifest
@@ -0,0 +1,94 @@
+"""Unit tests for the two-stage ANN query plan in proactive-recall.py.
+
+The cursor is mocked, so these tests check the SQL shape and parameters
+rather than results: the candidate stage must order by raw distance with a
+plain LIMIT (the only form the ivfflat index can drive), and re-ranking,
+thresholding must happen outside it, while scope and visibility gating must
+happen inside it so filtered rows never take up candidate slots.
+"""
+
+import importlib.util
+import re
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.modules.setdefault("env_loader", mock.MagicMock())
+sys.modules.setdefault("pg_env", mock.MagicMock())
+
+_RECALL_PATH = Path(__file__).resolve().parent.parent / "scripts" / "proactive-recall.py"
+_spec = importlib.util.spec_from_file_location("proactive_recall_ann", str(_RECALL_PATH))
+proactive_recall = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(proactive_recall)
+proactive_recall._embedding_cache = proactive_recall.EmbeddingCache(path=None)
+
+EMBEDDING = [0.1, 0.2, 0.3]
+
+
+def _candidate_cte(sql):
+    return re.search(r"WITH candidates AS \((.*?)\)\s*SELECT", sql, re.S).group(1)
+
+
+def test_candidate_stage_is_index_shaped():
+    cur = mock.MagicMock()
+    proactive_recall._ann_search(cur, EMBEDDING, 0.4, 10, 4)
+    sql, params = cur.execute.call_args.args
+
+    cte = _candidate_cte(sql)
+    assert re.search(r"ORDER BY distance\s+LIMIT %s", cte)
+    assert "priority" not in cte
+    assert "WHERE" not in cte
+    assert params == (EMBEDDING, 40, 0.4, 10)
+
+
+def test_rerank_orders_by_weighted_score_and_thresholds():
+    cur = mock.MagicMock()
+    proactive_recall._ann_search(cur, EMBEDDING, 0.4, 10, 4)
+    sql = cur.execute.call_args.args[0]
+    outer = sql.split("SELECT", 2)[2]
+    assert "1 - c.distance > %s" in outer
+    assert "ORDER BY weighted_score DESC" in outer
+    assert "entity_facts" not in sql
+
+
+def test_domain_scope_is_applied_in_candidate_stage():
+    cur = mock.MagicMock()
+    proactive_recall._ann_search(
+        cur, EMBEDDING, 0.4, 5, 3,
+        scope_sql="m.source_type = 'agent_domain' AND m.source_id = ANY(%s)",
+        scope_params=(["crypto"],),
+    )
+    sql, params = cur.execute.call_args.args
+    assert "ANY(%s)" in _candidate_cte(sql)
+    assert params == (EMBEDDING, ["crypto"], 15, 0.4, 5)
+
+
+def test_group_visibility_filter_runs_before_the_candidate_limit():
+    cur = mock.MagicMock()
+    proactive_recall._ann_search(
+        cur, EMBEDDING, 0.4, 5, 3,
+        scope_sql="m.source_type = 'agent_domain' AND m.source_id = ANY(%s)",
+        scope_params=(["crypto"],), public_only=True,
+    )
+    sql, params = cur.execute.call_args.args
+    cte = _candidate_cte(sql)
+    assert "ef.visibility = 'public'" in cte and "ANY(%s) AND (m.source_type" in cte
+    assert cte.index("visibility") < cte.index("LIMIT")
+    assert "entity_facts" not in sql.split(cte, 1)[1]
+    assert params == (EMBEDDING, ["crypto"], 15, 0.4, 5)
+
+
+def test_recall_sets_probes_locally_and_passes_overfetch():
+    conn = mock.MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchall.return_value = []
+    with mock.patch.object(proactive_recall, "get_embedding", return_value=EMBEDDING):
+        result = proactive_recall.recall({}, "hi", conn=conn, overfetch=7, probes=25)
+
+    first_sql, first_params = cur.execute.call_args_list[0].args
+    assert "set_config('ivfflat.probes', %s, true)" in first_sql
+    assert first_params == ("25",)
+    search_params = cur.execute.call_args_list[1].args[1]
+    assert search_params[1] == proactive_recall.DEFAULT_MAX_RESULTS * 7
+    assert result["count"] == 0
+    conn.close.assert_not_called()
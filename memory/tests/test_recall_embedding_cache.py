@@ -0,0 +1,95 @@
+"""Unit tests for the query-embedding cache in proactive-recall.py.
+
+Ollama is never contacted: ``fetch_embedding`` is mocked and the disk tier
+lives in a pytest tmp_path.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+sys.modules.setdefault("env_loader", mock.MagicMock())
+sys.modules.setdefault("pg_env", mock.MagicMock())
+
+_RECALL_PATH = Path(__file__).resolve().parent.parent / "scripts" / "proactive-recall.py"
+_spec = importlib.util.spec_from_file_location("proactive_recall_cache", str(_RECALL_PATH))
+proactive_recall = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(proactive_recall)
+
+EmbeddingCache = proactive_recall.EmbeddingCache
+CONFIG = {"model": "snowflake-arctic-embed2", "base_url": "http://x", "dimensions": 3}
+VECTOR = [0.5, -0.25, 0.125]  # exactly representable as float32
+
+
+@pytest.fixture
+def fetch():
+    with mock.patch.object(proactive_recall, "fetch_embedding", return_value=VECTOR) as f:
+        yield f
+
+
+def test_normalization_collapses_whitespace():
+    assert proactive_recall.normalize_query_text("  hello \n\t world ") == "hello world"
+
+
+def test_memory_hit_skips_fetch(fetch):
+    cache = EmbeddingCache(path=None)
+    assert proactive_recall.get_embedding(CONFIG, "hi  there", cache=cache) == VECTOR
+    assert proactive_recall.get_embedding(CONFIG, "hi there", cache=cache) == VECTOR
+    fetch.assert_called_once_with(CONFIG, "hi there")
+    stats = cache.snapshot_stats()
+    assert (stats["memory_hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_key_includes_model(fetch):
+    cache = EmbeddingCache(path=None)
+    proactive_recall.get_embedding(CONFIG, "hi", cache=cache)
+    proactive_recall.get_embedding(dict(CONFIG, model="other"), "hi", cache=cache)
+    assert fetch.call_count == 2
+
+
+def test_disk_tier_survives_restart(tmp_path, fetch):
+    path = str(tmp_path / "cache" / "emb.sqlite")
+    proactive_recall.get_embedding(CONFIG, "persist me", cache=EmbeddingCache(path=path))
+
+    fresh = EmbeddingCache(path=path)
+    assert proactive_recall.get_embedding(CONFIG, "persist me", cache=fresh) == VECTOR
+    assert fetch.call_count == 1
+    assert fresh.snapshot_stats()["disk_hits"] == 1
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = EmbeddingCache(path=None, memory_size=2)
+    for name in ("a", "b"):
+        cache.put(cache.key("m", name), VECTOR)
+    cache.get(cache.key("m", "a"))           # a becomes most recent
+    cache.put(cache.key("m", "c"), VECTOR)   # evicts b
+    assert cache.get(cache.key("m", "b")) is None
+    assert cache.get(cache.key("m", "a")) == VECTOR
+
+
+def test_disk_tier_is_size_bounded(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "emb.sqlite"), memory_size=0, disk_size=10)
+    for i in range(25):
+        cache.put(cache.key("m", str(i)), VECTOR)
+    assert cache.snapshot_stats()["disk_entries"] <= 10
+    assert cache.get(cache.key("m", "24")) == VECTOR
+
+
+def test_bypass_always_fetches(fetch):
+    cache = EmbeddingCache(path=None)
+    proactive_recall.get_embedding(CONFIG, "x", cache=cache, use_cache=False)
+    proactive_recall.get_embedding(CONFIG, "x", cache=cache, use_cache=False)
+    assert fetch.call_count == 2
+    assert cache.snapshot_stats()["misses"] == 0
+
+
+def test_unwritable_disk_tier_degrades_to_memory(tmp_path, fetch):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory")
+    cache = EmbeddingCache(path=str(blocker / "emb.sqlite"))
+    assert cache.snapshot_stats()["disk_entries"] is None
+    assert proactive_recall.get_embedding(CONFIG, "x", cache=cache) == VECTOR
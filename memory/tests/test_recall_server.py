@@ -0,0 +1,200 @@
+"""Unit tests for the resident recall service.
+
+These tests exercise ``memory/scripts/recall-server.py`` and the shared
+request parsing in ``proactive-recall.py``. The connection pool and
+``recall()`` are mocked, so no database or Ollama is required; the socket
+tests run a real server on a temporary Unix socket through the shared
+fixtures in ``conftest.py``.
+"""
+
+import importlib.util
+import json
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+# Stub the centralized env loaders so importing the scripts never touches
+# ~/.openclaw or the live environment.
+sys.modules.setdefault("env_loader", mock.MagicMock())
+sys.modules.setdefault("pg_env", mock.MagicMock())
+
+_SERVER_PATH = Path(__file__).resolve().parent.parent / "scripts" / "recall-server.py"
+_spec = importlib.util.spec_from_file_location("recall_server", str(_SERVER_PATH))
+recall_server = importlib.util.module_from_spec(_spec)
+sys.modules["recall_server"] = recall_server
+_spec.loader.exec_module(recall_server)
+
+proactive_recall = recall_server.proactive_recall
+# Keep the embedding cache in memory only; never touch ~/.openclaw/cache.
+proactive_recall._embedding_cache = proactive_recall.EmbeddingCache(path=None)
+
+CONFIG = {"provider": "ollama", "model": "m", "base_url": "http://x", "dimensions": 3}
+FAKE_RESULT = {
+    "query": "hello",
+    "memories": [{"source": "lesson/1", "content": "c", "similarity": 0.8, "full": True}],
+    "count": 1,
+    "tokens_used": 21,
+    "token_budget": 1000,
+}
+
+
+@pytest.fixture
+def service():
+    with mock.patch.object(recall_server.pg_pool, "ThreadedConnectionPool") as pool_cls:
+        conn = mock.MagicMock()
+        conn.closed = 0
+        pool_cls.return_value.getconn.return_value = conn
+        svc = recall_server.RecallService(CONFIG, pool_size=2)
+        svc._conn = conn
+        yield svc
+
+
+# ---------------------------------------------------------------------------
+# parse_request_payload
+# ---------------------------------------------------------------------------
+
+def test_parse_structured_payload():
+    raw = json.dumps({"content": " hi ", "is_group": 1, "entity_id": 7,
+                      "domain_hints": ["a", 3, "b"]})
+    assert proactive_recall.parse_request_payload(raw) == ("hi", True, 7, ["a", "b"])
+
+
+def test_parse_plain_text_falls_back():
+    assert proactive_recall.parse_request_payload("just text") == ("just text", False, None, None)
+
+
+def test_parse_accepts_dict():
+    assert proactive_recall.parse_request_payload({"content": "x"}) == ("x", False, None, None)
+
+
+# ---------------------------------------------------------------------------
+# RecallService.handle
+# ---------------------------------------------------------------------------
+
+def test_handle_passes_pooled_connection_and_returns_it(service):
+    with mock.patch.object(proactive_recall, "recall", return_value=dict(FAKE_RESULT)) as rec:
+        result = service.handle({"content": "hello", "max_tokens": 500, "domain_hints": ["x"]})
+
+    assert result["count"] == 1
+    kwargs = rec.call_args.kwargs
+    assert kwargs["conn"] is service._conn
+    assert kwargs["token_budget"] == 500
+    assert kwargs["domain_hints"] == ["x"]
+    service._conn.rollback.assert_called_once()
+    service.pool.putconn.assert_called_once_with(service._conn, close=False)
+    assert service.snapshot_stats()["requests"] == 1
+
+
+def test_handle_discards_dead_connection(service):
+    def _die(*args, **kwargs):
+        service._conn.closed = 2
+        return {"error": "server closed the connection", "memories": []}
+
+    with mock.patch.object(proactive_recall, "recall", side_effect=_die):
+        result = service.handle({"content": "hello"})
+
+    assert "error" in result
+    service.pool.putconn.assert_called_once_with(service._conn, close=True)
+    assert service.snapshot_stats()["errors"] == 1
+
+
+def test_handle_inject_adds_formatted_text(service):
+    with mock.patch.object(proactive_recall, "recall", return_value=dict(FAKE_RESULT)):
+        result = service.handle({"content": "hello", "inject": True})
+    assert result["injection"].startswith("## Relevant Memories")
+
+
+def test_handle_empty_content_skips_pool(service):
+    result = service.handle({"content": "   "})
+    assert result == {"error": "empty content", "memories": []}
+    service.pool.getconn.assert_not_called()
+
+
+def test_concurrent_requests_wait_for_a_pooled_connection(service):
+    in_use = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def _recall(*args, **kwargs):
+        with lock:
+            in_use["now"] += 1
+            in_use["max"] = max(in_use["max"], in_use["now"])
+        release.wait(5)
+        with lock:
+            in_use["now"] -= 1
+        return dict(FAKE_RESULT)
+
+    with mock.patch.object(proactive_recall, "recall", side_effect=_recall):
+        threads = [threading.Thread(target=service.handle, args=({"content": "hello"},)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        deadline = time.monotonic() + 2
+        while in_use["now"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        assert service.pool.getconn.call_count == 2  # pool_size=2; the others wait
+        release.set()
+        for t in threads:
+            t.join(5)
+
+    assert in_use["max"] == 2
+    assert service.snapshot_stats()["requests"] == 5
+
+
+def test_ping(service):
+    result = service.handle({"op": "ping"})
+    assert result["ok"] is True
+    assert result["stats"]["requests"] == 0
+    assert "hit_rate" in result["stats"]["embedding_cache"]
+
+
+# ---------------------------------------------------------------------------
+# Socket protocol
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def running_server(serve_unix, service):
+    return serve_unix(recall_server.RecallServer, service, "recall.sock")
+
+
+def test_socket_serves_multiple_requests_per_connection(running_server, roundtrip):
+    with mock.patch.object(proactive_recall, "recall", return_value=dict(FAKE_RESULT)):
+        replies = roundtrip(
+            running_server,
+            json.dumps({"content": "hello"}).encode(),
+            json.dumps({"op": "ping"}).encode(),
+        )
+    assert replies[0]["count"] == 1
+    assert replies[1]["ok"] is True
+
+
+def test_socket_reports_malformed_request(running_server, roundtrip):
+    (reply,) = roundtrip(running_server, b"[1, 2]")
+    assert reply["memories"] == []
+    assert "JSON object" in reply["error"]
+
+
+def test_socket_refuses_oversized_request(running_server, roundtrip):
+    (reply,) = roundtrip(running_server, b"x" * (recall_server.MAX_REQUEST_BYTES + 1))
+    assert reply == {"error": "request too large", "memories": []}
+
+
+def test_prepare_socket_path_removes_stale_socket(tmp_path):
+    stale = tmp_path / "run" / "recall.sock"
+    stale.parent.mkdir()
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.bind(str(stale))
+    s.close()  # bound but nobody listening → stale
+
+    recall_server.socket_server.prepare_socket_path(str(stale), "recall-server")
+    assert not stale.exists()
+
+
+def test_prepare_socket_path_refuses_a_live_socket(running_server):
+    with pytest.raises(SystemExit):
+        recall_server.socket_server.prepare_socket_path(running_server, "recall-server")
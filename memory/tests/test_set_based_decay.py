@@ -0,0 +1,116 @@
+"""Unit tests for set-based confidence decay in memory-maintenance.
+
+Decay runs as one server-side UPDATE per id range instead of fetching rows
+into Python. The connection is faked, so these tests check the chunking,
+the per-chunk commits, the parameters bound to each statement and that the
+commits happen on a connection of decay's own.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+_MAINTENANCE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "memory-maintenance.py"
+)
+_spec = importlib.util.spec_from_file_location("memory_maintenance", str(_MAINTENANCE_PATH))
+_memory_maintenance = importlib.util.module_from_spec(_spec)
+sys.modules["memory_maintenance"] = _memory_maintenance
+_spec.loader.exec_module(_memory_maintenance)
+
+
+def _fake_conn(id_range, rowcount=3, has_updated_at=True):
+    conn = mock.MagicMock()
+    cur = conn.cursor.return_value
+    cur.rowcount = rowcount
+    fetches = []
+    if has_updated_at is not None:
+        fetches.append((1,) if has_updated_at else None)
+    fetches.append(id_range)
+    cur.fetchone.side_effect = fetches + [(rowcount,)] * 10
+    return conn, cur
+
+
+def _decay_statements(cur):
+    return [c.args for c in cur.execute.call_args_list if "confidence" in c.args[0]]
+
+
+def test_table_decay_updates_in_id_chunks(monkeypatch):
+    monkeypatch.setattr(_memory_maintenance, "DECAY_CHUNK_SIZE", 10)
+    conn, cur = _fake_conn((1, 25))
+
+    count = _memory_maintenance.apply_decay_to_table(conn, "lessons", 0.001)
+
+    statements = _decay_statements(cur)
+    assert [params[1:3] for _sql, params in statements] == [(1, 11), (11, 21), (21, 31)]
+    sql, params = statements[0]
+    assert sql.lstrip().startswith("UPDATE lessons t")
+    assert "updated_at = NOW()" in sql
+    assert "abs(d.new_confidence - t.confidence) > 0.001" in sql
+    assert params == (0.001, 1, 11, _memory_maintenance.ARCHIVE_THRESHOLD)
+    assert conn.commit.call_count == 3
+    assert count == 9
+
+
+def test_table_without_updated_at_leaves_it_alone():
+    conn, cur = _fake_conn((1, 2), has_updated_at=False)
+    _memory_maintenance.apply_decay_to_table(conn, "events", 0.001)
+    (sql, _params), = _decay_statements(cur)
+    assert "updated_at" not in sql
+
+
+def test_dry_run_counts_without_writing():
+    conn, cur = _fake_conn((1, 2), rowcount=4)
+    count = _memory_maintenance.apply_decay_to_table(conn, "events", 0.001, dry_run=True)
+    (sql, _params), = _decay_statements(cur)
+    assert "SELECT COUNT(*)" in sql
+    assert "UPDATE" not in sql
+    conn.commit.assert_not_called()
+    assert count == 4
+
+
+def test_entity_fact_decay_binds_rate_table_and_skips_permanent():
+    conn, cur = _fake_conn((5, 6), has_updated_at=None)
+    _memory_maintenance.apply_decay_to_entity_facts(conn)
+    (sql, params), = _decay_statements(cur)
+    assert "durability != 'permanent'" in sql
+    assert "COALESCE(decay_rate::double precision" in sql
+    assert params[0].adapted == _memory_maintenance.DECAY_RATES
+    chunk = _memory_maintenance.DECAY_CHUNK_SIZE
+    assert params[1:] == (5, 5 + chunk, _memory_maintenance.ARCHIVE_THRESHOLD)
+
+
+def test_empty_table_issues_no_update():
+    conn, cur = _fake_conn((None, None))
+    assert _memory_maintenance.apply_decay_to_table(conn, "lessons", 0.001) == 0
+    assert _decay_statements(cur) == []
+
+
+def test_decay_commits_on_its_own_connection(monkeypatch, tmp_path):
+    main_conn = mock.MagicMock()
+    decay_conn, _cur = _fake_conn((1, 2))
+    decay_conn.cursor.return_value.fetchone.side_effect = lambda: (1, 2)
+    monkeypatch.setattr(_memory_maintenance.psycopg2, "connect", lambda dsn: decay_conn)
+    args = SimpleNamespace(state_file=str(tmp_path / "state.json"), force=True, dry_run=False, verbose=False)
+
+    _memory_maintenance.apply_decay(main_conn, args)
+
+    assert decay_conn.commit.call_count == 4  # one chunk per table
+    decay_conn.close.assert_called_once()
+    main_conn.cursor.assert_not_called()
+    main_conn.commit.assert_not_called()
+    assert args._ran_decay
+
+
+def test_dry_run_decay_counts_on_the_callers_connection(monkeypatch, tmp_path):
+    conn, _cur = _fake_conn((1, 2))
+    conn.cursor.return_value.fetchone.side_effect = lambda: (1, 2)
+    monkeypatch.setattr(_memory_maintenance.psycopg2, "connect", mock.Mock(side_effect=AssertionError))
+    args = SimpleNamespace(state_file=str(tmp_path / "state.json"), force=True, dry_run=True, verbose=False)
+
+    _memory_maintenance.apply_decay(conn, args)
+
+    conn.commit.assert_not_called()
+    conn.close.assert_not_called()
@@ -0,0 +1,184 @@
+"""Unit tests for the cross-source text-to-vector cache (migration 093).
+
+``_embed_pipeline()`` looks every batch up in embedding_cache before calling
+Ollama and caches the vectors of its misses; ``seed-domain-embeddings.py``
+shares the same keys. Cursors are faked and ``embed_texts()`` is replaced, so
+no database or Ollama is needed.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from unittest import mock
+
+import psycopg2
+import pytest
+
+sys.modules.setdefault("pg_env", mock.MagicMock())
+
+_TEMPLATES = Path(__file__).resolve().parent.parent / "templates"
+_SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, str(path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_memory_maintenance = _load("memory_maintenance", _TEMPLATES / "memory-maintenance.py")
+seed_domain_embeddings = _load("seed_domain_embeddings", _SCRIPTS / "seed-domain-embeddings.py")
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+class DictCache:
+    """EmbeddingCache stand-in backed by a dict of normalized text -> vector."""
+
+    def __init__(self, vectors=None):
+        self.vectors = dict(vectors or {})
+        self.filled = []
+
+    def lookup(self, texts):
+        return {t: self.vectors[t] for t in texts if t in self.vectors}
+
+    def fill(self, vectors):
+        self.filled.append(dict(vectors))
+        self.vectors.update(vectors)
+
+
+class RecordingEmbed:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, cfg):
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_only_uncached_text_reaches_ollama(monkeypatch, concurrency):
+    embed = RecordingEmbed()
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", embed)
+    cache = DictCache({"Alice": [9.0]})
+    stored = []
+    batches = [
+        [{"id": 1, "text": "Alice"}, {"id": 2, "text": "Bob"}, {"id": 3, "text": " Bob\n"}],
+        [{"id": 4, "text": "Bob"}, {"id": 5, "text": "Carol"}],
+    ]
+
+    total = _memory_maintenance._embed_pipeline(
+        iter(batches), {"concurrency": concurrency, "cache": cache},
+        lambda batch, embeddings: stored.append(([it["id"] for it in batch], embeddings)) or len(batch),
+    )
+
+    assert total == 5
+    assert embed.calls == [["Bob"], ["Carol"]]  # whitespace variants share one key
+    assert stored == [([1, 2, 3], [[9.0], [3.0], [3.0]]), ([4, 5], [[3.0], [5.0]])]
+    assert cache.filled == [{"Bob": [3.0]}, {"Carol": [5.0]}]
+
+
+def test_skipped_texts_are_not_cached(monkeypatch):
+    monkeypatch.setattr(_memory_maintenance, "embed_texts", lambda texts, cfg: [[], [1.0]])
+    cache = DictCache()
+    stored = []
+    _memory_maintenance._embed_pipeline(
+        iter([[{"id": 1, "text": "bad"}, {"id": 2, "text": "good"}]]), {"concurrency": 1, "cache": cache},
+        lambda batch, embeddings: stored.append(embeddings) or len(batch),
+    )
+    assert stored == [[[], [1.0]]]
+    assert cache.filled == [{"good": [1.0]}]
+
+
+# ---------------------------------------------------------------------------
+# EmbeddingCache
+# ---------------------------------------------------------------------------
+
+def _cache_with_rows(rows):
+    conn = mock.MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = rows
+    return _memory_maintenance.EmbeddingCache(conn, "m"), cur
+
+
+def test_lookup_parses_vectors_and_touches_old_entries():
+    h = _memory_maintenance.EmbeddingCache.text_hash
+    cache, cur = _cache_with_rows([(h("a"), "[1,2]", False), (h("b"), "[3,4]", True)])
+
+    assert cache.lookup(["a", "b", "c"]) == {"a": [1, 2], "b": [3, 4]}
+
+    (lookup_sql, lookup_params), (touch_sql, touch_params) = [c.args for c in cur.execute.call_args_list]
+    assert lookup_params == ("m", [h("a"), h("b"), h("c")])
+    assert touch_sql.startswith("UPDATE embedding_cache SET last_used_at") and touch_params == ("m", [h("b")])
+    assert (cache.stats["hits"], cache.stats["misses"]) == (2, 1)
+
+
+def test_fill_inserts_without_overwriting():
+    cache, _cur = _cache_with_rows([])
+    with mock.patch.object(_memory_maintenance.psycopg2.extras, "execute_values") as execute_values:
+        cache.fill({"a": [1.0, 2.0]})
+    _cur_arg, sql, rows = execute_values.call_args.args
+    assert "ON CONFLICT (model, text_hash) DO NOTHING" in sql
+    assert rows == [("m", cache.text_hash("a"), "[1.0, 2.0]")]
+    assert execute_values.call_args.kwargs["template"] == "(%s, %s, %s::vector)"
+
+
+def test_database_error_disables_the_cache_for_the_run():
+    cache, cur = _cache_with_rows([])
+    cur.execute.side_effect = psycopg2.OperationalError("connection lost")
+    assert cache.lookup(["a"]) == {}
+    assert cache.disabled
+    cur.execute.reset_mock()
+    assert cache.lookup(["a"]) == {}
+    cache.fill({"a": [1.0]})
+    cur.execute.assert_not_called()
+
+
+def test_cache_is_off_until_the_migration_is_applied():
+    conn = mock.MagicMock()
+    conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (None,)
+    with mock.patch.object(_memory_maintenance.psycopg2, "connect", return_value=conn):
+        assert _memory_maintenance.open_embedding_cache({"model": "m"}) is None
+    conn.close.assert_called_once()
+
+
+@pytest.mark.parametrize("exists, expected", [(None, 0), ("embedding_cache", 4)])
+def test_purge_skips_a_missing_table(exists, expected):
+    conn = mock.MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchone.return_value = (exists,)
+    cur.rowcount = 4
+    assert _memory_maintenance.purge_unused_embedding_cache(conn) == expected
+    statements = [c.args[0] for c in cur.execute.call_args_list]
+    assert statements[0] == "SELECT to_regclass(%s)"
+    assert len(statements) == (2 if exists else 1)
+
+
+# ---------------------------------------------------------------------------
+# Other writers and schema
+# ---------------------------------------------------------------------------
+
+def test_seed_script_shares_the_cache_keys():
+    text = "Subject matter domain: cooking.  Recipes\nand technique."
+    normalized = seed_domain_embeddings.normalize_embed_text(text)
+    assert normalized == _memory_maintenance.normalize_embed_text(text)
+    assert seed_domain_embeddings.cache_key({"model": "m"}, normalized) == (
+        "m", _memory_maintenance.EmbeddingCache.text_hash(normalized),
+    )
+
+
+def test_schema_and_migration_define_the_same_table():
+    migration = (REPO_ROOT / "memory" / "migrations" / "093_embedding_cache.sql").read_text()
+    schema = (REPO_ROOT / "database" / "schema.sql").read_text()
+    for start in (
+        "CREATE TABLE IF NOT EXISTS embedding_cache",
+        "CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used_at",
+    ):
+        i, j = migration.index(start), schema.index(start)
+        assert migration[i:migration.index(";", i)].split() == schema[j:schema.index(";", j)].split(), start
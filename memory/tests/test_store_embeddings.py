@@ -0,0 +1,98 @@
+"""Unit tests for the bulk binary embedding write path in memory-maintenance.
+
+``_store_embeddings()`` streams rows into a temp staging table with binary
+COPY and then runs one upsert. No database is available here, so the COPY
+stream is decoded in Python against the documented PGCOPY framing and
+pgvector's binary ``vector`` layout.
+"""
+
+import importlib.util
+import struct
+import sys
+from pathlib import Path
+from unittest import mock
+
+_MAINTENANCE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "memory-maintenance.py"
+)
+_spec = importlib.util.spec_from_file_location("memory_maintenance", str(_MAINTENANCE_PATH))
+_memory_maintenance = importlib.util.module_from_spec(_spec)
+sys.modules["memory_maintenance"] = _memory_maintenance
+_spec.loader.exec_module(_memory_maintenance)
+
+
+def _decode_copy(data):
+    """Decode a binary COPY stream of (text, text, text, vector) tuples."""
+    assert data[:11] == b"PGCOPY\n\xff\r\n\x00"
+    flags, ext_len = struct.unpack("!ii", data[11:19])
+    assert (flags, ext_len) == (0, 0)
+    pos = 19
+    rows = []
+    while True:
+        (nfields,) = struct.unpack("!h", data[pos:pos + 2])
+        pos += 2
+        if nfields == -1:
+            break
+        assert nfields == 4
+        fields = []
+        for _ in range(nfields):
+            (length,) = struct.unpack("!i", data[pos:pos + 4])
+            pos += 4
+            fields.append(data[pos:pos + length])
+            pos += length
+        dim, unused = struct.unpack("!hh", fields[3][:4])
+        assert unused == 0
+        vector = list(struct.unpack(f"!{dim}f", fields[3][4:]))
+        rows.append((*(f.decode("utf-8") for f in fields[:3]), vector))
+    assert pos == len(data)
+    return rows
+
+
+def _run_store(items, embeddings):
+    cur = mock.MagicMock()
+    captured = {}
+
+    def _copy(sql, stream):
+        captured["sql"] = sql
+        captured["data"] = stream.read()
+
+    cur.copy_expert.side_effect = _copy
+    written = _memory_maintenance._store_embeddings(cur, "lesson", items, embeddings)
+    return cur, captured, written
+
+
+def test_copy_stream_round_trips():
+    items = [{"id": 1, "text": "first"}, {"id": "x#2", "text": "zweite — ünïcode"}]
+    embeddings = [[0.5, -1.0, 2.25], [0.0, 1.5, -0.125]]
+    _cur, captured, written = _run_store(items, embeddings)
+
+    assert written == 2
+    assert "FORMAT binary" in captured["sql"]
+    assert _decode_copy(captured["data"]) == [
+        ("lesson", "1", "first", [0.5, -1.0, 2.25]),
+        ("lesson", "x#2", "zweite — ünïcode", [0.0, 1.5, -0.125]),
+    ]
+
+
+def test_single_upsert_statement_then_truncate():
+    cur, _captured, _written = _run_store([{"id": 1, "text": "a"}], [[1.0]])
+    statements = [c.args[0] for c in cur.execute.call_args_list]
+    assert "CREATE TEMP TABLE IF NOT EXISTS memory_embeddings_staging" in statements[0]
+    assert "ON COMMIT DELETE ROWS" in statements[0]
+    assert "ON CONFLICT (source_type, source_id) DO UPDATE" in statements[1]
+    assert statements[2].strip() == "TRUNCATE memory_embeddings_staging"
+    assert len(statements) == 3
+
+
+def test_empty_embeddings_skipped_and_duplicates_last_wins():
+    items = [{"id": 1, "text": "old"}, {"id": 2, "text": "none"}, {"id": 1, "text": "new"}]
+    _cur, captured, written = _run_store(items, [[1.0], [], [2.0]])
+    assert written == 1
+    assert _decode_copy(captured["data"]) == [("lesson", "1", "new", [2.0])]
+
+
+def test_nothing_to_write_touches_no_tables():
+    cur, _captured, written = _run_store([{"id": 1, "text": "a"}], [[]])
+    assert written == 0
+    cur.execute.assert_not_called()
+    cur.copy_expert.assert_not_called()
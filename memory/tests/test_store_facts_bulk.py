@@ -0,0 +1,210 @@
+"""Unit tests for the batched fact write path in extract_memories.py.
+
+store_facts_bulk() must reach the same dedup decisions as one-fact-at-a-time
+storage did (exact match, then pg_trgm fuzzy match above 0.85), while
+issuing one prefetch and at most one multi-row INSERT,
+UPDATE and entity_fact_sources upsert. execute_values is patched, so no
+database is required.
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+sys.path.insert(0, os.path.abspath(SCRIPT_DIR))
+
+sys.modules.setdefault("env_loader", MagicMock())
+sys.modules.setdefault("pg_env", MagicMock())
+
+import extract_memories as em  # noqa: E402
+
+EXISTING = [
+    (10, 1, "current_city", "Austin"),
+    (11, 1, "employer", "Rogue Signal Labs"),
+    (12, 2, "current_city", "Denver"),
+]
+
+
+def make_conn(rows=EXISTING):
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = list(rows)
+    return conn, cur
+
+
+def fact(entity_id, key, value, **extra):
+    return dict(entity_id=entity_id, key=key, value=value, **extra)
+
+
+@pytest.fixture
+def execute_values():
+    calls = []
+
+    def _execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False):
+        calls.append((sql, list(argslist), template))
+        if fetch:
+            return [(1000 + i,) for i in range(len(argslist))]
+        return None
+
+    with patch.object(em.psycopg2.extras, "execute_values", side_effect=_execute_values):
+        yield calls
+
+
+def _statement(calls, prefix):
+    matching = [c for c in calls if c[0].lstrip().startswith(prefix)]
+    assert len(matching) <= 1
+    return matching[0] if matching else None
+
+
+# ---------------------------------------------------------------------------
+# trigram_similarity
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("word", "two words", 0.36363637),   # pg_trgm documentation example
+    ("Austin", "austin", 1.0),
+    ("Austin, TX", "austin tx", 1.0),     # punctuation only separates words
+    ("abc", "", 0.0),
+])
+def test_trigram_similarity_matches_pg_trgm(a, b, expected):
+    assert em.trigram_similarity(a, b) == pytest.approx(expected, abs=1e-7)
+
+
+def test_similarity_is_float4_at_the_cutoff():
+    # 17 shared of 20 distinct trigrams: real 0.85 is 0.85000002 > 0.85 in SQL.
+    with patch.object(em, "_trigrams", side_effect=[set(range(17)), set(range(20))]):
+        assert em.trigram_similarity("x", "y") > em.FUZZY_MATCH_THRESHOLD
+
+
+def test_trigrams_pad_each_word():
+    assert em._trigrams("Ab c") == {"  a", " ab", "ab ", "  c", " c "}
+
+
+# ---------------------------------------------------------------------------
+# store_facts_bulk
+# ---------------------------------------------------------------------------
+
+def test_empty_batch_issues_no_statements():
+    conn, cur = make_conn()
+    assert em.store_facts_bulk([], 5, conn) == []
+    conn.cursor.assert_not_called()
+
+
+def test_prefetch_is_one_query_for_all_entities_and_keys(execute_values):
+    conn, cur = make_conn()
+    em.store_facts_bulk(
+        [fact(2, "Current_City", "Boulder"), fact(1, "employer", "Rogue Signal Labs")], None, conn
+    )
+    cur.execute.assert_called_once()
+    sql, params = cur.execute.call_args.args
+    assert "entity_id = ANY(%s) AND LOWER(key) = ANY(%s)" in sql
+    assert params == ([1, 2], ["current_city", "employer"])
+
+
+def test_exact_fuzzy_and_new_facts(execute_values):
+    conn, cur = make_conn()
+    actions = em.store_facts_bulk(
+        [
+            fact(1, "Current_City", "AUSTIN"),               # exact, case-insensitive
+            fact(1, "employer", "Rogue Signal Labs."),       # fuzzy
+            fact(2, "employer", "Rogue Signal Labs"),        # other entity: new
+            fact(1, "favorite_food", "tacos", expires="2026-12-01"),
+        ],
+        5,
+        conn,
+        src_channel_transcript_id="42",
+        src_channel_session_id="",
+    )
+
+    assert actions == ["reinforced", "reinforced", "created", "created"]
+
+    _, rows, template = _statement(execute_values, "INSERT INTO entity_facts")
+    assert rows == [
+        (2, "employer", "Rogue Signal Labs", "public", "long_term", "observation", None, None, 42, None),
+        (1, "favorite_food", "tacos", "public", "long_term", "observation", None, "2026-12-01", 42, None),
+    ]
+    assert "::timestamptz" in template
+
+    sql, rows, _ = _statement(execute_values, "UPDATE entity_facts")
+    assert sorted(rows) == [(10, 1, 42, None), (11, 1, 42, None)]
+    assert "COALESCE(f.source_channel_transcript_id, v.transcript_id)" in sql
+
+    _, rows, _ = _statement(execute_values, "INSERT INTO entity_fact_sources")
+    assert sorted(rows) == [
+        (10, 5, None, 1), (11, 5, None, 1), (1000, 5, None, 1), (1001, 5, None, 1),
+    ]
+
+
+def test_repeats_within_batch_reinforce_the_earlier_fact(execute_values):
+    conn, cur = make_conn([])
+    actions = em.store_facts_bulk(
+        [
+            fact(3, "pet", "a dog named Biscuit", source_citation="first"),
+            fact(3, "pet", "A dog named Biscuit", source_citation="second"),
+            fact(3, "pet", "a dog named biscuit!"),
+        ],
+        5,
+        conn,
+    )
+
+    assert actions == ["created", "reinforced", "reinforced"]
+    _, rows, _ = _statement(execute_values, "INSERT INTO entity_facts")
+    assert len(rows) == 1
+    _, rows, _ = _statement(execute_values, "UPDATE entity_facts")
+    assert rows == [(1000, 2, None, None)]
+    # One upsert row carrying all three attributions; first citation wins,
+    # as it would when the row is inserted and then bumped twice.
+    _, rows, _ = _statement(execute_values, "INSERT INTO entity_fact_sources")
+    assert rows == [(1000, 5, "first", 3)]
+
+
+def test_below_threshold_is_a_new_fact(execute_values):
+    conn, cur = make_conn()
+    actions = em.store_facts_bulk([fact(1, "current_city", "Austin Texas")], None, conn)
+    assert actions == ["created"]
+    assert _statement(execute_values, "UPDATE entity_facts") is None
+    assert _statement(execute_values, "INSERT INTO entity_fact_sources") is None
+
+
+def test_best_fuzzy_match_wins_and_ties_go_to_oldest(execute_values):
+    rows = [
+        (20, 1, "hobby", "woodworking and welding"),
+        (21, 1, "hobby", "woodworking & welding"),
+        (22, 1, "hobby", "woodworking and welding!"),
+    ]
+    conn, cur = make_conn(rows)
+    em.store_facts_bulk([fact(1, "hobby", "woodworking, and welding")], None, conn)
+    _, update_rows, _ = _statement(execute_values, "UPDATE entity_facts")
+    assert update_rows == [(20, 1, None, None)]
+
+
+# ---------------------------------------------------------------------------
+# store_extracted integration
+# ---------------------------------------------------------------------------
+
+def test_store_extracted_writes_facts_in_one_bulk_call():
+    conn = MagicMock()
+    data = {
+        "facts": [
+            {"subject": "Alice", "key": "current_city", "value": "Austin"},
+            {"subject": "Alice", "key": "phone", "value": "+15125550199", "visibility": "public"},
+            {"subject": "Bob", "key": "employer", "value": None},
+        ],
+    }
+    with patch.object(em, "resolve_source_entity_id", return_value=5), \
+            patch.object(em, "find_entity_id", return_value=1), \
+            patch.object(em, "store_facts_bulk", return_value=["created", "reinforced"]) as bulk:
+        em.store_extracted(data, "Alice", "", "", "", "42", "", conn)
+
+    bulk.assert_called_once()
+    facts, source_entity_id, _ = bulk.call_args.args
+    assert source_entity_id == 5
+    assert [(f["entity_id"], f["key"], f["visibility"]) for f in facts] == [
+        (1, "current_city", "public"),
+        (1, "phone", "private"),
+    ]
+    assert bulk.call_args.kwargs["src_channel_transcript_id"] == "42"
+    conn.commit.assert_called_once()
@@ -0,0 +1,253 @@
+"""Unit tests for the streaming transcript catch-up ingester.
+
+These tests exercise ``memory/scripts/transcript-catchup.py`` against real
+JSONL files in a temporary agents directory. The database is mocked:
+``execute_values()`` is patched to capture the channel_transcripts rows, so
+the tests can check that each run parses only the lines appended since the
+recorded byte offset.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+# Stub the centralized env loaders so importing the scripts never touches
+# ~/.openclaw or the live environment.
+sys.modules.setdefault("env_loader", mock.MagicMock())
+sys.modules.setdefault("pg_env", mock.MagicMock())
+
+_CATCHUP_PATH = Path(__file__).resolve().parent.parent / "scripts" / "transcript-catchup.py"
+_spec = importlib.util.spec_from_file_location("transcript_catchup", str(_CATCHUP_PATH))
+transcript_catchup = importlib.util.module_from_spec(_spec)
+sys.modules["transcript_catchup"] = transcript_catchup
+_spec.loader.exec_module(transcript_catchup)
+
+extract_memories = transcript_catchup.extract_memories
+
+
+def message(n, role="user", text=None, **extra):
+    entry = {"type": "message", "id": f"m{n}", "timestamp": f"2026-10-17T00:00:{n:02d}.000Z",
+             "message": {"role": role, "content": [{"type": "text", "text": text or f"message number {n}"}]}}
+    entry.update(extra)
+    return json.dumps(entry) + "\n"
+
+
+@pytest.fixture
+def agents(tmp_path):
+    sessions = tmp_path / "agents" / "main" / "sessions"
+    sessions.mkdir(parents=True)
+    return tmp_path
+
+
+@pytest.fixture
+def db():
+    """Mocked connection; ``db.batches`` collects the transcript rows of each insert."""
+    conn = mock.MagicMock()
+    conn.batches = []
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = (7,)  # channel_sessions id
+
+    def execute_values(cur, sql, rows, **kwargs):
+        conn.batches.append(rows)
+        return [(r[1], 100 + len(conn.batches) * 10 + i) for i, r in enumerate(rows)]
+
+    with mock.patch.object(transcript_catchup.psycopg2.extras, "execute_values", side_effect=execute_values):
+        yield conn
+
+
+def _run(agents, conn, **kwargs):
+    state_path = str(agents / "state.json")
+    state = transcript_catchup.load_state(state_path)
+    files = transcript_catchup.transcript_files(str(agents / "agents"))
+    totals = transcript_catchup.run(conn, state, files, state_path=state_path, **kwargs)
+    return totals, transcript_catchup.load_state(state_path)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def test_partial_trailing_line_waits_for_the_next_run(tmp_path):
+    path = tmp_path / "s.jsonl"
+    path.write_text(message(1) + '{"type": "mess')
+    lines, offset = transcript_catchup.read_new_lines(str(path), 0)
+    assert len(lines) == 1 and offset == len(message(1))
+
+
+def test_max_bytes_bounds_a_run_but_always_progresses(tmp_path):
+    path = tmp_path / "s.jsonl"
+    path.write_text(message(1) + message(2) + message(3))
+    lines, offset = transcript_catchup.read_new_lines(str(path), 0, max_bytes=1)
+    assert len(lines) == 1
+    lines, offset = transcript_catchup.read_new_lines(str(path), offset, max_bytes=10 ** 6)
+    assert len(lines) == 2 and offset == path.stat().st_size
+
+
+@pytest.mark.parametrize("chat_id, provider, chat_type", [
+    ("channel:123", "discord", "group"),
+    ("group:abc", "signal", "group"),
+    ("+15125550199", "signal", "direct"),
+    ("other", "openclaw", "direct"),
+])
+def test_session_fields_follow_memory_catchup_rules(chat_id, provider, chat_type):
+    entries = [{"timestamp": "t0"}, {"chat_id": chat_id, "is_group_chat": chat_type == "group",
+                                     "group_subject": "Book club"}]
+    fields = transcript_catchup.session_fields("/x/agents/nova/sessions/abc.jsonl", entries)
+    assert (fields["provider"], fields["chat_type"], fields["agent_id"]) == (provider, chat_type, "nova")
+    assert fields["external_chat_id"] == fields["session_key"] == chat_id
+    assert fields["started_at"] == "t0"
+
+
+def test_session_without_chat_id_uses_the_file_stem():
+    fields = transcript_catchup.session_fields("/x/agents/main/sessions/abc.jsonl", [])
+    assert (fields["provider"], fields["external_chat_id"], fields["title"]) == ("openclaw", "abc", None)
+
+
+def test_fallback_ids_stay_stable_across_runs():
+    entries = [json.loads(message(n)) for n in (1, 2, 3)]
+    for e in entries:
+        del e["id"]
+    whole, _ = transcript_catchup.transcript_rows(entries, 0)
+    first, seq = transcript_catchup.transcript_rows(entries[:2], 0)
+    rest, _ = transcript_catchup.transcript_rows(entries[2:], seq)
+    assert [r["external_message_id"] for r in whole] == [r["external_message_id"] for r in first + rest]
+    assert whole[2]["external_message_id"] == "2026-10-17T00:00:03.000Z_2"
+
+
+def test_oversized_message_keeps_valid_raw_metadata():
+    long_text = "x" * (transcript_catchup.CONTENT_MAX + 1000)
+    rows, _ = transcript_catchup.transcript_rows([json.loads(message(1, text=long_text))], 0)
+    raw = rows[0]["raw_metadata"]
+    assert len(raw) <= transcript_catchup.CONTENT_MAX
+    meta = json.loads(raw)
+    assert meta["truncated"] is True and meta["id"] == "m1"
+    assert len(rows[0]["content"]) == transcript_catchup.CONTENT_MAX
+
+
+def test_oversized_non_message_fields_fall_back_to_a_stub():
+    entry = json.loads(message(1))
+    entry["tool_output"] = "y" * (transcript_catchup.CONTENT_MAX + 1)
+    meta = json.loads(transcript_catchup.raw_metadata(entry))
+    assert meta == {"type": "message", "id": "m1", "timestamp": entry["timestamp"], "truncated": True}
+
+
+# ---------------------------------------------------------------------------
+# Runs
+# ---------------------------------------------------------------------------
+
+def test_each_run_parses_only_appended_lines(agents, db):
+    path = agents / "agents" / "main" / "sessions" / "abc.jsonl"
+    path.write_text(message(1) + message(2) + '{"type": "tool"}\n')
+    totals, state = _run(agents, db)
+    assert totals["messages"] == 2
+    assert [r[1] for r in db.batches[0]] == ["m1", "m2"]
+    assert state["files"][str(path)]["offset"] == path.stat().st_size
+    assert state["files"][str(path)]["session_id"] == 7
+
+    with open(path, "a") as f:
+        f.write(message(3))
+    totals, state = _run(agents, db)
+    assert [r[1] for r in db.batches[1]] == ["m3"]
+    assert state["files"][str(path)]["messages"] == 3
+
+    totals, _ = _run(agents, db)  # nothing new: no read, no insert
+    assert totals["files"] == 0 and len(db.batches) == 2
+
+
+def test_every_session_file_is_ingested(agents, db):
+    for agent, name in (("main", "a"), ("main", "b"), ("nova", "c")):
+        sessions = agents / "agents" / agent / "sessions"
+        sessions.mkdir(parents=True, exist_ok=True)
+        (sessions / f"{name}.jsonl").write_text(message(1))
+    totals, state = _run(agents, db)
+    assert totals["files"] == 3 and len(state["files"]) == 3
+
+
+def test_rotated_file_is_read_from_the_start(agents, db):
+    path = agents / "agents" / "main" / "sessions" / "abc.jsonl"
+    path.write_text(message(1) + message(2))
+    _run(agents, db)
+    replacement = path.with_suffix(".new")
+    replacement.write_text(message(9))
+    os.replace(replacement, path)
+    _, state = _run(agents, db)
+    assert [r[1] for r in db.batches[-1]] == ["m9"]
+    assert state["files"][str(path)]["offset"] == len(message(9))
+
+
+def test_vanished_files_are_dropped_from_state(agents, db):
+    path = agents / "agents" / "main" / "sessions" / "abc.jsonl"
+    path.write_text(message(1))
+    _run(agents, db)
+    path.unlink()
+    _, state = _run(agents, db)
+    assert state["files"] == {}
+
+
+def test_failed_file_keeps_its_offset(agents, db):
+    path = agents / "agents" / "main" / "sessions" / "abc.jsonl"
+    path.write_text(message(1))
+    db.cursor.return_value.__enter__.return_value.fetchone.side_effect = Exception("db down")
+    totals, state = _run(agents, db)
+    assert totals["errors"] == 1 and state["files"] == {}
+    db.rollback.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+def test_new_messages_are_extracted_and_failures_dead_lettered(agents, db):
+    path = agents / "agents" / "main" / "sessions" / "abc.jsonl"
+    path.write_text(
+        message(1, text="I moved to Austin last month.", sender="Alice")
+        + message(2, role="assistant", text="Noted, welcome to Austin!")
+        + message(3, text="ok")
+        + message(4, role="toolResult", text="exit status 0 from the build")
+    )
+    extracted = {"facts": [{"subject": "Alice", "key": "current_city", "value": "Austin"}]}
+    with mock.patch.object(extract_memories, "TRIAGE_ENABLED", False), \
+            mock.patch.object(extract_memories, "extract_batch",
+                              return_value=[extracted, RuntimeError("LLM API call failed: HTTP 400")]) as batch, \
+            mock.patch.object(extract_memories, "store_extracted") as store:
+        totals, _ = _run(agents, db, extract=("key", "m"))
+
+    messages = batch.call_args.args[0]
+    assert [(m["sender_name"], m["text"]) for m in messages] == [
+        ("Alice", "I moved to Austin last month."), ("main", "Noted, welcome to Austin!"),
+    ]
+    assert store.call_args.kwargs["src_channel_transcript_id"] == "110"
+    assert store.call_args.kwargs["src_channel_session_id"] == "7"
+    assert (totals["extracted"], totals["extract_failed"]) == (1, 1)
+
+    cur = db.cursor.return_value.__enter__.return_value
+    sql, params = cur.execute.call_args.args
+    assert "INSERT INTO extraction_failures" in sql
+    assert params[0] == 111 and params[-1] == "nonzero_exit"
+
+
+def test_extraction_interrupted_after_the_checkpoint_is_retried(agents, db):
+    path = agents / "agents" / "main" / "sessions" / "abc.jsonl"
+    path.write_text(message(1, text="I moved to Austin last month.", sender="Alice"))
+    with mock.patch.object(extract_memories, "TRIAGE_ENABLED", False), \
+            mock.patch.object(extract_memories, "extract_batch", side_effect=KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            _run(agents, db, extract=("key", "m"))
+
+    state = transcript_catchup.load_state(str(agents / "state.json"))
+    entry = state["files"][str(path)]
+    assert entry["offset"] == path.stat().st_size
+    assert [j["transcript_id"] for j in entry["pending"]] == [110]
+
+    with mock.patch.object(extract_memories, "TRIAGE_ENABLED", False), \
+            mock.patch.object(extract_memories, "extract_batch", return_value=[{"facts": []}]) as batch, \
+            mock.patch.object(extract_memories, "store_extracted"):
+        totals, state = _run(agents, db, extract=("key", "m"))
+    assert [m["text"] for m in batch.call_args.args[0]] == ["I moved to Austin last month."]
+    assert totals["extracted"] == 1 and len(db.batches) == 1
+    assert "pending" not in state["files"][str(path)]
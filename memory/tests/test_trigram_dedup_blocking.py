@@ -0,0 +1,87 @@
+"""Unit tests for trigram candidate blocking in memory-maintenance dedup.
+
+``merge_duplicates()`` and ``phase_dedup_lessons()`` gate their self-joins
+with the pg_trgm ``%`` operator so the planner can use a gin_trgm_ops index.
+The cursor is faked, so these tests check the query shape and that tiering
+of the returned pairs is unchanged.
+"""
+
+import importlib.util
+import re
+import sys
+from pathlib import Path
+from unittest import mock
+
+_MAINTENANCE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "memory-maintenance.py"
+)
+_spec = importlib.util.spec_from_file_location("memory_maintenance", str(_MAINTENANCE_PATH))
+_memory_maintenance = importlib.util.module_from_spec(_spec)
+sys.modules["memory_maintenance"] = _memory_maintenance
+_spec.loader.exec_module(_memory_maintenance)
+
+
+def _pair(id1, id2, sim, conf1=0.9, conf2=0.5):
+    return {
+        "id1": id1, "id2": id2, "entity_id": 1, "key": "city",
+        "value1": f"v{id1}", "value2": f"v{id2}",
+        "conf1": conf1, "conf2": conf2, "date1": None, "date2": None,
+        "sim": sim,
+    }
+
+
+def _executed(cur):
+    return [c.args for c in cur.execute.call_args_list]
+
+
+def test_fact_dedup_sets_threshold_before_blocked_join():
+    conn = mock.MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchall.return_value = []
+
+    _memory_maintenance.merge_duplicates(conn, dry_run=True)
+
+    (set_sql, set_params), (sql, params) = _executed(cur)
+    assert "set_config('pg_trgm.similarity_threshold', %s, true)" in set_sql
+    assert set_params == ("0.5",)
+    assert re.search(r"LOWER\(f2\.value\) %% LOWER\(f1\.value\)", sql)
+    assert "similarity(LOWER(f1.value), LOWER(f2.value)) >= %s" in sql
+    assert params == (0.50,)
+
+
+def test_fact_dedup_tiers_unchanged(monkeypatch):
+    conn = mock.MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchall.return_value = [_pair(1, 2, 0.91), _pair(2, 3, 0.85), _pair(4, 5, 0.60)]
+    monkeypatch.setattr(_memory_maintenance, "write_dedup_report", lambda *a, **k: None)
+
+    result = _memory_maintenance.merge_duplicates(conn, dry_run=True)
+
+    assert result["high_merges"] == 1  # (2, 3) skipped: 2 was absorbed
+    assert result["modified_ids"] == {1}
+    assert [(c["id1"], c["id2"]) for c in result["medium_candidates"]] == [(4, 5)]
+
+
+def test_lesson_near_dups_use_blocked_join():
+    conn = mock.MagicMock()
+    cur = conn.cursor.return_value
+    cur.fetchall.return_value = []
+
+    _memory_maintenance.phase_dedup_lessons(conn, dry_run=True)
+
+    statements = _executed(cur)
+    set_sql, set_params = statements[1]
+    assert "pg_trgm.similarity_threshold" in set_sql
+    assert set_params == ("0.8",)
+    sql, params = statements[2]
+    assert "l2.lesson %% l1.lesson" in sql
+    assert "similarity(l1.lesson, l2.lesson) >= %s" in sql
+    assert params == (0.80,)
+
+
+def test_lesson_trigram_index_ships_as_a_migration():
+    repo_root = Path(__file__).resolve().parents[2]
+    migration = (repo_root / "memory" / "migrations" / "094_lessons_lesson_trgm.sql").read_text()
+    schema = (repo_root / "database" / "schema.sql").read_text()
+    statement = re.compile(r"CREATE INDEX IF NOT EXISTS idx_lessons_lesson_trgm [^;]*;")
+    assert statement.search(migration).group(0) == statement.search(schema).group(0)
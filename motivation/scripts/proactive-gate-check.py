@@ -4,6 +4,7 @@ proactive-gate-check.py — Deterministic gate checker for NOVA's proactive casc
 
 Checks all 11 cascade step gates without LLM involvement. Outputs a structured
 JSON manifest so the heartbeat agent can work only on actionable steps.
+Steps 1-10 run concurrently under per-step deadlines; step 11 runs last.
 
 Exit code is always 0. Per-step errors are embedded in JSON output.
 
@@ -14,9 +15,11 @@ import json
 import os
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable
 
 # ---------------------------------------------------------------------------
 # Venv bootstrap — add nova venv site-packages so psycopg2 is importable
@@ -105,6 +108,16 @@ BLOCKERS_PER_MESSAGE = 3
 # D100 forced-roll threshold (issue #358)
 D100_FORCED_COOLDOWN_H = 12
 
+# Per-step deadlines for the concurrent gate executor. A step that overruns
+# is reported as an error and left to finish in its daemon thread.
+STEP_DEADLINE_S = float(os.environ.get("GATE_STEP_DEADLINE_S", "20"))
+STEP_DEADLINES_S = {
+    "7_github": float(os.environ.get("GATE_GITHUB_DEADLINE_S", "45")),
+}
+
+# Concurrent `gh issue list` calls in step 7
+GITHUB_ISSUE_WORKERS = 8
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -631,11 +644,7 @@ def check_step7_github_issues() -> dict:
     if not repos:
         return {"actionable": False, "reason": "No repos found in NOVA-Openclaw"}
 
-    total_issues = 0
-    per_repo: dict[str, int] = {}
-    errors: list[str] = []
-
-    for repo in repos:
+    def _count_open_issues(repo: str) -> tuple[int, str | None]:
         try:
             result = subprocess.run(
                 [
@@ -650,17 +659,28 @@ def check_step7_github_issues() -> dict:
                 timeout=20,
             )
             if result.returncode != 0:
-                errors.append(f"{repo}: {result.stderr[:100]}")
-                continue
+                return 0, f"{repo}: {result.stderr[:100]}"
             count_str = result.stdout.strip()
-            count = int(count_str) if count_str else 0
-            if count > 0:
-                per_repo[repo] = count
-                total_issues += count
+            return (int(count_str) if count_str else 0), None
         except subprocess.TimeoutExpired:
-            errors.append(f"{repo}: timed out")
+            return 0, f"{repo}: timed out"
         except (ValueError, TypeError) as exc:
-            errors.append(f"{repo}: parse error {exc}")
+            return 0, f"{repo}: parse error {exc}"
+
+    # One gh call per repo, fanned out; results are folded in repo order.
+    with ThreadPoolExecutor(max_workers=min(GITHUB_ISSUE_WORKERS, len(repos))) as pool:
+        counts = list(pool.map(_count_open_issues, repos))
+
+    total_issues = 0
+    per_repo: dict[str, int] = {}
+    errors: list[str] = []
+
+    for repo, (count, error) in zip(repos, counts):
+        if error:
+            errors.append(error)
+        elif count > 0:
+            per_repo[repo] = count
+            total_issues += count
 
     result_dict: dict[str, Any] = {
         "total": total_issues,
@@ -1245,6 +1265,58 @@ def check_step11_d100(prior_actionable_count: int) -> dict:
     }
 
 
+# ---------------------------------------------------------------------------
+# Concurrent executor
+# ---------------------------------------------------------------------------
+
+def _run_steps(
+    checks: list[tuple[str, Callable[[], dict]]],
+) -> tuple[dict[str, dict], dict[str, float]]:
+    """
+    Run independent gate checks concurrently, each bounded by its deadline.
+
+    Every check gets its own daemon thread and its deadline from
+    STEP_DEADLINES_S (default STEP_DEADLINE_S), measured from a common start,
+    so total latency is bounded by the slowest step rather than their sum.
+    A check that overruns or raises is reported via _step_error(); a result
+    that lands before the executor stops waiting is kept.
+
+    Returns (results, elapsed_ms), both keyed and ordered like ``checks``.
+    """
+    finished: dict[str, tuple[dict, float]] = {}
+
+    def _worker(key: str, fn: Callable[[], dict]) -> None:
+        started = time.monotonic()
+        try:
+            outcome = fn()
+        except Exception as exc:
+            outcome = _step_error(f"Unhandled error: {exc}")
+        finished[key] = (outcome, round((time.monotonic() - started) * 1000, 1))
+
+    started = time.monotonic()
+    threads = []
+    for key, fn in checks:
+        thread = threading.Thread(target=_worker, args=(key, fn), name=f"gate-{key}", daemon=True)
+        thread.start()
+        threads.append((key, thread))
+
+    for key, thread in threads:
+        deadline = STEP_DEADLINES_S.get(key, STEP_DEADLINE_S)
+        thread.join(max(0.0, started + deadline - time.monotonic()))
+
+    results: dict[str, dict] = {}
+    elapsed_ms: dict[str, float] = {}
+    for key, _fn in checks:
+        done = finished.get(key)
+        if done is None:
+            deadline = STEP_DEADLINES_S.get(key, STEP_DEADLINE_S)
+            results[key] = _step_error(f"Timed out after {deadline:g}s")
+            elapsed_ms[key] = round(deadline * 1000, 1)
+        else:
+            results[key], elapsed_ms[key] = done
+    return results, elapsed_ms
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -1271,23 +1343,27 @@ def main() -> None:
         print(json.dumps(base, indent=2))
         return
 
-    # 2. Run all 11 gate checks
-    steps: dict[str, dict] = {}
-
-    steps["1_agent_chat"] = check_step1_agent_chat()
-    steps["2_unanswered"] = check_step2_unanswered_sessions()
-    steps["3_introspect"] = check_step3_introspection()
-    steps["4_memory"] = check_step4_memory_maintenance()
-    steps["5_entities"] = check_step5_entity_dedup()
-    steps["6_tasks"] = check_step6_pending_tasks()
-    steps["7_github"] = check_step7_github_issues()
-    steps["8_blocker_outreach"] = check_step8_blocker_outreach()
-    steps["9_research"] = check_step9_unsolved_problems()
-    steps["10_filesystem"] = check_step10_filesystem_hygiene()
+    checks_started = time.monotonic()
+
+    # 2. Run gate checks 1-10 concurrently; step 11 depends on their outcome
+    steps, step_elapsed_ms = _run_steps([
+        ("1_agent_chat", check_step1_agent_chat),
+        ("2_unanswered", check_step2_unanswered_sessions),
+        ("3_introspect", check_step3_introspection),
+        ("4_memory", check_step4_memory_maintenance),
+        ("5_entities", check_step5_entity_dedup),
+        ("6_tasks", check_step6_pending_tasks),
+        ("7_github", check_step7_github_issues),
+        ("8_blocker_outreach", check_step8_blocker_outreach),
+        ("9_research", check_step9_unsolved_problems),
+        ("10_filesystem", check_step10_filesystem_hygiene),
+    ])
 
     # Count actionable steps 1-10 (excluding step 11)
     prior_actionable = [k for k, v in steps.items() if k != "11_d100" and v.get("actionable")]
+    d100_started = time.monotonic()
     steps["11_d100"] = check_step11_d100(len(prior_actionable))
+    step_elapsed_ms["11_d100"] = round((time.monotonic() - d100_started) * 1000, 1)
 
     # Collect final actionable step numbers
     actionable_steps: list[int] = []
@@ -1307,6 +1383,8 @@ def main() -> None:
         "actionable_steps": actionable_steps,
         "actionable_count": actionable_count,
         "summary": f"{actionable_count} of 11 steps actionable",
+        "step_elapsed_ms": step_elapsed_ms,
+        "elapsed_ms": round((time.monotonic() - checks_started) * 1000, 1),
     }
 
     print(json.dumps(output, indent=2))
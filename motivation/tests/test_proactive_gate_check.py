@@ -1637,6 +1637,72 @@ class TestStep11D100:
         assert result["actionable"] is True
 
 
+# ---------------------------------------------------------------------------
+# Concurrent executor
+# ---------------------------------------------------------------------------
+
+class TestRunSteps:
+    def test_steps_run_concurrently(self, m):
+        def slow():
+            time.sleep(0.2)
+            return {"actionable": True, "reason": "slow"}
+
+        started = time.monotonic()
+        results, elapsed = m._run_steps([("1_a", slow), ("2_b", slow), ("3_c", slow)])
+        assert time.monotonic() - started < 0.5
+        assert all(r["actionable"] for r in results.values())
+        assert all(ms >= 150 for ms in elapsed.values())
+
+    def test_preserves_step_order(self, m):
+        def delayed(value, delay):
+            def check():
+                time.sleep(delay)
+                return {"actionable": False, "reason": value}
+            return check
+
+        results, elapsed = m._run_steps([
+            ("1_first", delayed("a", 0.1)),
+            ("2_second", delayed("b", 0.0)),
+        ])
+        assert list(results) == ["1_first", "2_second"]
+        assert list(elapsed) == ["1_first", "2_second"]
+
+    def test_overrunning_step_reports_timeout(self, m):
+        def hang():
+            time.sleep(1.0)
+            return {"actionable": True}
+
+        with patch.object(m, "STEP_DEADLINE_S", 0.1):
+            results, elapsed = m._run_steps([
+                ("1_fast", lambda: {"actionable": True, "reason": "ok"}),
+                ("2_hang", hang),
+            ])
+        assert results["1_fast"]["actionable"] is True
+        assert results["2_hang"]["actionable"] is False
+        assert "Timed out" in results["2_hang"]["error"]
+        assert elapsed["2_hang"] == 100.0
+
+    def test_per_step_deadline_override(self, m):
+        def sleeper(delay):
+            def check():
+                time.sleep(delay)
+                return {"actionable": True, "reason": "done"}
+            return check
+
+        with patch.object(m, "STEP_DEADLINE_S", 0.05), \
+             patch.object(m, "STEP_DEADLINES_S", {"7_github": 0.5}):
+            results, _ = m._run_steps([("7_github", sleeper(0.1)), ("6_tasks", sleeper(1.0))])
+        assert results["7_github"]["actionable"] is True
+        assert "error" in results["6_tasks"]
+
+    def test_raising_step_becomes_error(self, m):
+        def boom():
+            raise RuntimeError("kaboom")
+
+        results, _ = m._run_steps([("1_boom", boom)])
+        assert results["1_boom"] == {"actionable": False, "error": "Unhandled error: kaboom"}
+
+
 # ---------------------------------------------------------------------------
 # Output format validation
 # ---------------------------------------------------------------------------
@@ -1721,6 +1787,12 @@ class TestOutputFormat:
         output = self._run_main(m, idle=True)
         assert "of 11 steps actionable" in output["summary"]
 
+    def test_reports_per_step_elapsed_time(self, m):
+        output = self._run_main(m, idle=True)
+        assert list(output["step_elapsed_ms"]) == list(output["steps"])
+        assert all(isinstance(v, float) for v in output["step_elapsed_ms"].values())
+        assert isinstance(output["elapsed_ms"], float)
+
     def test_output_is_valid_json(self, m):
         """main() must print valid JSON — no exceptions."""
         import io